@@ -0,0 +1,151 @@
+"""
+Benchmark für AI/local_inference_server.py (oder jeden OpenAI-kompatiblen Endpunkt).
+
+Schickt für jede Nebenläufigkeitsstufe --requests gestreamte Anfragen mit dem
+Finanz-System-Prompt und misst pro Anfrage Time-to-first-token, Gesamtlatenz und
+Tokens (= SSE-Chunks), sowie den Gesamtdurchsatz in Tokens/Sekunde.
+
+Usage:
+    python AI/benchmark_local_inference.py --url http://127.0.0.1:8800/chat/completions --concurrency 1,4,8
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+# Derselbe System-Prompt wie im Backend, damit der Präfix-Cache des Servers greift
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from buy_high_backend.utils.ai import FINANCE_SYSTEM_PROMPT as SYSTEM_PROMPT
+except Exception:
+    SYSTEM_PROMPT = (
+        "You are a financial analysis assistant. Provide accurate and helpful information "
+        "only on finance-related topics. Keep responses concise, data-driven, and educational."
+    )
+PROMPTS = [
+    "What is diversification?",
+    "Explain the P/E ratio.",
+    "What is the difference between a stock and a bond?",
+    "How does compound interest work?",
+    "What is an ETF?",
+    "What does market capitalization mean?",
+]
+
+
+def run_request(url, prompt, max_tokens):
+    """Eine gestreamte Anfrage; gibt (ttft_s, latency_s, tokens) zurück."""
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=300)
+    body = json.dumps({
+        "messages": [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}],
+        "stream": True,
+        "max_tokens": max_tokens,
+        "temperature": 0.0,
+    })
+    started = time.perf_counter()
+    ttft = None
+    tokens = 0
+    try:
+        conn.request("POST", parsed.path, body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}: {response.read()[:200]!r}")
+        while True:
+            line = response.readline()
+            if not line:
+                break
+            line = line.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            if (choices[0].get("delta") or {}).get("content"):
+                tokens += 1
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+    finally:
+        conn.close()
+    return ttft, time.perf_counter() - started, tokens
+
+
+def run_level(url, concurrency, total_requests, max_tokens):
+    results, errors = [], []
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def worker():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            try:
+                result = run_request(url, PROMPTS[index % len(PROMPTS)], max_tokens)
+                with lock:
+                    results.append(result)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    return results, errors, wall
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark für den lokalen Inferenz-Server")
+    parser.add_argument("--url", default="http://127.0.0.1:8800/chat/completions")
+    parser.add_argument("--concurrency", default="1,4,8", help="Kommagetrennte Nebenläufigkeitsstufen")
+    parser.add_argument("--requests", type=int, default=16, help="Anfragen pro Stufe")
+    parser.add_argument("--max-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{'conc':>4} {'ok':>4} {'err':>4} {'ttft p50':>9} {'ttft p95':>9} {'lat p50':>8} {'lat p95':>8} "
+          f"{'tok/s req':>9} {'tok/s total':>11}")
+    for concurrency in [int(c) for c in args.concurrency.split(",") if c]:
+        results, errors, wall = run_level(args.url, concurrency, args.requests, args.max_tokens)
+        ttfts = [r[0] for r in results if r[0] is not None]
+        latencies = [r[1] for r in results]
+        per_request = [r[2] / r[1] for r in results if r[1] > 0]
+        total_tokens = sum(r[2] for r in results)
+        print(f"{concurrency:>4} {len(results):>4} {len(errors):>4} "
+              f"{percentile(ttfts, 50) * 1000:>7.0f}ms {percentile(ttfts, 95) * 1000:>7.0f}ms "
+              f"{percentile(latencies, 50):>7.2f}s {percentile(latencies, 95):>7.2f}s "
+              f"{statistics.mean(per_request) if per_request else 0:>9.1f} {total_tokens / wall:>11.1f}")
+        if errors:
+            print(f"     Fehler (Beispiel): {errors[0]}")
+
+    # Server-Metriken (Batchgröße, Präfix-Cache-Treffer), falls der Endpunkt sie anbietet
+    parsed = urlparse(args.url)
+    try:
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=5)
+        conn.request("GET", "/metrics")
+        response = conn.getresponse()
+        if response.status == 200:
+            print(json.dumps(json.loads(response.read()), indent=2))
+        conn.close()
+    except (OSError, ValueError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
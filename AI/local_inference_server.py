@@ -0,0 +1,578 @@
+"""
+Lokaler Inferenz-Server (nur CPU) für den Finanz-Chatbot.
+
+Lädt ein Modell einmalig über ModelStreamer.load_quantized_model (standardmäßig
+dynamisch int8-quantisiert) und stellt eine OpenAI-kompatible
+POST /chat/completions Schnittstelle bereit (mit und ohne "stream": true).
+Damit ist der Server ein direkter Ersatz für die externe API in
+buy_high_backend/utils/ai.py:
+
+    python AI/local_inference_server.py --model Qwen/Qwen2.5-0.5B-Instruct --port 8800
+    export AI_CHAT_COMPLETIONS_URL=http://127.0.0.1:8800/chat/completions
+
+Optimierungen:
+- Dynamisches Batching: Anfragen, die innerhalb von --batch-wait-ms eintreffen und
+  denselben System-Prompt haben, werden gemeinsam dekodiert (bis --max-batch-size).
+  Fertige Sequenzen werden aus dem Batch entfernt.
+- Token-Streaming: jeder dekodierte Token wird sofort als SSE-Chunk gesendet.
+- KV-Cache für den Prompt-Präfix: der KV-Cache des (geteilten) System-Prompts wird
+  einmal berechnet und für jede Anfrage wiederverwendet (LRU, --prefix-cache-size).
+- Thread-Tuning: --threads (Standard: physische Kerne) bzw. --tune-threads misst
+  mehrere Thread-Anzahlen und wählt die schnellste.
+
+Benchmark: AI/benchmark_local_inference.py
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psutil
+import torch
+
+from stream_and_quantize_model import ModelStreamer
+
+try:
+    from transformers import DynamicCache
+except ImportError:  # ältere transformers-Versionen nutzen Tupel als KV-Cache
+    DynamicCache = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_NEW_TOKENS = 256
+METRICS_WINDOW = 1000
+
+
+class GenerationRequest:
+    """Eine Chat-Anfrage; der Scheduler schreibt Text-Deltas in `output` (None = Ende)."""
+
+    def __init__(self, messages, max_new_tokens, temperature, top_p):
+        self.id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        self.created = int(time.time())
+        self.messages = messages
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.top_p = top_p
+        self.prefix_text = ""
+        self.suffix_text = ""
+        self.output = queue.Queue()
+        self.cancelled = threading.Event()
+        self.enqueued_at = time.perf_counter()
+        self.first_token_at = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.finish_reason = None
+        self.error = None
+
+
+class LocalInferenceEngine:
+    """Batching-Scheduler und Dekodier-Schleife um ein Causal-LM."""
+
+    def __init__(self, model, tokenizer, max_batch_size=8, batch_wait_ms=10,
+                 prefix_cache_size=4, max_input_tokens=1024, max_queue=64):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.batch_wait = batch_wait_ms / 1000
+        self.prefix_cache_size = prefix_cache_size
+        self.max_input_tokens = max_input_tokens
+        self.use_chat_template = bool(getattr(tokenizer, "chat_template", None))
+
+        eos = getattr(model.generation_config, "eos_token_id", None) or tokenizer.eos_token_id
+        self.eos_ids = set(eos if isinstance(eos, (list, tuple)) else [eos])
+        self.pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._deferred = deque()          # Anfragen mit anderem Präfix als der aktuelle Batch
+        self._prefix_cache = OrderedDict()  # prefix_text -> (Anzahl Tokens, legacy KV-Tupel)
+        self._prefix_lock = threading.Lock()
+        self._worker = None
+        self.metrics = {
+            "requests": 0, "rejected": 0, "cancelled": 0, "failed": 0,
+            "batches": 0, "batched_requests": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "decode_seconds": 0.0,
+            "prefix_cache_hits": 0, "prefix_cache_misses": 0,
+        }
+        self._ttft_ms = deque(maxlen=METRICS_WINDOW)
+
+    # --- Prompt-Aufbau und Präfix-Cache ---
+
+    def split_prompt(self, messages):
+        """Teilt den Prompt in (Präfix = System-Prompt, Rest) für den KV-Präfix-Cache."""
+        system = [m for m in messages if m.get("role") == "system"]
+        if self.use_chat_template:
+            full = self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+            if system:
+                prefix = self.tokenizer.apply_chat_template(system[:1], tokenize=False)
+                if full.startswith(prefix) and len(prefix) < len(full):
+                    return prefix, full[len(prefix):]
+            return "", full
+        prefix = "".join(f"{m['content']}\n\n" for m in system)
+        turns = "".join(
+            f"{'User' if m.get('role') == 'user' else 'Assistant'}: {m.get('content', '')}\n"
+            for m in messages if m.get("role") != "system"
+        )
+        return prefix, turns + "Assistant:"
+
+    def _encode(self, text, is_start):
+        # Chat-Templates enthalten die Spezial-Tokens bereits selbst
+        add_special = is_start and not self.use_chat_template
+        return self.tokenizer(text, add_special_tokens=add_special).input_ids
+
+    def _get_prefix(self, prefix_text):
+        """Liefert (Anzahl Tokens, legacy KV-Cache) des Präfixes, berechnet ihn höchstens einmal."""
+        if not prefix_text:
+            return 0, None
+        with self._prefix_lock:
+            cached = self._prefix_cache.get(prefix_text)
+            if cached is not None:
+                self._prefix_cache.move_to_end(prefix_text)
+                self.metrics["prefix_cache_hits"] += 1
+                return cached
+        ids = torch.tensor([self._encode(prefix_text, is_start=True)], dtype=torch.long)
+        with torch.inference_mode():
+            past = self.model(input_ids=ids, use_cache=True).past_key_values
+        if hasattr(past, "to_legacy_cache"):
+            past = past.to_legacy_cache()
+        entry = (ids.shape[1], tuple((k, v) for k, v in past))
+        with self._prefix_lock:
+            self.metrics["prefix_cache_misses"] += 1
+            self._prefix_cache[prefix_text] = entry
+            while len(self._prefix_cache) > self.prefix_cache_size:
+                self._prefix_cache.popitem(last=False)
+        return entry
+
+    def warm_prefix(self, system_prompt):
+        """Berechnet den KV-Cache eines System-Prompts vorab (z.B. beim Start)."""
+        prefix, _ = self.split_prompt([{"role": "system", "content": system_prompt},
+                                       {"role": "user", "content": "Hi"}])
+        self._get_prefix(prefix)
+
+    @staticmethod
+    def _to_cache(legacy):
+        if legacy is None:
+            return None
+        return DynamicCache.from_legacy_cache(legacy) if DynamicCache is not None else legacy
+
+    @staticmethod
+    def _select_rows(past, rows):
+        """Entfernt fertige Sequenzen aus dem KV-Cache (None, falls nicht unterstützt)."""
+        index = torch.tensor(rows, dtype=torch.long)
+        if hasattr(past, "batch_select_indices"):
+            past.batch_select_indices(index)
+            return past
+        if isinstance(past, tuple):
+            return tuple((k.index_select(0, index), v.index_select(0, index)) for k, v in past)
+        return None
+
+    # --- Dekodierung ---
+
+    def _sample(self, logits, batch):
+        greedy = logits.argmax(dim=-1)
+        temperatures = torch.tensor([r.temperature for r in batch], dtype=logits.dtype)
+        if bool((temperatures <= 0).all()):
+            return greedy
+        probs = torch.softmax(logits / temperatures.clamp(min=1e-5).unsqueeze(-1), dim=-1)
+        sorted_probs, sorted_ids = probs.sort(dim=-1, descending=True)
+        top_p = torch.tensor([r.top_p for r in batch], dtype=logits.dtype).unsqueeze(-1)
+        sorted_probs[(sorted_probs.cumsum(dim=-1) - sorted_probs) > top_p] = 0
+        sampled = sorted_ids.gather(-1, torch.multinomial(sorted_probs, 1)).squeeze(-1)
+        return torch.where(temperatures <= 0, greedy, sampled)
+
+    def _emit(self, request, tokens, emitted):
+        """Dekodiert inkrementell und gibt den neuen Text zurück (unvollständige UTF-8-Zeichen werden zurückgehalten)."""
+        text = self.tokenizer.decode(tokens, skip_special_tokens=True)
+        if text.endswith("�"):
+            return emitted
+        if len(text) > len(emitted):
+            if request.first_token_at is None:
+                request.first_token_at = time.perf_counter()
+                self._ttft_ms.append((request.first_token_at - request.enqueued_at) * 1000)
+            request.output.put(text[len(emitted):])
+        return text
+
+    def _finish(self, request, reason):
+        request.finish_reason = reason
+        if reason == "cancelled":
+            self.metrics["cancelled"] += 1
+        self.metrics["completion_tokens"] += request.completion_tokens
+        request.output.put(None)
+
+    def _run_batch(self, batch):
+        prefix_len, prefix_kv = self._get_prefix(batch[0].prefix_text)
+        suffixes = []
+        for r in batch:
+            ids = self._encode(r.suffix_text, is_start=prefix_len == 0)[-self.max_input_tokens:]
+            r.prompt_tokens = prefix_len + len(ids)
+            self.metrics["prompt_tokens"] += r.prompt_tokens
+            suffixes.append(ids)
+
+        size, width = len(batch), max(len(s) for s in suffixes)
+        # Layout je Zeile: [Präfix][Padding][Suffix]; das Padding wird über die Attention-Maske ausgeblendet
+        input_ids = torch.full((size, width), self.pad_id, dtype=torch.long)
+        attention = torch.zeros((size, prefix_len + width), dtype=torch.long)
+        attention[:, :prefix_len] = 1
+        for i, ids in enumerate(suffixes):
+            input_ids[i, width - len(ids):] = torch.tensor(ids, dtype=torch.long)
+            attention[i, prefix_len + width - len(ids):] = 1
+        position_ids = (attention.cumsum(dim=-1) - 1).clamp(min=0)[:, prefix_len:]
+        past = None
+        if prefix_kv is not None:
+            past = self._to_cache(tuple((k.repeat(size, 1, 1, 1), v.repeat(size, 1, 1, 1)) for k, v in prefix_kv))
+
+        rows = list(range(size))             # Zeile im Tensor -> Index in batch (None = fertig, nur Padding)
+        tokens = [[] for _ in batch]
+        emitted = [""] * size
+        started = time.perf_counter()
+        with torch.inference_mode():
+            while True:
+                out = self.model(input_ids=input_ids, attention_mask=attention, position_ids=position_ids,
+                                 past_key_values=past, use_cache=True)
+                past = out.past_key_values
+                next_tokens = self._sample(out.logits[:, -1, :].float(),
+                                           [batch[i if i is not None else 0] for i in rows])
+
+                for row, i in enumerate(rows):
+                    if i is None:
+                        continue
+                    request = batch[i]
+                    token = int(next_tokens[row])
+                    if request.cancelled.is_set():
+                        self._finish(request, "cancelled")
+                    elif token in self.eos_ids:
+                        self._finish(request, "stop")
+                    else:
+                        tokens[i].append(token)
+                        request.completion_tokens += 1
+                        emitted[i] = self._emit(request, tokens[i], emitted[i])
+                        if request.completion_tokens < request.max_new_tokens:
+                            continue
+                        self._finish(request, "length")
+                    rows[row] = None
+
+                live = [row for row, i in enumerate(rows) if i is not None]
+                if not live:
+                    break
+                if len(live) < len(rows):
+                    compacted = self._select_rows(past, live)
+                    if compacted is not None:
+                        index = torch.tensor(live, dtype=torch.long)
+                        past = compacted
+                        next_tokens = next_tokens.index_select(0, index)
+                        attention = attention.index_select(0, index)
+                        position_ids = position_ids.index_select(0, index)
+                        rows = [rows[row] for row in live]
+                    else:
+                        # Cache kann nicht verkleinert werden: fertige Zeilen laufen mit Padding weiter
+                        next_tokens = next_tokens.clone()
+                        for row, i in enumerate(rows):
+                            if i is None:
+                                next_tokens[row] = self.pad_id
+
+                input_ids = next_tokens.unsqueeze(-1)
+                attention = torch.cat([attention, torch.ones((attention.shape[0], 1), dtype=torch.long)], dim=1)
+                position_ids = position_ids[:, -1:] + 1
+        self.metrics["decode_seconds"] += time.perf_counter() - started
+
+    def _next_batch(self):
+        while True:
+            try:
+                self._deferred.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        first = self._deferred.popleft() if self._deferred else self._queue.get()
+        batch = [first]
+        for request in list(self._deferred):
+            if len(batch) >= self.max_batch_size:
+                break
+            if request.prefix_text == first.prefix_text:
+                self._deferred.remove(request)
+                batch.append(request)
+
+        deadline = time.perf_counter() + self.batch_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request.prefix_text == first.prefix_text:
+                batch.append(request)
+            else:
+                self._deferred.append(request)
+        return batch
+
+    def _scheduler_loop(self):
+        while True:
+            batch = []
+            for request in self._next_batch():
+                if request.cancelled.is_set():
+                    self._finish(request, "cancelled")
+                else:
+                    batch.append(request)
+            if not batch:
+                continue
+            self.metrics["batches"] += 1
+            self.metrics["batched_requests"] += len(batch)
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                logger.error(f"Fehler bei der Batch-Inferenz: {e}", exc_info=True)
+                for request in batch:
+                    if request.finish_reason is None:
+                        self.metrics["failed"] += 1
+                        request.error = str(e)
+                        request.finish_reason = "error"
+                        request.output.put(None)
+
+    def start(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._scheduler_loop, name="inference-scheduler", daemon=True)
+            self._worker.start()
+
+    def submit(self, messages, max_new_tokens=DEFAULT_MAX_NEW_TOKENS, temperature=0.7, top_p=1.0):
+        """Reiht eine Anfrage ein; gibt None zurück, wenn die Warteschlange voll ist."""
+        request = GenerationRequest(messages, max_new_tokens, temperature, top_p)
+        request.prefix_text, request.suffix_text = self.split_prompt(messages)
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            self.metrics["rejected"] += 1
+            return None
+        self.metrics["requests"] += 1
+        return request
+
+    def get_metrics(self):
+        ttft = sorted(self._ttft_ms)
+        pct = lambda p: round(ttft[min(len(ttft) - 1, int(p / 100 * (len(ttft) - 1) + 0.5))], 1) if ttft else None
+        decode = self.metrics["decode_seconds"]
+        return {
+            **self.metrics,
+            "avg_batch_size": round(self.metrics["batched_requests"] / self.metrics["batches"], 2) if self.metrics["batches"] else None,
+            "tokens_per_second": round(self.metrics["completion_tokens"] / decode, 1) if decode else None,
+            "ttft_ms": {"p50": pct(50), "p95": pct(95), "samples": len(ttft)},
+            "queue_depth": self._queue.qsize() + len(self._deferred),
+            "threads": torch.get_num_threads(),
+        }
+
+
+# --- Thread-Tuning ---
+
+def configure_threads(num_threads):
+    torch.set_num_threads(num_threads)
+    try:
+        # Ein Inter-Op-Thread reicht für die sequentielle Dekodierung
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # kann nur vor der ersten parallelen Operation gesetzt werden
+
+
+def tune_threads(engine, candidates, new_tokens=16):
+    """Misst Tokens/Sekunde für jede Thread-Anzahl mit einem vollen Batch und setzt die schnellste."""
+    messages = [{"role": "user", "content": "Explain what a diversified portfolio is."}]
+    prefix, suffix = engine.split_prompt(messages)
+    results = {}
+    for threads in candidates:
+        torch.set_num_threads(threads)
+        batch = []
+        for _ in range(engine.max_batch_size):
+            request = GenerationRequest(messages, new_tokens, 0.0, 1.0)
+            request.prefix_text, request.suffix_text = prefix, suffix
+            batch.append(request)
+        started = time.perf_counter()
+        engine._run_batch(batch)
+        elapsed = time.perf_counter() - started
+        results[threads] = sum(r.completion_tokens for r in batch) / elapsed
+        logger.info(f"Threads {threads}: {results[threads]:.1f} Tokens/s")
+    best = max(results, key=results.get)
+    torch.set_num_threads(best)
+    logger.info(f"Verwende {best} Threads")
+    return best
+
+
+# --- HTTP-Schnittstelle (OpenAI-kompatibel) ---
+
+def make_handler(engine, model_name):
+    class InferenceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def _send_json(self, status, data):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/health":
+                self._send_json(200, {"status": "ok", "model": model_name})
+            elif path == "/metrics":
+                self._send_json(200, engine.get_metrics())
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            if self.path.rstrip("/") not in ("/chat/completions", "/v1/chat/completions"):
+                self.send_error(404)
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                messages = payload["messages"]
+            except (ValueError, KeyError):
+                self._send_json(400, {"error": {"message": "Invalid request: 'messages' is required"}})
+                return
+
+            request = engine.submit(
+                messages,
+                max_new_tokens=int(payload.get("max_tokens") or DEFAULT_MAX_NEW_TOKENS),
+                temperature=float(payload.get("temperature", 0.7)),
+                top_p=float(payload.get("top_p", 1.0)),
+            )
+            if request is None:
+                self._send_json(503, {"error": {"message": "Server overloaded, try again later"}})
+                return
+            if payload.get("stream"):
+                self._stream(request)
+            else:
+                self._complete(request)
+
+        def _complete(self, request):
+            chunks = []
+            while True:
+                delta = request.output.get()
+                if delta is None:
+                    break
+                chunks.append(delta)
+            if request.error:
+                self._send_json(500, {"error": {"message": request.error}})
+                return
+            self._send_json(200, {
+                "id": request.id,
+                "object": "chat.completion",
+                "created": request.created,
+                "model": model_name,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(chunks)},
+                             "finish_reason": request.finish_reason}],
+                "usage": {"prompt_tokens": request.prompt_tokens, "completion_tokens": request.completion_tokens,
+                          "total_tokens": request.prompt_tokens + request.completion_tokens},
+            })
+
+        def _chunk(self, request, delta=None, finish_reason=None):
+            return {
+                "id": request.id, "object": "chat.completion.chunk", "created": request.created, "model": model_name,
+                "choices": [{"index": 0, "delta": {"content": delta} if delta is not None else {},
+                             "finish_reason": finish_reason}],
+            }
+
+        def _stream(self, request):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                while True:
+                    delta = request.output.get()
+                    if delta is None:
+                        break
+                    self._write_chunk(f"data: {json.dumps(self._chunk(request, delta))}\n\n")
+                if request.error:
+                    self._write_chunk(f"data: {json.dumps({'error': {'message': request.error}})}\n\n")
+                else:
+                    self._write_chunk(f"data: {json.dumps(self._chunk(request, finish_reason=request.finish_reason))}\n\n")
+                self._write_chunk("data: [DONE]\n\n")
+                self._write_chunk("")
+            except (BrokenPipeError, ConnectionResetError):
+                # Client weg: Sequenz beim nächsten Dekodierschritt aus dem Batch nehmen
+                request.cancelled.set()
+
+        def _write_chunk(self, text):
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return InferenceHandler
+
+
+def _finance_system_prompt():
+    """System-Prompt des Backends, damit sein KV-Cache schon beim Start vorliegt."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        from buy_high_backend.utils.ai import FINANCE_SYSTEM_PROMPT
+        return FINANCE_SYSTEM_PROMPT
+    except Exception as e:
+        logger.warning(f"Finanz-System-Prompt konnte nicht geladen werden: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler CPU-Inferenz-Server (OpenAI-kompatibel)")
+    parser.add_argument("--model", default="Qwen/Qwen2.5-0.5B-Instruct")
+    parser.add_argument("--quantization", default="int8-dynamic", choices=["int8-dynamic", "none"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--batch-wait-ms", type=float, default=10.0, help="Wartezeit zum Sammeln eines Batches")
+    parser.add_argument("--prefix-cache-size", type=int, default=4)
+    parser.add_argument("--max-input-tokens", type=int, default=1024)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=psutil.cpu_count(logical=False) or os.cpu_count())
+    parser.add_argument("--tune-threads", action="store_true", help="Thread-Anzahl beim Start ausmessen")
+    parser.add_argument("--cache-dir", default="./model_cache")
+    args = parser.parse_args()
+
+    configure_threads(args.threads)
+    streamer = ModelStreamer(cache_dir=args.cache_dir)
+    model, tokenizer = streamer.load_quantized_model(
+        model_name=args.model,
+        quantization_type=args.quantization,
+        device_map="cpu"
+    )
+    engine = LocalInferenceEngine(
+        model, tokenizer,
+        max_batch_size=args.max_batch_size,
+        batch_wait_ms=args.batch_wait_ms,
+        prefix_cache_size=args.prefix_cache_size,
+        max_input_tokens=args.max_input_tokens,
+        max_queue=args.max_queue,
+    )
+
+    if args.tune_threads:
+        logical = os.cpu_count() or args.threads
+        candidates = sorted({n for n in (1, 2, 4, 8, 16, args.threads, logical) if n <= logical})
+        tune_threads(engine, candidates)
+
+    system_prompt = _finance_system_prompt()
+    if system_prompt:
+        engine.warm_prefix(system_prompt)
+        logger.info("KV-Cache für den Finanz-System-Prompt vorberechnet")
+
+    engine.start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(engine, args.model))
+    server.daemon_threads = True
+    logger.info(f"Inferenz-Server läuft auf http://{args.host}:{args.port}/chat/completions "
+                f"(Threads: {torch.get_num_threads()}, Speicher: {streamer.get_memory_usage():.2f} GB)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Server durch Benutzer beendet")
+
+
+if __name__ == "__main__":
+    main()
@@ -59,7 +59,7 @@ class ModelStreamer:
     def load_quantized_model(
         self,
         model_name: str,
-        quantization_type: str = "8bit",  # "8bit", "4bit", "none"
+        quantization_type: str = "8bit",  # "8bit", "4bit", "int8-dynamic" (CPU), "none"
         device_map: str = "auto",
         max_memory: dict = None,
         use_auth_token: str = None
@@ -88,6 +88,12 @@ class ModelStreamer:
                 bnb_4bit_use_double_quant=True,
             )
             logger.info("Verwende 4-bit Quantisierung mit NF4")
+
+        elif quantization_type == "int8-dynamic":
+            # bitsandbytes benötigt eine GPU; auf der CPU werden stattdessen die
+            # Linear-Layer nach dem Laden dynamisch nach int8 quantisiert
+            device_map = "cpu"
+            logger.info("Verwende dynamische int8 Quantisierung (CPU)")
         
         try:
             # Tokenizer laden
@@ -104,13 +110,17 @@ class ModelStreamer:
                 load_in_8bit=load_in_8bit,
                 device_map=device_map,
                 max_memory=max_memory,
-                torch_dtype=torch.float16 if quantization_type != "none" else torch.float32,
+                torch_dtype=torch.float16 if quantization_type not in ("none", "int8-dynamic") else torch.float32,
                 cache_dir=str(self.cache_dir),
                 token=use_auth_token,
                 low_cpu_mem_usage=True,  # Reduziert CPU Memory Usage
                 trust_remote_code=True
             )
             
+            if quantization_type == "int8-dynamic":
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            model.eval()
+
             logger.info(f"Modell geladen! Speicher nach Laden: {self.get_memory_usage():.2f} GB")
             
             # Garbage Collection
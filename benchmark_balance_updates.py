@@ -0,0 +1,143 @@
+"""
+Concurrency benchmark for balance updates (gambling routes, trades).
+
+Many threads credit +1 to the same test user at the same time; afterwards the
+final balance shows how many updates were lost. Compared paths:
+
+- legacy: read-modify-write (get_user_by_id + update_user_balance with an
+  absolute value, as the gambling routes used to do)
+- direct: the single guarded UPDATE from every thread; correct, but all threads
+  queue on the row lock of the user and each pays its own commit
+- queued: postgres_balance_handler.apply_balance_delta; commands of one user are
+  serialised in process and coalesced into one transaction while they pile up
+
+With --users N the queued path additionally runs on N users in parallel.
+
+Needs the database from .env (POSTGRES_*). A temporary user is created and
+deleted again.
+
+Usage:
+    python benchmark_balance_updates.py
+    python benchmark_balance_updates.py --threads 32 --spins 100 --users 8
+"""
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import database.handler.postgres.postgres_db_handler as db_handler
+import database.handler.postgres.postgres_balance_handler as balance_handler
+from database.handler.postgres.postgres_pool import LazyConnectionPool
+
+START_BALANCE = 10000.0
+
+
+def legacy_spin(user_id):
+    user = db_handler.get_user_by_id(user_id)
+    return db_handler.update_user_balance(user_id, user['balance'] + 1)
+
+
+def make_direct_spin(pool):
+    def direct_spin(user_id):
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE users SET balance = balance + %s WHERE id = %s AND balance >= %s RETURNING balance",
+                    (1, user_id, 0)
+                )
+                ok = cur.fetchone() is not None
+            conn.commit()
+            return ok
+        finally:
+            pool.putconn(conn)
+    return direct_spin
+
+
+def queued_spin(user_id):
+    return balance_handler.apply_balance_delta(user_id, 1)["success"]
+
+
+def create_test_user():
+    name = f"bench_balance_{uuid.uuid4().hex[:8]}"
+    conn = db_handler.get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO users (username, email, balance) VALUES (%s, %s, %s) RETURNING id",
+                (name, f"{name}@example.invalid", START_BALANCE)
+            )
+            user_id = cur.fetchone()[0]
+        conn.commit()
+        return user_id
+    finally:
+        conn.close()
+
+
+def reset_balance(user_id):
+    db_handler.update_user_balance(user_id, START_BALANCE)
+
+
+def delete_test_user(user_id):
+    conn = db_handler.get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run(name, spin, user_ids, threads, spins):
+    for user_id in user_ids:
+        reset_balance(user_id)
+    total = threads * spins
+    batches_before = balance_handler.get_queue_stats()['batches']
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda i: spin(user_ids[i % len(user_ids)]), range(total)))
+    elapsed = time.perf_counter() - started
+    final = sum(db_handler.get_user_by_id(user_id)['balance'] for user_id in user_ids)
+    applied = sum(1 for ok in results if ok)
+    lost = applied - round(final - START_BALANCE * len(user_ids))
+    line = (f"{name:<10} {total:>6} spins  {total / elapsed:>8.0f} spins/s  "
+            f"{elapsed * 1000 / total:>6.2f} ms/spin  lost updates: {lost}")
+    batches = balance_handler.get_queue_stats()['batches'] - batches_before
+    if batches:
+        line += f"  transactions: {batches} ({total / batches:.1f} spins each)"
+    print(line)
+    return lost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--spins", type=int, default=50, help="spins per thread")
+    parser.add_argument("--users", type=int, default=1, help="users for the additional parallel queued run")
+    args = parser.parse_args()
+
+    user_ids = [create_test_user() for _ in range(max(args.users, 1))]
+    direct_pool = LazyConnectionPool(1, args.threads,
+        host=balance_handler.PG_HOST, port=balance_handler.PG_PORT, dbname=balance_handler.PG_DB,
+        user=balance_handler.PG_USER, password=balance_handler.PG_PASSWORD
+    )
+    try:
+        print(f"{args.threads} threads x {args.spins} spins on one user (id {user_ids[0]})")
+        legacy_lost = run("legacy", legacy_spin, user_ids[:1], args.threads, args.spins)
+        direct_lost = run("direct", make_direct_spin(direct_pool), user_ids[:1], args.threads, args.spins)
+        queued_lost = run("queued", queued_spin, user_ids[:1], args.threads, args.spins)
+        if len(user_ids) > 1:
+            print(f"{args.threads} threads x {args.spins} spins on {len(user_ids)} users")
+            queued_lost += run("queued", queued_spin, user_ids, args.threads, args.spins)
+    finally:
+        for user_id in user_ids:
+            delete_test_user(user_id)
+        direct_pool.closeall()
+        balance_handler.connection_pool.closeall()
+    if direct_lost or queued_lost:
+        raise SystemExit(f"FAIL: updates lost (direct {direct_lost}, queued {queued_lost})")
+    print(f"OK: no lost updates with the guarded statement or the queue (legacy path lost {legacy_lost})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark for chart downsampling (utils/downsample.py) in /stock-data.
+
+Builds the long ranges /stock-data serves: 'ALL' (five years of daily bars)
+and '1MIN' (two days of 1-minute bars, extended hours), and compares the
+previous response path (iterrows, one StockDataPoint per bar, JSON) with the
+new one at chart width (frame_to_points after LTTB or OHLC buckets, JSON). It
+reports points, payload size and time. It also checks that OHLC buckets keep
+the extremes and the last close, that LTTB keeps the first and last point, and
+shows weekly and monthly resampling of the daily bars.
+
+No database or network is needed.
+
+Usage:
+    python benchmark_chart_downsampling.py
+    python benchmark_chart_downsampling.py --max-points 300
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import utils.downsample as downsample
+from buy_high_backend.pydantic_models import StockDataPoint
+
+
+def make_frame(index, rng):
+    close = 150 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+    spread = np.abs(rng.normal(0, 0.005, len(index))) * close
+    open_ = close * (1 + rng.normal(0, 0.003, len(index)))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) + spread,
+        "Low": np.minimum(open_, close) - spread,
+        "Close": close,
+        "Volume": rng.integers(10_000, 1_000_000, len(index)),
+    }, index=index)
+
+
+def previous_path(df):
+    """The former /stock-data conversion: iterrows and one pydantic model per bar."""
+    data = []
+    for index, row in df.iterrows():
+        open_price = float(row['Open']) if pd.notna(row['Open']) else None
+        high_price = float(row['High']) if pd.notna(row['High']) else None
+        low_price = float(row['Low']) if pd.notna(row['Low']) else None
+        close_price = float(row['Close']) if pd.notna(row['Close']) else None
+        volume = int(row['Volume']) if pd.notna(row['Volume']) else None
+        data.append(StockDataPoint(date=index.strftime('%Y-%m-%dT%H:%M:%S'), open=open_price, high=high_price,
+                                   low=low_price, close=close_price, volume=volume, currency='USD'))
+    return json.dumps([point.model_dump() for point in data])
+
+
+def new_path(df, max_points, chart):
+    points = downsample.frame_to_points(downsample.downsample(df, max_points, chart))
+    return json.dumps([StockDataPoint(**point).model_dump() for point in points])
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-points", type=int, default=300, help="roughly the chart width in pixels / 2")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ranges = {
+        "ALL (5y daily)": make_frame(pd.bdate_range(end="2026-10-16", periods=5 * 252), rng),
+        "1MIN (2 days, 4:00-20:00)": make_frame(pd.DatetimeIndex(
+            [t for day in ("2026-10-15", "2026-10-16")
+             for t in pd.date_range(f"{day} 04:00", f"{day} 19:59", freq="1min")]), rng),
+    }
+
+    for name, df in ranges.items():
+        before, before_ms = timed(lambda: previous_path(df))
+        print(f"{name}: {len(df):,} bars, {len(before) / 1024:,.0f} KiB in {before_ms:.1f} ms before")
+        for chart in downsample.CHART_TYPES:
+            after, after_ms = timed(lambda: new_path(df, args.max_points, chart))
+            print(f"  max_points={args.max_points} chart={chart:6s}: {len(json.loads(after)):,} points, "
+                  f"{len(after) / 1024:,.0f} KiB in {after_ms:.1f} ms "
+                  f"({len(before) / len(after):.1f}x smaller, {before_ms / after_ms:.0f}x faster)")
+
+        buckets = downsample.ohlc_buckets(df, args.max_points)
+        assert buckets['High'].max() == df['High'].max() and buckets['Low'].min() == df['Low'].min()
+        assert buckets['Close'].iloc[-1] == df['Close'].iloc[-1] and buckets['Open'].iloc[0] == df['Open'].iloc[0]
+        assert buckets['Volume'].sum() == df['Volume'].sum()
+        line = downsample.lttb(df, args.max_points)
+        assert line.index[0] == df.index[0] and line.index[-1] == df.index[-1] and line.index.is_monotonic_increasing
+
+    daily = ranges["ALL (5y daily)"]
+    for period in downsample.RESAMPLE_PERIODS:
+        resampled, resample_ms = timed(lambda: downsample.resample(daily, period))
+        assert resampled['Volume'].sum() == daily['Volume'].sum()
+        print(f"resample={period}: {len(daily):,} daily bars -> {len(resampled):,} candles in {resample_ms:.1f} ms")
+    print("Buckets keep open, high, low, last close and volume; LTTB keeps the first and last point")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark for the order trigger index (utils/order_book.py).
+
+Loads a million resting limit, stop and stop-limit orders spread over a few
+symbols around their start prices, then feeds a local fake tick stream (random
+walk per symbol) into OrderBook.on_price and reports load time, per-tick latency
+and triggered orders. For comparison, the same ticks are also matched by a full
+scan over all resting orders of the symbol (what a plain SELECT of pending
+orders per tick amounts to), and both must trigger exactly the same orders.
+
+No database or network is needed.
+
+Usage:
+    python benchmark_order_book.py
+    python benchmark_order_book.py --orders 1000000 --ticks 20000 --symbols 10
+"""
+import argparse
+import random
+import statistics
+import time
+
+from utils.order_book import BUY, SELL, LIMIT, STOP, STOP_LIMIT, OrderBook, RestingOrder
+
+SPREAD = 0.05          # resting orders lie within 5% of the start price
+VOLATILITY = 0.0004    # standard deviation of one tick's relative move
+
+
+def make_orders(count, prices, rng):
+    symbols = list(prices)
+    orders = []
+    for order_id in range(1, count + 1):
+        symbol = rng.choice(symbols)
+        price = prices[symbol]
+        side = rng.choice((BUY, SELL))
+        order_type = rng.choice((LIMIT, LIMIT, STOP, STOP_LIMIT))
+        # Resting orders are not marketable yet: buy limits / sell stops below the price,
+        # sell limits / buy stops above it
+        below = (side == BUY) == (order_type == LIMIT)
+        offset = rng.uniform(0.0005, SPREAD)
+        level = round(price * (1 - offset if below else 1 + offset), 2)
+        limit_price = stop_price = None
+        if order_type == LIMIT:
+            limit_price = level
+        elif order_type == STOP:
+            stop_price = level
+        else:
+            stop_price = level
+            # Limit a little beyond or short of the stop: fires with the stop or rests after it
+            slack = rng.uniform(-0.003, 0.005)
+            limit_price = round(level * (1 + slack if side == BUY else 1 - slack), 2)
+        orders.append(RestingOrder(order_id, order_id % 5000, symbol, side, order_type, 1, limit_price, stop_price))
+    return orders
+
+
+def make_ticks(count, prices, rng):
+    current = dict(prices)
+    symbols = list(prices)
+    ticks = []
+    for _ in range(count):
+        symbol = rng.choice(symbols)
+        current[symbol] = round(current[symbol] * (1 + rng.gauss(0, VOLATILITY)), 4)
+        ticks.append((symbol, current[symbol]))
+    return ticks
+
+
+def copy_order(order):
+    return RestingOrder(order.id, order.user_id, order.symbol, order.side, order.order_type, order.quantity,
+                        order.limit_price, order.stop_price)
+
+
+class ScanBook:
+    """Reference matcher: checks every resting order of the symbol on every tick."""
+
+    def __init__(self, orders):
+        self.by_symbol = {}
+        for order in orders:
+            self.by_symbol.setdefault(order.symbol, {})[order.id] = order
+
+    def on_price(self, symbol, price):
+        resting = self.by_symbol.get(symbol, {})
+        fired = []
+        for order in list(resting.values()):
+            if not order.fires_at(price):
+                continue
+            if order.stage == STOP and order.order_type == STOP_LIMIT:
+                order.stage = LIMIT
+                if not order.fires_at(price):
+                    continue
+            del resting[order.id]
+            fired.append(order)
+        return sorted(fired, key=lambda o: o.id)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--ticks", type=int, default=20_000)
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--scan-ticks", type=int, default=200, help="ticks also matched by full scan")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    prices = {f"SYM{i}": rng.uniform(20, 500) for i in range(args.symbols)}
+    orders = make_orders(args.orders, prices, rng)
+    ticks = make_ticks(args.ticks, prices, rng)
+
+    book = OrderBook()
+    started = time.perf_counter()
+    book.add_many(copy_order(order) for order in orders)
+    print(f"Loaded {len(book):,} orders in {time.perf_counter() - started:.2f}s")
+
+    latencies, triggered, activated = [], 0, 0
+    started = time.perf_counter()
+    for symbol, price in ticks:
+        tick_started = time.perf_counter()
+        fired, stage_changed = book.on_price(symbol, price)
+        latencies.append((time.perf_counter() - tick_started) * 1e6)
+        triggered += len(fired)
+        activated += len(stage_changed)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"Trigger index: {len(ticks):,} ticks in {elapsed:.2f}s ({len(ticks) / elapsed:,.0f} ticks/s), "
+          f"{triggered:,} orders fired, {activated:,} stop-limits activated, {len(book):,} still resting")
+    print(f"  per tick: p50 {statistics.median(latencies):.1f} us, p99 {percentile(latencies, 0.99):.1f} us, "
+          f"max {latencies[-1]:.1f} us")
+
+    # Same ticks on a fresh book and on the full scan: identical orders must fire
+    scan_ticks = ticks[:args.scan_ticks]
+    index = OrderBook()
+    index.add_many(copy_order(order) for order in orders)
+    scan = ScanBook([copy_order(order) for order in orders])
+    scan_latencies = []
+    for symbol, price in scan_ticks:
+        expected = [o.id for o in index.on_price(symbol, price)[0]]
+        tick_started = time.perf_counter()
+        actual = [o.id for o in scan.on_price(symbol, price)]
+        scan_latencies.append((time.perf_counter() - tick_started) * 1e6)
+        if actual != expected:
+            raise SystemExit(f"FAIL: index and scan differ at {symbol} {price}")
+    scan_latencies.sort()
+    print(f"Full scan:     p50 {statistics.median(scan_latencies):,.0f} us per tick over {len(scan_ticks)} ticks "
+          f"({statistics.median(scan_latencies) / max(statistics.median(latencies), 1e-9):,.0f}x slower), same orders fired")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark for the streaming P&L book (utils/portfolio_book.py).
+
+Loads 100k users with a handful of positions each over a few hundred symbols,
+plus one symbol every user holds, then feeds a local fake tick stream (random
+walk per symbol) into PortfolioBook.on_price and reports per-tick latency, in
+particular for the symbol with 100k holders. For comparison, the holders of a
+few ticks are also revalued from scratch position by position (what calling
+show_user_portfolio per affected user amounts to, without the database). Trades
+are simulated with set_positions in between, and at the end every user's totals
+must match a full recomputation.
+
+No database or network is needed.
+
+Usage:
+    python benchmark_pnl_engine.py
+    python benchmark_pnl_engine.py --users 100000 --symbols 300 --positions 8 --ticks 5000
+"""
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+from utils.portfolio_book import PortfolioBook
+
+VOLATILITY = 0.0004    # standard deviation of one tick's relative move
+POPULAR = "SPY"        # held by every user
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def make_portfolios(users, symbols, positions, prices, rng):
+    portfolios = {}
+    for user_id in range(1, users + 1):
+        held = rng.sample(symbols, positions) + [POPULAR]
+        portfolios[user_id] = {symbol: (rng.randint(1, 50), round(prices[symbol] * rng.uniform(0.7, 1.3), 2))
+                               for symbol in held}
+    return portfolios
+
+
+def revalue(portfolio, prices):
+    value = sum(quantity * prices[symbol] for symbol, (quantity, _) in portfolio.items())
+    cost = sum(quantity * average for quantity, average in portfolio.values())
+    return value, cost
+
+
+def check_repositioned_twice():
+    """A user repositioned twice between ticks with the user arrays at full capacity."""
+    users = 1024
+    book = PortfolioBook()
+    book.load((user_id, "AAA", 1, 100.0, 100.0) for user_id in range(1, users + 1))
+    book.watch(users)
+    book.set_positions(1, [("AAA", 2, 100.0, 100.0)])
+    book.set_positions(1, [("AAA", 3, 100.0, 100.0)])
+    changed = book.on_price("AAA", 110.0)
+    if book.totals(1)["market_value"] != 330.0 or book.totals(users)["market_value"] != 110.0:
+        raise SystemExit(f"FAIL: repositioned twice: user 1 {book.totals(1)}, user {users} {book.totals(users)}")
+    if list(changed) != [users]:
+        raise SystemExit(f"FAIL: repositioned twice: reported {list(changed)} as changed")
+    print("User repositioned twice at full capacity: OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--positions", type=int, default=8, help="positions per user besides the popular symbol")
+    parser.add_argument("--ticks", type=int, default=5_000)
+    parser.add_argument("--trades", type=int, default=20_000, help="position changes mixed into the ticks")
+    parser.add_argument("--naive-ticks", type=int, default=5, help="popular-symbol ticks also revalued from scratch")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    prices = {symbol: rng.uniform(20, 500) for symbol in symbols + [POPULAR]}
+    portfolios = make_portfolios(args.users, symbols, args.positions, prices, rng)
+
+    book = PortfolioBook()
+    started = time.perf_counter()
+    book.load((user_id, symbol, quantity, average, prices[symbol])
+              for user_id, portfolio in portfolios.items() for symbol, (quantity, average) in portfolio.items())
+    print(f"Loaded {book.positions:,} positions of {len(book):,} users in {time.perf_counter() - started:.2f}s")
+
+    holders = {}
+    for user_id, portfolio in portfolios.items():
+        for symbol in portfolio:
+            holders.setdefault(symbol, []).append(user_id)
+
+    # Ticks of the symbol every user holds
+    popular, naive = [], []
+    for i in range(200):
+        prices[POPULAR] = round(prices[POPULAR] * (1 + rng.gauss(0, VOLATILITY)), 4)
+        started = time.perf_counter()
+        book.on_price(POPULAR, prices[POPULAR])
+        popular.append((time.perf_counter() - started) * 1e3)
+        if i < args.naive_ticks:
+            started = time.perf_counter()
+            for user_id in holders[POPULAR]:
+                revalue(portfolios[user_id], prices)
+            naive.append((time.perf_counter() - started) * 1e3)
+    popular.sort()
+    print(f"Tick with {len(holders[POPULAR]):,} holders: p50 {statistics.median(popular):.2f} ms, "
+          f"p99 {percentile(popular, 0.99):.2f} ms")
+    print(f"  revaluing those portfolios from scratch: p50 {statistics.median(naive):,.0f} ms "
+          f"({statistics.median(naive) / statistics.median(popular):,.0f}x slower)")
+
+    # Random ticks with trades (set_positions) mixed in
+    trade_every = max(args.ticks * 1 // max(args.trades, 1), 1)
+    trades_per_tick = max(args.trades // args.ticks, 1)
+    latencies, trade_latencies = [], []
+    for i in range(args.ticks):
+        symbol = rng.choice(symbols)
+        prices[symbol] = round(prices[symbol] * (1 + rng.gauss(0, VOLATILITY)), 4)
+        started = time.perf_counter()
+        book.on_price(symbol, prices[symbol])
+        latencies.append((time.perf_counter() - started) * 1e6)
+        if i % trade_every == 0:
+            for _ in range(trades_per_tick):
+                user_id = rng.randint(1, args.users)
+                portfolio = portfolios[user_id]
+                traded = rng.choice(symbols)
+                quantity, average = portfolio.get(traded, (0, prices[traded]))
+                quantity = max(quantity + rng.randint(-10, 10), 0)
+                if quantity:
+                    portfolio[traded] = (quantity, average)
+                else:
+                    portfolio.pop(traded, None)
+                started = time.perf_counter()
+                book.set_positions(user_id, [(s, q, a, prices[s]) for s, (q, a) in portfolio.items()])
+                trade_latencies.append((time.perf_counter() - started) * 1e6)
+    latencies.sort()
+    trade_latencies.sort()
+    print(f"Random ticks: p50 {statistics.median(latencies):.0f} us, p99 {percentile(latencies, 0.99):.0f} us "
+          f"over {len(latencies):,} ticks; position update p50 {statistics.median(trade_latencies):.0f} us "
+          f"over {len(trade_latencies):,} trades")
+
+    # Every user's totals must match a full recomputation at the final prices
+    for symbol in symbols + [POPULAR]:
+        book.on_price(symbol, prices[symbol])
+    mismatches = 0
+    for user_id, portfolio in portfolios.items():
+        value, cost = revalue(portfolio, prices)
+        totals = book.totals(user_id)
+        if not (np.isclose(totals["market_value"], value, rtol=1e-9, atol=1e-6)
+                and np.isclose(totals["cost_basis"], cost, rtol=1e-9, atol=1e-6)):
+            mismatches += 1
+    if mismatches:
+        raise SystemExit(f"FAIL: {mismatches} users differ from a full recomputation")
+    print(f"All {len(portfolios):,} users match a full recomputation")
+    check_repositioned_twice()
+
+
+if __name__ == "__main__":
+    main()
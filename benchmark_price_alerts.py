@@ -0,0 +1,127 @@
+"""
+Benchmark for the price alert index (utils/alert_index.py).
+
+Loads 100k alerts spread over a few symbols around their start prices, then
+feeds a local fake tick stream (random walk per symbol) into AlertIndex.on_price
+and reports load time, per-tick latency and fired alerts. Every alert must fire
+at most once. For comparison, the same ticks are also matched by a full scan
+over all alerts of the symbol, and both must fire exactly the same alerts.
+
+No database or network is needed.
+
+Usage:
+    python benchmark_price_alerts.py
+    python benchmark_price_alerts.py --alerts 100000 --ticks 50000 --symbols 20
+"""
+import argparse
+import random
+import statistics
+import time
+
+from utils.alert_index import ABOVE, BELOW, AlertIndex
+
+SPREAD = 0.05          # thresholds lie within 5% of the start price
+VOLATILITY = 0.0004    # standard deviation of one tick's relative move
+
+
+def make_alerts(count, prices, rng):
+    symbols = list(prices)
+    alerts = []
+    for alert_id in range(1, count + 1):
+        symbol = rng.choice(symbols)
+        direction = rng.choice((ABOVE, BELOW))
+        # Not crossed yet: 'above' thresholds over the price, 'below' thresholds under it
+        offset = rng.uniform(0.0005, SPREAD)
+        threshold = round(prices[symbol] * (1 + offset if direction == ABOVE else 1 - offset), 2)
+        alerts.append((alert_id, symbol, direction, threshold))
+    return alerts
+
+
+def make_ticks(count, prices, rng):
+    current = dict(prices)
+    symbols = list(prices)
+    ticks = []
+    for _ in range(count):
+        symbol = rng.choice(symbols)
+        current[symbol] = round(current[symbol] * (1 + rng.gauss(0, VOLATILITY)), 4)
+        ticks.append((symbol, current[symbol]))
+    return ticks
+
+
+class ScanAlerts:
+    """Reference matcher: checks every alert of the symbol on every tick."""
+
+    def __init__(self, alerts):
+        self.by_symbol = {}
+        for alert_id, symbol, direction, threshold in alerts:
+            self.by_symbol.setdefault(symbol, {})[alert_id] = (direction, threshold)
+
+    def on_price(self, symbol, price):
+        alerts = self.by_symbol.get(symbol, {})
+        fired = [alert_id for alert_id, (direction, threshold) in alerts.items()
+                 if (price >= threshold if direction == ABOVE else price <= threshold)]
+        for alert_id in fired:
+            del alerts[alert_id]
+        return fired
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--ticks", type=int, default=50_000)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--scan-ticks", type=int, default=2_000, help="ticks also matched by full scan")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    prices = {f"SYM{i}": rng.uniform(20, 500) for i in range(args.symbols)}
+    alerts = make_alerts(args.alerts, prices, rng)
+    ticks = make_ticks(args.ticks, prices, rng)
+
+    index = AlertIndex()
+    started = time.perf_counter()
+    index.add_many(alerts)
+    print(f"Loaded {len(index):,} alerts in {time.perf_counter() - started:.2f}s")
+
+    latencies, delivered = [], set()
+    started = time.perf_counter()
+    for symbol, price in ticks:
+        tick_started = time.perf_counter()
+        fired = index.on_price(symbol, price)
+        latencies.append((time.perf_counter() - tick_started) * 1e6)
+        for alert_id in fired:
+            if alert_id in delivered:
+                raise SystemExit(f"FAIL: alert {alert_id} fired twice")
+            delivered.add(alert_id)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"Threshold index: {len(ticks):,} ticks in {elapsed:.2f}s ({len(ticks) / elapsed:,.0f} ticks/s), "
+          f"{len(delivered):,} alerts fired once each, {len(index):,} still active")
+    print(f"  per tick: p50 {statistics.median(latencies):.1f} us, p99 {percentile(latencies, 0.99):.1f} us, "
+          f"max {latencies[-1]:.1f} us")
+
+    # Same ticks on a fresh index and on the full scan: identical alerts must fire
+    scan_ticks = ticks[:args.scan_ticks]
+    index = AlertIndex()
+    index.add_many(alerts)
+    scan = ScanAlerts(alerts)
+    scan_latencies = []
+    for symbol, price in scan_ticks:
+        expected = sorted(index.on_price(symbol, price))
+        tick_started = time.perf_counter()
+        actual = sorted(scan.on_price(symbol, price))
+        scan_latencies.append((time.perf_counter() - tick_started) * 1e6)
+        if actual != expected:
+            raise SystemExit(f"FAIL: index and scan differ at {symbol} {price}")
+    scan_latencies.sort()
+    print(f"Full scan:       p50 {statistics.median(scan_latencies):,.0f} us per tick over {len(scan_ticks):,} ticks "
+          f"({statistics.median(scan_latencies) / max(statistics.median(latencies), 1e-9):,.0f}x slower), same alerts fired")
+
+
+if __name__ == "__main__":
+    main()
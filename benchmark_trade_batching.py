@@ -0,0 +1,122 @@
+"""
+Throughput benchmark for trade execution with and without group commit.
+
+Simulates a burst at market open: many threads buy at the same time, spread over
+several test users. Each run uses one group-commit window (TRADE_GROUP_COMMIT_MS);
+0 is the per-trade path, where every buy commits on its own. Reports trades per
+second, latency and how many trades shared a transaction.
+
+The timings include everything buy_stock does after the commit (trade event,
+XP), as the API routes see it.
+
+Needs the database from .env (POSTGRES_*) with the asset table seeded
+(postgres_schema.sql). Temporary users are created and deleted again, together
+with their transactions and portfolio rows.
+
+Usage:
+    python benchmark_trade_batching.py
+    python benchmark_trade_batching.py --threads 128 --trades 20 --windows 0,2,5,10
+"""
+import argparse
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import database.handler.postgres.postgres_db_handler as db_handler
+import database.handler.postgres.postgre_transactions_handler as transactions_handler
+from database.handler.postgres.postgres_pool import close_all_pools
+
+START_BALANCE = 1_000_000.0
+SYMBOL = "AAPL"
+PRICE = 1.0
+
+
+def create_test_users(count):
+    conn = db_handler.get_db_connection()
+    try:
+        user_ids = []
+        with conn.cursor() as cur:
+            for _ in range(count):
+                name = f"bench_trade_{uuid.uuid4().hex[:8]}"
+                cur.execute(
+                    "INSERT INTO users (username, email, balance) VALUES (%s, %s, %s) RETURNING id",
+                    (name, f"{name}@example.invalid", START_BALANCE)
+                )
+                user_ids.append(cur.fetchone()[0])
+        conn.commit()
+        return user_ids
+    finally:
+        conn.close()
+
+
+def delete_test_users(user_ids):
+    conn = db_handler.get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM transactions WHERE user_id = ANY(%s)", (user_ids,))
+            cur.execute("DELETE FROM users WHERE id = ANY(%s)", (user_ids,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def count_transactions(user_ids):
+    conn = db_handler.get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM transactions WHERE user_id = ANY(%s)", (user_ids,))
+            return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run(window_ms, user_ids, threads, trades):
+    transactions_handler.set_group_commit_window(window_ms)
+    total = threads * trades
+    before = count_transactions(user_ids)
+
+    def buy(i):
+        started = time.perf_counter()
+        result = transactions_handler.buy_stock(user_ids[i % len(user_ids)], SYMBOL, 1, PRICE)
+        return result["success"], time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(buy, range(total)))
+    elapsed = time.perf_counter() - started
+
+    succeeded = sum(1 for ok, _ in results if ok)
+    latencies = sorted(latency * 1000 for _, latency in results)
+    written = count_transactions(user_ids) - before
+    stats = transactions_handler.get_group_commit_stats()
+    per_commit = f"{stats['items'] / stats['batches']:>6.1f}" if stats and stats['batches'] else f"{1:>6.1f}"
+    print(f"{window_ms:>6g} ms {total / elapsed:>10.0f} {statistics.median(latencies):>10.1f} "
+          f"{latencies[int(len(latencies) * 0.99) - 1]:>10.1f} {per_commit}   {succeeded}/{total} ok, {written} rows")
+    return succeeded == written == total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--trades", type=int, default=20, help="trades per thread")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--windows", default="0,1,2,5,10", help="group-commit windows in ms")
+    args = parser.parse_args()
+    windows = [float(w) for w in args.windows.split(",")]
+
+    user_ids = create_test_users(args.users)
+    try:
+        print(f"{args.threads} threads x {args.trades} buys on {args.users} users")
+        print(f"{'window':>9} {'trades/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'per tx':>6}")
+        ok = all([run(window, user_ids, args.threads, args.trades) for window in windows])
+    finally:
+        transactions_handler.set_group_commit_window(0)
+        delete_test_users(user_ids)
+        close_all_pools()
+    if not ok:
+        raise SystemExit("FAIL: not every buy was written exactly once")
+
+
+if __name__ == "__main__":
+    main()
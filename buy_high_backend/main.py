@@ -1,6 +1,7 @@
 import os
 import sys # Add sys import
 import logging
+from contextlib import asynccontextmanager
 
 # Calculate project_root_dir
 # This should be /Users/julianstosse/Developer/BuyHigh.io
@@ -23,15 +24,6 @@ if not _setup_logger.hasHandlers(): # Only add handler once
 # Assumption: main.py is in buy_high_backend, utils folder is at the same level as buy_high_backend
 firebase_config_path = os.path.join(project_root_dir, "utils", "buyhighio-firebase-adminsdk-fbsvc-df9d657bec.json")
 
-_setup_logger.info(f"MAIN.PY: Attempted path for Firebase config: {firebase_config_path}")
-
-if os.path.exists(firebase_config_path):
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = firebase_config_path
-    _setup_logger.info(f"MAIN.PY: GOOGLE_APPLICATION_CREDENTIALS set to: {firebase_config_path}")
-else:
-    _setup_logger.error(f"MAIN.PY: Firebase config file NOT found at: {firebase_config_path}")
-
-
 from fastapi import FastAPI, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware # Added
@@ -40,62 +32,63 @@ from pydantic import BaseModel
 
 # Import the combined router and middleware from the router package.
 # The debug_logger object is now directly imported from the router module.
-from .router import router as api_router, RequestLoggingMiddleware, debug_logger as router_debug_logger
-
-# Initialize FastAPI application with metadata
-app = FastAPI(
-    title="BuyHigh.io API",
-    description="Backend API for the BuyHigh.io trading platform",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
-)
-
-_setup_logger.info(f"MAIN.PY: FastAPI app instance created: {id(app)}")
-
-# Define allowed origins
-allowed_origins = [
-    "https://buy-high-io.vercel.app/"
-]
-
-# CORS middleware to enable cross-origin requests
-# This should be placed before other middlewares that modify or generate responses.
-#app.add_middleware(
-#    CORSMiddleware,
-#    allow_origins=[
-#    "https://buy-high-io.vercel.app",
-#    "https://buy-high-io.vercel.app/",], 
-#    allow_credentials=True,
-#    allow_methods=["*"],
-#    allow_headers=["*"],
-#    expose_headers=["Authorization", "Content-Disposition"],
-#    max_age=600,  # Cache the CORS response for 10 minutes
-#)
-
-# Add the request logging middleware
-#app.add_middleware(RequestLoggingMiddleware)
-
-_setup_logger.info(f"MAIN.PY: Attempting to include api_router (id: {id(api_router)}) from buy_high_backend.router into app (id: {id(app)}) with prefix=''.")
-# Include API routes without prefix (empty string instead of "")
-app.include_router(api_router, prefix="")
-_setup_logger.info(f"MAIN.PY: Successfully included api_router into app.")
-
-# Static files for profile pictures, etc.
-static_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
-os.makedirs(static_dir, exist_ok=True)  # Create directory if it doesn't exist
-app.mount("/static", StaticFiles(directory=static_dir), name="static")
-
-# Logging folder and file for frontend logs
+from .router import router as api_router, RequestLoggingMiddleware, debug_logger as router_debug_logger, configure_debug_logging
+import utils.badge_rules as badge_rules
+import database.handler.postgres.postgres_pool as postgres_pool
+import utils.news_service as news_service
+import utils.stock_data_api as stock_data_api
+import utils.warmup as warmup
+import utils.order_engine as order_engine
+from .utils import ai_stream, rag_index
+
+# Importing this module has no side effects: no DB connections, no Firebase, no threads,
+# no files. Everything is created by create_app() and the lifespan below, and heavy
+# libraries (pandas, numpy, finnhub, firebase_admin) are imported on first use.
+# test_import_time.py in the project root guards the import time.
+
+static_dir = os.path.join(project_root_dir, "static")
 frontend_log_dir = os.path.join(project_root_dir, "frontend_logs")
-os.makedirs(frontend_log_dir, exist_ok=True)
 frontend_log_file = os.path.join(frontend_log_dir, "frontend.log")
 
+
+def _configure_firebase_credentials():
+    """Point the Firebase Admin SDK at the service account file (it is initialised on first use)."""
+    _setup_logger.info(f"MAIN.PY: Attempted path for Firebase config: {firebase_config_path}")
+    if os.path.exists(firebase_config_path):
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = firebase_config_path
+        _setup_logger.info(f"MAIN.PY: GOOGLE_APPLICATION_CREDENTIALS set to: {firebase_config_path}")
+    else:
+        _setup_logger.error(f"MAIN.PY: Firebase config file NOT found at: {firebase_config_path}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services when the server starts and release resources on shutdown."""
+    # Badge-Regeln an den Event-Bus hängen (Trades, Level-Ups, Quiz, Gamble)
+    badge_rules.register()
+    # Fill reference data and price caches in the background; /ready reports 503 until done
+    warmup.start()
+    # Keep the Finnhub news feeds in memory so /news requests never call Finnhub directly
+    news_service.start()
+    # Keep recently requested charts warm while the exchange is open
+    stock_data_api.start_price_refresher()
+    # Load pending limit/stop orders and trigger them on price updates
+    order_engine.start()
+    # Keep the chatbot's retrieval index in sync with the roadmap and quiz content
+    rag_index.register()
+    try:
+        yield
+    finally:
+        # Close the pooled HTTP client used for streaming chatbot responses and the DB pools
+        await ai_stream.close_client()
+        postgres_pool.close_all_pools()
+
+
 class FrontendLogEntry(BaseModel):
     level: str
     message: str
     context: dict = {}
 
-@app.post("/frontend-log")
 async def frontend_log(entry: FrontendLogEntry, request: Request):
     client_ip = request.client.host
     log_line = f"{entry.level.upper()} | {client_ip} | {entry.message} | {entry.context}\n"
@@ -104,7 +97,6 @@ async def frontend_log(entry: FrontendLogEntry, request: Request):
     return JSONResponse({"status": "ok"})
 
 # Root route for health check
-@app.get("/")
 async def root():
     """Simple root route for API status check"""
     router_debug_logger.debug("Root endpoint accessed")
@@ -114,9 +106,76 @@ async def root():
         "version": "1.0.0"
     }
 
-@app.options("/{rest_of_path:path}")
 async def preflight_handler(rest_of_path: str):
     return Response(status_code=200)
 
+
+def create_app() -> FastAPI:
+    """Build the FastAPI application (routes, static files, logging, lifespan)."""
+    _configure_firebase_credentials()
+    configure_debug_logging()
+
+    # Initialize FastAPI application with metadata
+    app = FastAPI(
+        title="BuyHigh.io API",
+        description="Backend API for the BuyHigh.io trading platform",
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        lifespan=lifespan
+    )
+
+    # Define allowed origins
+    allowed_origins = [
+        "https://buy-high-io.vercel.app/"
+    ]
+
+    # CORS middleware to enable cross-origin requests
+    # This should be placed before other middlewares that modify or generate responses.
+    #app.add_middleware(
+    #    CORSMiddleware,
+    #    allow_origins=[
+    #    "https://buy-high-io.vercel.app",
+    #    "https://buy-high-io.vercel.app/",],
+    #    allow_credentials=True,
+    #    allow_methods=["*"],
+    #    allow_headers=["*"],
+    #    expose_headers=["Authorization", "Content-Disposition"],
+    #    max_age=600,  # Cache the CORS response for 10 minutes
+    #)
+
+    # Add the request logging middleware
+    #app.add_middleware(RequestLoggingMiddleware)
+
+    # Include API routes without prefix (empty string instead of "")
+    app.include_router(api_router, prefix="")
+
+    # Static files for profile pictures, etc.
+    os.makedirs(static_dir, exist_ok=True)  # Create directory if it doesn't exist
+    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+
+    # Logging folder and file for frontend logs
+    os.makedirs(frontend_log_dir, exist_ok=True)
+    app.add_api_route("/frontend-log", frontend_log, methods=["POST"])
+    app.add_api_route("/", root, methods=["GET"])
+    app.add_api_route("/{rest_of_path:path}", preflight_handler, methods=["OPTIONS"])
+
+    _setup_logger.info(f"MAIN.PY: FastAPI app instance created: {id(app)}")
+    return app
+
+
+_app = None
+
+def __getattr__(name):
+    # `buy_high_backend.main:app` keeps working: the app is built on first access
+    # instead of at import time
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # To start the app with uvicorn:
 # python -m uvicorn buy_high_backend.main:app --reload
+# python -m uvicorn buy_high_backend.main:create_app --factory --reload
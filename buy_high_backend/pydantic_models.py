@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Any, Union
 from datetime import datetime
 
@@ -44,6 +44,40 @@ class TradeRequest(BaseModel):
     quantity: float
     price: float
 
+class OrderRequest(BaseModel):
+    symbol: str
+    side: str                           # 'buy' or 'sell'
+    order_type: str                     # 'limit', 'stop' or 'stop_limit'
+    quantity: float
+    limit_price: Optional[float] = None
+    stop_price: Optional[float] = None
+
+class AlertRequest(BaseModel):
+    symbol: str
+    threshold: float
+    direction: Optional[str] = None     # 'above' or 'below'; default: crossing from the current price
+    note: Optional[str] = None
+
+class BacktestRequest(BaseModel):
+    symbol: str
+    strategy: str                       # 'ma_crossover', 'buy_the_dip' or 'rsi_reversion'
+    params: Optional[dict] = None       # strategy parameters; missing ones use the defaults
+    timeframe: str = 'ALL'
+    start: Optional[str] = None         # ISO dates limiting the range
+    end: Optional[str] = None
+    fee_bps: float = Field(0.0, ge=0)   # fee per trade in basis points
+
+class BacktestSweepRequest(BaseModel):
+    symbol: str
+    strategy: str
+    grid: dict                          # {param: [values]}, every combination is tested
+    timeframe: str = 'ALL'
+    start: Optional[str] = None
+    end: Optional[str] = None
+    fee_bps: float = Field(0.0, ge=0)
+    sort_by: str = 'sharpe'
+    top: int = Field(20, gt=0)
+
 class ProfilePictureUploadResponse(BaseModel):
     success: bool
     message: str
@@ -19,28 +19,28 @@ from .easter_egg_router import router as easter_egg_router
 from .news_router import router as news_router  # Import news_router
 from .gamble import router as gamble_router # Import gamble_router
 from .api_router import router as api_router
+from .alert_router import router as alert_router
+from .backtest_router import router as backtest_router
 
 # Umgebungsvariablen laden
 load_dotenv()
 
-# Debug-Logger konfigurieren
+# Debug-Logger; die Log-Datei wird erst von configure_debug_logging() (App-Factory) geöffnet,
+# damit der Import des Pakets keine Dateien anlegt
 DEBUG_LOG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DEBUG_LOG_FILE = os.path.join(DEBUG_LOG_DIR, "../debug.log")
-os.makedirs(os.path.dirname(DEBUG_LOG_FILE), exist_ok=True)
 
-# Logger-Konfiguration
 debug_logger = logging.getLogger("buyhigh_debug")
 debug_logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler(DEBUG_LOG_FILE)
-file_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
-debug_logger.addHandler(file_handler)
 
-debug_logger.info("Initializing router package (buy_high_backend.router.__init__)")
-
-# Log routes of auth_router before inclusion
-debug_logger.info(f"Routes on auth_router (id: {id(auth_router)}) BEFORE inclusion:")
-for route in auth_router.routes:
-    debug_logger.info(f"  Path: {route.path}, Name: {route.name}, Methods: {getattr(route, 'methods', 'N/A')}")
+def configure_debug_logging():
+    """Hängt den Datei-Handler für debug.log an (idempotent)."""
+    if any(isinstance(h, logging.FileHandler) for h in debug_logger.handlers):
+        return
+    os.makedirs(os.path.dirname(DEBUG_LOG_FILE), exist_ok=True)
+    file_handler = logging.FileHandler(DEBUG_LOG_FILE)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    debug_logger.addHandler(file_handler)
 
 # Debug-Funktion für die Anwendung
 def log_request_response(request: Request, message: str):
@@ -49,38 +49,21 @@ def log_request_response(request: Request, message: str):
 
 # Hauptrouter, der alle Sub-Router kombiniert
 router = APIRouter()
-debug_logger.info(f"Created main APIRouter instance in router.__init__: {id(router)}")
 
 # Sub-Router einbinden
-debug_logger.info(f"Including auth_router ({id(auth_router)}) into main router ({id(router)}) WITH prefix '/auth'.")
 router.include_router(auth_router, prefix="/auth", tags=["Authentication"])
-debug_logger.info(f"Including stock_router ({id(stock_router)}) into main router ({id(router)}) without prefix.")
 router.include_router(stock_router)
-debug_logger.info(f"Including trade_router ({id(trade_router)}) into main router ({id(router)}) without prefix.")
 router.include_router(trade_router)
-debug_logger.info(f"Including asset_router ({id(asset_router)}) into main router ({id(router)}) without prefix.")
 router.include_router(asset_router)
-debug_logger.info(f"Including user_router ({id(user_router)}) into main router ({id(router)}) without prefix.")
 router.include_router(user_router)
-debug_logger.info(f"Including education_router ({id(education_router)}) into main router ({id(router)}) without prefix.")
 router.include_router(education_router)
-debug_logger.info(f"Including misc_router ({id(misc_router)}) into main router ({id(router)}) without prefix.")
 router.include_router(misc_router)
-debug_logger.info(f"Including easter_egg_router ({id(easter_egg_router)}) into main router ({id(router)}) without prefix.")
 router.include_router(easter_egg_router)
-debug_logger.info(f"Including news_router ({id(news_router)}) into main router ({id(router)}) without prefix.")
-router.include_router(news_router)  # Include news_router
-debug_logger.info(f"Including gamble_router ({id(gamble_router)}) into main router ({id(router)}) without prefix.") # Log gamble_router
-router.include_router(gamble_router) # Include gamble_router
-debug_logger.info(f"Including api_router ({id(api_router)}) into main router ({id(router)}) without prefix.")
-router.include_router(api_router) # Include api_router
-
-debug_logger.info(f"Finished including sub-routers into main router ({id(router)}) in router.__init__.")
-
-# Log routes of the main combined router (api_router)
-debug_logger.info(f"Routes on main api_router (id: {id(router)}) AFTER all inclusions:")
-for route in router.routes:
-    debug_logger.info(f"  Path: {route.path}, Name: {route.name}, Methods: {getattr(route, 'methods', 'N/A')}")
+router.include_router(news_router)
+router.include_router(gamble_router)
+router.include_router(api_router)
+router.include_router(alert_router)
+router.include_router(backtest_router)
 
 # Middleware-Klasse (wird in main.py verwendet)
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
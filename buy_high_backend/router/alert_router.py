@@ -0,0 +1,42 @@
+"""
+Router for price alerts ("notify me when AAPL crosses $200").
+
+Alerts fire in the Flask app, which owns the Socket.IO server (namespace /alerts);
+its alert engine picks up alerts created here within a few seconds.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+import logging
+import database.handler.postgres.postgres_alerts_handler as alerts_handler
+import utils.alert_engine as alert_engine
+from ..auth_utils import get_current_user, AuthenticatedUser
+from ..pydantic_models import AlertRequest
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.post("/alerts")
+def api_create_alert(alert: AlertRequest, current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Create a price alert (without direction it fires when the price crosses the threshold from where it is now)"""
+    result = alert_engine.create_alert(current_user.id, alert.symbol, alert.threshold, direction=alert.direction, note=alert.note)
+    if result.get("success"):
+        return result
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result.get("message", "Alert could not be created."))
+
+@router.get("/alerts")
+def api_get_alerts(status_filter: Optional[str] = None, current_user: AuthenticatedUser = Depends(get_current_user)):
+    """The user's alerts, newest first (optionally only one status, e.g. ?status_filter=active)"""
+    try:
+        return {"success": True, "alerts": alerts_handler.get_user_alerts(current_user.id, status_filter)}
+    except Exception as e:
+        logger.error(f"Error loading alerts for user {current_user.id}: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not load alerts.")
+
+@router.delete("/alerts/{alert_id}")
+def api_cancel_alert(alert_id: int, current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Delete an alert that has not fired yet"""
+    result = alert_engine.cancel_alert(current_user.id, alert_id)
+    if result.get("success"):
+        return result
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=result.get("message", "Alert not found."))
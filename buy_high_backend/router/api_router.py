@@ -2,10 +2,13 @@
 API router for chatbot functionality.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from ..auth_utils import get_current_user, AuthenticatedUser
 from ..pydantic_models import ChatbotRequest, ChatbotResponse
 from ..utils.ai import generate_finance_response
+from ..utils import ai_cache, ai_stream, rating_queue
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -58,3 +61,115 @@ async def api_chatbot(
             status_code=500,
             detail="Internal server error occurred while processing your request"
         )
+
+
+def _sse_event(data: dict, event: str = None) -> str:
+    """Format one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router.post("/api/chatbot/stream")
+async def api_chatbot_stream(
+    payload: ChatbotRequest,
+    request: Request,
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """
+    Stream the finance assistant's answer as Server-Sent Events.
+
+    Events:
+        data: {"delta": "..."}           - next piece of the answer
+        event: done / data: {...}        - end of stream
+        event: error / data: {"error"}   - upstream failure, or {"error", "busy": true}
+                                           when all stream slots stay taken
+    The upstream request is cancelled as soon as the client disconnects.
+    """
+    prompt = payload.prompt.strip() if payload.prompt else ""
+    if not prompt:
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+    cached = ai_cache.get_cached_response(prompt)
+    if cached is not None:
+        # Answered from the cache: no upstream stream slot needed
+        async def cached_stream():
+            yield _sse_event({"delta": cached})
+            yield _sse_event({"success": True, "cached": True}, event="done")
+
+        return StreamingResponse(
+            cached_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    logger.info(f"Streaming chatbot response for user {current_user.email}")
+
+    async def event_stream():
+        # The slot is taken inside the generator, so it is only held while the body is
+        # actually streamed (a response that is never sent never takes one)
+        try:
+            await ai_stream.acquire_stream_slot()
+        except ai_stream.StreamBusyError:
+            yield _sse_event({"error": "Chatbot is busy, please try again shortly", "busy": True}, event="error")
+            return
+        stream = ai_stream.stream_finance_response(prompt)
+        chunks = []
+        try:
+            async for delta in stream:
+                if await request.is_disconnected():
+                    logger.info(f"Client disconnected, cancelling chatbot stream for user {current_user.email}")
+                    break
+                chunks.append(delta)
+                yield _sse_event({"delta": delta})
+            else:
+                # Only complete answers are cached
+                ai_cache.store_response(prompt, "".join(chunks))
+                yield _sse_event({"success": True}, event="done")
+        except Exception as e:
+            logger.error(f"Chatbot stream failed for user {current_user.email}: {e}")
+            yield _sse_event({"error": "Failed to generate AI response. Please try again later."}, event="error")
+        finally:
+            # Closes the upstream response if we stopped early (disconnect/cancellation)
+            await stream.aclose()
+            ai_stream.release_stream_slot()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/api/chatbot/metrics")
+async def api_chatbot_metrics(current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Metrics of this worker: streams (active, TTFT and duration percentiles) and response cache hit rate."""
+    return {
+        "stream": ai_stream.get_stream_metrics(),
+        "cache": ai_cache.get_cache_metrics(),
+        "rating_queue": rating_queue.get_queue_metrics()
+    }
+
+
+@router.get("/api/portfolio/rating")
+def api_get_portfolio_rating(current_user: AuthenticatedUser = Depends(get_current_user)):
+    """
+    Return the user's latest AI portfolio rating without waiting for the AI.
+    `pending` is true while a (re-)rating is queued or running; poll again later.
+    """
+    try:
+        return {"success": True, **rating_queue.get_rating(current_user.id)}
+    except Exception as e:
+        logger.error(f"Error loading portfolio rating for user {current_user.id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load portfolio rating")
+
+
+@router.post("/api/portfolio/rating", status_code=202)
+def api_request_portfolio_rating(
+    force: bool = False,
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Queue a portfolio rating; unchanged portfolios are only re-rated with force=true."""
+    status = rating_queue.enqueue_rating(current_user.id, force=force)
+    if status == "busy":
+        raise HTTPException(status_code=503, detail="Rating queue is full, please try again later")
+    return {"success": True, "status": status}
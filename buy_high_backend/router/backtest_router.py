@@ -0,0 +1,44 @@
+"""
+Router for strategy backtests over the cached price bars ("how would a 20/100
+moving average crossover have done on AAPL?").
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+import utils.backtest_service as backtest_service
+from utils.backtest import STRATEGIES
+from ..auth_utils import get_current_user, AuthenticatedUser
+from ..pydantic_models import BacktestRequest, BacktestSweepRequest
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/backtest/strategies")
+def api_backtest_strategies(current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Available strategies with their default parameters"""
+    return {"success": True, "strategies": {name: defaults for name, (_, defaults) in STRATEGIES.items()}}
+
+@router.post("/backtest")
+def api_backtest(request: BacktestRequest, current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Backtest one strategy: equity curve and stats (total return, CAGR, max drawdown, Sharpe)"""
+    try:
+        return backtest_service.backtest(request.symbol, request.timeframe, request.strategy, request.params,
+                                         start=request.start, end=request.end, fee_bps=request.fee_bps)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error backtesting {request.strategy} on {request.symbol}: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not run the backtest.")
+
+@router.post("/backtest/sweep")
+def api_backtest_sweep(request: BacktestSweepRequest, current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Backtest every combination of a parameter grid, best first"""
+    try:
+        return backtest_service.sweep(request.symbol, request.timeframe, request.strategy, request.grid,
+                                      start=request.start, end=request.end, fee_bps=request.fee_bps,
+                                      sort_by=request.sort_by, top=request.top)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error sweeping {request.strategy} on {request.symbol}: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not run the sweep.")
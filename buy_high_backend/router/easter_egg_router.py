@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request as FastAP
 from typing import Optional
 from datetime import datetime
 import logging
-import database.handler.postgres.postgres_db_handler as db_handler
+import database.handler.postgres.postgres_balance_handler as balance_handler
 from ..auth_utils import get_current_user, AuthenticatedUser
 from ..pydantic_models import EasterEggRedeemRequest, RedeemCodeRequest, RedeemCodeResponse
 
@@ -51,7 +51,7 @@ async def redeem_easter_egg(
     }
 
 @router.post("/redeem-code", response_model=RedeemCodeResponse)
-async def api_redeem_code(
+def api_redeem_code(
     payload: RedeemCodeRequest,
     current_user: AuthenticatedUser = Depends(get_current_user)
 ):
@@ -59,12 +59,6 @@ async def api_redeem_code(
     
     code = payload.code.upper()
 
-    user_data = db_handler.get_user_by_id(user_id)
-    if not user_data:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    
-    current_balance = user_data.get('balance', 0.0)
-
     reward = 0
     message = ""
     reload_page = False
@@ -87,13 +81,13 @@ async def api_redeem_code(
     else:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid code")
         
-    new_balance = current_balance + reward
-    
-    update_success = db_handler.update_user_balance(user_id, new_balance)
-    if not update_success:
+    update = balance_handler.apply_balance_delta(user_id, reward)
+    if not update["success"]:
+        if update["reason"] == balance_handler.USER_NOT_FOUND:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         logger.error(f"Failed to update balance for user {user_id} after redeeming code {code}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating balance.")
 
     return RedeemCodeResponse(
-        success=True, message=message, reload=reload_page, reward=reward, new_balance=new_balance
+        success=True, message=message, reload=reload_page, reward=reward, new_balance=update["new_balance"]
     )
@@ -7,6 +7,7 @@ from datetime import datetime
 import logging
 import database.handler.postgres.postgre_education_handler as education_handler
 import database.handler.postgres.postgres_db_handler as db_handler
+import database.handler.postgres.postgre_roadmap_handler as roadmap_handler
 from ..auth_utils import get_current_user, AuthenticatedUser
 from ..pydantic_models import DailyQuizAttemptRequest, DailyQuizAttemptResponse, RoadmapListResponse, RoadmapStepsResponse, RoadmapQuizAttemptRequest, RoadmapQuizAttemptResponse
 
@@ -20,6 +21,15 @@ async def api_get_daily_quiz(current_user: AuthenticatedUser = Depends(get_curre
     quiz_data = education_handler.get_daily_quiz(date=today)
     return quiz_data
 
+@router.get("/daily-quiz/stats")
+async def api_get_daily_quiz_stats(current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Aggregated answer statistics for today's quiz ("X% got this right")."""
+    today = datetime.today().strftime('%Y-%m-%d')
+    quiz_data = education_handler.get_daily_quiz(date=today)
+    if not quiz_data:
+        raise HTTPException(status_code=404, detail="Daily quiz not found for today.")
+    return {"success": True, **education_handler.get_daily_quiz_stats(quiz_data['id'])}
+
 @router.post("/daily-quiz/attempt", response_model=DailyQuizAttemptResponse) # Use DailyQuizAttemptResponse
 async def api_submit_daily_quiz_attempt(
     payload: DailyQuizAttemptRequest, 
@@ -38,16 +48,8 @@ async def api_submit_daily_quiz_attempt(
         logger.error(f"Quiz data for date {today_str} is missing 'id' field.")
         raise HTTPException(status_code=500, detail="Quiz data is incomplete (missing ID).")
 
-    # Check if user already attempted today's quiz using get_daily_quiz_attempts
-    all_user_attempts = education_handler.get_daily_quiz_attempts(user_id)
-    found_todays_attempt = None
-    if all_user_attempts:
-        for attempt in all_user_attempts:
-            # Ensure IDs are of the same type for comparison, e.g., both int or both str.
-            # Assuming actual_quiz_id_from_db is an int, and attempt.get('quiz_id') might also be.
-            if attempt.get('quiz_id') == actual_quiz_id_from_db:
-                found_todays_attempt = attempt
-                break
+    # Check if user already attempted today's quiz (single lookup on (user_id, quiz_id))
+    found_todays_attempt = education_handler.get_daily_quiz_attempt(user_id, actual_quiz_id_from_db)
     
     if found_todays_attempt:
         # If an attempt for today's quiz_id is found, return its details.
@@ -140,15 +142,8 @@ async def api_get_daily_quiz_attempt_today(current_user: AuthenticatedUser = Dep
             selected_answer=None
         )
 
-    # 2. Fetch all user's quiz attempts
-    all_user_attempts = education_handler.get_daily_quiz_attempts(user_id)
-    found_todays_attempt_details = None
-    if all_user_attempts:
-        for attempt in all_user_attempts:
-            # Ensure 'quiz_id' exists in attempt dictionary
-            if attempt.get('quiz_id') == actual_quiz_id_from_db:
-                found_todays_attempt_details = attempt
-                break
+    # 2. Fetch the user's attempt for today's quiz (single lookup on (user_id, quiz_id))
+    found_todays_attempt_details = education_handler.get_daily_quiz_attempt(user_id, actual_quiz_id_from_db)
     
     if found_todays_attempt_details:
         # An attempt for today's specific quiz ID was found
@@ -191,6 +186,18 @@ async def api_get_roadmap_steps(roadmap_id: int, current_user: AuthenticatedUser
     else:
         raise HTTPException(status_code=500, detail=f"Could not fetch steps for roadmap {roadmap_id}")
 
+@router.get("/roadmap/{roadmap_id}/full")
+async def api_get_roadmap_full(roadmap_id: int, current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Roadmap, steps and quizzes including the user's progress in one response."""
+    try:
+        roadmap_view = roadmap_handler.get_roadmap_view(current_user.id, roadmap_id)
+    except Exception as e:
+        logger.error(f"Error building roadmap view for roadmap {roadmap_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Could not load roadmap {roadmap_id}")
+    if roadmap_view is None:
+        raise HTTPException(status_code=404, detail=f"Roadmap {roadmap_id} not found")
+    return {"success": True, **roadmap_view}
+
 
 @router.post("/roadmap/quiz/attempt", response_model=RoadmapQuizAttemptResponse)
 async def api_submit_roadmap_quiz_attempt(
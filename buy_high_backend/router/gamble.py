@@ -2,10 +2,11 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 import sys
 import os
-import random
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
-from database.handler.postgres.postgres_db_handler import update_user_balance, get_user_by_id
+from database.handler.postgres.postgres_balance_handler import apply_balance_delta, USER_NOT_FOUND, INSUFFICIENT_FUNDS
+import utils.events as events
 from ..auth_utils import get_current_user, AuthenticatedUser
+from ..utils import slots_engine
 
 class CoinFlipResult(BaseModel):
     Success: bool
@@ -24,250 +25,133 @@ class SlotsResult(BaseModel):
 
 router = APIRouter()
 
-# Slots symbols and their weights (higher weight = more common)
-# Adjusted for higher win probability
-SLOTS_SYMBOLS = {
-    "🍒": {"weight": 40, "multiplier": 2},   # Cherry - very common, low payout
-    "🍋": {"weight": 35, "multiplier": 3},   # Lemon - more common
-    "🍊": {"weight": 30, "multiplier": 4},   # Orange - common
-    "🍇": {"weight": 25, "multiplier": 5},   # Grapes - fairly common
-    "⭐": {"weight": 15, "multiplier": 8},    # Star - less rare, high payout
-    "💎": {"weight": 5, "multiplier": 20}     # Diamond - rare but more common, highest payout
-}
+# Odds and payouts live in utils/slots_engine.py (precomputed tables, also used by
+# `python -m buy_high_backend.utils.slots_engine simulate` to tune them)
+SLOTS_SYMBOLS = slots_engine.SLOTS_SYMBOLS
 
 def get_weighted_symbol():
     """Get a random symbol based on weights"""
-    symbols = list(SLOTS_SYMBOLS.keys())
-    weights = [SLOTS_SYMBOLS[symbol]["weight"] for symbol in symbols]
-    return random.choices(symbols, weights=weights)[0]
+    table = slots_engine.DEFAULT_TABLE
+    return table.symbols[table.draw()]
 
 def calculate_slots_win(reels: list[str], bet: int) -> tuple[int, int]:
     """Calculate win amount and multiplier for slots result"""
-    # Count occurrences of each symbol
-    symbol_counts = {}
-    for symbol in reels:
-        symbol_counts[symbol] = symbol_counts.get(symbol, 0) + 1
-    
-    # Check for winning combinations
-    max_count = max(symbol_counts.values())
-    is_win = max_count >= 2  # Win if any symbol appears 2 or more times
-    multiplier = 0
-    win_amount = 0
-    
-    if is_win:
-        # Find the symbol with the highest count
-        for symbol, count in symbol_counts.items():
-            if count >= 3:  # 3 matching symbols = full payout
-                multiplier = SLOTS_SYMBOLS[symbol]["multiplier"]
-                win_amount = bet * multiplier
-                break
-            elif count == 2:  # 2 matching symbols = half payout
-                multiplier = SLOTS_SYMBOLS[symbol]["multiplier"] * 0.5
-                win_amount = int(bet * multiplier)
-                break
-    
-    return win_amount, multiplier
+    table = slots_engine.DEFAULT_TABLE
+    return table.win_amount([table.index[symbol] for symbol in reels], bet)
 
-@router.get("/gamble/test", tags=["Gamble"])
-async def test_gamble_route():
-    return {"message": "Gamble router test successful"}
-
-@router.post("/gamble/coinflip", tags=["Gamble"])
-async def record_coin_flip_result(result: CoinFlipResult, current_user: AuthenticatedUser = Depends(get_current_user)):
-    success = result.Success
-    bet = result.bet
-    profit = result.profit
-    
-    # Hole die aktuelle Balance aus der Datenbank
-    user_data = get_user_by_id(current_user.id)
-    if not user_data:
+def _balance_error(update):
+    """Fehlerantwort für ein fehlgeschlagenes apply_balance_delta."""
+    if update["reason"] == USER_NOT_FOUND:
         return {
             "status": "error",
             "message": "User not found",
             "balance_updated": False
         }
-    
-    current_balance = user_data.get('balance', 0) if user_data else 0
-    
-    # Validiere den Einsatz gegen die aktuelle Balance
-    if bet > current_balance:
-        return {
-            "status": "error",
-            "message": "Insufficient balance for bet",
-            "current_balance": current_balance,
-            "balance_updated": False
-        }
-    
-    # Berechne neuen Balance basierend auf dem Ergebnis
-    if success:
-        new_balance = current_balance + profit
-    else:
-        new_balance = current_balance - bet
-    
-    # Verhindere negative Balance (sollte durch vorherige Validierung bereits abgefangen sein)
-    if new_balance < 0:
+    if update["reason"] == INSUFFICIENT_FUNDS:
         return {
             "status": "error",
             "message": "Insufficient balance for bet",
-            "current_balance": current_balance,
+            "current_balance": update["balance"],
             "balance_updated": False
         }
+    return {
+        "status": "error",
+        "message": "Failed to update user balance",
+        "balance_updated": False
+    }
+
+@router.get("/gamble/test", tags=["Gamble"])
+async def test_gamble_route():
+    return {"message": "Gamble router test successful"}
+
+@router.post("/gamble/coinflip", tags=["Gamble"])
+def record_coin_flip_result(result: CoinFlipResult, current_user: AuthenticatedUser = Depends(get_current_user)):
+    success = result.Success
+    bet = result.bet
+    profit = result.profit
     
-    # Aktualisiere die Balance in der Datenbank
-    update_success = update_user_balance(current_user.id, new_balance)
-    
-    if update_success:
-        return {
-            "status": "success", 
-            "received_data": result,
-            "old_balance": current_balance,
-            "new_balance": new_balance,
-            "balance_updated": True
-        }
-    else:
-        return {
-            "status": "error",
-            "message": "Failed to update user balance",
-            "balance_updated": False
-        }
+    # Einsatz und Ergebnis in einer Anweisung verbuchen; der Kontostand muss den Einsatz decken
+    update = apply_balance_delta(current_user.id, profit if success else -bet, required=bet)
+    if not update["success"]:
+        return _balance_error(update)
+    
+    if success and profit > 0:
+        events.publish(events.GAMBLE_WIN, user_id=current_user.id, game='coinflip', bet=bet, payout=profit, multiplier=profit / bet if bet else 0)
+    return {
+        "status": "success", 
+        "received_data": result,
+        "old_balance": update["old_balance"],
+        "new_balance": update["new_balance"],
+        "balance_updated": True
+    }
 
 @router.post("/gamble/slots", tags=["Gamble"])
-async def record_slots_result(result: SlotsResult, current_user: AuthenticatedUser = Depends(get_current_user)):
+def record_slots_result(result: SlotsResult, current_user: AuthenticatedUser = Depends(get_current_user)):
     success = result.Success
     bet = result.bet
     profit = result.profit
     symbols = result.symbols
     multiplier = result.multiplier
     
-    # Hole die aktuelle Balance aus der Datenbank
-    user_data = get_user_by_id(current_user.id)
-    if not user_data:
-        return {
-            "status": "error",
-            "message": "User not found",
-            "balance_updated": False
-        }
-    
-    current_balance = user_data.get('balance', 0) if user_data else 0
-    
-    # Validiere den Einsatz gegen die aktuelle Balance
-    if bet > current_balance:
-        return {
-            "status": "error",
-            "message": "Insufficient balance for bet",
-            "current_balance": current_balance,
-            "balance_updated": False
-        }
-    
-    # Berechne neuen Balance basierend auf dem Ergebnis
-    if success:
-        new_balance = current_balance + profit
-    else:
-        new_balance = current_balance - bet
-    
-    # Verhindere negative Balance (sollte durch vorherige Validierung bereits abgefangen sein)
-    if new_balance < 0:
-        return {
-            "status": "error",
-            "message": "Insufficient balance for bet",
-            "current_balance": current_balance,
-            "balance_updated": False
-        }
-    
-    # Aktualisiere die Balance in der Datenbank
-    update_success = update_user_balance(current_user.id, new_balance)
-    
-    if update_success:
-        return {
-            "status": "success", 
-            "received_data": result,
-            "old_balance": current_balance,
-            "new_balance": new_balance,
-            "balance_updated": True,
-            "game_result": {
-                "symbols": symbols,
-                "multiplier": multiplier,
-                "won": success,
-                "payout": profit if success else 0
-            }
-        }
-    else:
-        return {
-            "status": "error",
-            "message": "Failed to update user balance",
-            "balance_updated": False
+    # Einsatz und Ergebnis in einer Anweisung verbuchen; der Kontostand muss den Einsatz decken
+    update = apply_balance_delta(current_user.id, profit if success else -bet, required=bet)
+    if not update["success"]:
+        return _balance_error(update)
+    
+    if success and profit > 0:
+        events.publish(events.GAMBLE_WIN, user_id=current_user.id, game='slots', bet=bet, payout=profit, multiplier=multiplier)
+    return {
+        "status": "success", 
+        "received_data": result,
+        "old_balance": update["old_balance"],
+        "new_balance": update["new_balance"],
+        "balance_updated": True,
+        "game_result": {
+            "symbols": symbols,
+            "multiplier": multiplier,
+            "won": success,
+            "payout": profit if success else 0
         }
+    }
 
 @router.post("/gamble/slots/play", tags=["Gamble"])
-async def play_slots(request: SlotsRequest, current_user: AuthenticatedUser = Depends(get_current_user)):
+def play_slots(request: SlotsRequest, current_user: AuthenticatedUser = Depends(get_current_user)):
     """Play slots game - server calculates the result"""
     bet = request.bet
     
-    # Hole die aktuelle Balance aus der Datenbank
-    user_data = get_user_by_id(current_user.id)
-    if not user_data:
-        return {
-            "status": "error",
-            "message": "User not found",
-            "balance_updated": False
-        }
-    
-    current_balance = user_data.get('balance', 0) if user_data else 0
-    
-    # Validiere den Einsatz gegen die aktuelle Balance
-    if bet > current_balance:
-        return {
-            "status": "error",
-            "message": "Insufficient balance for bet",
-            "current_balance": current_balance,
-            "balance_updated": False
-        }
-    
     if bet <= 0:
         return {
             "status": "error",
             "message": "Bet must be positive",
-            "current_balance": current_balance,
             "balance_updated": False
         }
     
-    # Generiere 3 zufällige Symbole
-    symbols = [get_weighted_symbol() for _ in range(3)]
-    
-    # Berechne Gewinn
-    win_amount, multiplier = calculate_slots_win(symbols, bet)
+    # Walzen drehen und Gewinn aus der vorberechneten Auszahlungstabelle lesen
+    table = slots_engine.DEFAULT_TABLE
+    reels = table.spin()
+    symbols = [table.symbols[i] for i in reels]
+    win_amount, multiplier = table.win_amount(reels, bet)
     is_win = win_amount > 0
+    profit = win_amount if is_win else 0
     
-    # Berechne neue Balance
-    if is_win:
-        new_balance = current_balance + win_amount
-        profit = win_amount
-    else:
-        new_balance = current_balance - bet
-        profit = 0
-    
-    # Aktualisiere die Balance in der Datenbank
-    update_success = update_user_balance(current_user.id, new_balance)
+    # Einsatz und Gewinn in einer Anweisung verbuchen; der Kontostand muss den Einsatz decken
+    update = apply_balance_delta(current_user.id, win_amount if is_win else -bet, required=bet)
+    if not update["success"]:
+        return _balance_error(update)
     
-    if update_success:
-        return {
-            "status": "success",
-            "old_balance": current_balance,
-            "new_balance": new_balance,
-            "balance_updated": True,
-            "game_result": {
-                "symbols": symbols,
-                "multiplier": multiplier,
-                "won": is_win,
-                "bet": bet,
-                "profit": profit,
-                "payout": win_amount
-            }
-        }
-    else:
-        return {
-            "status": "error",
-            "message": "Failed to update user balance",
-            "balance_updated": False
+    if is_win:
+        events.publish(events.GAMBLE_WIN, user_id=current_user.id, game='slots', bet=bet, payout=win_amount, multiplier=multiplier)
+    return {
+        "status": "success",
+        "old_balance": update["old_balance"],
+        "new_balance": update["new_balance"],
+        "balance_updated": True,
+        "game_result": {
+            "symbols": symbols,
+            "multiplier": multiplier,
+            "won": is_win,
+            "bet": bet,
+            "profit": profit,
+            "payout": win_amount
         }
-
+    }
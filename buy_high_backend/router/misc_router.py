@@ -3,9 +3,12 @@ Router for various smaller features.
 """
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from datetime import datetime
 import logging
 import utils.stock_data_api as stock_data
+import utils.market_data as market_data
+import utils.warmup as warmup
 from ..auth_utils import get_current_user, AuthenticatedUser
 from ..pydantic_models import FunnyTip, FunnyTipsResponse, StatusResponse
 
@@ -29,6 +32,17 @@ async def api_status(current_user: AuthenticatedUser = Depends(get_current_user)
         timestamp=datetime.now().isoformat()
     )
 
+@router.get("/status/market-data")
+def api_market_data_status(current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Health scores, circuit breaker state and remaining request budgets of the market data providers."""
+    return market_data.get_provider_health()
+
 @router.get("/health")
 async def api_health_check():
     return {"status": "ok", "message": "API is running."}
+
+@router.get("/ready")
+def api_readiness_check():
+    """Readiness probe for the load balancer: 503 until the startup warm-up has finished."""
+    report = warmup.get_status()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
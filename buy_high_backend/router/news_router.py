@@ -1,41 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import Optional
 import logging
 from ..auth_utils import get_current_user, AuthenticatedUser
 from ..pydantic_models import AssetResponse, AssetsListResponse, Asset
-from utils.stock_news import fetch_company_news, fetch_general_news
+import utils.news_service as news_service
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# News are served from the in-memory news service; handlers are sync so that a first
+# fetch of an unknown symbol waits in the threadpool instead of blocking the event loop.
+
 @router.get("/news/{symbol}/")
-async def api_news_for_asset(
+def api_news_for_asset(
     symbol: str,
+    request: Request,
+    response: Response,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
     current_user: AuthenticatedUser = Depends(get_current_user)
-) -> AssetResponse:
+):
     """API route to get news for a specific asset by symbol."""
     user_id = current_user.id
-    news = fetch_company_news(symbol, from_date, to_date)
+    try:
+        news, etag = news_service.get_company_news(symbol, from_date, to_date)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dates must be in YYYY-MM-DD format.")
     
     if not news:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No news found for asset {symbol}.")
-    
-    return AssetResponse(symbol=symbol, news=news)
+
+    if news_service.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return {"success": True, "symbol": symbol.upper(), "news": news}
+
+# Transformed general feed, rebuilt only when the feed's ETag changes
+_general_news_assets = {"etag": None, "assets": None}
 
 @router.get("/news/")
-async def api_news():
+def api_news(request: Request, response: Response):
     """API route to get news for all assets."""
-    news_data = fetch_general_news()
-    
-    # --- Temporäres Logging zur Überprüfung der Datenstruktur ---
-    logger.info(f"Raw news data from fetch_general_news: {news_data[:5] if news_data else 'No data'}") # Loggt die ersten 5 Elemente
-    # --- Ende temporäres Logging ---
+    news_data, etag = news_service.get_general_news("general")
 
     if not news_data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No news found for any assets.")
+
+    if news_service.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    cached = _general_news_assets
+    if cached["etag"] == etag:
+        return AssetsListResponse(success=True, assets=cached["assets"])
     
     transformed_assets = []
     if isinstance(news_data, list): # Sicherstellen, dass news_data eine Liste ist
@@ -102,6 +120,7 @@ async def api_news():
         logger.error(f"news_data is not a list as expected: {type(news_data)}")
         # Du könntest hier auch eine HTTPException auslösen, wenn das Format unerwartet ist
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected format for news data.")
-            
+
+    _general_news_assets.update(etag=etag, assets=transformed_assets)
     return AssetsListResponse(success=True, assets=transformed_assets)
 
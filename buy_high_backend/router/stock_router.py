@@ -3,9 +3,10 @@ from fastapi.responses import JSONResponse
 from typing import List, Optional
 from datetime import datetime, timedelta
 import logging
-import pandas as pd
-import yfinance as yf
 import utils.stock_data_api as stock_data
+import utils.market_data as market_data
+import utils.indicator_service as indicator_service
+import utils.downsample as downsample
 from ..auth_utils import get_current_user, AuthenticatedUser
 from ..pydantic_models import StockDataPoint
 
@@ -41,11 +42,31 @@ async def api_stock_data(
     symbol: str = 'AAPL',
     timeframe: str = '3M',
     fresh: bool = False,
+    max_points: Optional[int] = None,
+    chart: str = 'candle',
+    resample: Optional[str] = None,
     current_user: AuthenticatedUser = Depends(get_current_user)
 ):
+    """
+    OHLCV bars for a chart. Optional:
+        resample=weekly|monthly   aggregate the daily bars of 'ALL' per week or month
+                                  (the timeframe is ignored)
+        max_points=N              at most N points: chart=candle merges consecutive bars into
+                                  OHLC buckets, chart=line keeps the LTTB selection of the closes
+    """
     user_id_for_analytics = current_user.id if current_user else None
     logger.info(f"Accessing /stock-data for user: {user_id_for_analytics}. Symbol: {symbol}, Timeframe: {timeframe}, Fresh: {fresh}")
 
+    if max_points is not None and max_points < 3:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="max_points must be at least 3.")
+    if chart not in downsample.CHART_TYPES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"chart must be one of {', '.join(downsample.CHART_TYPES)}.")
+    if resample is not None and resample not in downsample.RESAMPLE_PERIODS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"resample must be one of {', '.join(downsample.RESAMPLE_PERIODS)}.")
+    if resample:
+        # Weekly/monthly candles over the full daily history (the 'ALL' cache entry)
+        timeframe = 'ALL'
+
     end_date_dt = datetime.now()
     start_date_dt = None
     period_param_for_1min = None
@@ -103,31 +124,17 @@ async def api_stock_data(
                 logger.error(f"Data for {symbol} is missing one or more required columns. Available: {list(df.columns)}")
                 raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Data processing error: Missing columns for {symbol}')
 
-            for index, row in df.iterrows():
-                try:
-                    timestamp_to_format = index.tz_localize(None) if index.tzinfo else index
-                    
-                    open_price = float(row['Open']) if pd.notna(row['Open']) else None
-                    high_price = float(row['High']) if pd.notna(row['High']) else None
-                    low_price = float(row['Low']) if pd.notna(row['Low']) else None
-                    close_price = float(row['Close']) if pd.notna(row['Close']) else None
-                    volume = int(row['Volume']) if pd.notna(row['Volume']) else None
-
-                    if any(v is None for v in [open_price, high_price, low_price, close_price, volume]):
-                        logger.warning(f"Skipping row for {symbol} at {index} due to missing critical data.")
-                        continue
-
-                    data.append(StockDataPoint(
-                        date=timestamp_to_format.strftime('%Y-%m-%dT%H:%M:%S'),
-                        open=open_price, high=high_price, low=low_price, close=close_price, volume=volume, currency='USD'
-                    ))
-                except (ValueError, TypeError) as e:
-                    logger.error(f"Error converting row data for {symbol} at {index}: {e}. Row: {row.to_dict()}")
-                    continue
+            # The last close of the full series updates the asset price, whatever the chart shows
+            latest_close = df['Close'].dropna()
+            latest_close = float(latest_close.iloc[-1]) if not latest_close.empty else None
+            if resample:
+                df = downsample.resample(df, resample)
+            df = downsample.downsample(df, max_points, chart)
+            data = downsample.frame_to_points(df)
         
-        if not is_demo_data and len(data) > 0 and data[-1].close is not None:
+        if not is_demo_data and len(data) > 0 and latest_close is not None:
             try:
-                update_asset_price_in_db(symbol, float(data[-1].close), user_id_for_analytics)
+                update_asset_price_in_db(symbol, latest_close, user_id_for_analytics)
             except Exception as e:
                 logger.error(f"Error updating asset price in database: {e}")
         
@@ -139,8 +146,28 @@ async def api_stock_data(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.get("/indicators")
+def api_indicators(
+    symbol: str = 'AAPL',
+    tf: str = '3M',
+    ind: str = 'sma:20',
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """
+    Technical indicators over the same bars as /stock-data, e.g.
+    /indicators?symbol=AAPL&tf=1Y&ind=sma:20,ema:50,rsi:14,macd,bbands
+    """
+    try:
+        return indicator_service.get_indicators(symbol, tf, ind)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error computing indicators {ind} for {symbol} timeframe {tf}: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not compute indicators.")
+
+
 @router.get("/simple-stock-price")
-async def get_simple_stock_price(
+def get_simple_stock_price(
     symbol: str,
     current_user: AuthenticatedUser = Depends(get_current_user)
 ):
@@ -149,19 +176,16 @@ async def get_simple_stock_price(
     logger.info(f"Accessing /simple-stock-price for user: {user_id_for_analytics}. Symbol: {symbol}")
     
     try:
-        # Yahoo Finance verwenden für aktuellen Preis
-        ticker = yf.Ticker(symbol.upper())
-        hist = ticker.history(period="1d")
-        
-        if hist.empty:
-            logger.warning(f"No data found for symbol: {symbol}")
+        # Aktueller Preis über die Market-Data-Schicht (Deadlines, Circuit Breaker, Failover)
+        try:
+            current_price = round(market_data.get_quote(symbol.upper()), 2)
+        except market_data.MarketDataError as e:
+            logger.warning(f"No data found for symbol {symbol}: {e}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No data found for symbol: {symbol}"
             )
         
-        current_price = round(float(hist['Close'].iloc[-1]), 2)
-        
         # Optional: Preis in Datenbank aktualisieren
         try:
             update_asset_price_in_db(symbol.upper(), current_price, user_id_for_analytics)
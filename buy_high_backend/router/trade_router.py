@@ -3,16 +3,19 @@ Router for trading functionality (buying/selling).
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
 import logging
 import database.handler.postgres.postgre_transactions_handler as transactions_handler
+import database.handler.postgres.postgres_orders_handler as orders_handler
+import utils.order_engine as order_engine
 from ..auth_utils import get_current_user, AuthenticatedUser
-from ..pydantic_models import TradeRequest
+from ..pydantic_models import TradeRequest, OrderRequest
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/trade/buy")
-async def api_buy_stock(trade_data: TradeRequest, current_user: AuthenticatedUser = Depends(get_current_user)):
+def api_buy_stock(trade_data: TradeRequest, current_user: AuthenticatedUser = Depends(get_current_user)):
     """API route for buying stocks"""
     user_id = current_user.id
 
@@ -26,7 +29,7 @@ async def api_buy_stock(trade_data: TradeRequest, current_user: AuthenticatedUse
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result.get("message", "Buy operation failed."))
 
 @router.post("/trade/sell")
-async def api_sell_stock(trade_data: TradeRequest, current_user: AuthenticatedUser = Depends(get_current_user)):
+def api_sell_stock(trade_data: TradeRequest, current_user: AuthenticatedUser = Depends(get_current_user)):
     """API route for selling stocks"""
     user_id = current_user.id
 
@@ -39,6 +42,34 @@ async def api_sell_stock(trade_data: TradeRequest, current_user: AuthenticatedUs
     else:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result.get("message", "Sell operation failed."))
 
+@router.post("/trade/orders")
+def api_place_order(order: OrderRequest, current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Place a pending limit, stop or stop-limit order"""
+    result = order_engine.place_order(
+        current_user.id, order.symbol, order.side, order.order_type, order.quantity,
+        limit_price=order.limit_price, stop_price=order.stop_price
+    )
+    if result.get("success"):
+        return result
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=result.get("message", "Order could not be placed."))
+
+@router.get("/trade/orders")
+def api_get_orders(status_filter: Optional[str] = None, current_user: AuthenticatedUser = Depends(get_current_user)):
+    """The user's orders, newest first (optionally only one status, e.g. ?status_filter=open)"""
+    try:
+        return {"success": True, "orders": orders_handler.get_user_orders(current_user.id, status_filter)}
+    except Exception as e:
+        logger.error(f"Error loading orders for user {current_user.id}: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not load orders.")
+
+@router.delete("/trade/orders/{order_id}")
+def api_cancel_order(order_id: int, current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Cancel an order that has not been executed yet"""
+    result = order_engine.cancel_order(current_user.id, order_id)
+    if result.get("success"):
+        return result
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=result.get("message", "Order not found."))
+
 @router.get("/trade/{symbol}/")
 async def api_stock_data_symbol_dummy(symbol: str, current_user: AuthenticatedUser = Depends(get_current_user)):
     """Dummy API route for stock data by symbol"""
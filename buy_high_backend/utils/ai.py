@@ -1,38 +1,67 @@
+import os
 import requests
 import json
 from typing import Optional, Dict, Any, Tuple
 
-def generate_finance_response(prompt: str) -> Optional[str]:
+from . import ai_cache, rag_index
+
+# Chat-completions endpoint (overridable, e.g. to point at utils/fake_completion_server.py in tests)
+CHAT_COMPLETIONS_URL = os.getenv("AI_CHAT_COMPLETIONS_URL", "https://ai.hackclub.com/chat/completions")
+
+# Finance-focused system message
+FINANCE_SYSTEM_PROMPT = (
+    "You are a financial analysis assistant. Provide accurate and helpful information "
+    "only on finance-related topics such as investing, trading, markets, economics, "
+    "cryptocurrencies, stocks, and personal finance. If asked about non-financial topics, "
+    "politely redirect to financial matters. Keep responses concise, data-driven, and "
+    "educational. Never provide investment advice that could be interpreted as financial "
+    "advice. Always maintain a professional tone."
+)
+
+def build_finance_messages(prompt: str, use_context: bool = True) -> list:
+    """
+    Build the chat messages (system + user) for a finance prompt.
+
+    With use_context, the most relevant BuyHigh.io lesson passages from the
+    retrieval index (utils/rag_index.py) are added to the user message. The
+    system message stays identical for every request so it can be cached upstream.
+    """
+    content = prompt
+    if use_context:
+        passages = rag_index.retrieve(prompt)
+        if passages:
+            context = "\n".join(f"[{i}] {p['text']}" for i, p in enumerate(passages, 1))
+            content = (
+                "Relevant BuyHigh.io lesson content (use it if it helps answer the question):\n"
+                f"{context}\n\nQuestion: {prompt}"
+            )
+    return [
+        {"role": "system", "content": FINANCE_SYSTEM_PROMPT},
+        {"role": "user", "content": content}
+    ]
+
+def generate_finance_response(prompt: str, use_cache: bool = True, use_context: bool = True) -> Optional[str]:
     """
     Generate a finance-focused AI response using the Hack Club AI API.
     
     Args:
         prompt (str): The user's financial query
+        use_cache (bool): Answer repeated/similar questions from utils/ai_cache.py
+        use_context (bool): Add relevant lesson passages from utils/rag_index.py
         
     Returns:
         Optional[str]: The AI-generated response or None if the request failed
     """
-    endpoint = "https://ai.hackclub.com/chat/completions"
-    
-    # Finance-focused system message
-    system_message = {
-        "role": "system",
-        "content": (
-            "You are a financial analysis assistant. Provide accurate and helpful information "
-            "only on finance-related topics such as investing, trading, markets, economics, "
-            "cryptocurrencies, stocks, and personal finance. If asked about non-financial topics, "
-            "politely redirect to financial matters. Keep responses concise, data-driven, and "
-            "educational. Never provide investment advice that could be interpreted as financial "
-            "advice. Always maintain a professional tone."
-        )
-    }
+    if use_cache:
+        cached = ai_cache.get_cached_response(prompt)
+        if cached is not None:
+            return cached
+
+    endpoint = CHAT_COMPLETIONS_URL
     
     # Prepare request payload
     payload = {
-        "messages": [
-            system_message,
-            {"role": "user", "content": prompt}
-        ]
+        "messages": build_finance_messages(prompt, use_context=use_context)
     }
     
     try:
@@ -51,7 +80,10 @@ def generate_finance_response(prompt: str) -> Optional[str]:
         # Extract the content from response
         if "choices" in response_data and response_data["choices"]:
             if "message" in response_data["choices"][0]:
-                return response_data["choices"][0]["message"].get("content")
+                content = response_data["choices"][0]["message"].get("content")
+                if use_cache and content:
+                    ai_cache.store_response(prompt, content)
+                return content
         
         print(f"Unexpected response format: {response_data}")
         return None
@@ -67,50 +99,83 @@ def generate_finance_response(prompt: str) -> Optional[str]:
         return None
     
 
-def rate_portfolio(portfolio: Dict[str, Any], transactions: Dict[str, Any]) -> Optional[Tuple[float, str]]:
+def build_portfolio_rating_prompt(snapshot: Dict[str, Any]) -> str:
     """
-    Rates a user's portfolio and provides tips using an AI model.
+    Build a compact rating prompt from an aggregated portfolio snapshot
+    (see postgre_transactions_handler.get_portfolio_rating_snapshot).
 
-    Args:
-        portfolio (Dict[str, Any]): The user's portfolio data.
-        transactions (Dict[str, Any]): The user's recent transactions.
-
-    Returns:
-        Optional[Tuple[float, str]]: A tuple containing the rating (0-1) and a tip, or None on failure.
+    Positions are listed one per line with their portfolio weight, followed by
+    sector weights and the aggregated trading activity, instead of dumping the
+    raw portfolio and transaction JSON.
     """
-    try:
-        # Construct a detailed prompt for the AI
-        prompt = f"""
-        Analyze the following investment portfolio and recent transactions.
-        Provide a rating from 0.0 to 1.0, where 0.0 is very poor and 1.0 is excellent.
-        Also, provide a single, concise, actionable tip for improvement.
+    positions = snapshot.get("positions") or []
+    balance = float(snapshot.get("balance") or 0.0)
+    invested = sum(p["quantity"] * p["price"] for p in positions)
+    total = invested + balance
+
+    lines = [
+        "Rate this portfolio from 0.0 (very poor) to 1.0 (excellent) and give one concise, actionable tip.",
+        'Answer only with JSON: {"rating": <float>, "tip": "<string>"}',
+        f"Total {total:.0f}, cash {balance / total * 100 if total else 100:.0f}%, {len(positions)} positions:",
+    ]
+    sectors = {}
+    for p in sorted(positions, key=lambda p: p["quantity"] * p["price"], reverse=True):
+        value = p["quantity"] * p["price"]
+        pnl = (p["price"] - p["average_price"]) / p["average_price"] * 100 if p["average_price"] else 0.0
+        lines.append(f"{p['symbol']} {p['type']} {value / total * 100 if total else 0:.1f}% pnl {pnl:+.0f}%")
+        sector = p.get("sector") or p["type"]
+        sectors[sector] = sectors.get(sector, 0.0) + value
+    if sectors and total:
+        lines.append("Sectors: " + ", ".join(
+            f"{name} {value / total * 100:.0f}%" for name, value in sorted(sectors.items(), key=lambda i: -i[1])
+        ))
+
+    activity = snapshot.get("activity") or {}
+    days = snapshot.get("activity_days", 30)
+    if activity:
+        lines.append(f"Last {days}d: " + ", ".join(
+            f"{kind} {a['trades']} trades/{a['symbols']} symbols/{a['volume']:.0f}" for kind, a in sorted(activity.items())
+        ))
+    else:
+        lines.append(f"No trades in the last {days}d")
+    return "\n".join(lines)
 
-        **Portfolio:**
-        {json.dumps(portfolio, indent=2)}
 
-        **Recent Transactions:**
-        {json.dumps(transactions, indent=2)}
+def _parse_rating_response(raw_response: str) -> Optional[Tuple[float, str]]:
+    # Models sometimes wrap the JSON in prose or code fences: parse the outermost object
+    start, end = raw_response.find("{"), raw_response.rfind("}")
+    if start == -1 or end <= start:
+        print(f"No JSON object in AI response: {raw_response}")
+        return None
+    response_data = json.loads(raw_response[start:end + 1])
+    rating = response_data.get("rating")
+    tip = response_data.get("tip")
+    if isinstance(rating, (float, int)) and isinstance(tip, str):
+        return min(1.0, max(0.0, float(rating))), tip
+    print(f"Invalid format in AI response: {response_data}")
+    return None
 
-        Return the analysis in the following JSON format:
-        {{"rating": <float_value>, "tip": "<string_tip>"}}
-        """
 
-        # Get the raw response from the AI
-        raw_response = generate_finance_response(prompt)
+def rate_portfolio(snapshot: Dict[str, Any]) -> Optional[Tuple[float, str]]:
+    """
+    Rates a user's portfolio and provides a tip using an AI model.
 
-        if not raw_response:
-            return None
+    Normally called by the background queue in utils/rating_queue.py, not inside a request.
 
-        # Parse the JSON response
-        response_data = json.loads(raw_response)
-        rating = response_data.get("rating")
-        tip = response_data.get("tip")
+    Args:
+        snapshot (Dict[str, Any]): Aggregated positions, cash balance and trading activity.
 
-        if isinstance(rating, (float, int)) and isinstance(tip, str):
-            return float(rating), tip
-        else:
-            print(f"Invalid format in AI response: {response_data}")
+    Returns:
+        Optional[Tuple[float, str]]: A tuple containing the rating (0-1) and a tip, or None on failure.
+    """
+    raw_response = None
+    try:
+        # Portfolios are user-specific (no cache) and need no lesson content
+        raw_response = generate_finance_response(build_portfolio_rating_prompt(snapshot),
+                                                  use_cache=False, use_context=False)
+        if not raw_response:
             return None
+        return _parse_rating_response(raw_response)
 
     except json.JSONDecodeError:
         print(f"Failed to parse AI response as JSON: {raw_response}")
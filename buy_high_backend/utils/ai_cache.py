@@ -0,0 +1,214 @@
+"""
+Response cache for the finance chatbot.
+
+Two lookup levels:
+1. Exact match on a normalised prompt (lower case, contractions expanded,
+   punctuation/articles removed, whitespace collapsed), e.g.
+   "What's a stock?" and "what is stock" share one entry.
+2. Semantic match: every cached prompt is embedded as a hashed word + character
+   n-gram vector; a new prompt reuses a cached answer if the cosine similarity
+   is above SIMILARITY_THRESHOLD. NumPy is used for the search if installed,
+   otherwise a pure-Python sparse dot product.
+
+Entries expire after CACHE_TTL seconds and the cache is bounded to
+CACHE_MAX_ENTRIES (least recently used entries are evicted first).
+"""
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from utils.lazy_imports import lazy_import
+
+# Optional and loaded on the first semantic search; without numpy the search runs in pure Python
+np = lazy_import("numpy", optional=True)
+
+CACHE_TTL = int(os.getenv("AI_CACHE_TTL", str(24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "2000"))
+SIMILARITY_THRESHOLD = float(os.getenv("AI_CACHE_SIMILARITY", "0.85"))
+MAX_CACHEABLE_PROMPT_LENGTH = 500   # long prompts are usually unique (context, portfolios, ...)
+VECTOR_DIM = 2048
+
+_CONTRACTIONS = {
+    "what's": "what is", "whats": "what is", "who's": "who is", "how's": "how is",
+    "where's": "where is", "it's": "it is", "that's": "that is", "there's": "there is",
+    "what're": "what are", "don't": "do not", "doesn't": "does not", "isn't": "is not",
+    "aren't": "are not", "can't": "cannot", "i'm": "i am", "should've": "should have",
+}
+# Whole words only: "whats" must not rewrite "whatsapp"
+_CONTRACTION_RE = re.compile(r"\b(" + "|".join(re.escape(c) for c in sorted(_CONTRACTIONS, key=len, reverse=True)) + r")\b")
+_STOPWORDS = {"a", "an", "the", "please", "pls", "me", "tell", "explain", "can", "you", "exactly", "actually"}
+# Question/filler words carry little meaning for similarity and get a low weight
+_QUESTION_WORDS = {"what", "is", "are", "how", "do", "does", "why", "when", "which", "who", "work",
+                   "mean", "meaning", "define", "definition", "of", "in", "for", "to", "and", "i", "my"}
+_TOKEN_RE = re.compile(r"[a-z0-9$€%.]+")
+
+
+def _stem(token: str) -> str:
+    # Light plural stemming ("stocks" -> "stock"), leaving short and question words alone
+    if token in _QUESTION_WORDS or len(token) <= 3 or not token.endswith("s") or token.endswith("ss"):
+        return token
+    return token[:-1]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalise a prompt for exact-match caching."""
+    text = prompt.lower().replace("’", "'")
+    text = _CONTRACTION_RE.sub(lambda match: _CONTRACTIONS[match.group(0)], text)
+    tokens = [_stem(t.strip(".")) for t in _TOKEN_RE.findall(text)]
+    return " ".join(t for t in tokens if t and t not in _STOPWORDS)
+
+
+def _hash_feature(feature: str):
+    """Map a feature to (bucket, sign); the sign keeps hash collisions from inflating similarity."""
+    value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "little")
+    return value % VECTOR_DIM, (1.0 if value & 0x80000000 else -1.0)
+
+
+def _add_feature(vector: dict, feature: str, weight: float):
+    index, sign = _hash_feature(feature)
+    vector[index] = vector.get(index, 0.0) + sign * weight
+
+
+def embed(normalized: str) -> dict:
+    """
+    Hashed bag of words plus character trigrams of the content words (for typos),
+    L2-normalised, as a sparse {index: weight} dict.
+    """
+    vector = {}
+    for word in normalized.split():
+        if word in _QUESTION_WORDS:
+            _add_feature(vector, "w:" + word, 0.3)
+            continue
+        _add_feature(vector, "w:" + word, 3.0)
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            _add_feature(vector, "c:" + padded[i:i + 3], 1.0)
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {k: v / norm for k, v in vector.items()}
+
+
+class _Entry:
+    __slots__ = ("answer", "created_at", "vector")
+
+    def __init__(self, answer, created_at, vector):
+        self.answer = answer
+        self.created_at = created_at
+        self.vector = vector
+
+
+_lock = threading.Lock()
+_entries = OrderedDict()        # normalised prompt -> _Entry (LRU order)
+_matrix = None                  # (keys, dense numpy matrix) for semantic search, rebuilt lazily
+_metrics = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+
+def _is_cacheable(prompt: str) -> bool:
+    return bool(prompt) and len(prompt) <= MAX_CACHEABLE_PROMPT_LENGTH
+
+
+def _drop(key):
+    global _matrix
+    del _entries[key]
+    _matrix = None
+
+
+def _semantic_search(vector: dict):
+    """Return (key, similarity) of the most similar live entry, or (None, 0.0)."""
+    global _matrix
+    if not _entries:
+        return None, 0.0
+    if np is not None:
+        if _matrix is None:
+            keys = list(_entries)
+            dense = np.zeros((len(keys), VECTOR_DIM), dtype=np.float32)
+            for row, key in enumerate(keys):
+                for index, weight in _entries[key].vector.items():
+                    dense[row, index] = weight
+            _matrix = (keys, dense)
+        keys, dense = _matrix
+        query = np.zeros(VECTOR_DIM, dtype=np.float32)
+        for index, weight in vector.items():
+            query[index] = weight
+        scores = dense @ query
+        best = int(np.argmax(scores))
+        return keys[best], float(scores[best])
+
+    best_key, best_score = None, 0.0
+    for key, entry in _entries.items():
+        small, large = (vector, entry.vector) if len(vector) < len(entry.vector) else (entry.vector, vector)
+        score = sum(weight * large.get(index, 0.0) for index, weight in small.items())
+        if score > best_score:
+            best_key, best_score = key, score
+    return best_key, best_score
+
+
+def get_cached_response(prompt: str) -> Optional[str]:
+    """Return a cached answer for the prompt (exact or semantically similar), or None."""
+    if not _is_cacheable(prompt):
+        return None
+    key = normalize_prompt(prompt)
+    now = time.time()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            if now - entry.created_at <= CACHE_TTL:
+                _entries.move_to_end(key)
+                _metrics["exact_hits"] += 1
+                return entry.answer
+            _drop(key)
+            _metrics["expired"] += 1
+
+        match_key, similarity = _semantic_search(embed(key))
+        if match_key is not None and similarity >= SIMILARITY_THRESHOLD:
+            match = _entries[match_key]
+            if now - match.created_at <= CACHE_TTL:
+                _entries.move_to_end(match_key)
+                _metrics["semantic_hits"] += 1
+                return match.answer
+            _drop(match_key)
+            _metrics["expired"] += 1
+
+        _metrics["misses"] += 1
+        return None
+
+
+def store_response(prompt: str, answer: str):
+    """Cache an answer for the prompt (no-op for empty answers or uncacheable prompts)."""
+    global _matrix
+    if not answer or not _is_cacheable(prompt):
+        return
+    key = normalize_prompt(prompt)
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+        _entries[key] = _Entry(answer, time.time(), embed(key))
+        _matrix = None
+        _metrics["stores"] += 1
+        while len(_entries) > CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _metrics["evictions"] += 1
+
+
+def clear_cache():
+    global _matrix
+    with _lock:
+        _entries.clear()
+        _matrix = None
+
+
+def get_cache_metrics() -> dict:
+    """Hit/miss counters, hit rate and current size."""
+    with _lock:
+        hits = _metrics["exact_hits"] + _metrics["semantic_hits"]
+        lookups = hits + _metrics["misses"]
+        return {
+            **_metrics,
+            "entries": len(_entries),
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "semantic_search": "numpy" if np is not None else "python",
+        }
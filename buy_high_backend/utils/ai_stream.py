@@ -0,0 +1,163 @@
+"""
+Streaming chat completions for the finance chatbot.
+
+Proxies the upstream chat-completions API with `"stream": true` and yields the
+text deltas as they arrive. All requests of a worker share one pooled
+httpx.AsyncClient, and the number of concurrent upstream streams per worker is
+bounded by a semaphore. Time-to-first-token (TTFT) and stream durations are
+recorded for the metrics endpoint.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from .ai import CHAT_COMPLETIONS_URL, build_finance_messages
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_STREAMS = int(os.getenv("AI_MAX_CONCURRENT_STREAMS", "8"))
+STREAM_ACQUIRE_TIMEOUT = 2.0     # seconds to wait for a free stream slot before rejecting
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 30.0              # max silence between two upstream chunks
+METRICS_WINDOW = 1000            # number of recent streams used for percentiles
+
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+_metrics = {
+    "started": 0,
+    "completed": 0,
+    "failed": 0,
+    "cancelled": 0,
+    "rejected": 0,
+    "active": 0,
+}
+_ttft_ms = deque(maxlen=METRICS_WINDOW)
+_duration_ms = deque(maxlen=METRICS_WINDOW)
+
+
+class StreamBusyError(Exception):
+    """Raised when no stream slot becomes free within STREAM_ACQUIRE_TIMEOUT."""
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the worker-wide pooled HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=MAX_CONCURRENT_STREAMS * 2,
+                                max_keepalive_connections=MAX_CONCURRENT_STREAMS),
+            headers={"Content-Type": "application/json"},
+        )
+    return _client
+
+
+async def close_client():
+    """Close the pooled client (call on application shutdown)."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENT_STREAMS)
+    return _semaphore
+
+
+async def acquire_stream_slot():
+    """Reserve one upstream stream slot; raises StreamBusyError if the worker is saturated."""
+    try:
+        await asyncio.wait_for(_get_semaphore().acquire(), timeout=STREAM_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        _metrics["rejected"] += 1
+        raise StreamBusyError("Too many concurrent chatbot streams")
+
+
+def release_stream_slot():
+    _get_semaphore().release()
+
+
+def _parse_sse_data(line: str) -> Optional[str]:
+    """Extract the text delta from one SSE `data:` line of an OpenAI-style stream."""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    chunk = json.loads(data)
+    choices = chunk.get("choices") or []
+    if not choices:
+        return None
+    delta = choices[0].get("delta") or choices[0].get("message") or {}
+    return delta.get("content")
+
+
+async def stream_finance_response(prompt: str) -> AsyncIterator[str]:
+    """
+    Stream the answer to a finance prompt as text deltas.
+
+    The caller must hold a stream slot (acquire_stream_slot). Closing the generator
+    (e.g. on client disconnect) closes the upstream response immediately.
+    """
+    payload = {"messages": build_finance_messages(prompt), "stream": True}
+    started = time.perf_counter()
+    first_token_at = None
+    outcome = "failed"
+    _metrics["started"] += 1
+    _metrics["active"] += 1
+    try:
+        async with get_client().stream("POST", CHAT_COMPLETIONS_URL, json=payload) as response:
+            response.raise_for_status()
+            if "text/event-stream" in response.headers.get("content-type", ""):
+                async for line in response.aiter_lines():
+                    delta = _parse_sse_data(line)
+                    if delta:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        yield delta
+            else:
+                # Upstream ignored "stream": deliver the full completion as one chunk
+                body = json.loads(await response.aread())
+                content = (body.get("choices") or [{}])[0].get("message", {}).get("content")
+                if content:
+                    first_token_at = time.perf_counter()
+                    yield content
+        outcome = "completed"
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    finally:
+        _metrics["active"] -= 1
+        _metrics[outcome] += 1
+        if first_token_at is not None:
+            _ttft_ms.append((first_token_at - started) * 1000)
+        if outcome == "completed":
+            _duration_ms.append((time.perf_counter() - started) * 1000)
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 1)
+
+
+def get_stream_metrics() -> dict:
+    """Counters and TTFT/duration percentiles (ms) over the last METRICS_WINDOW streams."""
+    return {
+        **_metrics,
+        "max_concurrent_streams": MAX_CONCURRENT_STREAMS,
+        "ttft_ms": {"p50": _percentile(_ttft_ms, 50), "p95": _percentile(_ttft_ms, 95), "samples": len(_ttft_ms)},
+        "duration_ms": {"p50": _percentile(_duration_ms, 50), "p95": _percentile(_duration_ms, 95), "samples": len(_duration_ms)},
+    }
@@ -1,7 +1,6 @@
-import firebase_admin
-from firebase_admin import credentials, auth as firebase_auth_module
 import os
 import logging
+import threading
 
 # Logger für dieses Modul. Verwende den gleichen Logger-Namen wie in router/__init__.py
 # oder einen spezifischen für utils.auth, falls gewünscht.
@@ -21,6 +20,8 @@ def initialize_firebase_app():
     Initialisiert die Firebase Admin App, falls noch nicht geschehen.
     Verlässt sich primär auf die Umgebungsvariable GOOGLE_APPLICATION_CREDENTIALS.
     """
+    import firebase_admin
+    from firebase_admin import credentials
     if not firebase_admin._apps:
         try:
             cred_path_env = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
@@ -56,15 +57,26 @@ def initialize_firebase_app():
         except Exception as e:
             logger.critical(f"UTILS.AUTH: Kritischer Fehler bei der Initialisierung von Firebase Admin SDK: {e}", exc_info=True)
 
-# Initialisiere Firebase, wenn dieses Modul importiert wird.
-# Da main.py die Umgebungsvariable vorher setzt, sollte dies jetzt funktionieren.
-initialize_firebase_app()
+# Firebase wird erst beim ersten Aufruf importiert und initialisiert, nicht beim Import
+# dieses Moduls (schneller Start, kein Netzwerk-/Dateizugriff beim Laden der Router).
+_firebase_lock = threading.Lock()
+
+def get_firebase_admin():
+    """Gibt das firebase_admin-Modul zurück und initialisiert die App beim ersten Aufruf."""
+    import firebase_admin
+    from firebase_admin import auth  # noqa: F401 - macht firebase_admin.auth verfügbar
+    if not firebase_admin._apps:
+        with _firebase_lock:
+            initialize_firebase_app()
+    return firebase_admin
 
 def create_firebase_user(email: str, password: str, display_name: str = None):
     """
     Erstellt einen neuen Benutzer in Firebase Authentication.
     """
     logger.info(f"UTILS.AUTH: create_firebase_user aufgerufen für E-Mail: {email}")
+    firebase_admin = get_firebase_admin()
+    firebase_auth_module = firebase_admin.auth
     if not firebase_admin._apps:
         logger.error("UTILS.AUTH: Firebase App nicht initialisiert. Benutzererstellung nicht möglich.")
         raise ConnectionError("Firebase ist nicht initialisiert. Benutzererstellung fehlgeschlagen.")
@@ -102,6 +114,7 @@ def login_firebase_user_rest(email: str, password: str):
     Diese Funktion ist hier als Platzhalter oder für einen spezifischen serverseitigen Anwendungsfall.
     """
     logger.info(f"UTILS.AUTH: login_firebase_user_rest aufgerufen für E-Mail: {email}")
+    firebase_admin = get_firebase_admin()
     if not firebase_admin._apps:
         logger.error("UTILS.AUTH: Firebase App nicht initialisiert. Anmeldung nicht möglich.")
         raise ConnectionError("Firebase ist nicht initialisiert. Anmeldung fehlgeschlagen.")
@@ -130,6 +143,8 @@ def verify_firebase_id_token(id_token: str):
     logger.debug(f"UTILS.AUTH: Token to verify (first 100 chars): {id_token[:100]}...")
     logger.debug(f"UTILS.AUTH: Token length: {len(id_token)}")
     
+    firebase_admin = get_firebase_admin()
+    firebase_auth_module = firebase_admin.auth
     if not firebase_admin._apps:
         logger.error("UTILS.AUTH: Firebase App nicht initialisiert. Token-Überprüfung nicht möglich.")
         return None
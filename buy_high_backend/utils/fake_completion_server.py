@@ -0,0 +1,98 @@
+"""
+Local fake chat-completions server for testing the chatbot without the real AI API.
+
+Implements POST /chat/completions in the OpenAI format, both streaming (SSE, when
+the request contains "stream": true) and non-streaming. Only the standard library
+is used, so it runs without extra dependencies.
+
+Usage:
+    python -m buy_high_backend.utils.fake_completion_server --port 8765 --delay 0.05
+    export AI_CHAT_COMPLETIONS_URL=http://127.0.0.1:8765/chat/completions
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "Diversification spreads risk across assets, sectors and regions. "
+    "Consider costs, time horizon and risk tolerance before investing."
+)
+
+
+def make_handler(reply=DEFAULT_REPLY, first_token_delay=0.2, token_delay=0.05):
+    class FakeCompletionHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # keep test output quiet
+            pass
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/chat/completions":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if request.get("stream"):
+                self._stream()
+            else:
+                self._complete()
+
+        def _complete(self):
+            time.sleep(first_token_delay)
+            body = json.dumps({
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}]
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(first_token_delay)
+            try:
+                for i, word in enumerate(reply.split(" ")):
+                    token = word if i == 0 else " " + word
+                    chunk = {"object": "chat.completion.chunk",
+                             "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                    time.sleep(token_delay)
+                self._write_chunk("data: [DONE]\n\n")
+                self._write_chunk("")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client went away (e.g. cancelled stream)
+
+        def _write_chunk(self, text):
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return FakeCompletionHandler
+
+
+def start_fake_server(port=0, **handler_options):
+    """Start the server on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(**handler_options))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake chat-completions server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--delay", type=float, default=0.05, help="delay between tokens")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port),
+                                 make_handler(first_token_delay=args.first_token_delay, token_delay=args.delay))
+    print(f"Fake completion server on http://127.0.0.1:{args.port}/chat/completions")
+    server.serve_forever()
@@ -0,0 +1,288 @@
+"""
+Retrieval index over the curated learning content for the finance chatbot.
+
+The roadmap steps, roadmap quizzes and past daily quizzes are chunked and
+embedded into an on-disk index:
+
+    <RAG_INDEX_DIR>/manifest.json          sources, content hashes, row mapping
+    <RAG_INDEX_DIR>/vectors-<gen>.npy      float16 matrix (rows x VECTOR_DIM), memory-mapped
+    <RAG_INDEX_DIR>/passages-<gen>.jsonl   one passage per row
+
+Embeddings are the hashed word/character n-gram vectors from ai_cache, so no
+model has to be loaded. Queries are answered with a brute-force dot product over
+the query's non-zero dimensions of the memory-mapped matrix (a few thousand
+passages take a few milliseconds).
+
+Re-indexing is incremental: every source row carries a content hash and only
+new or changed rows are re-embedded. It runs on CONTENT_CHANGED events, every
+REINDEX_INTERVAL seconds (to pick up changes made by other processes) and via
+
+    python -m buy_high_backend.utils.rag_index
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List
+
+from utils.lazy_imports import lazy_import
+from . import ai_cache
+
+# Loaded on the first search/reindex; without numpy the chatbot simply runs without retrieval
+np = lazy_import("numpy", optional=True)
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INDEX_DIR = os.getenv("RAG_INDEX_DIR", os.path.join(PROJECT_ROOT, "data", "rag_index"))
+EMBEDDING_VERSION = f"hashed-ngram-v1-{ai_cache.VECTOR_DIM}"
+CHUNK_CHARS = 600                 # target passage length
+TOP_K = 3
+MIN_SCORE = 0.2                   # passages below this cosine similarity are not injected
+RELOAD_CHECK_INTERVAL = 5.0       # seconds between manifest mtime checks
+REINDEX_INTERVAL = 600            # periodic incremental reindex in the background
+REINDEX_DEBOUNCE = 5.0            # seconds to wait after a content change before reindexing
+SEARCH_BLOCK_ROWS = 8192          # rows converted to float32 at a time during search
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+_lock = threading.Lock()
+_index = None                     # {'mtime', 'vectors', 'passages'} of the loaded generation
+_last_check = 0.0
+_reindex_event = threading.Event()
+_worker = None
+
+
+# --- Chunking and embedding ---
+
+def chunk_text(title: str, text: str) -> List[str]:
+    """Split a content row into passages of about CHUNK_CHARS at sentence boundaries."""
+    sentences = [s for s in _SENTENCE_RE.split((text or "").strip()) if s]
+    chunks, current = [], ""
+    for sentence in sentences:
+        if current and len(current) + len(sentence) + 1 > CHUNK_CHARS:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current or not chunks:
+        chunks.append(current)
+    # The title is part of every passage so short chunks keep their topic
+    return [f"{title}: {chunk}" if chunk else title for chunk in chunks]
+
+
+def embed_text(text: str):
+    """Dense float32 embedding (L2-normalised) of a passage or query."""
+    vector = np.zeros(ai_cache.VECTOR_DIM, dtype=np.float32)
+    for index, weight in ai_cache.embed(ai_cache.normalize_prompt(text)).items():
+        vector[index] = weight
+    return vector
+
+
+def _content_hash(row: Dict) -> str:
+    data = f"{EMBEDDING_VERSION}\x00{row['title']}\x00{row['text']}"
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+# --- Index files ---
+
+def _manifest_path():
+    return os.path.join(INDEX_DIR, "manifest.json")
+
+
+def _read_manifest():
+    try:
+        with open(_manifest_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _load_generation(manifest):
+    vectors = np.load(os.path.join(INDEX_DIR, manifest["vectors"]), mmap_mode="r")
+    with open(os.path.join(INDEX_DIR, manifest["passages"]), encoding="utf-8") as f:
+        passages = [json.loads(line) for line in f]
+    return vectors, passages
+
+
+def reindex(content: List[Dict] = None) -> Dict:
+    """
+    Incrementally rebuild the index from the current content rows.
+
+    Unchanged rows (same content hash) reuse their stored vectors; only new or
+    changed rows are chunked and embedded. Returns counts of reused/embedded/removed sources.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required to build the retrieval index")
+    if content is None:
+        import database.handler.postgres.postgre_roadmap_handler as roadmap_handler
+        content = roadmap_handler.get_indexable_content()
+
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    with open(os.path.join(INDEX_DIR, ".lock"), "w") as lock_file:
+        # One writer at a time across processes
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        old = _read_manifest()
+        if old and old.get("embedding") != EMBEDDING_VERSION:
+            old = None
+        old_vectors, old_passages = _load_generation(old) if old else (None, None)
+        old_sources = old["sources"] if old else {}
+
+        rows, passages, sources = [], [], {}
+        stats = {"reused": 0, "embedded": 0, "removed": 0}
+        for item in content:
+            source, digest = item["source"], _content_hash(item)
+            start = len(passages)
+            previous = old_sources.get(source)
+            if previous and previous["hash"] == digest:
+                first, count = previous["rows"]
+                rows.append(np.asarray(old_vectors[first:first + count], dtype=np.float16))
+                passages.extend(old_passages[first:first + count])
+                stats["reused"] += 1
+            else:
+                for chunk in chunk_text(item["title"], item["text"]):
+                    rows.append(embed_text(chunk).astype(np.float16)[None, :])
+                    passages.append({"source": source, "title": item["title"], "text": chunk})
+                stats["embedded"] += 1
+            sources[source] = {"hash": digest, "rows": [start, len(passages) - start]}
+        stats["removed"] = len(set(old_sources) - set(sources))
+
+        if stats["embedded"] == 0 and stats["removed"] == 0 and old is not None:
+            return {**stats, "passages": len(passages), "changed": False}
+
+        matrix = np.concatenate(rows) if rows else np.zeros((0, ai_cache.VECTOR_DIM), dtype=np.float16)
+        generation = f"{int(time.time() * 1000)}-{os.getpid()}"
+        vectors_name, passages_name = f"vectors-{generation}.npy", f"passages-{generation}.jsonl"
+        np.save(os.path.join(INDEX_DIR, vectors_name), matrix)
+        with open(os.path.join(INDEX_DIR, passages_name), "w", encoding="utf-8") as f:
+            for passage in passages:
+                f.write(json.dumps(passage, ensure_ascii=False) + "\n")
+        manifest = {
+            "embedding": EMBEDDING_VERSION,
+            "vectors": vectors_name,
+            "passages": passages_name,
+            "count": len(passages),
+            "sources": sources,
+            "created_at": time.time(),
+        }
+        tmp_path = _manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        # Readers switch generations atomically when the manifest is replaced
+        os.replace(tmp_path, _manifest_path())
+
+        if old:
+            # Open memory maps of the old generation stay valid after unlinking
+            for name in (old["vectors"], old["passages"]):
+                try:
+                    os.remove(os.path.join(INDEX_DIR, name))
+                except OSError:
+                    pass
+
+    logger.info(f"Retrieval index rebuilt: {len(passages)} passages ({stats})")
+    return {**stats, "passages": len(passages), "changed": True}
+
+
+# --- Query side ---
+
+def _get_index():
+    """Return the loaded index, reloading it when the manifest on disk changed."""
+    global _index, _last_check
+    now = time.monotonic()
+    if _index is not None and now - _last_check < RELOAD_CHECK_INTERVAL:
+        return _index
+    with _lock:
+        _last_check = now
+        try:
+            mtime = os.stat(_manifest_path()).st_mtime
+        except OSError:
+            return _index
+        if _index is None or _index["mtime"] != mtime:
+            manifest = _read_manifest()
+            if manifest and manifest.get("embedding") == EMBEDDING_VERSION:
+                vectors, passages = _load_generation(manifest)
+                _index = {"mtime": mtime, "vectors": vectors, "passages": passages}
+        return _index
+
+
+def retrieve(query: str, k: int = TOP_K, min_score: float = MIN_SCORE) -> List[Dict]:
+    """
+    Return up to k passages most similar to the query as
+    {'source', 'title', 'text', 'score'} dicts (best first).
+    Returns an empty list if there is no index or numpy is missing.
+    """
+    if np is None or not query:
+        return []
+    try:
+        index = _get_index()
+    except Exception as e:
+        logger.warning(f"Loading the retrieval index failed: {e}")
+        return []
+    if index is None or len(index["passages"]) == 0:
+        return []
+
+    vectors = index["vectors"]
+    q = embed_text(query)
+    # Queries only touch a few dozen hash buckets: multiplying just those columns
+    # gives the exact dot product without converting the whole float16 matrix
+    dims = np.flatnonzero(q)
+    if len(dims) == 0:
+        return []
+    q_dims = q[dims]
+    scores = np.empty(vectors.shape[0], dtype=np.float32)
+    for start in range(0, vectors.shape[0], SEARCH_BLOCK_ROWS):
+        block = vectors[start:start + SEARCH_BLOCK_ROWS, dims]
+        scores[start:start + len(block)] = block.astype(np.float32) @ q_dims
+
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    results = []
+    for row in top[np.argsort(-scores[top])]:
+        if scores[row] < min_score:
+            break
+        results.append({**index["passages"][row], "score": round(float(scores[row]), 3)})
+    return results
+
+
+# --- Background reindexing ---
+
+def _worker_loop():
+    while True:
+        triggered = _reindex_event.wait(REINDEX_INTERVAL)
+        if triggered:
+            # Collect bursts of changes (e.g. a roadmap with many steps) into one run
+            time.sleep(REINDEX_DEBOUNCE)
+            _reindex_event.clear()
+        try:
+            reindex()
+        except Exception as e:
+            logger.warning(f"Incremental reindex failed: {e}")
+
+
+def schedule_reindex(event_type=None, payload=None):
+    """Request an incremental reindex in the background (also usable as event handler)."""
+    _reindex_event.set()
+
+
+def register():
+    """Start the background reindexer and subscribe to content changes (call once at app startup)."""
+    global _worker
+    if np is None:
+        logger.warning("numpy not installed: chatbot retrieval disabled")
+        return
+    import utils.events as events
+    events.subscribe(events.CONTENT_CHANGED, schedule_reindex)
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_worker_loop, name="rag-reindexer", daemon=True)
+        _worker.start()
+    # Bring the index up to date with content changed while the app was down
+    schedule_reindex()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(reindex())
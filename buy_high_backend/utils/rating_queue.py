@@ -0,0 +1,161 @@
+"""
+Background queue for AI portfolio ratings.
+
+Rating a portfolio takes one slow AI call, so it never runs inside a request:
+
+- enqueue_rating() schedules a user; a user that is already queued or being
+  rated is not queued twice (a request arriving during a rating re-runs it
+  once afterwards).
+- A fixed number of worker threads (AI_RATING_WORKERS) process the queue, which
+  bounds the concurrent AI calls per process.
+- Before calling the AI, the worker hashes the holdings and skips users whose
+  portfolio has not changed since their stored rating (only its rated_at is
+  renewed, so it counts as fresh for another RATING_MAX_AGE).
+- Results are stored in the portfolio_ratings table, so get_rating() answers
+  from the database immediately and only schedules a refresh if needed.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+import database.handler.postgres.postgre_transactions_handler as transactions_handler
+from .ai import rate_portfolio
+
+logger = logging.getLogger(__name__)
+
+RATING_WORKERS = int(os.getenv("AI_RATING_WORKERS", "2"))
+RATING_QUEUE_MAX = 1000                 # jobs beyond this are rejected instead of piling up
+RATING_MAX_AGE = timedelta(hours=6)     # older ratings are refreshed when read
+
+_queue = queue.Queue(maxsize=RATING_QUEUE_MAX)
+_lock = threading.Lock()
+_queued = {}          # user_id -> force flag, for users waiting in _queue
+_running = set()      # user_ids currently being rated
+_rerun = {}           # user_id -> force flag, requested while the user was being rated
+_workers = []
+_metrics = {"queued": 0, "deduplicated": 0, "rejected": 0, "rated": 0, "unchanged": 0, "failed": 0}
+
+
+def compute_portfolio_hash(snapshot: Dict[str, Any]) -> str:
+    """Hash of the holdings and cash balance (prices and activity are ignored)."""
+    holdings = sorted(
+        (p["symbol"], round(p["quantity"], 6), round(p["average_price"], 4))
+        for p in snapshot.get("positions") or []
+    )
+    balance = round(float(snapshot.get("balance") or 0.0), 2)
+    return hashlib.sha1(json.dumps([holdings, balance]).encode("utf-8")).hexdigest()
+
+
+def _rate_user(user_id: int, force: bool):
+    snapshot = transactions_handler.get_portfolio_rating_snapshot(user_id)
+    if not snapshot.get("success"):
+        logger.warning(f"Portfolio snapshot for user {user_id} failed: {snapshot.get('message')}")
+        _metrics["failed"] += 1
+        return
+
+    portfolio_hash = compute_portfolio_hash(snapshot)
+    stored = transactions_handler.get_portfolio_rating(user_id)
+    if stored and stored["portfolio_hash"] == portfolio_hash and not force:
+        # Still valid: restart its RATING_MAX_AGE, otherwise every read would queue the user again
+        transactions_handler.touch_portfolio_rating(user_id)
+        _metrics["unchanged"] += 1
+        return
+
+    started = time.perf_counter()
+    result = rate_portfolio(snapshot)
+    if result is None:
+        _metrics["failed"] += 1
+        return
+    rating, tip = result
+    transactions_handler.save_portfolio_rating(user_id, rating, tip, portfolio_hash)
+    _metrics["rated"] += 1
+    logger.info(f"Rated portfolio of user {user_id}: {rating:.2f} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+
+def _worker_loop():
+    while True:
+        user_id = _queue.get()
+        with _lock:
+            force = _queued.pop(user_id, False)
+            _running.add(user_id)
+        try:
+            _rate_user(user_id, force)
+        except Exception as e:
+            _metrics["failed"] += 1
+            logger.error(f"Rating portfolio of user {user_id} failed: {e}", exc_info=True)
+        finally:
+            with _lock:
+                _running.discard(user_id)
+                rerun = _rerun.pop(user_id, None)
+            _queue.task_done()
+            if rerun is not None:
+                enqueue_rating(user_id, force=rerun)
+
+
+def start():
+    """Start the worker threads (idempotent)."""
+    with _lock:
+        _workers[:] = [w for w in _workers if w.is_alive()]
+        for i in range(len(_workers), RATING_WORKERS):
+            worker = threading.Thread(target=_worker_loop, name=f"portfolio-rating-{i}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def enqueue_rating(user_id: int, force: bool = False) -> str:
+    """
+    Schedule a rating for the user.
+
+    Returns "queued", "pending" (already queued or running) or "busy" (queue full).
+    force=True re-rates even if the portfolio hash is unchanged.
+    """
+    start()
+    with _lock:
+        if user_id in _queued:
+            _queued[user_id] = _queued[user_id] or force
+            _metrics["deduplicated"] += 1
+            return "pending"
+        if user_id in _running:
+            _rerun[user_id] = _rerun.get(user_id, False) or force
+            _metrics["deduplicated"] += 1
+            return "pending"
+        try:
+            _queue.put_nowait(user_id)
+        except queue.Full:
+            _metrics["rejected"] += 1
+            return "busy"
+        _queued[user_id] = force
+        _metrics["queued"] += 1
+        return "queued"
+
+
+def is_pending(user_id: int) -> bool:
+    with _lock:
+        return user_id in _queued or user_id in _running
+
+
+def get_rating(user_id: int) -> Dict[str, Any]:
+    """
+    Return the stored rating immediately, scheduling a refresh in the background
+    if there is none yet or it is older than RATING_MAX_AGE.
+    """
+    stored = transactions_handler.get_portfolio_rating(user_id)
+    if stored is None or stored["rated_at"] is None or datetime.now() - stored["rated_at"] > RATING_MAX_AGE:
+        enqueue_rating(user_id)
+    return {
+        "rating": stored["rating"] if stored else None,
+        "tip": stored["tip"] if stored else None,
+        "rated_at": stored["rated_at"].isoformat() if stored and stored["rated_at"] else None,
+        "pending": is_pending(user_id)
+    }
+
+
+def get_queue_metrics() -> Dict[str, Any]:
+    with _lock:
+        return {**_metrics, "waiting": len(_queued), "running": len(_running), "workers": RATING_WORKERS}
@@ -0,0 +1,262 @@
+"""
+Slots and coin-flip engine: precomputed odds tables, live spins and simulation.
+
+SlotsTable turns a SLOTS_SYMBOLS config into
+- cumulative reel weights: a live spin is one random integer and a bisect per reel,
+- the payout multiplier of every possible outcome (n_symbols ** SLOTS_REELS of them),
+  indexed by the reel symbol indices written as a base-n number.
+
+The /gamble/slots/play route spins on DEFAULT_TABLE. simulate_slots() draws millions
+of spins at once with NumPy (searchsorted on the same cumulative weights) and counts
+the outcomes with bincount, so payouts are a dot product with the multiplier table.
+exact_slots_stats() computes the same figures analytically for comparison.
+
+All figures are per unit bet. The game keeps the bet and pays bet * multiplier on a
+win, and loses the bet otherwise, so the net result of a spin is +multiplier or -1 and
+RTP = E[(1 + multiplier) if win else 0]. Pair payouts are rounded down to whole
+credits in live play, so small bets return slightly less than the simulated RTP.
+
+Usage:
+    python -m buy_high_backend.utils.slots_engine simulate --spins 10_000_000
+    python -m buy_high_backend.utils.slots_engine simulate --weight "💎=8" --multiplier "⭐=6"
+    python -m buy_high_backend.utils.slots_engine simulate --game coinflip --spins 1_000_000
+"""
+import argparse
+import itertools
+import json
+import math
+import random
+import time
+from bisect import bisect_right
+from collections import namedtuple
+
+from utils.lazy_imports import lazy_import
+
+# Only needed for simulations; live spins use the pure-Python tables
+np = lazy_import("numpy")
+
+# Slots symbols and their weights (higher weight = more common)
+# Adjusted for higher win probability
+SLOTS_SYMBOLS = {
+    "🍒": {"weight": 40, "multiplier": 2},   # Cherry - very common, low payout
+    "🍋": {"weight": 35, "multiplier": 3},   # Lemon - more common
+    "🍊": {"weight": 30, "multiplier": 4},   # Orange - common
+    "🍇": {"weight": 25, "multiplier": 5},   # Grapes - fairly common
+    "⭐": {"weight": 15, "multiplier": 8},    # Star - less rare, high payout
+    "💎": {"weight": 5, "multiplier": 20}     # Diamond - rare but more common, highest payout
+}
+SLOTS_REELS = 3
+PAIR_FACTOR = 0.5                   # 2 matching symbols pay half the symbol's multiplier
+
+# Coin flip (played in the frontend): 50/50, a win pays the bet as profit
+COINFLIP_WIN_PROBABILITY = 0.5
+COINFLIP_PAYOUT = 1.0
+
+SIMULATION_BATCH = 1_000_000        # spins per NumPy batch (bounds memory for long runs)
+
+SimulationStats = namedtuple("SimulationStats", [
+    "spins", "rtp", "house_edge", "variance", "std_dev", "hit_frequency", "rtp_ci95", "breakdown"
+])
+
+
+def outcome_multiplier(config, reels):
+    """Payout multiplier of one outcome (list of symbols); 0 for a loss."""
+    symbol_counts = {}
+    for symbol in reels:
+        symbol_counts[symbol] = symbol_counts.get(symbol, 0) + 1
+    # The first symbol (in reel order) that appears at least twice decides the payout
+    for symbol, count in symbol_counts.items():
+        if count >= 3:
+            return config[symbol]["multiplier"]
+        if count == 2:
+            return config[symbol]["multiplier"] * PAIR_FACTOR
+    return 0
+
+
+def _outcome_label(reels):
+    for symbol in dict.fromkeys(reels):
+        count = reels.count(symbol)
+        if count >= 2:
+            return f"{min(count, 3)}x {symbol}"
+    return None
+
+
+class SlotsTable:
+    """Precomputed draw and payout tables for a SLOTS_SYMBOLS config."""
+
+    def __init__(self, config=SLOTS_SYMBOLS, reels=SLOTS_REELS):
+        self.config = config
+        self.symbols = tuple(config)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.reels = reels
+        self.weights = tuple(config[symbol]["weight"] for symbol in self.symbols)
+        if any(weight <= 0 for weight in self.weights):
+            raise ValueError("Slots weights must be positive")
+        self.cumulative = tuple(itertools.accumulate(self.weights))
+        self.total_weight = self.cumulative[-1]
+        self.integer_weights = all(isinstance(weight, int) for weight in self.weights)
+        outcomes = list(itertools.product(range(len(self.symbols)), repeat=reels))
+        self.multipliers = tuple(outcome_multiplier(config, [self.symbols[i] for i in o]) for o in outcomes)
+        self.labels = tuple(_outcome_label([self.symbols[i] for i in o]) for o in outcomes)
+
+    def draw(self, rng=random):
+        """Index of one weighted random symbol."""
+        if self.integer_weights:
+            return bisect_right(self.cumulative, rng.randrange(self.total_weight))
+        return min(bisect_right(self.cumulative, rng.random() * self.total_weight), len(self.symbols) - 1)
+
+    def spin(self, rng=random):
+        """Symbol indices of one spin."""
+        return tuple(self.draw(rng) for _ in range(self.reels))
+
+    def outcome(self, indices):
+        """Position of an outcome in the multiplier table."""
+        position = 0
+        for i in indices:
+            position = position * len(self.symbols) + i
+        return position
+
+    def multiplier(self, indices):
+        return self.multipliers[self.outcome(indices)]
+
+    def win_amount(self, indices, bet):
+        """(win amount, multiplier) of a spin; pair payouts are rounded down to whole credits."""
+        multiplier = self.multiplier(indices)
+        return int(bet * multiplier), multiplier
+
+
+DEFAULT_TABLE = SlotsTable()
+
+
+def _stats(spins, net_values, weights, breakdown_labels=None):
+    """Per-unit-bet statistics from outcome net results and their weights (counts or probabilities)."""
+    total = float(sum(weights))
+    mean = sum(w * x for w, x in zip(weights, net_values)) / total
+    variance = sum(w * x * x for w, x in zip(weights, net_values)) / total - mean * mean
+    hits = sum(w for w, x in zip(weights, net_values) if x > 0) / total
+    breakdown = {}
+    if breakdown_labels is not None:
+        for label, w in zip(breakdown_labels, weights):
+            if label is not None and w:
+                breakdown[label] = breakdown.get(label, 0.0) + w / total
+    ci95 = 1.96 * math.sqrt(max(variance, 0.0) / spins) if spins else 0.0
+    return SimulationStats(
+        spins=spins, rtp=mean + 1, house_edge=-mean, variance=variance, std_dev=math.sqrt(max(variance, 0.0)),
+        hit_frequency=hits, rtp_ci95=ci95, breakdown=breakdown
+    )
+
+
+def _net_values(table):
+    return [m if m > 0 else -1 for m in table.multipliers]
+
+
+def exact_slots_stats(table=DEFAULT_TABLE):
+    """RTP, variance and hit frequency computed from the outcome probabilities."""
+    probabilities = [
+        math.prod(table.weights[i] for i in outcome) / table.total_weight ** table.reels
+        for outcome in itertools.product(range(len(table.symbols)), repeat=table.reels)
+    ]
+    return _stats(0, _net_values(table), probabilities, table.labels)
+
+
+def simulate_slots(spins, table=DEFAULT_TABLE, seed=None, batch_size=SIMULATION_BATCH):
+    """Simulate `spins` spins vectorised with NumPy and return their SimulationStats."""
+    rng = np.random.default_rng(seed)
+    n_symbols = len(table.symbols)
+    cumulative = np.asarray(table.cumulative)
+    place_values = n_symbols ** np.arange(table.reels - 1, -1, -1)
+    counts = np.zeros(len(table.multipliers), dtype=np.int64)
+    remaining = spins
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        if table.integer_weights:
+            values = rng.integers(0, table.total_weight, size=(size, table.reels))
+        else:
+            values = rng.random((size, table.reels)) * table.total_weight
+        draws = np.searchsorted(cumulative, values, side="right")
+        np.minimum(draws, n_symbols - 1, out=draws)
+        counts += np.bincount(draws @ place_values, minlength=len(counts))
+        remaining -= size
+    return _stats(spins, _net_values(table), counts.tolist(), table.labels)
+
+
+def simulate_coinflip(spins, win_probability=COINFLIP_WIN_PROBABILITY, payout=COINFLIP_PAYOUT,
+                      seed=None, batch_size=SIMULATION_BATCH):
+    """Simulate coin flips (win pays `payout` per unit bet, a loss costs the bet)."""
+    rng = np.random.default_rng(seed)
+    wins = 0
+    remaining = spins
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        wins += int(np.count_nonzero(rng.random(size) < win_probability))
+        remaining -= size
+    return _stats(spins, [payout, -1], [wins, spins - wins], ["win", None])
+
+
+def exact_coinflip_stats(win_probability=COINFLIP_WIN_PROBABILITY, payout=COINFLIP_PAYOUT):
+    return _stats(0, [payout, -1], [win_probability, 1 - win_probability], ["win", None])
+
+
+# --- CLI ---
+
+def _parse_overrides(values, kind, config):
+    for value in values or []:
+        symbol, _, number = value.partition("=")
+        symbol = symbol.strip()
+        if symbol not in config or not number:
+            raise SystemExit(f"--{kind} expects SYMBOL=NUMBER with one of {' '.join(config)}, got {value!r}")
+        config[symbol][kind] = float(number) if "." in number else int(number)
+
+
+def _load_config(args):
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = json.load(f)
+    else:
+        config = {symbol: dict(settings) for symbol, settings in SLOTS_SYMBOLS.items()}
+    _parse_overrides(args.weight, "weight", config)
+    _parse_overrides(args.multiplier, "multiplier", config)
+    return config
+
+
+def _print_stats(simulated, exact, elapsed):
+    print(f"{simulated.spins:,} spins in {elapsed:.2f}s ({simulated.spins / max(elapsed, 1e-9):,.0f} spins/s)")
+    print(f"{'':<16}{'simulated':>14}{'exact':>14}")
+    print(f"{'RTP':<16}{simulated.rtp:>14.4%}{exact.rtp:>14.4%}   (95% CI ±{simulated.rtp_ci95:.4%})")
+    print(f"{'house edge':<16}{simulated.house_edge:>14.4%}{exact.house_edge:>14.4%}")
+    print(f"{'hit frequency':<16}{simulated.hit_frequency:>14.4%}{exact.hit_frequency:>14.4%}")
+    print(f"{'variance':<16}{simulated.variance:>14.4f}{exact.variance:>14.4f}")
+    print(f"{'std dev':<16}{simulated.std_dev:>14.4f}{exact.std_dev:>14.4f}")
+    if len(exact.breakdown) > 1:
+        print("Winning outcomes:")
+        for label, probability in sorted(exact.breakdown.items(), key=lambda item: -item[1]):
+            print(f"  {label:<14}{simulated.breakdown.get(label, 0.0):>14.4%}{probability:>14.4%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="gamble", description="Simulate the casino games to tune their odds")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    simulate = subparsers.add_parser("simulate", help="Simulate spins and report RTP, variance and hit frequency")
+    simulate.add_argument("--game", choices=("slots", "coinflip"), default="slots")
+    simulate.add_argument("--spins", type=int, default=1_000_000)
+    simulate.add_argument("--seed", type=int, default=None)
+    simulate.add_argument("--config", help="JSON file with a SLOTS_SYMBOLS-style config")
+    simulate.add_argument("--weight", action="append", metavar="SYMBOL=W", help="override a symbol weight")
+    simulate.add_argument("--multiplier", action="append", metavar="SYMBOL=M", help="override a symbol multiplier")
+    simulate.add_argument("--win-probability", type=float, default=COINFLIP_WIN_PROBABILITY, help="coin flip only")
+    simulate.add_argument("--payout", type=float, default=COINFLIP_PAYOUT, help="coin flip only")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.game == "coinflip":
+        simulated = simulate_coinflip(args.spins, args.win_probability, args.payout, seed=args.seed)
+        exact = exact_coinflip_stats(args.win_probability, args.payout)
+    else:
+        table = SlotsTable(_load_config(args))
+        simulated = simulate_slots(args.spins, table, seed=args.seed)
+        exact = exact_slots_stats(table)
+    _print_stats(simulated, exact, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 """
 Einfache Stock Price Funktion
-Gibt den aktuellen Preis für ein Stock Symbol zurück
+Gibt den aktuellen Preis für ein Stock Symbol zurück (über utils/market_data.py,
+d.h. yfinance, Twelve Data oder Alpha Vantage - je nachdem, welcher Provider verfügbar ist)
 """
 
-import yfinance as yf
+import utils.market_data as market_data
 
 def get_stock_price(symbol):
     """
@@ -17,16 +18,10 @@ def get_stock_price(symbol):
         float: Aktueller Preis in USD, oder None bei Fehler
     """
     try:
-        ticker = yf.Ticker(symbol.upper())
-        hist = ticker.history(period="1d")
-        
-        if hist.empty:
-            print(f"Keine Daten für {symbol} gefunden")
-            return None
-            
-        current_price = hist['Close'].iloc[-1]
-        return round(current_price, 2)
-        
+        return round(market_data.get_quote(symbol.upper()), 2)
+    except market_data.MarketDataError as e:
+        print(f"Keine Daten für {symbol} gefunden: {e}")
+        return None
     except Exception as e:
         print(f"Fehler beim Abrufen von {symbol}: {e}")
         return None
@@ -15,6 +15,11 @@ load_dotenv()  # Load environment variables from .env file
 import database.handler.postgres.postgres_db_handler as db_handler
 import database.handler.postgres.postgre_transactions_handler as transactions_handler
 import utils.auth as auth_module  # Import our updated auth module
+import utils.badge_rules as badge_rules
+import utils.news_service as news_service
+import utils.warmup as warmup
+import utils.alert_engine as alert_engine
+import utils.pnl_engine as pnl_engine
 
 # Import Blueprints
 from routes.main_routes import main_bp
@@ -227,6 +232,34 @@ logger.info("Registriere Chat-Events für SocketIO...")
 register_chat_events(socketio)
 logger.info("Chat-Events registriert.")
 
+from routes.alert_events import register_alert_events
+register_alert_events(socketio)
+
+from routes.portfolio_events import register_portfolio_events
+register_portfolio_events(socketio)
+
+# Badge-Regeln an den Event-Bus hängen (Trades, Level-Ups, Quiz, Gamble)
+badge_rules.register()
+
+# Referenzdaten (Abzeichen, Roadmaps, XP-Tabellen, Assets) und Kurs-Caches im Hintergrund
+# aufwärmen; /ready meldet erst danach Bereitschaft
+warmup.start()
+
+# Finnhub-News im Hintergrund aktualisieren, Requests lesen nur aus dem Speicher
+news_service.start()
+
+# Kursalarme auslösen und über Socket.IO (/alerts) zustellen
+alert_engine.start()
+
+# Marktwert und unrealisierten G/V aller Benutzer bei Kursänderungen fortschreiben (/portfolio)
+pnl_engine.start()
+
+@app.route('/ready')
+def ready():
+    """Readiness-Probe für den Load Balancer: 503, bis das Aufwärmen nach dem Start abgeschlossen ist."""
+    report = warmup.get_status()
+    return jsonify(report), (200 if report["ready"] else 503)
+
 @app.route('/auth/google-signin', methods=['POST'])
 def google_signin():
     logger.info("Google Sign-In Anfrage erhalten.")
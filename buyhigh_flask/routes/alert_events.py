@@ -0,0 +1,45 @@
+"""
+Zustellung ausgelöster Kursalarme über Socket.IO.
+
+Clients verbinden sich mit dem Namespace /alerts und landen im Raum ihres
+Benutzers (user_<id>, aus der Flask-Session). utils/alert_engine.py
+veröffentlicht jeden ausgelösten Alarm genau einmal als events.PRICE_ALERT;
+hier wird er als Event 'price_alert' an diesen Raum gesendet.
+
+Frontend:
+    const socket = io(window.location.origin + '/alerts');
+    socket.on('price_alert', (alert) => { ... });
+"""
+import logging
+
+from flask import session
+from flask_socketio import join_room
+
+import utils.events as events
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = '/alerts'
+
+
+def user_room(user_id):
+    return f"user_{user_id}"
+
+
+def register_alert_events(socketio_instance):
+    logger.info("Registriere SocketIO Alarm-Events...")
+
+    @socketio_instance.on('connect', namespace=NAMESPACE)
+    def handle_connect(auth=None):
+        user_id = session.get('user_id')
+        if not user_id:
+            logger.debug("SocketIO /alerts: Verbindung ohne angemeldeten Benutzer abgelehnt.")
+            return False
+        join_room(user_room(user_id))
+        logger.debug(f"SocketIO /alerts: Benutzer {user_id} verbunden.")
+
+    def deliver(event_type, payload):
+        socketio_instance.emit('price_alert', payload['alert'], room=user_room(payload['user_id']), namespace=NAMESPACE)
+
+    events.subscribe(events.PRICE_ALERT, deliver)
+    logger.info("SocketIO Alarm-Events registriert.")
@@ -7,11 +7,13 @@ from datetime import datetime, timedelta
 from utils.utils import login_required
 import os
 import utils.stock_data_api as stock_data
+import utils.downsample as downsample
 import database.handler.postgres.postgre_transactions_handler as transactions_handler
 import pandas as pd
 import logging
 import utils.auth as auth_module  # Fix the import path to match the correct module name
 import database.handler.postgres.postgres_db_handler as db_handler
+import database.handler.postgres.postgres_balance_handler as balance_handler
 import database.handler.postgres.postgre_education_handler as education_handler
 from utils.models import db, EasterEggRedemption  # db und EasterEggRedemption importieren
 from buy_high_backend.pydantic_models import User  # User importieren
@@ -119,6 +121,19 @@ def api_stock_data():
     symbol = request.args.get('symbol', 'AAPL')
     timeframe = request.args.get('timeframe', '3M')
     force_fresh = request.args.get('fresh', 'false').lower() == 'true'
+    # Optional: Wochen-/Monatskerzen und höchstens max_points Punkte (siehe utils/downsample.py)
+    max_points = request.args.get('max_points', type=int)
+    chart = request.args.get('chart', 'candle')
+    resample = request.args.get('resample')
+    if max_points is not None and max_points < 3:
+        return jsonify({'error': 'max_points must be at least 3.', 'currency': 'USD'}), 400
+    if chart not in downsample.CHART_TYPES:
+        return jsonify({'error': f"chart must be one of {', '.join(downsample.CHART_TYPES)}.", 'currency': 'USD'}), 400
+    if resample is not None and resample not in downsample.RESAMPLE_PERIODS:
+        return jsonify({'error': f"resample must be one of {', '.join(downsample.RESAMPLE_PERIODS)}.", 'currency': 'USD'}), 400
+    if resample:
+        # Wochen-/Monatskerzen über die gesamte Tageshistorie (Cache-Eintrag 'ALL')
+        timeframe = 'ALL'
     
     end_date_dt = datetime.now()
     start_date_dt = None 
@@ -190,48 +205,27 @@ def api_stock_data():
 
 
         data = []
-        # Ensure df is not None and has rows before iterating, and required columns exist
+        # Ensure df is not None and has rows, and required columns exist
         if df is not None and not df.empty:
             required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
             if not all(col in df.columns for col in required_columns):
                 print(f"Data for {symbol} is missing one or more required columns: {required_columns}. Available: {list(df.columns)}")
                 return jsonify({'error': f'Data processing error: Missing columns for {symbol}', 'currency': 'USD'}), 500
 
-            for index, row in df.iterrows():
-                try:
-                    # Ensure index is timezone-naive before formatting for consistency
-                    timestamp_to_format = index.tz_localize(None) if index.tzinfo else index
-                    
-                    # Check for NaN or None before conversion
-                    open_price = float(row['Open']) if pd.notna(row['Open']) else None
-                    high_price = float(row['High']) if pd.notna(row['High']) else None
-                    low_price = float(row['Low']) if pd.notna(row['Low']) else None
-                    close_price = float(row['Close']) if pd.notna(row['Close']) else None
-                    volume = int(row['Volume']) if pd.notna(row['Volume']) else None
-
-                    # If any critical value is None after attempting conversion, skip this row
-                    if any(v is None for v in [open_price, high_price, low_price, close_price, volume]):
-                        print(f"Skipping row for {symbol} at {index} due to missing critical data after pd.notna check.")
-                        continue
-
-                    data.append({
-                        'date': timestamp_to_format.strftime('%Y-%m-%dT%H:%M:%S'), # ISO format for JS Date constructor
-                        'open': open_price,
-                        'high': high_price,
-                        'low': low_price,
-                        'close': close_price,
-                        'volume': volume,
-                        'currency': 'USD'  # Add currency information
-                    })
-                except (ValueError, TypeError) as e:
-                    print(f"Error converting row data for {symbol} at {index}: {e}. Row: {row.to_dict()}")
-                    continue # Skip rows with conversion errors
+            # Letzter Schlusskurs der vollständigen Reihe, unabhängig von der Verdichtung
+            latest_close = df['Close'].dropna()
+            latest_close = float(latest_close.iloc[-1]) if not latest_close.empty else None
+            if resample:
+                df = downsample.resample(df, resample)
+            df = downsample.downsample(df, max_points, chart)
+            # Zeilen mit fehlenden Werten werden übersprungen, Datum im ISO-Format für den JS-Date-Konstruktor
+            data = downsample.frame_to_points(df)
         
         # Nach dem Laden der Daten, den letzten Kurs in der Assets-Datenbank aktualisieren
         # NUR wenn es KEINE Demo-Daten sind und Daten vorhanden sind
-        if not is_demo_data and len(data) > 0 and data[-1].get('close') is not None:
+        if not is_demo_data and len(data) > 0 and latest_close is not None:
             try:
-                update_asset_price(symbol, float(data[-1]['close'])) # Analytics inside update_asset_price
+                update_asset_price(symbol, latest_close) # Analytics inside update_asset_price
             except Exception as e:
                 # Nur loggen, nicht abbrechen wenn Update fehlschlägt
                 logger.error(f"Error updating asset price in database: {e}")
@@ -594,29 +588,14 @@ def redeem_easter_egg():
         # Wenn wir einen authentifizierten Benutzer haben, aktualisiere die Datenbank
         if user_id:
             try:
-                # Versuche zuerst, die update_user_balance Funktion zu verwenden
-                update_result = db_handler.update_user_balance(user_id, new_balance)
-                print(f"Update result: {update_result}")
-                
-                # Überprüfe, ob das Update funktioniert hat, indem wir die Balance nochmal abrufen
-                user_data_after_update = db_handler.get_user_by_id(user_id) # Renamed for clarity
-                if user_data_after_update: # Check if user object itself is not None
-                    updated_balance = user_data_after_update.get('balance', current_balance) # Access balance directly
-                    print(f"Balance nach Update: {updated_balance}")
-                    
-                    # Wenn die Balance nicht aktualisiert wurde, versuchen wir es mit einer direkten DB-Verbindung
-                    if updated_balance != new_balance:
-                        logger.warning(f"Balance wurde nicht korrekt aktualisiert: erwartet={new_balance}, ist={updated_balance}")
-                        logger.warning("Versuche direktes Update mit SQL")
-                        with transactions_handler.get_connection() as conn:
-                            with conn.cursor() as cur:
-                                cur.execute("""
-                                    UPDATE users SET balance = %s WHERE id = %s
-                                """, (new_balance, user_id))
-                                conn.commit()
-                                logger.info(f"Direct database update for user {user_id} completed")
+                # Gutschrift als Betrag über die Kontostand-Warteschlange, nicht als absoluter Wert:
+                # parallele Trades oder Spiele des Benutzers gehen sonst verloren
+                update = balance_handler.apply_balance_delta(user_id, reward)
+                if update["success"]:
+                    current_balance = update["old_balance"]
+                    new_balance = update["new_balance"]
                 else:
-                    logger.error(f"Konnte Benutzerdaten nach Update nicht abrufen für Benutzer {user_id}")
+                    logger.error(f"Gutschrift für Benutzer {user_id} fehlgeschlagen: {update['message']}")
                 
                 # Redeemed Code speichern
                 redeemed_codes = session.get(f"user_{user_id}_redeemed_codes", [])
@@ -1,8 +1,9 @@
 from flask import Blueprint, render_template, g, request, flash, redirect, url_for, jsonify
 from utils.utils import process_easter_egg, login_required
 import database.handler.postgres.postgres_db_handler as db_handler
+import database.handler.postgres.postgres_balance_handler as balance_handler
 import logging  # Add logging import
-import utils.stock_news as stock_news
+import utils.news_service as news_service
 from rich import print
 import database.handler.postgres.postgre_education_handler as edu_handler
 import datetime
@@ -140,13 +141,11 @@ def dashboard():
     today = datetime.date.today().strftime('%Y-%m-%d')
     quiz_data = edu_handler.get_daily_quiz(today)
     print(f'[red]user:', g.user)
-    print(f'[red]today atempt: {edu_handler.get_dayly_quiz_attempt_day(g.user["id"], today)}')
+    todays_attempt = edu_handler.get_daily_quiz_attempt(g.user['id'], quiz_data['id']) if quiz_data else None
+    print(f'[red]today atempt: {todays_attempt}')
     if quiz_data is None:
         quiz_data = {}
-    if edu_handler.get_dayly_quiz_attempt_day(g.user['id'], today) is not None:
-        quiz_data['attempted'] = True
-    else:
-        quiz_data['attempted'] = False
+    quiz_data['attempted'] = todays_attempt is not None
     print(f'[cyan]Quiz data:', quiz_data)
 
 
@@ -234,7 +233,7 @@ def news():
     user_id_for_analytics = g.user.get('id') if hasattr(g, 'user') and g.user else None
     logger.info(f"News-Seite (allgemein) aufgerufen von Benutzer: {g.user.get('username') if g.user else 'Unbekannt'}")
     dark_mode_active = g.user and g.user.get('theme') == 'dark'
-    news_data = stock_news.fetch_general_news("general")
+    news_data, _ = news_service.get_general_news("general")
     logger.debug(f"Allgemeine Nachrichten abgerufen: {len(news_data) if news_data else 0} Artikel")
     # print(f'[cyan]General news data:', news_data) # Beibehalten für Rich-Print, falls gewünscht
     return render_template('news.html', user=g.user, darkmode=dark_mode_active, news_items=news_data)
@@ -245,7 +244,7 @@ def company_news(symbol):
     user_id_for_analytics = g.user.get('id') if hasattr(g, 'user') and g.user else None
     logger.info(f"News-Seite für Symbol '{symbol}' aufgerufen von Benutzer: {g.user.get('username') if g.user else 'Unbekannt'}")
     dark_mode_active = g.user and g.user.get('theme') == 'dark'
-    news_data = stock_news.fetch_company_news(symbol, "2025-01-01", "2025-01-02") # Daten sind statisch, ggf. anpassen
+    news_data, _ = news_service.get_company_news(symbol, "2025-01-01", "2025-01-02") # Daten sind statisch, ggf. anpassen
     logger.debug(f"Nachrichten für Symbol '{symbol}' abgerufen: {len(news_data) if news_data else 0} Artikel")
     # print(f'[cyan]Symbol: {symbol} | News data:', news_data) # Beibehalten für Rich-Print
     return render_template('news.html', user=g.user, darkmode=dark_mode_active, news_items=news_data)
@@ -465,36 +464,14 @@ def api_rescue_wheel():
             if result_value > 0:
                 import database.handler.postgres.postgre_transactions_handler as transactions_handler
                 
-                # Get previous balance
-                previous_balance = g.user['balance']
-                new_balance = previous_balance + result_value
-                
-                # Fix: Direct database update instead of using add_funds_to_user
-                success = False
-                try:
-                    # Using db_handler to execute direct SQL
-                    from database.handler.postgres.postgres_db_handler import get_db_connection
-                    conn = get_db_connection()
-                    cur = conn.cursor()
-                    
-                    # Update user balance
-                    cur.execute(
-                        "UPDATE users SET balance = balance + %s WHERE id = %s",
-                        (result_value, g.user['id'])
-                    )
-                    
-                    # Commit the transaction
-                    conn.commit()
-                    
-                    # Close cursor and connection
-                    cur.close()
-                    conn.close()
-                    
-                    success = True
+                # Gutschrift als Delta in einer Anweisung (parallele Spins gehen nicht verloren)
+                update = balance_handler.apply_balance_delta(g.user['id'], result_value)
+                success = update["success"]
+                if success:
+                    previous_balance, new_balance = update["old_balance"], update["new_balance"]
                     logger.info(f"Successfully updated balance for user {g.user['id']}: +${result_value}")
-                except Exception as db_error:
-                    logger.error(f"Database error updating user balance: {db_error}")
-                    success = False
+                else:
+                    logger.error(f"Database error updating user balance: {update['message']}")
                 
                 if success:
                     # Log the transaction
@@ -514,15 +491,11 @@ def api_rescue_wheel():
                     # Add XP for using the wheel
                     db_handler.manage_user_xp('rescue_wheel_spin', g.user['id'], 1)
                     
-                    # Refresh user data to get updated balance
-                    updated_user = db_handler.get_user_by_id(g.user['id'])
-                    updated_balance = updated_user['balance'] if updated_user else new_balance
-                    
                     return jsonify({
                         "success": True,
                         "message": f"Successfully added ${result_value} to your account!",
                         "previous_balance": previous_balance,
-                        "new_balance": updated_balance,
+                        "new_balance": new_balance,
                         "amount": result_value
                     })
                 else:
@@ -0,0 +1,58 @@
+"""
+Live-Portfoliowerte über Socket.IO.
+
+Clients verbinden sich mit dem Namespace /portfolio und landen im Raum ihres
+Benutzers (user_<id>, aus der Flask-Session). Solange ein Client verbunden ist,
+veröffentlicht utils/pnl_engine.py bei jeder Kursänderung, die den Benutzer
+betrifft, ein events.PORTFOLIO_VALUED; hier wird es als Event 'portfolio_update'
+(market_value, cost_basis, unrealised_pl, unrealised_pl_pct) an den Raum gesendet.
+
+Frontend:
+    const socket = io(window.location.origin + '/portfolio');
+    socket.on('portfolio_update', (totals) => { ... });
+"""
+import logging
+
+from flask import session
+from flask_socketio import emit, join_room
+
+import utils.events as events
+import utils.pnl_engine as pnl_engine
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = '/portfolio'
+
+
+def user_room(user_id):
+    return f"user_{user_id}"
+
+
+def register_portfolio_events(socketio_instance):
+    logger.info("Registriere SocketIO Portfolio-Events...")
+
+    @socketio_instance.on('connect', namespace=NAMESPACE)
+    def handle_connect(auth=None):
+        user_id = session.get('user_id')
+        if not user_id:
+            logger.debug("SocketIO /portfolio: Verbindung ohne angemeldeten Benutzer abgelehnt.")
+            return False
+        join_room(user_room(user_id))
+        pnl_engine.watch(user_id)
+        # Aktueller Stand sofort, danach nur noch Änderungen
+        totals = pnl_engine.get_totals(user_id)
+        if totals is not None:
+            emit('portfolio_update', totals)
+        logger.debug(f"SocketIO /portfolio: Benutzer {user_id} verbunden.")
+
+    @socketio_instance.on('disconnect', namespace=NAMESPACE)
+    def handle_disconnect(*args):
+        user_id = session.get('user_id')
+        if user_id:
+            pnl_engine.unwatch(user_id)
+
+    def deliver(event_type, payload):
+        socketio_instance.emit('portfolio_update', payload['totals'], room=user_room(payload['user_id']), namespace=NAMESPACE)
+
+    events.subscribe(events.PORTFOLIO_VALUED, deliver)
+    logger.info("SocketIO Portfolio-Events registriert.")
@@ -19,66 +19,15 @@ def roadmap(roadmap_id=1):  # Default to roadmap ID 1 if none provided
     dark_mode_active = g.user and g.user.get('theme') == 'dark'
     user_id = g.user.get('id')
 
-    roadmap_data = roadmap_handler.get_roadmap(roadmap_id)
-    if not roadmap_data:
+    # Static content comes from the in-memory roadmap bundle, user progress from a single query
+    roadmap_view = roadmap_handler.get_roadmap_view(user_id, roadmap_id)
+    if not roadmap_view:
         flash("Roadmap nicht gefunden.", "error")
         return redirect(url_for('roadmap.roadmap_collection'))
-        
-    roadmap_steps_data = roadmap_handler.get_roadmap_steps(roadmap_id)
-    
-    user_step_progress_db = {}
-    if user_id:
-        user_step_progress_db = roadmap_handler.get_user_roadmap_progress_all_steps(user_id, roadmap_id)
-
-    total_steps = len(roadmap_steps_data)
-    completed_steps_count = 0 # Counts steps where all quizzes are attempted
-
-    if total_steps > 0:
-        for step in roadmap_steps_data:
-            progress_info = user_step_progress_db.get(step['id'])
-            step['is_attempted_all_quizzes'] = False # Renaming for clarity, true if all quizzes in step are attempted
-            step['completion_status'] = 'incomplete' # Default: 'incomplete', 'perfect', 'imperfect'
-
-            if progress_info and progress_info.get('is_completed'): # 'is_completed' from DB means all quizzes attempted
-                step['is_attempted_all_quizzes'] = True
-                completed_steps_count += 1
 
-                # Use get_roadmap_quizes_specific for accuracy
-                quizzes_in_step = roadmap_handler.get_roadmap_quizes_specific(step_id=step['id'], roadmap_id=roadmap_id)
-                if not quizzes_in_step:
-                    step['completion_status'] = 'perfect' # Step completed, no quizzes to be imperfect on
-                else:
-                    all_correct = True
-                    quiz_ids_for_this_step = [q['id'] for q in quizzes_in_step]
-                    # Fetch attempts for these specific quizzes
-                    user_attempts_for_quizzes = roadmap_handler.get_user_progress_for_quizzes(user_id, quiz_ids_for_this_step)
-
-                    if len(user_attempts_for_quizzes) < len(quizzes_in_step):
-                        # This implies an inconsistency if step.is_attempted_all_quizzes is True.
-                        # e.g. quiz added after completion, or error fetching progress.
-                        all_correct = False
-                        logger.warning(f"Data inconsistency for step {step['id']} user {user_id}: marked completed but quiz progress count mismatch.")
-                    
-                    for q_id in quiz_ids_for_this_step:
-                        attempt = user_attempts_for_quizzes.get(q_id)
-                        # If step is marked as all quizzes attempted, each quiz should have an attempt.
-                        if not attempt or not attempt.get('attempted'):
-                            all_correct = False # Should not happen if is_attempted_all_quizzes is true and data is consistent
-                            logger.warning(f"Data inconsistency for step {step['id']} user {user_id}: quiz {q_id} not marked attempted despite step completion.")
-                            break 
-                        if not attempt.get('is_correct'):
-                            all_correct = False
-                            break
-                    
-                    if all_correct:
-                        step['completion_status'] = 'perfect'
-                    else:
-                        step['completion_status'] = 'imperfect'
-            # else: step remains 'incomplete' and step['is_attempted_all_quizzes'] is False
-        
-        overall_roadmap_progress_percentage = (completed_steps_count / total_steps) * 100 if total_steps > 0 else 0
-    else:
-        overall_roadmap_progress_percentage = 0
+    roadmap_data = roadmap_view['roadmap']
+    roadmap_steps_data = roadmap_view['steps'] # Contains 'is_attempted_all_quizzes' and 'completion_status'
+    overall_roadmap_progress_percentage = roadmap_view['overall_progress_percentage']
 
     return render_template('roadmap/roadmap.html',
                            user=g.user, 
@@ -450,6 +399,7 @@ def create_roadmap():
                         )
             
             conn.commit()
+            roadmap_handler.invalidate_roadmap_bundles()
             
             if is_ajax:
                 return jsonify({
@@ -50,7 +50,17 @@ VALUES
 -- Community-Badges
 ('Mentor', 'Hilft aktiv neuen Händlern', 'community', 'chat-alt', 'neo-blue', 1),
 ('Strategie-Autor', 'Teilt wertvolle Trading-Strategien', 'community', 'document', 'neo-purple', 1),
-('Analytiker', 'Erstellt qualitativ hochwertige Analysen', 'community', 'chart', 'neo-emerald', 1)
+('Analytiker', 'Erstellt qualitativ hochwertige Analysen', 'community', 'chart', 'neo-emerald', 1),
+
+-- Meilenstein-Badges (automatisch vergeben durch utils/badge_rules.py, Namen müssen übereinstimmen)
+('Erster Trade', 'Den ersten Trade ausgeführt', 'milestones', 'trending-up', 'neo-emerald', 1),
+('Aktiver Händler', '50 Trades ausgeführt', 'milestones', 'switch-horizontal', 'neo-blue', 2),
+('Vielhändler', '250 Trades ausgeführt', 'milestones', 'chart-bar', 'neo-purple', 3),
+('Aufsteiger', 'Level 5 erreicht', 'milestones', 'star', 'neo-amber', 1),
+('Elite', 'Level 10 erreicht', 'milestones', 'star', 'neo-red', 2),
+('Wissbegierig', '10 Quizfragen richtig beantwortet', 'milestones', 'document', 'neo-blue', 1),
+('Quiz-Meister', '50 Quizfragen richtig beantwortet', 'milestones', 'document', 'neo-purple', 2),
+('Glückspilz', 'Einen Gewinn mit mindestens 20-fachem Multiplikator erzielt', 'milestones', 'gift', 'neo-amber', 1)
 ON CONFLICT DO NOTHING;
 
 -- Beispielhafte Badge-Zuweisungen für Testzwecke (optional)
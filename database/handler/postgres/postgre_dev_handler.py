@@ -5,6 +5,7 @@ from psycopg2 import pool
 from datetime import datetime
 import logging
 from rich import print
+from database.handler.postgres.postgres_pool import LazyConnectionPool
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +16,7 @@ PG_DB = os.getenv('POSTGRES_DB', 'buyhigh')
 PG_USER = os.getenv('POSTGRES_USER', 'postgres')
 PG_PASSWORD = os.getenv('POSTGRES_PASSWORD', '')
 
-connection_pool = psycopg2.pool.SimpleConnectionPool(1, 20,
+connection_pool = LazyConnectionPool(1, 20,
     host=PG_HOST,
     port=PG_PORT,
     dbname=PG_DB,
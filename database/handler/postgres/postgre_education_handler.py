@@ -2,9 +2,12 @@ import os  # Dieser Import fehlte
 import psycopg2
 import psycopg2.extras
 from psycopg2 import pool
-from datetime import datetime
+from datetime import datetime, date as date_type, timedelta
 import logging
+import threading
 from rich import print
+from database.handler.postgres.postgres_pool import LazyConnectionPool
+import utils.events as events
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +18,7 @@ PG_DB = os.getenv('POSTGRES_DB', 'buyhigh')
 PG_USER = os.getenv('POSTGRES_USER', 'postgres')
 PG_PASSWORD = os.getenv('POSTGRES_PASSWORD', '')
 
-connection_pool = psycopg2.pool.SimpleConnectionPool(1, 20,
+connection_pool = LazyConnectionPool(1, 20,
     host=PG_HOST,
     port=PG_PORT,
     dbname=PG_DB,
@@ -47,8 +50,65 @@ def _parse_user_timestamps(user_row):
     return user_data
 
 
+# Quiz-Kalender: die Quizze von gestern bis QUIZ_CALENDAR_WINDOW_DAYS Tage in die Zukunft werden
+# einmal pro Tag vorgeladen. Der erste Zugriff nach Mitternacht lädt das Fenster neu.
+# Tage ohne Quiz werden als None gespeichert, damit sie keine weiteren Abfragen auslösen.
+QUIZ_CALENDAR_WINDOW_DAYS = 30
+
+_quiz_calendar = {'loaded_for': None, 'by_date': {}}
+_quiz_calendar_lock = threading.Lock()
+
+def _load_quiz_calendar(today):
+    start = today - timedelta(days=1)
+    end = today + timedelta(days=QUIZ_CALENDAR_WINDOW_DAYS)
+    conn = None
+    try:
+        conn = get_db_connection(None)
+        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+            cursor.execute("SELECT * FROM daily_quiz WHERE date BETWEEN %s AND %s", (start, end))
+            rows = cursor.fetchall()
+    finally:
+        if conn:
+            connection_pool.putconn(conn)
+
+    by_date = {(start + timedelta(days=offset)).isoformat(): None for offset in range((end - start).days + 1)}
+    for row in rows:
+        by_date[row['date'].isoformat()] = dict(row)
+    logger.info(f"Quiz-Kalender geladen: {len(rows)} Quizze zwischen {start} und {end}")
+    return by_date
+
+def _get_quiz_calendar():
+    """Gibt den Quiz-Kalender für heute zurück und lädt ihn bei Tageswechsel neu."""
+    today = date_type.today()
+    calendar = _quiz_calendar
+    if calendar['loaded_for'] == today:
+        return calendar['by_date']
+    with _quiz_calendar_lock:
+        if _quiz_calendar['loaded_for'] != today:
+            _quiz_calendar['by_date'] = _load_quiz_calendar(today)
+            _quiz_calendar['loaded_for'] = today
+        return _quiz_calendar['by_date']
+
+def invalidate_quiz_calendar():
+    """Verwirft den Quiz-Kalender, z.B. nach dem Anlegen oder Löschen eines Quiz."""
+    with _quiz_calendar_lock:
+        _quiz_calendar['loaded_for'] = None
+        _quiz_calendar['by_date'] = {}
+    events.publish(events.CONTENT_CHANGED, user_id=None, source='daily_quiz')
+
 def get_daily_quiz(date):
-    """Lädt das tägliche Quiz für ein bestimmtes Datum aus der PostgreSQL-Datenbank."""
+    """Lädt das tägliche Quiz für ein bestimmtes Datum (aus dem Quiz-Kalender, sonst aus der Datenbank)."""
+    date_key = date.isoformat() if isinstance(date, date_type) else str(date)
+    try:
+        by_date = _get_quiz_calendar()
+        if date_key in by_date:
+            quiz = by_date[date_key]
+            return dict(quiz) if quiz else None
+    except psycopg2.Error as e:
+        logger.error(f"Fehler beim Laden des Quiz-Kalenders: {e}", exc_info=True)
+
+    # Datum außerhalb des vorgeladenen Fensters
+    conn = None
     try:
         conn = get_db_connection(None)
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
@@ -69,12 +129,32 @@ def insert_daily_quiz_attempt(user_id, quiz_id, selected_answer, is_correct):
     try:
         conn = get_db_connection(None)
         with conn.cursor() as cursor:
+            # Versuch speichern und die Statistik im selben Statement fortschreiben;
+            # bei einem doppelten Versuch liefert die CTE keine Zeile und die Statistik bleibt unverändert
             cursor.execute("""
-                INSERT INTO daily_quiz_attempts (user_id, quiz_id, selected_answer, is_correct)
-                VALUES (%s, %s, %s, %s)
-                ON CONFLICT (user_id, quiz_id) DO NOTHING
+                WITH attempt AS (
+                    INSERT INTO daily_quiz_attempts (user_id, quiz_id, selected_answer, is_correct)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (user_id, quiz_id) DO NOTHING
+                    RETURNING quiz_id, selected_answer, is_correct
+                )
+                INSERT INTO daily_quiz_stats (quiz_id, total_attempts, correct_attempts, answer_counts)
+                SELECT quiz_id, 1, CASE WHEN is_correct THEN 1 ELSE 0 END, jsonb_build_object(selected_answer, 1)
+                FROM attempt
+                ON CONFLICT (quiz_id) DO UPDATE SET
+                    total_attempts = daily_quiz_stats.total_attempts + 1,
+                    correct_attempts = daily_quiz_stats.correct_attempts + EXCLUDED.correct_attempts,
+                    answer_counts = daily_quiz_stats.answer_counts || jsonb_build_object(
+                        (SELECT selected_answer FROM attempt),
+                        COALESCE((daily_quiz_stats.answer_counts ->> (SELECT selected_answer FROM attempt))::int, 0) + 1
+                    ),
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING quiz_id
             """, (user_id, quiz_id, selected_answer, is_correct))
+            inserted = cursor.fetchone() is not None
             conn.commit()
+        if inserted and is_correct:
+            events.publish(events.QUIZ_CORRECT, user_id=user_id, quiz_id=quiz_id, source='daily')
     except psycopg2.Error as e:
         logger.error(f"Fehler beim Einfügen eines Quiz-Versuchs: {e}", exc_info=True)
         raise
@@ -82,6 +162,71 @@ def insert_daily_quiz_attempt(user_id, quiz_id, selected_answer, is_correct):
         if conn:
             connection_pool.putconn(conn)
 
+def get_daily_quiz_attempt(user_id, quiz_id):
+    """
+    Lädt den Versuch eines Benutzers für ein bestimmtes Quiz (Index-Lookup über UNIQUE(user_id, quiz_id)).
+    Gibt None zurück, wenn der Benutzer das Quiz noch nicht beantwortet hat.
+    """
+    conn = None
+    try:
+        conn = get_db_connection(None)
+        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+            cursor.execute("""
+                SELECT * FROM daily_quiz_attempts WHERE user_id = %s AND quiz_id = %s
+            """, (user_id, quiz_id))
+            attempt = cursor.fetchone()
+            return dict(attempt) if attempt else None
+    except psycopg2.Error as e:
+        logger.error(f"Fehler beim Abrufen des Quizversuchs von Benutzer {user_id} für Quiz {quiz_id}: {e}", exc_info=True)
+        raise
+    finally:
+        if conn:
+            connection_pool.putconn(conn)
+
+def get_daily_quiz_attempt_for_date(user_id, date):
+    """
+    Lädt den Versuch eines Benutzers für das Quiz eines bestimmten Datums.
+    Das Datum wird über den Quiz-Kalender auf die Quiz-ID abgebildet (date ist UNIQUE),
+    danach genügt ein einzelner Index-Lookup.
+    """
+    quiz = get_daily_quiz(date)
+    if not quiz:
+        return None
+    return get_daily_quiz_attempt(user_id, quiz['id'])
+
+def get_daily_quiz_stats(quiz_id):
+    """
+    Lädt die fortlaufend gepflegte Antwortstatistik eines Quiz.
+
+    Returns:
+        dict: total_attempts, correct_attempts, percent_correct und answer_counts (Antwort -> Anzahl)
+    """
+    conn = None
+    try:
+        conn = get_db_connection(None)
+        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+            cursor.execute("""
+                SELECT total_attempts, correct_attempts, answer_counts
+                FROM daily_quiz_stats WHERE quiz_id = %s
+            """, (quiz_id,))
+            row = cursor.fetchone()
+    except psycopg2.Error as e:
+        logger.error(f"Fehler beim Abrufen der Statistik für Quiz {quiz_id}: {e}", exc_info=True)
+        raise
+    finally:
+        if conn:
+            connection_pool.putconn(conn)
+
+    total = row['total_attempts'] if row else 0
+    correct = row['correct_attempts'] if row else 0
+    return {
+        'quiz_id': quiz_id,
+        'total_attempts': total,
+        'correct_attempts': correct,
+        'percent_correct': round(correct / total * 100, 1) if total else None,
+        'answer_counts': dict(row['answer_counts']) if row and row['answer_counts'] else {}
+    }
+
 def get_daily_quiz_attempts(user_id):
     """
     Lädt alle täglichen Quizversuche eines Benutzers aus der PostgreSQL-Datenbank.
@@ -114,6 +259,7 @@ def create_daily_quiz(date, question, possible_answer_1, possible_answer_2, poss
                 VALUES (%s, %s, %s, %s, %s, %s)
             """, (date, question, possible_answer_1, possible_answer_2, possible_answer_3, correct_answer))
             conn.commit()
+        invalidate_quiz_calendar()
     except psycopg2.Error as e:
         logger.error(f"Fehler beim Erstellen des täglichen Quiz: {e}", exc_info=True)
         raise
@@ -147,6 +293,7 @@ def delete_daily_quiz(quiz_id):
         with conn.cursor() as cursor:
             cursor.execute("DELETE FROM daily_quiz WHERE id = %s", (quiz_id,))
             conn.commit()
+        invalidate_quiz_calendar()
     except psycopg2.Error as e:
         logger.error(f"Fehler beim Löschen des täglichen Quiz mit ID {quiz_id}: {e}", exc_info=True)
         raise
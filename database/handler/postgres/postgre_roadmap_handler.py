@@ -1,9 +1,11 @@
 import os
 import psycopg2
 import psycopg2.extras
+import threading
 from datetime import datetime
 import logging
 from rich import print
+import utils.events as events
 
 logger = logging.getLogger(__name__)
 
@@ -167,6 +169,7 @@ def check_and_fix_quiz_mappings():
                         """, (quiz['expected_roadmap_id'], quiz['id']))
                         
                 conn.commit()
+                invalidate_roadmap_bundles()
                 logger.info("Inconsistent quiz mappings have been corrected.")
             else:
                 logger.info("No inconsistent quiz mappings found.")
@@ -190,19 +193,16 @@ def get_user_progress_for_quizzes(user_id, quiz_ids):
     conn = get_db_connection()
     try:
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-            # Create a placeholder string for the IN clause: (%s, %s, ...)
-            placeholders = ', '.join(['%s'] * len(quiz_ids))
-            sql_query = f"""
+            # A single array parameter keeps the statement text constant regardless of list length
+            sql_query = """
             SELECT 
                 quiz_id,
                 is_correct,
                 attempted_at IS NOT NULL as attempted
             FROM user_roadmap_quiz_progress
-            WHERE user_id = %s AND quiz_id IN ({placeholders});
+            WHERE user_id = %s AND quiz_id = ANY(%s);
             """
-            # The parameter list must contain user_id first, then the quiz_ids
-            params = [user_id] + quiz_ids
-            cursor.execute(sql_query, tuple(params))
+            cursor.execute(sql_query, (user_id, list(quiz_ids)))
             progress_data = cursor.fetchall()
             
             user_progress = {}
@@ -239,17 +239,26 @@ def record_user_quiz_attempt(user_id, quiz_id, is_correct):
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            # Attempt to update an existing entry or insert a new one
+            # Attempt to update an existing entry or insert a new one.
+            # The CTE reads the previous result (pre-statement snapshot) so we only
+            # publish a quiz_correct event on the first correct answer.
             sql_query = """
+            WITH previous AS (
+                SELECT is_correct FROM user_roadmap_quiz_progress WHERE user_id = %s AND quiz_id = %s
+            )
             INSERT INTO user_roadmap_quiz_progress (user_id, quiz_id, is_correct, attempted_at)
             VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
             ON CONFLICT (user_id, quiz_id) DO UPDATE SET
                 is_correct = EXCLUDED.is_correct,
-                attempted_at = CURRENT_TIMESTAMP;
+                attempted_at = CURRENT_TIMESTAMP
+            RETURNING (SELECT is_correct FROM previous) AS was_correct;
             """
-            cursor.execute(sql_query, (user_id, quiz_id, is_correct))
+            cursor.execute(sql_query, (user_id, quiz_id, user_id, quiz_id, is_correct))
+            was_correct = cursor.fetchone()[0]
             conn.commit()
             logger.info(f"Quiz attempt for user {user_id}, quiz {quiz_id} recorded. Correct: {is_correct}")
+        if is_correct and not was_correct:
+            events.publish(events.QUIZ_CORRECT, user_id=user_id, quiz_id=quiz_id, source='roadmap')
     except psycopg2.Error as e:
         conn.rollback()
         logger.error(f"Error recording quiz attempt for user {user_id}, quiz {quiz_id}: {e}", exc_info=True)
@@ -392,6 +401,219 @@ def get_roadmap_collection():
     finally:
         conn.close()
 
+# --- Roadmap content bundle ---
+# Roadmaps, steps and quizzes only change when content is created or fixed, so the whole
+# tree is loaded once into memory and rebuilt after content changes. A roadmap view then
+# only needs a single query for the user's progress.
+
+_roadmap_bundles = None
+_roadmap_bundles_generation = 0     # bumped by every invalidation
+_roadmap_bundles_lock = threading.Lock()
+
+def load_roadmap_bundles():
+    """
+    Loads all roadmaps with their steps and quizzes (three queries on one connection)
+    and replaces the in-memory bundle. Returns the number of roadmaps loaded.
+    """
+    return len(_load_bundles())
+
+def _load_bundles():
+    """
+    Loads and installs the bundles; returns the loaded dict (roadmap_id -> bundle).
+    A load that overlapped an invalidation is returned but not installed: it may
+    predate the content change.
+    """
+    global _roadmap_bundles
+    with _roadmap_bundles_lock:
+        generation = _roadmap_bundles_generation
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            cursor.execute("SELECT * FROM roadmap ORDER BY id")
+            roadmaps = cursor.fetchall()
+            cursor.execute("SELECT * FROM roadmap_steps ORDER BY roadmap_id, step_number, id")
+            steps = cursor.fetchall()
+            cursor.execute("SELECT * FROM roadmap_quizzes ORDER BY roadmap_id, step_id, id")
+            quizzes = cursor.fetchall()
+    except psycopg2.Error as e:
+        logger.error(f"Error loading roadmap bundles: {e}", exc_info=True)
+        raise
+    finally:
+        conn.close()
+
+    bundles = {}
+    for roadmap in roadmaps:
+        bundles[roadmap['id']] = {
+            'roadmap': dict(roadmap),
+            'steps': [],
+            'quizzes_by_step': {},
+            'quiz_ids': []
+        }
+    for step in steps:
+        bundle = bundles.get(step['roadmap_id'])
+        if bundle is not None:
+            bundle['steps'].append(dict(step))
+            bundle['quizzes_by_step'][step['id']] = []
+    for quiz in quizzes:
+        bundle = bundles.get(quiz['roadmap_id'])
+        if bundle is not None and quiz['step_id'] in bundle['quizzes_by_step']:
+            bundle['quizzes_by_step'][quiz['step_id']].append(dict(quiz))
+            bundle['quiz_ids'].append(quiz['id'])
+
+    with _roadmap_bundles_lock:
+        if generation == _roadmap_bundles_generation:
+            _roadmap_bundles = bundles
+    logger.info(f"Roadmap bundles loaded: {len(roadmaps)} roadmaps, {len(steps)} steps, {len(quizzes)} quizzes")
+    return bundles
+
+def invalidate_roadmap_bundles():
+    """Drops the in-memory bundle; it is rebuilt on next access. Call after roadmap content changes."""
+    global _roadmap_bundles, _roadmap_bundles_generation
+    with _roadmap_bundles_lock:
+        _roadmap_bundles = None
+        _roadmap_bundles_generation += 1
+    events.publish(events.CONTENT_CHANGED, user_id=None, source='roadmap')
+
+def get_roadmap_bundle(roadmap_id):
+    """Returns the cached content bundle for a roadmap (loading it if necessary), or None if not found."""
+    bundles = _roadmap_bundles
+    if bundles is None:
+        # The loaded dict itself: a concurrent invalidation may reset the global meanwhile
+        bundles = _load_bundles()
+    return bundles.get(roadmap_id)
+
+def get_indexable_content():
+    """
+    Returns the curated learning content for the chatbot's retrieval index
+    (buy_high_backend/utils/rag_index.py) as a list of
+    {'source', 'title', 'text'} dicts: roadmap steps, roadmap quiz questions
+    (without answers: the quizzes award XP) and daily quizzes whose day has
+    passed (today's and future answers stay hidden).
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT s.id, r.title AS roadmap_title, s.title, s.description, s.explain
+                FROM roadmap_steps s
+                JOIN roadmap r ON r.id = s.roadmap_id
+                ORDER BY s.id
+            """)
+            steps = cursor.fetchall()
+            cursor.execute("""
+                SELECT q.id, s.title AS step_title, q.question
+                FROM roadmap_quizzes q
+                JOIN roadmap_steps s ON s.id = q.step_id
+                ORDER BY q.id
+            """)
+            quizzes = cursor.fetchall()
+            cursor.execute("""
+                SELECT id, question, correct_answer
+                FROM daily_quiz
+                WHERE date < CURRENT_DATE
+                ORDER BY id
+            """)
+            daily_quizzes = cursor.fetchall()
+    except psycopg2.Error as e:
+        logger.error(f"Error loading indexable content: {e}", exc_info=True)
+        raise
+    finally:
+        conn.close()
+
+    content = []
+    for step in steps:
+        body = " ".join(part for part in (step['description'], step['explain']) if part)
+        content.append({
+            'source': f"roadmap_step:{step['id']}",
+            'title': f"{step['roadmap_title']} - {step['title']}",
+            'text': body
+        })
+    for quiz in quizzes:
+        content.append({
+            'source': f"roadmap_quiz:{quiz['id']}",
+            'title': f"Quiz: {quiz['step_title']}",
+            'text': quiz['question']
+        })
+    for quiz in daily_quizzes:
+        content.append({
+            'source': f"daily_quiz:{quiz['id']}",
+            'title': "Daily quiz",
+            'text': f"{quiz['question']} Answer: {quiz['correct_answer']}"
+        })
+    return content
+
+def get_roadmap_view(user_id, roadmap_id):
+    """
+    Builds the complete roadmap view for a user: roadmap, steps (with completion status)
+    and quizzes (with the user's attempts). Static content comes from the bundle; the
+    user's step and quiz progress is loaded with a single query.
+    Returns None if the roadmap does not exist.
+    """
+    bundle = get_roadmap_bundle(roadmap_id)
+    if bundle is None:
+        return None
+
+    quiz_progress = {}
+    step_progress = {}
+    if user_id:
+        conn = get_db_connection()
+        try:
+            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+                cursor.execute("""
+                    SELECT 'quiz' AS kind, quiz_id AS ref_id, is_correct,
+                           NULL AS is_completed, NULL AS progress_percentage
+                    FROM user_roadmap_quiz_progress
+                    WHERE user_id = %s AND quiz_id = ANY(%s)
+                    UNION ALL
+                    SELECT 'step', step_id, NULL, is_completed, progress_percentage
+                    FROM user_roadmap_progress
+                    WHERE user_id = %s AND roadmap_id = %s
+                """, (user_id, bundle['quiz_ids'], user_id, roadmap_id))
+                for row in cursor.fetchall():
+                    if row['kind'] == 'quiz':
+                        quiz_progress[row['ref_id']] = row['is_correct']
+                    else:
+                        step_progress[row['ref_id']] = {
+                            'is_completed': row['is_completed'],
+                            'progress_percentage': row['progress_percentage']
+                        }
+        except psycopg2.Error as e:
+            logger.error(f"Error fetching roadmap progress for user {user_id}, roadmap {roadmap_id}: {e}", exc_info=True)
+        finally:
+            conn.close()
+
+    steps = []
+    completed_steps_count = 0
+    for step_content in bundle['steps']:
+        step = dict(step_content)
+        quizzes = []
+        for quiz_content in bundle['quizzes_by_step'].get(step['id'], ()):
+            quiz = dict(quiz_content)
+            quiz['attempted'] = quiz['id'] in quiz_progress
+            quiz['is_correct'] = quiz_progress.get(quiz['id'])
+            quizzes.append(quiz)
+
+        progress_info = step_progress.get(step['id'])
+        step['progress_percentage'] = progress_info['progress_percentage'] if progress_info else 0.0
+        step['is_attempted_all_quizzes'] = False
+        step['completion_status'] = 'incomplete'
+        if progress_info and progress_info.get('is_completed'):
+            step['is_attempted_all_quizzes'] = True
+            completed_steps_count += 1
+            all_correct = all(quiz['attempted'] and quiz['is_correct'] for quiz in quizzes)
+            step['completion_status'] = 'perfect' if all_correct else 'imperfect'
+        step['quizzes'] = quizzes
+        steps.append(step)
+
+    total_steps = len(steps)
+    return {
+        'roadmap': dict(bundle['roadmap']),
+        'steps': steps,
+        'total_steps': total_steps,
+        'completed_steps': completed_steps_count,
+        'overall_progress_percentage': (completed_steps_count / total_steps) * 100 if total_steps > 0 else 0
+    }
+
 if __name__ == "__main__":
     # Perform a check and correction of quiz mappings if necessary
     print("[bold yellow]Checking quiz mappings:[/bold yellow]")
@@ -1,9 +1,16 @@
 import os
+import threading
+import time
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from collections import Counter
+from psycopg2.extras import RealDictCursor, execute_values
 from dotenv import load_dotenv
 import utils.stock_data_api as stock_data  # Import des stock_data Moduls für aktuelle Kurse # Changed from stock_data to stock_data_api
 import database.handler.postgres.postgres_db_handler as db_handler  # Import des PostgreSQL DB Handlers
+import database.handler.postgres.postgres_balance_handler as balance_handler
+from database.handler.postgres.postgres_group_commit import GroupCommitter
+from database.handler.postgres.postgres_pool import LazyConnectionPool
+import utils.events as events
 from rich import print
 
 load_dotenv()
@@ -16,6 +23,24 @@ POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 
 USD_TO_EUR_EXCHANGE_RATE = 0.92  # Beispielkurs, wie im SQLite-Handler
 
+# Asset-Listen (get_all_assets) werden kurz zwischengespeichert; last_price in der Liste
+# darf höchstens ASSETS_CACHE_TTL Sekunden alt sein.
+ASSETS_CACHE_TTL = 120  # Sekunden
+_assets_cache = {}  # (active_only, asset_type) -> (Zeitstempel, Assets)
+_assets_cache_lock = threading.Lock()
+
+# Group Commit für Käufe: Käufe, die innerhalb dieses Fensters eintreffen, laufen in einer
+# Transaktion (buy_stocks_batch). 0 = aus, jeder Kauf committet einzeln.
+TRADE_GROUP_COMMIT_MS = float(os.getenv("TRADE_GROUP_COMMIT_MS", "0"))
+_buy_batcher = None
+_group_commit_pool = LazyConnectionPool(1, 1,
+    host=POSTGRES_HOST,
+    port=POSTGRES_PORT,
+    dbname=POSTGRES_DB,
+    user=POSTGRES_USER,
+    password=POSTGRES_PASSWORD
+)
+
 def get_connection():
     print('[bold blue]Connection to DB from Transaction Handler[/bold blue]')
     return psycopg2.connect(
@@ -147,143 +172,264 @@ def update_portfolio_on_sell(cursor, user_id, asset_symbol, quantity):
     else:
         raise ValueError(f"Insufficient quantity of {asset_symbol} in portfolio.")
 
+def _buy_command(asset_type_id, asset_symbol, quantity, price_per_unit):
+    """Kontostand-Befehl für einen Kauf (läuft mit gesperrter Benutzerzeile, siehe postgres_balance_handler)."""
+    def command(conn, account):
+        total_cost_usd = quantity * price_per_unit
+        total_cost_eur = total_cost_usd * USD_TO_EUR_EXCHANGE_RATE
+        if account.balance < total_cost_eur:
+            return {"success": False, "message": "Insufficient balance."}
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("UPDATE users SET total_trades = total_trades + 1 WHERE id = %s", (account.user_id,))
+            cur.execute("""
+                INSERT INTO transactions 
+                (user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type)
+                VALUES (%s, %s, %s, %s, %s, 'buy')
+                RETURNING id, user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type, timestamp;
+            """, (account.user_id, asset_type_id, asset_symbol, quantity, price_per_unit))
+            transaction = cur.fetchone()
+            
+            update_portfolio_on_buy(cur, account.user_id, asset_symbol, quantity, price_per_unit)
+        account.balance -= total_cost_eur
+        return {"success": True, "transaction": transaction, "message": f"Successfully purchased {quantity} shares of {asset_symbol} for ${total_cost_usd:.2f} (approx. €{total_cost_eur:.2f})."}
+    return command
+
 def buy_stock(user_id, asset_symbol, quantity, price_per_unit):
     """
     Führt einen Aktienkauf für den Benutzer durch (PostgreSQL).
     User balance ist in EUR, price_per_unit in USD.
+    Läuft über die Kontostand-Warteschlange des Benutzers (postgres_balance_handler),
+    bei aktivem Group Commit (TRADE_GROUP_COMMIT_MS) gesammelt über buy_stocks_batch.
     """
     try:
-        with get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                asset_type_id = get_asset_type_id('stock')
-                cur.execute("SELECT balance FROM users WHERE id = %s", (user_id,))
-                user = cur.fetchone()
-                if not user:
-                    return {"success": False, "message": "User not found."}
-                current_balance_eur = user['balance']
-                total_cost_usd = quantity * price_per_unit
-                total_cost_eur = total_cost_usd * USD_TO_EUR_EXCHANGE_RATE
-                if current_balance_eur < total_cost_eur:
-                    return {"success": False, "message": "Insufficient balance."}
-                cur.execute("BEGIN;")
-                new_balance_eur = current_balance_eur - total_cost_eur
-                cur.execute(
-                    "UPDATE users SET balance = %s, total_trades = total_trades + 1 WHERE id = %s",
-                    (new_balance_eur, user_id)
-                )
-                cur.execute("""
-                    INSERT INTO transactions 
-                    (user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type)
-                    VALUES (%s, %s, %s, %s, %s, 'buy')
-                    RETURNING id, user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type, timestamp;
-                """, (user_id, asset_type_id, asset_symbol, quantity, price_per_unit))
-                transaction = cur.fetchone()
-                
-                update_portfolio_on_buy(cur, user_id, asset_symbol, quantity, price_per_unit)
-                
-                conn.commit()
-                db_handler.manage_user_xp("buy", user_id, quantity=quantity)
-                db_handler.check_user_level(user_id, db_handler.get_user_xp(user_id))
-                
-                return {"success": True, "transaction": transaction, "message": f"Successfully purchased {quantity} shares of {asset_symbol} for ${total_cost_usd:.2f} (approx. €{total_cost_eur:.2f})."}
+        if _buy_batcher is not None:
+            result = balance_handler.wait_for_command(_buy_batcher.submit((user_id, asset_symbol, quantity, price_per_unit)),
+                                                      balance_handler.COMMAND_TIMEOUT)
+        else:
+            asset_type_id = get_asset_type_id('stock')
+            result = balance_handler.run_balance_command(user_id, _buy_command(asset_type_id, asset_symbol, quantity, price_per_unit))
+    except balance_handler.UserNotFoundError:
+        return {"success": False, "message": "User not found."}
     except Exception as e:
         return {"success": False, "message": f"Database error: {e}"}
+    if result["success"]:
+        events.publish(events.TRADE_EXECUTED, user_id=user_id, side='buy', symbol=asset_symbol, quantity=quantity, price=price_per_unit)
+        db_handler.manage_user_xp("buy", user_id, quantity=quantity)
+        db_handler.check_user_level(user_id, db_handler.get_user_xp(user_id))
+    return result
+
+def buy_stocks_batch(trades):
+    """
+    Führt mehrere Käufe in einer Transaktion aus (Group Commit).
+
+    Sperrt alle beteiligten Benutzer in fester Reihenfolge, prüft die Käufe in
+    Reihenfolge gegen den Kontostand im Speicher und schreibt dann mit je einer
+    Anweisung: Kontostände, alle Transaktionen (mehrzeiliges INSERT) und die
+    Portfolio-Positionen (Upsert, pro Benutzer und Asset zusammengefasst).
+    Events und XP löst buy_stock nach dem Commit aus.
+
+    Args:
+        trades (list): (user_id, asset_symbol, quantity, price_per_unit) pro Kauf
+
+    Returns:
+        list: Ergebnis pro Kauf in derselben Reihenfolge, wie bei buy_stock
+    """
+    conn = _group_commit_pool.getconn()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT id FROM asset_types WHERE name = %s", ('stock',))
+            row = cur.fetchone()
+            if not row:
+                raise ValueError("Asset type 'stock' not found in database.")
+            asset_type_id = row['id']
+            cur.execute("SELECT symbol, id FROM assets WHERE symbol = ANY(%s)", (sorted({t[1] for t in trades}),))
+            asset_ids = {r['symbol']: r['id'] for r in cur.fetchall()}
+            # Feste Sperr-Reihenfolge: keine Deadlocks mit anderen Stapeln oder Workern
+            cur.execute("SELECT id, balance FROM users WHERE id = ANY(%s) ORDER BY id FOR UPDATE", (sorted({t[0] for t in trades}),))
+            balances = {r['id']: r['balance'] for r in cur.fetchall()}
+
+            results = [None] * len(trades)
+            accepted = []
+            for i, (user_id, asset_symbol, quantity, price_per_unit) in enumerate(trades):
+                if user_id not in balances:
+                    results[i] = {"success": False, "message": "User not found."}
+                    continue
+                if asset_symbol not in asset_ids:
+                    results[i] = {"success": False, "message": f"Database error: Asset with symbol '{asset_symbol}' not found."}
+                    continue
+                total_cost_eur = quantity * price_per_unit * USD_TO_EUR_EXCHANGE_RATE
+                if balances[user_id] < total_cost_eur:
+                    results[i] = {"success": False, "message": "Insufficient balance."}
+                    continue
+                balances[user_id] -= total_cost_eur
+                accepted.append(i)
+
+            if accepted:
+                trade_counts = Counter(trades[i][0] for i in accepted)
+                execute_values(cur, """
+                    UPDATE users SET balance = v.balance, total_trades = total_trades + v.trades
+                    FROM (VALUES %s) AS v(id, balance, trades)
+                    WHERE users.id = v.id
+                """, [(user_id, balances[user_id], count) for user_id, count in sorted(trade_counts.items())],
+                    page_size=len(trade_counts))
+                # RETURNING garantiert nicht die Reihenfolge von VALUES: jede Zeile bekommt vorab ihre
+                # ID aus der Sequenz, die Antwort wird über diese ID dem Kauf (ordinal = Index) zugeordnet
+                inserted = execute_values(cur, """
+                    WITH v AS (
+                        SELECT v.*, nextval(pg_get_serial_sequence('transactions', 'id')) AS new_id
+                        FROM (VALUES %s) AS v(ordinal, user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type)
+                    ), inserted AS (
+                        INSERT INTO transactions
+                        (id, user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type)
+                        SELECT new_id, user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type FROM v
+                        RETURNING id, user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type, timestamp
+                    )
+                    SELECT v.ordinal, inserted.* FROM inserted JOIN v ON v.new_id = inserted.id;
+                """, [(i, trades[i][0], asset_type_id, trades[i][1], trades[i][2], trades[i][3], 'buy') for i in accepted],
+                    page_size=len(accepted), fetch=True)
+                transactions = {row.pop('ordinal'): row for row in inserted}
+                # Pro (Benutzer, Asset) zusammenfassen: ein Upsert darf eine Zeile nur einmal treffen
+                positions = {}
+                for i in accepted:
+                    user_id, asset_symbol, quantity, price_per_unit = trades[i]
+                    key = (user_id, asset_ids[asset_symbol])
+                    total_quantity, total_cost = positions.get(key, (0.0, 0.0))
+                    positions[key] = (total_quantity + quantity, total_cost + quantity * price_per_unit)
+                execute_values(cur, """
+                    INSERT INTO portfolio (user_id, asset_id, quantity, average_buy_price)
+                    VALUES %s
+                    ON CONFLICT (user_id, asset_id) DO UPDATE SET
+                        quantity = portfolio.quantity + EXCLUDED.quantity,
+                        average_buy_price = (portfolio.quantity * portfolio.average_buy_price
+                                             + EXCLUDED.quantity * EXCLUDED.average_buy_price)
+                                            / (portfolio.quantity + EXCLUDED.quantity),
+                        last_updated = CURRENT_TIMESTAMP
+                """, [(user_id, asset_id, quantity, cost / quantity) for (user_id, asset_id), (quantity, cost) in sorted(positions.items())],
+                    page_size=len(positions))
+                for i in accepted:
+                    transaction = transactions[i]
+                    _, asset_symbol, quantity, price_per_unit = trades[i]
+                    total_cost_usd = quantity * price_per_unit
+                    total_cost_eur = total_cost_usd * USD_TO_EUR_EXCHANGE_RATE
+                    results[i] = {"success": True, "transaction": transaction, "message": f"Successfully purchased {quantity} shares of {asset_symbol} for ${total_cost_usd:.2f} (approx. €{total_cost_eur:.2f})."}
+        conn.commit()
+        return results
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _group_commit_pool.putconn(conn)
+
+def set_group_commit_window(window_ms):
+    """Schaltet den Group Commit für Käufe ein (Fenster in ms) oder mit 0 aus."""
+    global _buy_batcher
+    _buy_batcher = GroupCommitter("buy", buy_stocks_batch, window_ms) if window_ms > 0 else None
+
+def get_group_commit_stats():
+    return _buy_batcher.get_stats() if _buy_batcher is not None else None
+
+set_group_commit_window(TRADE_GROUP_COMMIT_MS)
+
+def _sell_command(asset_type_id, asset_symbol, quantity, price_per_unit):
+    """Kontostand-Befehl für einen Verkauf mit realisiertem Gewinn/Verlust nach FIFO."""
+    def command(conn, account):
+        user_id = account.user_id
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                SELECT 
+                    COALESCE(SUM(CASE WHEN transaction_type = 'buy' THEN quantity ELSE 0 END), 0) -
+                    COALESCE(SUM(CASE WHEN transaction_type = 'sell' THEN quantity ELSE 0 END), 0) as current_holding
+                FROM transactions
+                WHERE user_id = %s AND asset_symbol = %s AND asset_type_id = %s
+            """, (user_id, asset_symbol, asset_type_id))
+            holding_data = cur.fetchone()
+            current_holding = holding_data['current_holding'] if holding_data else 0
+            if current_holding < quantity:
+                return {"success": False, "message": f"Insufficient shares of {asset_symbol} to sell."}
+            cur.execute("""
+                SELECT quantity, price_per_unit 
+                FROM transactions
+                WHERE user_id = %s AND asset_symbol = %s AND asset_type_id = %s AND transaction_type = 'buy'
+                ORDER BY timestamp ASC
+            """, (user_id, asset_symbol, asset_type_id))
+            buy_transactions = cur.fetchall()
+            cur.execute("""
+                SELECT 
+                    SUM(CASE WHEN transaction_type = 'buy' THEN quantity ELSE 0 END) as total_bought,
+                    SUM(CASE WHEN transaction_type = 'sell' THEN quantity ELSE 0 END) as total_sold
+                FROM transactions
+                WHERE user_id = %s AND asset_symbol = %s AND asset_type_id = %s
+            """, (user_id, asset_symbol, asset_type_id))
+            all_tx_summary = cur.fetchone()
+            temp_quantity_sold_previously = all_tx_summary['total_sold'] if all_tx_summary else 0
+            effective_buy_lots = []
+            for bt in buy_transactions:
+                bt_quantity = float(bt['quantity'])
+                bt_price = float(bt['price_per_unit'])
+                if temp_quantity_sold_previously >= bt_quantity:
+                    temp_quantity_sold_previously -= bt_quantity
+                else:
+                    remaining_in_lot = bt_quantity - temp_quantity_sold_previously
+                    temp_quantity_sold_previously = 0
+                    if remaining_in_lot > 0:
+                        effective_buy_lots.append({'quantity': remaining_in_lot, 'price_per_unit': bt_price})
+            quantity_for_current_sale_calc = float(quantity)
+            cost_for_current_sale_usd = 0.0
+            for lot in effective_buy_lots:
+                if quantity_for_current_sale_calc == 0:
+                    break
+                sell_from_this_lot = min(quantity_for_current_sale_calc, lot['quantity'])
+                cost_for_current_sale_usd += sell_from_this_lot * lot['price_per_unit']
+                quantity_for_current_sale_calc -= sell_from_this_lot
+            if quantity_for_current_sale_calc > 0.0001:
+                return {"success": False, "message": f"Error in cost basis calculation for {asset_symbol}. Not enough purchase history for sale."}
+            total_sale_value_usd = float(quantity) * float(price_per_unit)
+            realized_profit_or_loss_usd = total_sale_value_usd - cost_for_current_sale_usd
+            realized_profit_or_loss_eur = realized_profit_or_loss_usd * USD_TO_EUR_EXCHANGE_RATE
+            total_sale_amount_eur = total_sale_value_usd * USD_TO_EUR_EXCHANGE_RATE
+            cur.execute(
+                """UPDATE users 
+                   SET total_trades = total_trades + 1,
+                       profit_loss = profit_loss + %s 
+                   WHERE id = %s""", 
+                (realized_profit_or_loss_eur, user_id)
+            )
+            cur.execute("""
+                INSERT INTO transactions 
+                (user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type)
+                VALUES (%s, %s, %s, %s, %s, 'sell')
+                RETURNING id, user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type, timestamp;
+            """, (user_id, asset_type_id, asset_symbol, quantity, price_per_unit))
+            transaction = cur.fetchone()
+            
+            update_portfolio_on_sell(cur, user_id, asset_symbol, quantity)
+        account.balance += total_sale_amount_eur
+        return {
+            "success": True,
+            "transaction": transaction,
+            "message": f"Successfully sold {quantity} shares of {asset_symbol} for ${total_sale_value_usd:.2f} (approx. €{total_sale_amount_eur:.2f}). Realized P/L: ${realized_profit_or_loss_usd:.2f} (approx. €{realized_profit_or_loss_eur:.2f})"
+        }
+    return command
 
 def sell_stock(user_id, asset_symbol, quantity, price_per_unit):
     """
     Führt einen Aktienverkauf für den Benutzer durch (PostgreSQL) und berechnet realisierten Gewinn/Verlust (FIFO).
     User balance und profit_loss sind in EUR, price_per_unit in USD.
+    Läuft über die Kontostand-Warteschlange des Benutzers, damit parallele Verkäufe
+    denselben Bestand nicht doppelt verkaufen.
     """
     try:
-        with get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                asset_type_id = get_asset_type_id('stock')
-                cur.execute("""
-                    SELECT 
-                        COALESCE(SUM(CASE WHEN transaction_type = 'buy' THEN quantity ELSE 0 END), 0) -
-                        COALESCE(SUM(CASE WHEN transaction_type = 'sell' THEN quantity ELSE 0 END), 0) as current_holding
-                    FROM transactions
-                    WHERE user_id = %s AND asset_symbol = %s AND asset_type_id = %s
-                """, (user_id, asset_symbol, asset_type_id))
-                holding_data = cur.fetchone()
-                current_holding = holding_data['current_holding'] if holding_data else 0
-                if current_holding < quantity:
-                    return {"success": False, "message": f"Insufficient shares of {asset_symbol} to sell."}
-                cur.execute("""
-                    SELECT quantity, price_per_unit 
-                    FROM transactions
-                    WHERE user_id = %s AND asset_symbol = %s AND asset_type_id = %s AND transaction_type = 'buy'
-                    ORDER BY timestamp ASC
-                """, (user_id, asset_symbol, asset_type_id))
-                buy_transactions = cur.fetchall()
-                cur.execute("""
-                    SELECT 
-                        SUM(CASE WHEN transaction_type = 'buy' THEN quantity ELSE 0 END) as total_bought,
-                        SUM(CASE WHEN transaction_type = 'sell' THEN quantity ELSE 0 END) as total_sold
-                    FROM transactions
-                    WHERE user_id = %s AND asset_symbol = %s AND asset_type_id = %s
-                """, (user_id, asset_symbol, asset_type_id))
-                all_tx_summary = cur.fetchone()
-                temp_quantity_sold_previously = all_tx_summary['total_sold'] if all_tx_summary else 0
-                effective_buy_lots = []
-                for bt in buy_transactions:
-                    bt_quantity = float(bt['quantity'])
-                    bt_price = float(bt['price_per_unit'])
-                    if temp_quantity_sold_previously >= bt_quantity:
-                        temp_quantity_sold_previously -= bt_quantity
-                    else:
-                        remaining_in_lot = bt_quantity - temp_quantity_sold_previously
-                        temp_quantity_sold_previously = 0
-                        if remaining_in_lot > 0:
-                            effective_buy_lots.append({'quantity': remaining_in_lot, 'price_per_unit': bt_price})
-                quantity_for_current_sale_calc = float(quantity)
-                cost_for_current_sale_usd = 0.0
-                for lot in effective_buy_lots:
-                    if quantity_for_current_sale_calc == 0:
-                        break
-                    sell_from_this_lot = min(quantity_for_current_sale_calc, lot['quantity'])
-                    cost_for_current_sale_usd += sell_from_this_lot * lot['price_per_unit']
-                    quantity_for_current_sale_calc -= sell_from_this_lot
-                if quantity_for_current_sale_calc > 0.0001:
-                    conn.rollback()
-                    return {"success": False, "message": f"Error in cost basis calculation for {asset_symbol}. Not enough purchase history for sale."}
-                total_sale_value_usd = float(quantity) * float(price_per_unit)
-                realized_profit_or_loss_usd = total_sale_value_usd - cost_for_current_sale_usd
-                realized_profit_or_loss_eur = realized_profit_or_loss_usd * USD_TO_EUR_EXCHANGE_RATE
-                total_sale_amount_eur = total_sale_value_usd * USD_TO_EUR_EXCHANGE_RATE
-                cur.execute("SELECT balance, profit_loss FROM users WHERE id = %s", (user_id,))
-                user_data = cur.fetchone()
-                if not user_data:
-                    return {"success": False, "message": "User not found."}
-                cur.execute("BEGIN;")
-                cur.execute(
-                    """UPDATE users 
-                       SET balance = balance + %s, 
-                           total_trades = total_trades + 1,
-                           profit_loss = profit_loss + %s 
-                       WHERE id = %s""", 
-                    (total_sale_amount_eur, realized_profit_or_loss_eur, user_id)
-                )
-                cur.execute("""
-                    INSERT INTO transactions 
-                    (user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type)
-                    VALUES (%s, %s, %s, %s, %s, 'sell')
-                    RETURNING id, user_id, asset_type_id, asset_symbol, quantity, price_per_unit, transaction_type, timestamp;
-                """, (user_id, asset_type_id, asset_symbol, quantity, price_per_unit))
-                transaction = cur.fetchone()
-                
-                update_portfolio_on_sell(cur, user_id, asset_symbol, quantity)
-                
-                conn.commit()
-                db_handler.manage_user_xp("buy", user_id, quantity=quantity)
-                db_handler.check_user_level(user_id, db_handler.get_user_xp(user_id))
-                return {
-                    "success": True,
-                    "transaction": transaction,
-                    "message": f"Successfully sold {quantity} shares of {asset_symbol} for ${total_sale_value_usd:.2f} (approx. €{total_sale_amount_eur:.2f}). Realized P/L: ${realized_profit_or_loss_usd:.2f} (approx. €{realized_profit_or_loss_eur:.2f})"
-                }
+        asset_type_id = get_asset_type_id('stock')
+        result = balance_handler.run_balance_command(user_id, _sell_command(asset_type_id, asset_symbol, quantity, price_per_unit))
+    except balance_handler.UserNotFoundError:
+        return {"success": False, "message": "User not found."}
     except Exception as e:
         return {"success": False, "message": f"Database error: {e}"}
+    if result["success"]:
+        events.publish(events.TRADE_EXECUTED, user_id=user_id, side='sell', symbol=asset_symbol, quantity=quantity, price=price_per_unit)
+        db_handler.manage_user_xp("buy", user_id, quantity=quantity)
+        db_handler.check_user_level(user_id, db_handler.get_user_xp(user_id))
+    return result
 
 def show_user_portfolio(user_id):
     """
@@ -356,6 +502,30 @@ def show_user_portfolio(user_id):
     except Exception as e:
         return {"success": False, "message": f"Database error: {e}", "portfolio": [], "balance": None}
 
+_POSITIONS_QUERY = """
+    SELECT p.user_id, a.symbol, p.quantity, p.average_buy_price, a.default_price
+    FROM portfolio p
+    JOIN assets a ON p.asset_id = a.id
+    WHERE p.quantity > 0
+"""
+
+def get_all_positions():
+    """
+    Alle offenen Positionen aller Benutzer als Tupel
+    (user_id, symbol, quantity, average_buy_price, default_price), für utils/pnl_engine.py.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_POSITIONS_QUERY)
+            return cur.fetchall()
+
+def get_user_positions(user_id):
+    """Offene Positionen eines Benutzers, gleiches Format wie get_all_positions."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_POSITIONS_QUERY + " AND p.user_id = %s", (user_id,))
+            return cur.fetchall()
+
 def get_recent_transactions(user_id, limit=5):
     """
     Holt die letzten Transaktionen für einen Benutzer (PostgreSQL).
@@ -417,9 +587,14 @@ def get_asset_value(user_id):
             result = cur.fetchone()
             return result['total_value'] if result else 0.0
 
+def invalidate_assets_cache():
+    """Verwirft die zwischengespeicherten Asset-Listen (nach Änderungen an der Tabelle assets)."""
+    with _assets_cache_lock:
+        _assets_cache.clear()
+
 def get_all_assets(active_only=True, asset_type=None):
     """
-    Ruft alle Assets aus der Datenbank ab.
+    Ruft alle Assets aus der Datenbank ab (für ASSETS_CACHE_TTL Sekunden zwischengespeichert).
 
     Args:
         active_only (bool): Wenn True, werden nur aktive Assets zurückgegeben
@@ -428,6 +603,11 @@ def get_all_assets(active_only=True, asset_type=None):
     Returns:
         dict: {"success": True, "assets": [...] } oder {"success": False, "message": "..."}
     """
+    cache_key = (bool(active_only), asset_type)
+    with _assets_cache_lock:
+        cached = _assets_cache.get(cache_key)
+    if cached is not None and time.monotonic() - cached[0] < ASSETS_CACHE_TTL:
+        return {"success": True, "assets": list(cached[1])}
     try:
         with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
@@ -443,10 +623,32 @@ def get_all_assets(active_only=True, asset_type=None):
                     query += " WHERE " + " AND ".join(conditions)
                 cur.execute(query, params)
                 assets = cur.fetchall()
-                return {"success": True, "assets": assets}
+        with _assets_cache_lock:
+            _assets_cache[cache_key] = (time.monotonic(), tuple(assets))
+        return {"success": True, "assets": assets}
     except Exception as e:
         return {"success": False, "message": f"Database error: {e}"}
 
+def get_most_held_symbols(limit=20):
+    """
+    Symbole, die die meisten Benutzer im Portfolio halten (für das Aufwärmen der Kurs-Caches).
+
+    Returns:
+        list: Symbole, absteigend nach Anzahl der Halter
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT a.symbol
+                FROM portfolio p
+                JOIN assets a ON p.asset_id = a.id
+                WHERE p.quantity > 0
+                GROUP BY a.symbol
+                ORDER BY COUNT(DISTINCT p.user_id) DESC, a.symbol
+                LIMIT %s
+            """, (limit,))
+            return [row[0] for row in cur.fetchall()]
+
 def get_asset_by_symbol(symbol):
     """
     Ruft ein Asset anhand seines Symbols ab.
@@ -486,6 +688,7 @@ def create_asset(symbol, name, asset_type, exchange=None, currency="USD",
                 """, (symbol, name, asset_type, exchange, currency, sector, industry, logo_url, description))
                 new_asset = cur.fetchone()
                 conn.commit()
+                invalidate_assets_cache()
                 return {"success": True, "asset": new_asset}
     except Exception as e:
         return {"success": False, "message": f"Database error: {e}"}
@@ -517,4 +720,102 @@ def get_user_assets(user_id):
                 """, (user_id,))
                 return cur.fetchall()
             except Exception as e:
-                return [] # Return empty list on error
\ No newline at end of file
+                return [] # Return empty list on error
+
+def get_portfolio_rating_snapshot(user_id, activity_days=30):
+    """
+    Holt eine kompakte Zusammenfassung des Portfolios für die KI-Bewertung (PostgreSQL):
+    Positionen (ohne Live-Kurse, bewertet mit default_price), Kontostand und die
+    nach Kauf/Verkauf aggregierten Transaktionen der letzten `activity_days` Tage.
+    """
+    try:
+        with get_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute("""
+                    SELECT a.symbol, a.asset_type, a.sector, p.quantity, p.average_buy_price,
+                           COALESCE(a.default_price, p.average_buy_price) AS price
+                    FROM portfolio p
+                    JOIN assets a ON p.asset_id = a.id
+                    WHERE p.user_id = %s AND p.quantity > 0
+                    ORDER BY a.symbol
+                """, (user_id,))
+                positions = [
+                    {
+                        "symbol": row['symbol'],
+                        "type": row['asset_type'] or 'stock',
+                        "sector": row['sector'],
+                        "quantity": float(row['quantity']),
+                        "average_price": float(row['average_buy_price']),
+                        "price": float(row['price'])
+                    }
+                    for row in cur.fetchall()
+                ]
+
+                cur.execute("SELECT balance FROM users WHERE id = %s", (user_id,))
+                user_data = cur.fetchone()
+                balance = float(user_data['balance']) if user_data and user_data['balance'] is not None else 0.0
+
+                cur.execute("""
+                    SELECT transaction_type, COUNT(*) AS trades, COALESCE(SUM(total_value), 0) AS volume,
+                           COUNT(DISTINCT asset_symbol) AS symbols
+                    FROM transactions
+                    WHERE user_id = %s AND timestamp >= NOW() - make_interval(days => %s)
+                    GROUP BY transaction_type
+                """, (user_id, activity_days))
+                activity = {
+                    row['transaction_type']: {
+                        "trades": int(row['trades']),
+                        "volume": float(row['volume']),
+                        "symbols": int(row['symbols'])
+                    }
+                    for row in cur.fetchall()
+                }
+
+                return {
+                    "success": True,
+                    "positions": positions,
+                    "balance": balance,
+                    "activity": activity,
+                    "activity_days": activity_days
+                }
+    except Exception as e:
+        return {"success": False, "message": f"Database error: {e}", "positions": [], "balance": None, "activity": {}}
+
+def get_portfolio_rating(user_id):
+    """
+    Holt die zuletzt gespeicherte KI-Bewertung eines Benutzers (oder None).
+    """
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                SELECT rating, tip, portfolio_hash, rated_at
+                FROM portfolio_ratings
+                WHERE user_id = %s
+            """, (user_id,))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+def save_portfolio_rating(user_id, rating, tip, portfolio_hash):
+    """
+    Speichert (bzw. ersetzt) die KI-Bewertung eines Benutzers.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO portfolio_ratings (user_id, rating, tip, portfolio_hash, rated_at)
+                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (user_id) DO UPDATE
+                SET rating = EXCLUDED.rating, tip = EXCLUDED.tip,
+                    portfolio_hash = EXCLUDED.portfolio_hash, rated_at = EXCLUDED.rated_at
+            """, (user_id, rating, tip, portfolio_hash))
+        conn.commit()
+
+def touch_portfolio_rating(user_id):
+    """
+    Markiert die gespeicherte KI-Bewertung als aktuell (rated_at = jetzt), wenn sich das
+    Portfolio seitdem nicht geändert hat.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE portfolio_ratings SET rated_at = CURRENT_TIMESTAMP WHERE user_id = %s", (user_id,))
+        conn.commit()
@@ -0,0 +1,162 @@
+"""
+Kursalarme (Tabelle alerts): "Benachrichtige mich, wenn AAPL 200 $ kreuzt".
+
+Status eines Alarms:
+    active     wartet auf den Schwellenwert
+    triggered  ausgelöst und zugestellt (trigger_price, triggered_at)
+    cancelled  vom Benutzer gelöscht
+
+Ein Alarm löst genau einmal aus: claim_alerts setzt 'active' -> 'triggered' und
+liefert nur die Alarme zurück, die dieser Aufruf umgestellt hat. Auslösen und
+Zustellen übernimmt utils/alert_engine.py.
+"""
+import os
+import logging
+
+from dotenv import load_dotenv
+from psycopg2.extras import RealDictCursor
+
+from database.handler.postgres.postgres_pool import LazyConnectionPool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+connection_pool = LazyConnectionPool(1, 5,
+    host=os.getenv('POSTGRES_HOST', 'localhost'),
+    port=os.getenv('POSTGRES_PORT', '5432'),
+    dbname=os.getenv('POSTGRES_DB', 'buyhigh'),
+    user=os.getenv('POSTGRES_USER', 'postgres'),
+    password=os.getenv('POSTGRES_PASSWORD', '')
+)
+
+MAX_ACTIVE_ALERTS_PER_USER = 100
+ALERT_COLUMNS = "id, user_id, asset_symbol, direction, threshold, note, status, trigger_price, created_at, triggered_at"
+
+
+def _run(fn):
+    conn = connection_pool.getconn()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            result = fn(cur)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        connection_pool.putconn(conn)
+
+
+def create_alerts_table():
+    """Legt die Tabelle alerts an (wie in postgres_schema.sql)."""
+    def create(cur):
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS alerts (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                asset_symbol VARCHAR(20) NOT NULL,
+                direction VARCHAR(5) NOT NULL CHECK (direction IN ('above', 'below')),
+                threshold FLOAT NOT NULL CHECK (threshold > 0),
+                note TEXT,
+                status VARCHAR(10) NOT NULL DEFAULT 'active',
+                trigger_price FLOAT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                triggered_at TIMESTAMP
+            );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_alerts_user ON alerts(user_id, created_at DESC)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_alerts_active ON alerts(id) WHERE status = 'active'")
+    _run(create)
+
+
+def create_alert(user_id, asset_symbol, direction, threshold, note=None):
+    """
+    Speichert einen neuen aktiven Alarm (höchstens MAX_ACTIVE_ALERTS_PER_USER pro Benutzer).
+
+    Returns:
+        dict: {"success": True, "alert": {...}} oder {"success": False, "message": "..."}
+    """
+    try:
+        def insert(cur):
+            cur.execute("SELECT COUNT(*) AS active FROM alerts WHERE user_id = %s AND status = 'active'", (user_id,))
+            if cur.fetchone()['active'] >= MAX_ACTIVE_ALERTS_PER_USER:
+                return None
+            cur.execute(f"""
+                INSERT INTO alerts (user_id, asset_symbol, direction, threshold, note)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING {ALERT_COLUMNS}
+            """, (user_id, asset_symbol.upper(), direction, threshold, note))
+            return cur.fetchone()
+        alert = _run(insert)
+        if alert is None:
+            return {"success": False, "message": f"You can have at most {MAX_ACTIVE_ALERTS_PER_USER} active alerts."}
+        return {"success": True, "alert": alert}
+    except Exception as e:
+        logger.error(f"Fehler beim Anlegen des Alarms für Benutzer ID {user_id}: {e}", exc_info=True)
+        return {"success": False, "message": f"Database error: {e}"}
+
+
+def cancel_alert(user_id, alert_id):
+    """
+    Löscht einen aktiven Alarm des Benutzers (Status 'cancelled').
+
+    Returns:
+        dict: {"success": True, "alert": {...}} oder {"success": False, "message": "..."}
+    """
+    try:
+        def cancel(cur):
+            cur.execute(f"""
+                UPDATE alerts SET status = 'cancelled'
+                WHERE id = %s AND user_id = %s AND status = 'active'
+                RETURNING {ALERT_COLUMNS}
+            """, (alert_id, user_id))
+            return cur.fetchone()
+        alert = _run(cancel)
+        if alert is None:
+            return {"success": False, "message": "Alert not found or already triggered."}
+        return {"success": True, "alert": alert}
+    except Exception as e:
+        logger.error(f"Fehler beim Löschen des Alarms {alert_id}: {e}", exc_info=True)
+        return {"success": False, "message": f"Database error: {e}"}
+
+
+def get_user_alerts(user_id, status=None, limit=100):
+    """Alarme des Benutzers, neueste zuerst; status=None für alle."""
+    def select(cur):
+        if status is None:
+            cur.execute(f"SELECT {ALERT_COLUMNS} FROM alerts WHERE user_id = %s ORDER BY created_at DESC LIMIT %s", (user_id, limit))
+        else:
+            cur.execute(f"SELECT {ALERT_COLUMNS} FROM alerts WHERE user_id = %s AND status = %s ORDER BY created_at DESC LIMIT %s", (user_id, status, limit))
+        return cur.fetchall()
+    return _run(select)
+
+
+def get_active_alerts(after_id=0):
+    """Aktive Alarme mit einer ID größer als after_id (Laden beim Start und inkrementelles Nachladen)."""
+    def select(cur):
+        cur.execute(
+            "SELECT id, asset_symbol, direction, threshold FROM alerts WHERE status = 'active' AND id > %s ORDER BY id",
+            (after_id,)
+        )
+        return cur.fetchall()
+    return _run(select)
+
+
+def claim_alerts(alert_ids, trigger_price):
+    """
+    Markiert ausgelöste Alarme als 'triggered'.
+
+    Returns:
+        list: die Alarme, die dieser Aufruf umgestellt hat (nur diese werden zugestellt)
+    """
+    if not alert_ids:
+        return []
+    def claim(cur):
+        cur.execute(f"""
+            UPDATE alerts SET status = 'triggered', trigger_price = %s, triggered_at = CURRENT_TIMESTAMP
+            WHERE id = ANY(%s) AND status = 'active'
+            RETURNING {ALERT_COLUMNS}
+        """, (trigger_price, list(alert_ids)))
+        return cur.fetchall()
+    return _run(claim)
@@ -2,6 +2,10 @@ import psycopg2
 import psycopg2.extras
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
 from rich import print
 
 logger = logging.getLogger(__name__)
@@ -22,6 +26,105 @@ def get_db_connection():
         logger.error(f"Fehler beim Öffnen der PostgreSQL-Verbindung: {e}", exc_info=True)
         raise
 
+# Der Abzeichen-Katalog ändert sich praktisch nie und wird daher nur einmal geladen.
+# Die fertig zusammengesetzte Antwort pro Benutzer wird zusätzlich zwischengespeichert
+# und von award_badge_to_user / revoke_badge_from_user invalidiert. Aufrufer erhalten
+# immer eine Kopie, nie den zwischengespeicherten Eintrag selbst.
+BadgeCatalog = namedtuple('BadgeCatalog', ['by_category', 'by_id', 'total'])
+
+USER_BADGES_CACHE_TTL = 300  # Sekunden
+USER_BADGES_CACHE_MAX_SIZE = 2048
+
+_badge_catalog = None
+_catalog_lock = threading.Lock()
+_user_badges_cache = OrderedDict()  # user_id -> (Zeitstempel, Antwort)
+_user_badges_cache_lock = threading.Lock()
+
+def _load_badge_catalog():
+    """Lädt alle Abzeichen und legt sie unveränderlich nach Kategorie gruppiert ab."""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.execute("SELECT id, name, description, category, icon_name, color, level FROM badges ORDER BY category, level DESC")
+            rows = cur.fetchall()
+
+    by_category = {}
+    by_id = {}
+    for row in rows:
+        badge = MappingProxyType(dict(row))
+        by_category.setdefault(badge['category'], []).append(badge)
+        by_id[badge['id']] = badge
+
+    return BadgeCatalog(
+        by_category=MappingProxyType({category: tuple(badges) for category, badges in by_category.items()}),
+        by_id=MappingProxyType(by_id),
+        total=len(rows)
+    )
+
+def get_badge_catalog(force_reload=False):
+    """
+    Gibt den im Speicher gehaltenen Abzeichen-Katalog zurück und lädt ihn beim ersten Aufruf.
+
+    Args:
+        force_reload (bool): Katalog neu aus der Datenbank laden (z.B. nach Änderungen an der Tabelle badges)
+
+    Returns:
+        BadgeCatalog: Abzeichen nach Kategorie (Tupel) und nach ID, sowie die Gesamtanzahl
+    """
+    global _badge_catalog
+    if _badge_catalog is not None and not force_reload:
+        return _badge_catalog
+    with _catalog_lock:
+        if _badge_catalog is None or force_reload:
+            _badge_catalog = _load_badge_catalog()
+            logger.info(f"Abzeichen-Katalog geladen: {_badge_catalog.total} Abzeichen")
+            if force_reload:
+                invalidate_user_badges_cache()
+    return _badge_catalog
+
+def invalidate_user_badges_cache(user_id=None):
+    """Verwirft die zwischengespeicherte Abzeichen-Antwort eines Benutzers (oder aller Benutzer)."""
+    with _user_badges_cache_lock:
+        if user_id is None:
+            _user_badges_cache.clear()
+        else:
+            _user_badges_cache.pop(user_id, None)
+
+def _get_cached_user_badges(user_id):
+    with _user_badges_cache_lock:
+        entry = _user_badges_cache.get(user_id)
+        if entry is None:
+            return None
+        cached_at, response = entry
+        if time.monotonic() - cached_at > USER_BADGES_CACHE_TTL:
+            del _user_badges_cache[user_id]
+            return None
+        _user_badges_cache.move_to_end(user_id)
+        return response
+
+def _copy_user_badges(response):
+    """Kopie einer Abzeichen-Antwort bis auf Ebene der einzelnen Abzeichen, damit Aufrufer den Cache nicht verändern."""
+    return {
+        **response,
+        "badges_by_category": {
+            category: {status: [dict(badge) for badge in badges] for status, badges in groups.items()}
+            for category, groups in response["badges_by_category"].items()
+        }
+    }
+
+def _store_cached_user_badges(user_id, response):
+    with _user_badges_cache_lock:
+        _user_badges_cache[user_id] = (time.monotonic(), response)
+        _user_badges_cache.move_to_end(user_id)
+        while len(_user_badges_cache) > USER_BADGES_CACHE_MAX_SIZE:
+            _user_badges_cache.popitem(last=False)
+
+def _get_earned_badge_map(user_id):
+    """Lädt nur die vom Benutzer erworbenen Abzeichen als Zuordnung badge_id -> earned_at."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT badge_id, earned_at FROM user_badges WHERE user_id = %s", (user_id,))
+            return dict(cur.fetchall())
+
 def get_user_badges(user_id):
     """
     Ruft alle Abzeichen ab, die ein bestimmter Benutzer erhalten hat.
@@ -32,58 +135,42 @@ def get_user_badges(user_id):
     Returns:
         dict: Erfolgsstatus und nach Kategorie gruppierte Abzeichen
     """
+    cached = _get_cached_user_badges(user_id)
+    if cached is not None:
+        return _copy_user_badges(cached)
+
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                # Alle vom Benutzer erworbenen Abzeichen abrufen
-                query = """
-                    SELECT b.id, b.name, b.description, b.category, b.icon_name, b.color, b.level, 
-                           ub.earned_at
-                    FROM badges b
-                    JOIN user_badges ub ON b.id = ub.badge_id
-                    WHERE ub.user_id = %s
-                    ORDER BY b.category, b.level DESC
-                """
-                cur.execute(query, (user_id,))
-                user_badges = cur.fetchall()
-                
-                # Alle verfügbaren Abzeichen abrufen
-                cur.execute("SELECT id, name, description, category, icon_name, color, level FROM badges ORDER BY category, level DESC")
-                all_badges = cur.fetchall()
-                
-                # Abzeichen nach Kategorien gruppieren
-                badges_by_category = {}
-                
-                # Zuerst alle verfügbaren Abzeichen nach Kategorie organisieren
-                for badge in all_badges:
-                    category = badge['category']
-                    if category not in badges_by_category:
-                        badges_by_category[category] = {
-                            'earned': [],
-                            'available': []
-                        }
-                    
-                    # Prüfen, ob dieses Abzeichen vom Benutzer erworben wurde
-                    is_earned = False
-                    for user_badge in user_badges:
-                        if user_badge['id'] == badge['id']:
-                            # Erworbenes Abzeichen mit earned_at-Zeitstempel hinzufügen
-                            badge_copy = dict(badge)
-                            badge_copy['earned_at'] = user_badge['earned_at']
-                            badges_by_category[category]['earned'].append(badge_copy)
-                            is_earned = True
-                            break
-                    
-                    # Wenn nicht erworben, zu verfügbaren Abzeichen hinzufügen
-                    if not is_earned:
-                        badges_by_category[category]['available'].append(badge)
-                
-                return {
-                    "success": True,
-                    "badges_by_category": badges_by_category,
-                    "total_earned": len(user_badges),
-                    "total_available": len(all_badges)
-                }
+        catalog = get_badge_catalog()
+        earned_map = _get_earned_badge_map(user_id)
+
+        # Abzeichen nach Kategorien gruppieren - ein Durchlauf über den Katalog,
+        # erworben/verfügbar wird per Lookup in earned_map entschieden
+        badges_by_category = {}
+        total_earned = 0
+        for category, badges in catalog.by_category.items():
+            earned = []
+            available = []
+            for badge in badges:
+                badge_copy = dict(badge)
+                if badge['id'] in earned_map:
+                    badge_copy['earned_at'] = earned_map[badge['id']]
+                    earned.append(badge_copy)
+                else:
+                    available.append(badge_copy)
+            total_earned += len(earned)
+            badges_by_category[category] = {
+                'earned': earned,
+                'available': available
+            }
+
+        response = {
+            "success": True,
+            "badges_by_category": badges_by_category,
+            "total_earned": total_earned,
+            "total_available": catalog.total
+        }
+        _store_cached_user_badges(user_id, response)
+        return _copy_user_badges(response)
     except Exception as e:
         logger.error(f"Fehler beim Abrufen der Abzeichen für Benutzer {user_id}: {e}", exc_info=True)
         return {
@@ -106,17 +193,14 @@ def award_badge_to_user(user_id, badge_id):
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cur:
-                # Prüfen, ob der Benutzer dieses Abzeichen bereits besitzt
-                cur.execute("SELECT 1 FROM user_badges WHERE user_id = %s AND badge_id = %s", 
+                # Ein einziges Statement statt Existenzprüfung + Insert
+                cur.execute("INSERT INTO user_badges (user_id, badge_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
                            (user_id, badge_id))
-                if cur.fetchone():
+                conn.commit()
+                if cur.rowcount == 0:
                     logger.info(f"Benutzer {user_id} hat Abzeichen {badge_id} bereits")
                     return True  # Bereits verliehen
-                
-                # Abzeichen verleihen
-                cur.execute("INSERT INTO user_badges (user_id, badge_id) VALUES (%s, %s)",
-                           (user_id, badge_id))
-                conn.commit()
+                invalidate_user_badges_cache(user_id)
                 
                 logger.info(f"Abzeichen {badge_id} an Benutzer {user_id} verliehen")
                 return True
@@ -124,6 +208,38 @@ def award_badge_to_user(user_id, badge_id):
         logger.error(f"Fehler beim Verleihen von Abzeichen {badge_id} an Benutzer {user_id}: {e}", exc_info=True)
         return False
 
+def award_badges_bulk(awards):
+    """
+    Verleiht mehrere Abzeichen in einem einzigen Statement.
+    
+    Args:
+        awards (iterable): Paare (user_id, badge_id)
+        
+    Returns:
+        list: Tatsächlich neu verliehene Paare (user_id, badge_id); bereits vorhandene werden übersprungen
+    """
+    awards = list(set(awards))
+    if not awards:
+        return []
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                inserted = psycopg2.extras.execute_values(
+                    cur,
+                    "INSERT INTO user_badges (user_id, badge_id) VALUES %s ON CONFLICT DO NOTHING RETURNING user_id, badge_id",
+                    awards,
+                    fetch=True
+                )
+                conn.commit()
+        for user_id in {user_id for user_id, _ in inserted}:
+            invalidate_user_badges_cache(user_id)
+        if inserted:
+            logger.info(f"{len(inserted)} Abzeichen im Batch verliehen")
+        return [tuple(row) for row in inserted]
+    except Exception as e:
+        logger.error(f"Fehler beim Batch-Verleihen von {len(awards)} Abzeichen: {e}", exc_info=True)
+        return []
+
 def revoke_badge_from_user(user_id, badge_id):
     """
     Entzieht einem Benutzer ein Abzeichen.
@@ -141,6 +257,7 @@ def revoke_badge_from_user(user_id, badge_id):
                 cur.execute("DELETE FROM user_badges WHERE user_id = %s AND badge_id = %s",
                            (user_id, badge_id))
                 conn.commit()
+                invalidate_user_badges_cache(user_id)
                 
                 # Prüfen, ob Zeilen betroffen waren
                 if cur.rowcount > 0:
@@ -0,0 +1,283 @@
+"""
+Kontostand-Befehle (users.balance), pro Benutzer serialisiert.
+
+Alles, was den Kontostand ändert (Trades, Glücksspiel, Glücksrad, Code-Einlösungen),
+läuft als Befehl über eine Warteschlange pro Benutzer-ID:
+
+- Befehle eines Benutzers laufen nacheinander, verschiedene Benutzer parallel auf
+  BALANCE_WORKERS Threads. Über Prozesse hinweg (mehrere Worker) serialisiert die
+  Zeilensperre (SELECT ... FOR UPDATE) auf der Benutzerzeile.
+- Stauen sich Befehle eines Benutzers, werden bis zu MAX_BATCH davon in einer
+  Transaktion ausgeführt: Zeile einmal sperren, alle Befehle gegen den Kontostand im
+  Speicher anwenden, den Kontostand einmal schreiben, einmal committen. Jeder Befehl
+  läuft in einem Savepoint, ein fehlschlagender Befehl bricht die anderen nicht ab.
+- Ein einzelner Betrags-Befehl (apply_balance_delta) ohne Stau ist eine einzige,
+  bewachte Anweisung:
+
+      UPDATE users SET balance = balance + %s WHERE id = %s AND balance >= %s RETURNING balance
+
+Ein Befehl ist eine Funktion command(conn, account). Er ändert den Kontostand nur über
+account.balance (nie per SQL auf users.balance), darf aber weitere Tabellen und
+andere Spalten von users über conn ändern. Fachliche Fehler (z.B. zu wenig Guthaben)
+gibt er als Ergebnis zurück, bevor er etwas schreibt; Ausnahmen rollen nur seinen
+Savepoint zurück. Ein Befehl darf keine weiteren Befehle für denselben Benutzer
+einreihen. Nebenwirkungen, die erst nach dem Commit passieren dürfen (Events, XP),
+löst der Aufrufer mit dem Ergebnis aus.
+"""
+import os
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from dotenv import load_dotenv
+
+from database.handler.postgres.postgres_pool import LazyConnectionPool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PG_HOST = os.getenv('POSTGRES_HOST', 'localhost')
+PG_PORT = os.getenv('POSTGRES_PORT', '5432')
+PG_DB = os.getenv('POSTGRES_DB', 'buyhigh')
+PG_USER = os.getenv('POSTGRES_USER', 'postgres')
+PG_PASSWORD = os.getenv('POSTGRES_PASSWORD', '')
+
+BALANCE_WORKERS = int(os.getenv('BALANCE_WORKERS', '8'))   # Benutzer, die gleichzeitig bearbeitet werden
+MAX_BATCH = 50                                             # Befehle pro Transaktion
+COMMAND_TIMEOUT = 30                                       # Sekunden, die ein Aufrufer höchstens wartet
+
+# Jeder Worker hält höchstens eine Verbindung
+connection_pool = LazyConnectionPool(1, BALANCE_WORKERS,
+    host=PG_HOST,
+    port=PG_PORT,
+    dbname=PG_DB,
+    user=PG_USER,
+    password=PG_PASSWORD
+)
+
+# Fehlergründe in der Antwort von apply_balance_delta
+INSUFFICIENT_FUNDS = 'insufficient_funds'
+USER_NOT_FOUND = 'user_not_found'
+DB_ERROR = 'db_error'
+
+
+class UserNotFoundError(LookupError):
+    """Der Benutzer eines Befehls existiert nicht."""
+
+
+class BalanceAccount:
+    """Kontostand eines Benutzers, wie ihn ein Befehl sieht (Zeile ist gesperrt)."""
+    __slots__ = ('user_id', 'balance')
+
+    def __init__(self, user_id, balance):
+        self.user_id = user_id
+        self.balance = balance
+
+
+_pending = {}                # user_id -> deque[(command, Future)]
+_active = set()              # Benutzer, für die gerade ein Worker läuft oder eingeplant ist
+_queue_lock = threading.Lock()
+_executor = None
+_stats = {'commands': 0, 'batches': 0, 'max_batch': 0}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _queue_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BALANCE_WORKERS, thread_name_prefix="balance")
+    return _executor
+
+
+def submit_balance_command(user_id, command):
+    """
+    Reiht command(conn, account) für den Benutzer ein.
+
+    Returns:
+        Future: Ergebnis des Befehls; UserNotFoundError, psycopg2.Error oder die Ausnahme des Befehls
+    """
+    future = Future()
+    executor = _get_executor()
+    with _queue_lock:
+        _pending.setdefault(user_id, deque()).append((command, future))
+        if user_id in _active:
+            return future
+        _active.add(user_id)
+    executor.submit(_drain, user_id)
+    return future
+
+
+def run_balance_command(user_id, command, timeout=COMMAND_TIMEOUT):
+    """
+    Führt command(conn, account) serialisiert für den Benutzer aus und gibt sein Ergebnis zurück.
+
+    Raises:
+        TimeoutError: der Befehl wartete länger als timeout Sekunden und wurde verworfen
+    """
+    return wait_for_command(submit_balance_command(user_id, command), timeout)
+
+
+def wait_for_command(future, timeout):
+    """
+    Ergebnis eines eingereihten Schreibbefehls. Wartet er nach timeout Sekunden noch,
+    wird er abgebrochen (TimeoutError, nichts wurde geschrieben); läuft er bereits, wird
+    auf sein Ergebnis gewartet, denn er wird noch committet und darf nicht als
+    fehlgeschlagen gemeldet werden.
+    """
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise TimeoutError(f"Command not started within {timeout}s and discarded")
+        logger.warning(f"Schreibbefehl läuft nach {timeout}s noch, warte auf das Ergebnis")
+        return future.result()
+
+
+def _drain(user_id):
+    with _queue_lock:
+        queue = _pending.get(user_id)
+        batch = [queue.popleft() for _ in range(min(MAX_BATCH, len(queue)))] if queue else []
+    batch = [(command, future) for command, future in batch if future.set_running_or_notify_cancel()]
+    if batch:
+        try:
+            _run_batch(user_id, batch)
+        except Exception as e:
+            if not isinstance(e, UserNotFoundError):
+                logger.error(f"Kontostand-Befehle für Benutzer ID {user_id} fehlgeschlagen: {e}", exc_info=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+    with _queue_lock:
+        if _pending.get(user_id):
+            # Weitere Befehle: neu einplanen statt weiterlaufen, damit andere Benutzer drankommen
+            _get_executor().submit(_drain, user_id)
+        else:
+            _pending.pop(user_id, None)
+            _active.discard(user_id)
+
+
+def _run_batch(user_id, batch):
+    conn = connection_pool.getconn()
+    results = []
+    try:
+        with conn.cursor() as cur:
+            command = batch[0][0]
+            if len(batch) == 1 and hasattr(command, 'execute_alone'):
+                results.append(command.execute_alone(cur, user_id))
+            else:
+                cur.execute("SELECT balance FROM users WHERE id = %s FOR UPDATE", (user_id,))
+                row = cur.fetchone()
+                if row is None:
+                    conn.rollback()
+                    for _, future in batch:
+                        future.set_exception(UserNotFoundError(f"User {user_id} not found"))
+                    return
+                account = BalanceAccount(user_id, row[0])
+                use_savepoints = len(batch) > 1
+                for command, _ in batch:
+                    before = account.balance
+                    if use_savepoints:
+                        cur.execute("SAVEPOINT balance_command")
+                    try:
+                        results.append(command(conn, account))
+                    except Exception as e:
+                        if not use_savepoints:
+                            raise
+                        cur.execute("ROLLBACK TO SAVEPOINT balance_command")
+                        account.balance = before
+                        results.append(e)
+                        continue
+                    if use_savepoints:
+                        cur.execute("RELEASE SAVEPOINT balance_command")
+                if account.balance != row[0]:
+                    cur.execute("UPDATE users SET balance = %s WHERE id = %s", (account.balance, user_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        connection_pool.putconn(conn)
+
+    with _queue_lock:
+        _stats['commands'] += len(batch)
+        _stats['batches'] += 1
+        _stats['max_batch'] = max(_stats['max_batch'], len(batch))
+    for (_, future), result in zip(batch, results):
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+
+def get_queue_stats():
+    """Ausgeführte Befehle, Transaktionen und größter Stapel seit dem Start."""
+    with _queue_lock:
+        return {**_stats, 'queued_users': len(_pending)}
+
+
+# --- Betrags-Befehle ---
+
+class BalanceDelta:
+    """Befehl: Kontostand um delta ändern, wenn er mindestens required beträgt."""
+
+    def __init__(self, delta, required=None):
+        self.delta = delta
+        self.required = required
+
+    def __call__(self, conn, account):
+        if self.required is not None and account.balance < self.required:
+            return {"success": False, "reason": INSUFFICIENT_FUNDS, "balance": account.balance, "message": "Insufficient balance"}
+        old_balance = account.balance
+        account.balance = old_balance + self.delta
+        return {"success": True, "old_balance": old_balance, "new_balance": account.balance}
+
+    def execute_alone(self, cur, user_id):
+        # Ohne Stau: eine einzige bewachte Anweisung statt Sperren, Lesen und Schreiben
+        if self.required is None:
+            cur.execute(
+                "UPDATE users SET balance = balance + %s WHERE id = %s RETURNING balance, balance - %s",
+                (self.delta, user_id, self.delta)
+            )
+        else:
+            cur.execute(
+                "UPDATE users SET balance = balance + %s WHERE id = %s AND balance >= %s RETURNING balance, balance - %s",
+                (self.delta, user_id, self.required, self.delta)
+            )
+        row = cur.fetchone()
+        if row is not None:
+            return {"success": True, "old_balance": row[1], "new_balance": row[0]}
+        # Nur im Fehlerfall: unterscheiden zwischen unbekanntem Benutzer und zu wenig Guthaben
+        cur.execute("SELECT balance FROM users WHERE id = %s", (user_id,))
+        current = cur.fetchone()
+        if current is None:
+            raise UserNotFoundError(f"User {user_id} not found")
+        return {"success": False, "reason": INSUFFICIENT_FUNDS, "balance": current[0], "message": "Insufficient balance"}
+
+
+def apply_balance_delta(user_id, delta, required=None):
+    """
+    Ändert den Kontostand atomar um delta.
+
+    Args:
+        user_id (int): ID des Benutzers
+        delta (float): Betrag, um den sich der Kontostand ändert (negativ für Abbuchungen)
+        required (float): Mindest-Kontostand vor der Änderung, z.B. der Einsatz einer Wette.
+            Standard: -delta bei Abbuchungen (der Kontostand wird nie negativ), sonst keine Bedingung.
+
+    Returns:
+        dict: {"success": True, "old_balance": ..., "new_balance": ...} oder
+              {"success": False, "reason": INSUFFICIENT_FUNDS | USER_NOT_FOUND | DB_ERROR,
+               "balance": aktueller Kontostand oder None, "message": "..."}
+    """
+    if required is None and delta < 0:
+        required = -delta
+    try:
+        return run_balance_command(user_id, BalanceDelta(delta, required))
+    except UserNotFoundError:
+        return {"success": False, "reason": USER_NOT_FOUND, "balance": None, "message": "User not found"}
+    except Exception as e:
+        logger.error(f"Fehler beim Ändern der Balance für Benutzer ID {user_id} um {delta}: {e}", exc_info=True)
+        return {"success": False, "reason": DB_ERROR, "balance": None, "message": "Failed to update user balance"}
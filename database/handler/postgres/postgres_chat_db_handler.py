@@ -5,6 +5,7 @@ import logging
 from datetime import datetime
 import os
 from rich import print
+from database.handler.postgres.postgres_pool import LazyConnectionPool
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +17,7 @@ def is_int(val):
     except (TypeError, ValueError):
         return False
 
-connection_pool = psycopg2.pool.SimpleConnectionPool(
+connection_pool = LazyConnectionPool(
     1, 20,
     host=os.getenv('POSTGRES_HOST'),
     port=os.getenv('POSTGRES_PORT'),
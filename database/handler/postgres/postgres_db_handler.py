@@ -2,9 +2,13 @@ import os
 import psycopg2
 import psycopg2.extras
 import logging
+import threading
+from collections import namedtuple
 from datetime import datetime
+from types import MappingProxyType
 from rich import print
 from dotenv import load_dotenv
+import utils.events as events
 
 # Lade Umgebungsvariablen aus .env-Datei
 load_dotenv()
@@ -357,42 +361,65 @@ def get_user_level(user_id_param):
         cur.close()
         conn.close()
 
-def get_xp_levels():
-    # add_analytics(event_type="get_xp_levels_call", details={"source": "postgres_db_handler:get_xp_levels"})
+# XP-Tabellen (xp_levels, xp_gains) ändern sich nur mit Deployments. Sie werden beim
+# ersten Zugriff (bzw. beim Aufwärmen nach dem Start) einmal geladen und im Speicher gehalten.
+XPTables = namedtuple('XPTables', ['levels', 'gains'])
+
+_xp_tables = None
+_xp_tables_lock = threading.Lock()
+
+def _load_xp_tables():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
         cur.execute("SELECT * FROM xp_levels ORDER BY level")
-        levels = cur.fetchall()
-        # add_analytics(event_type="get_xp_levels_success", details={"count": len(levels), "source": "postgres_db_handler:get_xp_levels"})
-        return levels
+        levels = tuple(cur.fetchall())
+        cur.execute("SELECT action, xp_amount FROM xp_gains")
+        gains = MappingProxyType(dict(cur.fetchall()))
+        return XPTables(levels=levels, gains=gains)
+    finally:
+        cur.close()
+        conn.close()
+
+def get_xp_tables(force_reload=False):
+    """
+    Gibt die im Speicher gehaltenen XP-Tabellen zurück und lädt sie beim ersten Aufruf.
+
+    Args:
+        force_reload (bool): Tabellen neu aus der Datenbank laden (z.B. nach Änderungen an xp_levels/xp_gains)
+
+    Returns:
+        XPTables: levels (Zeilen von xp_levels nach Level sortiert) und gains (Aktion -> XP)
+
+    Raises:
+        psycopg2.Error: Wenn die Tabellen nicht geladen werden konnten
+    """
+    global _xp_tables
+    if _xp_tables is not None and not force_reload:
+        return _xp_tables
+    with _xp_tables_lock:
+        if _xp_tables is None or force_reload:
+            _xp_tables = _load_xp_tables()
+            logger.info(f"XP-Tabellen geladen: {len(_xp_tables.levels)} Level, {len(_xp_tables.gains)} Aktionen")
+    return _xp_tables
+
+def get_xp_levels():
+    # add_analytics(event_type="get_xp_levels_call", details={"source": "postgres_db_handler:get_xp_levels"})
+    try:
+        return list(get_xp_tables().levels)
     except psycopg2.Error as e:
         logger.error(f"Fehler beim Abrufen der XP-Levels: {e}", exc_info=True)
         # add_analytics(event_type="get_xp_levels_error", details={"error": str(e), "source": "postgres_db_handler:get_xp_levels"})
         return []
-    finally:
-        cur.close()
-        conn.close()
 
 def get_xp_gains(action):
     # add_analytics(event_type="get_xp_gains_call", details={"action": action, "source": "postgres_db_handler:get_xp_gains"})
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("SELECT xp_amount FROM xp_gains WHERE action = %s", (action,))
-        xp_gain = cur.fetchone()
-        if xp_gain:
-            # add_analytics(event_type="get_xp_gains_success", details={"action": action, "xp_amount": xp_gain[0], "source": "postgres_db_handler:get_xp_gains"})
-            return xp_gain[0]
-        # add_analytics(event_type="get_xp_gains_not_found", details={"action": action, "source": "postgres_db_handler:get_xp_gains"})
-        return None
+        return get_xp_tables().gains.get(action)
     except psycopg2.Error as e:
         logger.error(f"Fehler beim Abrufen von XP-Gewinnen für Aktion '{action}': {e}", exc_info=True)
         # add_analytics(event_type="get_xp_gains_error", details={"action": action, "error": str(e), "source": "postgres_db_handler:get_xp_gains"})
         return None
-    finally:
-        cur.close()
-        conn.close()
 
 def manage_user_xp(action, user_id_param, quantity):
     # add_analytics(user_id=user_id_param, event_type="manage_user_xp_start", details={"action": action, "user_id_target": user_id_param, "quantity": quantity, "source": "postgres_db_handler:manage_user_xp"})
@@ -465,6 +492,8 @@ def check_user_level(user_id, current_xp):
             cur.execute("UPDATE users SET level = %s WHERE id = %s", (new_level, user_id))
             conn.commit()
             logger.info(f"Benutzer {user_id} Level aktualisiert von {user_current_level} auf {new_level}.")
+            if new_level > user_current_level:
+                events.publish(events.LEVEL_UP, user_id=user_id, old_level=user_current_level, new_level=new_level)
             # add_analytics(user_id=user_id, event_type="user_level_up", details={"source": "postgres_db_handler:check_user_level", "old_level": user_current_level, "new_level": new_level})
         else:
             # add_analytics(user_id=user_id, event_type="user_level_no_change", details={"source": "postgres_db_handler:check_user_level", "level": user_current_level})
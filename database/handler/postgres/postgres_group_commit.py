@@ -0,0 +1,96 @@
+"""
+Group Commit: Schreibaufträge mehrerer Anfragen in einer Transaktion.
+
+Ein GroupCommitter sammelt Aufträge, die innerhalb von window_ms nach dem ersten
+eintreffen (höchstens max_batch), und übergibt sie gemeinsam an
+execute_batch(items). Die Funktion führt alle Aufträge in einer Transaktion aus
+(ein Commit, ein fsync, mehrzeilige INSERTs) und gibt pro Auftrag ein Ergebnis
+oder eine Ausnahme zurück, in derselben Reihenfolge. Jeder Aufrufer wartet auf
+sein eigenes Future (mit Zeitlimit über postgres_balance_handler.wait_for_command:
+noch nicht gestartete Aufträge werden abgebrochen, laufende zu Ende abgewartet).
+
+Ein einzelner Flush-Thread arbeitet die Stapel nacheinander ab; während eine
+Transaktion läuft, sammelt sich der nächste Stapel. Der Thread startet erst mit
+dem ersten Auftrag, nicht beim Import.
+
+Das Fenster kostet jeden Auftrag bis zu window_ms Latenz und lohnt sich nur bei
+vielen gleichzeitigen Anfragen (z.B. Börsenöffnung), siehe benchmark_trade_batching.py.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 200
+
+
+class GroupCommitter:
+    """Sammelt Aufträge für window_ms und führt sie mit execute_batch in einer Transaktion aus."""
+
+    def __init__(self, name, execute_batch, window_ms, max_batch=MAX_BATCH):
+        self.name = name
+        self.execute_batch = execute_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._items = []
+        self._first_at = None
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stats = {'items': 0, 'batches': 0, 'max_batch': 0}
+
+    def submit(self, item):
+        """Reiht item ein; das Future liefert das Ergebnis von execute_batch für dieses item."""
+        future = Future()
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"group-commit-{self.name}", daemon=True)
+                self._thread.start()
+            if not self._items:
+                self._first_at = time.monotonic()
+            self._items.append((item, future))
+            if len(self._items) == 1 or len(self._items) >= self.max_batch:
+                self._condition.notify()
+        return future
+
+    def _next_batch(self):
+        with self._condition:
+            while True:
+                if not self._items:
+                    self._condition.wait()
+                    continue
+                remaining = self._first_at + self.window - time.monotonic()
+                if len(self._items) >= self.max_batch or remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._items[:self.max_batch]
+            del self._items[:self.max_batch]
+            self._first_at = time.monotonic() if self._items else None
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self.execute_batch([item for item, _ in batch])
+            except Exception as e:
+                logger.error(f"Group Commit '{self.name}' für {len(batch)} Aufträge fehlgeschlagen: {e}", exc_info=True)
+                results = [e] * len(batch)
+            with self._condition:
+                self._stats['items'] += len(batch)
+                self._stats['batches'] += 1
+                self._stats['max_batch'] = max(self._stats['max_batch'], len(batch))
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def get_stats(self):
+        """Ausgeführte Aufträge, Transaktionen und größter Stapel seit dem Start."""
+        with self._condition:
+            return {**self._stats, 'window_ms': self.window * 1000, 'queued': len(self._items)}
@@ -0,0 +1,201 @@
+"""
+Limit-, Stop- und Stop-Limit-Orders (Tabelle orders).
+
+Status einer Order:
+    open       wartet auf ihren Limit- bzw. Stop-Preis
+    active     Stop-Limit-Order, deren Stop ausgelöst hat; wartet jetzt auf den Limit-Preis
+    filling    ausgelöst und von einem Worker übernommen (claim_orders), wird gerade ausgeführt
+    filled     ausgeführt (fill_price, filled_at)
+    cancelled  vom Benutzer storniert
+    rejected   ausgelöst, aber nicht ausführbar (z.B. zu wenig Guthaben oder Aktien; message)
+
+Das Auslösen und Ausführen übernimmt utils/order_engine.py, dieses Modul speichert nur.
+Orders, die nach einem Absturz in 'filling' stehen bleiben, werden nicht neu geladen
+(der Trade kann schon gebucht sein) und müssen von Hand geprüft werden.
+"""
+import os
+import logging
+
+from dotenv import load_dotenv
+from psycopg2.extras import RealDictCursor, execute_values
+
+from database.handler.postgres.postgres_pool import LazyConnectionPool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+connection_pool = LazyConnectionPool(1, 5,
+    host=os.getenv('POSTGRES_HOST', 'localhost'),
+    port=os.getenv('POSTGRES_PORT', '5432'),
+    dbname=os.getenv('POSTGRES_DB', 'buyhigh'),
+    user=os.getenv('POSTGRES_USER', 'postgres'),
+    password=os.getenv('POSTGRES_PASSWORD', '')
+)
+
+OPEN_STATUSES = ('open', 'active')
+ORDER_COLUMNS = "id, user_id, asset_symbol, side, order_type, quantity, limit_price, stop_price, status, fill_price, message, created_at, updated_at, filled_at"
+
+
+def _run(fn):
+    conn = connection_pool.getconn()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            result = fn(cur)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        connection_pool.putconn(conn)
+
+
+def create_orders_table():
+    """Legt die Tabelle orders an (wie in postgres_schema.sql)."""
+    def create(cur):
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS orders (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                asset_symbol VARCHAR(20) NOT NULL,
+                side VARCHAR(4) NOT NULL CHECK (side IN ('buy', 'sell')),
+                order_type VARCHAR(10) NOT NULL CHECK (order_type IN ('limit', 'stop', 'stop_limit')),
+                quantity FLOAT NOT NULL CHECK (quantity > 0),
+                limit_price FLOAT,
+                stop_price FLOAT,
+                status VARCHAR(10) NOT NULL DEFAULT 'open',
+                fill_price FLOAT,
+                message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                filled_at TIMESTAMP
+            );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_orders_user ON orders(user_id, created_at DESC)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_orders_pending ON orders(id) WHERE status IN ('open', 'active')")
+    _run(create)
+
+
+def create_order(user_id, asset_symbol, side, order_type, quantity, limit_price=None, stop_price=None):
+    """
+    Speichert eine neue Order mit Status 'open'.
+
+    Returns:
+        dict: {"success": True, "order": {...}} oder {"success": False, "message": "..."}
+    """
+    try:
+        def insert(cur):
+            cur.execute(f"""
+                INSERT INTO orders (user_id, asset_symbol, side, order_type, quantity, limit_price, stop_price)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING {ORDER_COLUMNS}
+            """, (user_id, asset_symbol.upper(), side, order_type, quantity, limit_price, stop_price))
+            return cur.fetchone()
+        return {"success": True, "order": _run(insert)}
+    except Exception as e:
+        logger.error(f"Fehler beim Anlegen der Order für Benutzer ID {user_id}: {e}", exc_info=True)
+        return {"success": False, "message": f"Database error: {e}"}
+
+
+def cancel_order(user_id, order_id):
+    """
+    Storniert eine offene Order des Benutzers.
+
+    Returns:
+        dict: {"success": True, "order": {...}} oder {"success": False, "message": "..."}
+    """
+    try:
+        def cancel(cur):
+            cur.execute(f"""
+                UPDATE orders SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND user_id = %s AND status IN %s
+                RETURNING {ORDER_COLUMNS}
+            """, (order_id, user_id, OPEN_STATUSES))
+            return cur.fetchone()
+        order = _run(cancel)
+        if order is None:
+            return {"success": False, "message": "Order not found or no longer open."}
+        return {"success": True, "order": order}
+    except Exception as e:
+        logger.error(f"Fehler beim Stornieren der Order {order_id}: {e}", exc_info=True)
+        return {"success": False, "message": f"Database error: {e}"}
+
+
+def get_user_orders(user_id, status=None, limit=100):
+    """Orders des Benutzers, neueste zuerst; status=None für alle."""
+    def select(cur):
+        if status is None:
+            cur.execute(f"SELECT {ORDER_COLUMNS} FROM orders WHERE user_id = %s ORDER BY created_at DESC LIMIT %s", (user_id, limit))
+        else:
+            cur.execute(f"SELECT {ORDER_COLUMNS} FROM orders WHERE user_id = %s AND status = %s ORDER BY created_at DESC LIMIT %s", (user_id, status, limit))
+        return cur.fetchall()
+    return _run(select)
+
+
+def get_pending_orders():
+    """Alle Orders mit Status 'open' oder 'active' (zum Laden des Orderbuchs beim Start)."""
+    def select(cur):
+        cur.execute(f"SELECT {ORDER_COLUMNS} FROM orders WHERE status IN %s ORDER BY id", (OPEN_STATUSES,))
+        return cur.fetchall()
+    return _run(select)
+
+
+def claim_orders(order_ids):
+    """
+    Markiert ausgelöste Orders vor der Ausführung als 'filling', damit ein zweiter
+    Worker-Prozess sie nicht ebenfalls ausführt.
+
+    Returns:
+        set: IDs der Orders, die dieser Aufruf übernommen hat
+    """
+    if not order_ids:
+        return set()
+    def claim(cur):
+        cur.execute("""
+            UPDATE orders SET status = 'filling', updated_at = CURRENT_TIMESTAMP
+            WHERE id = ANY(%s) AND status IN ('open', 'active')
+            RETURNING id
+        """, (list(order_ids),))
+        return {row['id'] for row in cur.fetchall()}
+    return _run(claim)
+
+
+def activate_orders(order_ids):
+    """Stop-Limit-Orders, deren Stop ausgelöst hat: 'open' -> 'active'."""
+    if not order_ids:
+        return
+    def activate(cur):
+        cur.execute("""
+            UPDATE orders SET status = 'active', updated_at = CURRENT_TIMESTAMP
+            WHERE id = ANY(%s) AND status = 'open'
+        """, (list(order_ids),))
+    _run(activate)
+
+
+def update_order_statuses(updates):
+    """
+    Schreibt die Ergebnisse ausgelöster Orders mit einer Anweisung.
+
+    Args:
+        updates (list): (order_id, status, fill_price, message) pro übernommener Order
+
+    Returns:
+        set: IDs der tatsächlich geänderten Orders
+    """
+    if not updates:
+        return set()
+    def update(cur):
+        rows = execute_values(cur, """
+            UPDATE orders SET
+                status = v.status,
+                fill_price = v.fill_price,
+                message = v.message,
+                updated_at = CURRENT_TIMESTAMP,
+                filled_at = CASE WHEN v.status = 'filled' THEN CURRENT_TIMESTAMP ELSE orders.filled_at END
+            FROM (VALUES %s) AS v(id, status, fill_price, message)
+            WHERE orders.id = v.id AND orders.status = 'filling'
+            RETURNING orders.id
+        """, updates, template="(%s, %s, %s::float, %s::text)", page_size=len(updates), fetch=True)
+        return {row['id'] for row in rows}
+    return _run(update)
@@ -0,0 +1,66 @@
+"""
+Verbindungspools, die erst beim ersten getconn() eine Verbindung aufbauen.
+
+psycopg2.pool.SimpleConnectionPool öffnet minconn Verbindungen schon im
+Konstruktor. Als Modulvariable eines Handlers hieß das: jeder Import (und damit
+jeder Worker-Start) brauchte eine erreichbare Datenbank. LazyConnectionPool hat
+dieselbe Schnittstelle (getconn/putconn/closeall), erzeugt den echten Pool aber
+erst bei der ersten Anfrage.
+"""
+import logging
+import threading
+
+from psycopg2 import pool
+
+logger = logging.getLogger(__name__)
+
+_pools = []
+_pools_lock = threading.Lock()
+
+
+class LazyConnectionPool:
+    """Drop-in-Ersatz für SimpleConnectionPool, der beim ersten getconn() verbindet."""
+
+    def __init__(self, minconn, maxconn, **connect_kwargs):
+        self._args = (minconn, maxconn)
+        self._connect_kwargs = connect_kwargs
+        self._pool = None
+        self._lock = threading.Lock()
+        with _pools_lock:
+            _pools.append(self)
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = pool.SimpleConnectionPool(*self._args, **self._connect_kwargs)
+                    logger.info(f"PostgreSQL-Pool geöffnet ({self._args[0]}-{self._args[1]} Verbindungen)")
+        return self._pool
+
+    @property
+    def opened(self):
+        return self._pool is not None
+
+    def getconn(self, key=None):
+        return self._get_pool().getconn(key)
+
+    def putconn(self, conn, key=None, close=False):
+        return self._get_pool().putconn(conn, key=key, close=close)
+
+    def closeall(self):
+        """Schließt alle Verbindungen; der nächste getconn() öffnet einen neuen Pool."""
+        with self._lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+            self._pool = None
+
+
+def close_all_pools():
+    """Schließt alle geöffneten Pools (beim Herunterfahren der App)."""
+    with _pools_lock:
+        pools = list(_pools)
+    for lazy_pool in pools:
+        try:
+            lazy_pool.closeall()
+        except Exception as e:
+            logger.warning(f"Pool konnte nicht geschlossen werden: {e}")
@@ -120,6 +120,56 @@ CREATE TABLE IF NOT EXISTS portfolio (
     UNIQUE(user_id, asset_id)
 );
 
+-- Pending limit, stop and stop-limit orders (utils/order_engine.py).
+-- status: open -> (active ->) filling -> filled | rejected, or cancelled while open/active
+CREATE TABLE IF NOT EXISTS orders (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    asset_symbol VARCHAR(20) NOT NULL,
+    side VARCHAR(4) NOT NULL CHECK (side IN ('buy', 'sell')),
+    order_type VARCHAR(10) NOT NULL CHECK (order_type IN ('limit', 'stop', 'stop_limit')),
+    quantity FLOAT NOT NULL CHECK (quantity > 0),
+    limit_price FLOAT,
+    stop_price FLOAT,
+    status VARCHAR(10) NOT NULL DEFAULT 'open',
+    fill_price FLOAT,
+    message TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    filled_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_orders_user ON orders(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_pending ON orders(id) WHERE status IN ('open', 'active');
+
+-- Price alerts (utils/alert_engine.py), fire once: active -> triggered, or cancelled while active
+CREATE TABLE IF NOT EXISTS alerts (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    asset_symbol VARCHAR(20) NOT NULL,
+    direction VARCHAR(5) NOT NULL CHECK (direction IN ('above', 'below')),
+    threshold FLOAT NOT NULL CHECK (threshold > 0),
+    note TEXT,
+    status VARCHAR(10) NOT NULL DEFAULT 'active',
+    trigger_price FLOAT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    triggered_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_alerts_user ON alerts(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_active ON alerts(id) WHERE status = 'active';
+
+-- Latest AI portfolio rating per user, written by the background rating queue
+-- (buy_high_backend/utils/rating_queue.py). portfolio_hash identifies the holdings
+-- the rating was computed for, so unchanged portfolios are not re-rated.
+CREATE TABLE IF NOT EXISTS portfolio_ratings (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    rating REAL NOT NULL CHECK (rating >= 0 AND rating <= 1),
+    tip TEXT NOT NULL,
+    portfolio_hash TEXT NOT NULL,
+    rated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 CREATE TABLE IF NOT EXISTS xp_levels (
     level INTEGER PRIMARY KEY,
     xp_required INTEGER NOT NULL,
@@ -179,6 +229,27 @@ CREATE TABLE IF NOT EXISTS daily_quiz_attempts (
     UNIQUE(user_id, quiz_id)
 );
 
+-- Aggregated answer statistics per daily quiz, maintained incrementally by
+-- postgre_education_handler.insert_daily_quiz_attempt ("X% got this right")
+CREATE TABLE IF NOT EXISTS daily_quiz_stats (
+    quiz_id INTEGER PRIMARY KEY REFERENCES daily_quiz(id) ON DELETE CASCADE,
+    total_attempts INTEGER NOT NULL DEFAULT 0,
+    correct_attempts INTEGER NOT NULL DEFAULT 0,
+    answer_counts JSONB NOT NULL DEFAULT '{}'::jsonb, -- selected_answer -> count
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Backfill statistics from existing attempts (no-op for quizzes that already have stats)
+INSERT INTO daily_quiz_stats (quiz_id, total_attempts, correct_attempts, answer_counts)
+SELECT a.quiz_id, SUM(a.cnt), SUM(a.correct_cnt), jsonb_object_agg(a.selected_answer, a.cnt)
+FROM (
+    SELECT quiz_id, selected_answer, COUNT(*) AS cnt, COUNT(*) FILTER (WHERE is_correct) AS correct_cnt
+    FROM daily_quiz_attempts
+    GROUP BY quiz_id, selected_answer
+) a
+GROUP BY a.quiz_id
+ON CONFLICT (quiz_id) DO NOTHING;
+
 
 
 CREATE TABLE IF NOT EXISTS developers (
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming chatbot against the local fake completion server.
+
+Starts buy_high_backend/utils/fake_completion_server.py on a free port (on first
+use, not at import), streams a few answers concurrently through
+buy_high_backend.utils.ai_stream, cancels one stream early and checks the
+collected metrics.
+
+Usage:
+    python test_chatbot_stream.py           # or: python -m pytest test_chatbot_stream.py
+"""
+
+import asyncio
+import os
+import sys
+
+from buy_high_backend.utils.fake_completion_server import start_fake_server
+
+_server = None
+ai_stream = None    # imported in _ai_stream(), after the fake server's URL is set
+
+
+def _ai_stream():
+    """Start the fake server once and return ai_stream pointed at it."""
+    global _server, ai_stream
+    if ai_stream is None:
+        _server, url = start_fake_server(first_token_delay=0.2, token_delay=0.02)
+        os.environ["AI_CHAT_COMPLETIONS_URL"] = url
+        from buy_high_backend.utils import ai_stream as module  # reads the URL at import
+        module.CHAT_COMPLETIONS_URL = url                       # in case it was imported before
+        ai_stream = module
+    return ai_stream
+
+
+async def consume(prompt, cancel_after=None):
+    await ai_stream.acquire_stream_slot()
+    stream = ai_stream.stream_finance_response(prompt)
+    chunks = []
+    try:
+        async for delta in stream:
+            chunks.append(delta)
+            if cancel_after and len(chunks) >= cancel_after:
+                break
+    finally:
+        await stream.aclose()
+        ai_stream.release_stream_slot()
+    return "".join(chunks)
+
+
+def run_streams(*requests):
+    """
+    Stream (prompt, cancel_after) requests concurrently.
+
+    Returns:
+        (texts, counts, metrics): the streamed texts, the completed/cancelled streams
+        of this run and the metrics afterwards
+    """
+    stream = _ai_stream()
+
+    async def run():
+        try:
+            return await asyncio.gather(*(consume(prompt, cancel_after) for prompt, cancel_after in requests))
+        finally:
+            await stream.close_client()     # the client is bound to this event loop
+
+    before = stream.get_stream_metrics()
+    texts = asyncio.run(run())
+    metrics = stream.get_stream_metrics()
+    counts = {key: metrics[key] - before[key] for key in ("completed", "cancelled")}
+    return texts, counts, metrics
+
+
+def test_concurrent_streams_complete():
+    texts, counts, metrics = run_streams(("What is diversification?", None), ("What is an ETF?", None))
+    assert counts == {"completed": 2, "cancelled": 0}
+    assert metrics["active"] == 0
+    assert texts[0].startswith("Diversification")
+    assert all(texts)
+
+
+def test_cancelled_stream_releases_its_slot():
+    texts, counts, metrics = run_streams(("What is an ETF?", None), ("Explain P/E ratios", 3))
+    assert counts == {"completed": 1, "cancelled": 1}
+    assert metrics["active"] == 0
+    assert texts[1]
+
+
+def main():
+    try:
+        texts, counts, metrics = run_streams(
+            ("What is diversification?", None),
+            ("What is an ETF?", None),
+            ("Explain P/E ratios", 3),
+        )
+    finally:
+        if _server is not None:
+            _server.shutdown()
+    for text in texts:
+        print(f"-> {text!r}")
+    print(metrics)
+    ok = (counts == {"completed": 2, "cancelled": 1} and metrics["active"] == 0
+          and texts[0].startswith("Diversification"))
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Import-time budget for the FastAPI backend.
+
+Imports buy_high_backend.main in a fresh interpreter with `python -X importtime`
+and fails if
+- the import takes longer than IMPORT_TIME_BUDGET_MS (cumulative time of the module),
+- a heavy library that must only be loaded on first use is imported,
+- the import needs the database (POSTGRES_* point to a closed port) or starts threads.
+
+Usage:
+    python test_import_time.py            # or: python -m pytest test_import_time.py
+    IMPORT_TIME_BUDGET_MS=800 python test_import_time.py
+"""
+import os
+import re
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+MODULE = "buy_high_backend.main"
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+# Loaded lazily (utils/lazy_imports.py or imports inside functions), never at startup
+FORBIDDEN_MODULES = ("pandas", "numpy", "yfinance", "finnhub", "firebase_admin", "google.auth", "flask", "torch")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def measure_import(module=MODULE):
+    """Return (cumulative ms of the module, {imported module: cumulative ms}, stderr)."""
+    env = dict(os.environ)
+    # An import that opens a DB connection fails instead of silently connecting
+    env.update({"POSTGRES_HOST": "127.0.0.1", "POSTGRES_PORT": "1", "PYTHONDONTWRITEBYTECODE": "1"})
+    check = f"import threading, {module}; assert threading.active_count() == 1, 'threads started at import'"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=300
+    )
+    if result.returncode != 0:
+        errors = "\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:"))
+        raise AssertionError(f"Importing {module} failed:\n{errors[-3000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2)) / 1000.0
+    return modules.get(module, 0.0), modules, result.stderr
+
+
+def test_import_time():
+    total_ms, modules, _ = measure_import()
+    loaded = [name for name in FORBIDDEN_MODULES if name in modules]
+    assert not loaded, f"Heavy modules imported at startup: {', '.join(loaded)}"
+    assert total_ms <= BUDGET_MS, f"Importing {MODULE} took {total_ms:.0f} ms (budget {BUDGET_MS:.0f} ms)"
+
+
+if __name__ == "__main__":
+    total_ms, modules, _ = measure_import()
+    print(f"{MODULE}: {total_ms:.0f} ms (budget {BUDGET_MS:.0f} ms)")
+    print("Slowest project modules (cumulative):")
+    project = {name: ms for name, ms in modules.items()
+               if name.split(".")[0] in ("buy_high_backend", "utils", "database") and name != MODULE}
+    for name, ms in sorted(project.items(), key=lambda item: -item[1])[:15]:
+        print(f"  {ms:8.1f} ms  {name}")
+    loaded = [name for name in FORBIDDEN_MODULES if name in modules]
+    if loaded:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(loaded)}")
+        sys.exit(1)
+    if total_ms > BUDGET_MS:
+        print("FAIL: import time over budget")
+        sys.exit(1)
+    print("OK")
@@ -0,0 +1,157 @@
+"""
+Price alert engine: fires alerts on price updates and delivers them once.
+
+Alerts are stored in the alerts table (postgres_alerts_handler) and indexed in an
+AlertIndex (utils/alert_index.py). Prices come in through the shared quote
+poller (utils/quote_poller.py): every live quote of utils/market_data.py, and
+while the exchange is open a poll of all symbols with active alerts every
+ALERT_POLL_INTERVAL seconds.
+
+A price update removes the alerts it crosses from the index; a background thread
+claims them in the database (active -> triggered, so each alert is delivered by
+exactly one process, once) and publishes an events.PRICE_ALERT per claimed
+alert. The Flask app forwards these to the user's Socket.IO room (namespace
+/alerts, event 'price_alert', see buyhigh_flask/routes/alert_events.py).
+
+The engine runs in the process that owns the Socket.IO server (the Flask app).
+Alerts created through another process (FastAPI) are picked up by an incremental
+reload every ALERT_SYNC_INTERVAL seconds.
+
+Usage:
+    import utils.alert_engine as alert_engine
+    alert_engine.start()                                    # at app startup
+    alert_engine.create_alert(user_id, "AAPL", 200.0)       # direction from the current quote
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database.handler.postgres.postgres_alerts_handler as alerts_handler
+import utils.events as events
+import utils.market_data as market_data
+import utils.quote_poller as quote_poller
+from utils.alert_index import ABOVE, BELOW, DIRECTIONS, AlertIndex
+
+logger = logging.getLogger(__name__)
+
+ALERT_ENGINE_ENABLED = os.getenv("ALERT_ENGINE_ENABLED", "1") == "1"
+ALERT_POLL_INTERVAL = float(os.getenv("ALERT_POLL_INTERVAL", "30"))     # seconds between quote polls
+ALERT_SYNC_INTERVAL = float(os.getenv("ALERT_SYNC_INTERVAL", "5"))      # seconds between reloads of new alerts
+# Reload a few ids below the highest one seen: ids of concurrent inserts can commit out of order
+SYNC_OVERLAP = 100
+
+_index = AlertIndex()
+_lock = threading.Lock()
+_thread = None
+_dispatcher = None
+_last_loaded_id = 0
+_stats = {"fired": 0, "delivered": 0, "duplicates": 0}
+
+
+def _get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None:
+        with _lock:
+            if _dispatcher is None:
+                _dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-dispatch")
+    return _dispatcher
+
+
+def is_running():
+    return _thread is not None
+
+
+def create_alert(user_id, symbol, threshold, direction=None, note=None):
+    """
+    Store an alert. Without a direction it fires when the price crosses the threshold
+    from where it is now (needs a current quote).
+
+    Returns:
+        dict: {"success": True, "alert": {...}} or {"success": False, "message": "..."}
+    """
+    if threshold is None or threshold <= 0:
+        return {"success": False, "message": "Threshold must be positive."}
+    if direction is None:
+        try:
+            direction = ABOVE if threshold >= market_data.get_quote(symbol) else BELOW
+        except Exception as e:
+            logger.warning(f"No quote for {symbol} to choose the alert direction: {e}")
+            return {"success": False, "message": f"No current price for {symbol}; please choose 'above' or 'below'."}
+    if direction not in DIRECTIONS:
+        return {"success": False, "message": "Direction must be 'above' or 'below'."}
+    result = alerts_handler.create_alert(user_id, symbol, direction, threshold, note)
+    if result["success"] and is_running():
+        alert = result["alert"]
+        _index.add(alert["id"], alert["asset_symbol"], alert["direction"], alert["threshold"])
+    return result
+
+
+def cancel_alert(user_id, alert_id):
+    result = alerts_handler.cancel_alert(user_id, alert_id)
+    if result["success"]:
+        _index.remove(alert_id)
+    return result
+
+
+def on_price(symbol, price):
+    """Fire the alerts the price crosses (cheap; claiming and delivery run in the background)."""
+    fired = _index.on_price(symbol, price)
+    if fired:
+        _get_dispatcher().submit(_deliver, fired, price)
+
+
+def _json_safe(alert):
+    return {key: value.isoformat() if hasattr(value, "isoformat") else value for key, value in alert.items()}
+
+
+def _deliver(alert_ids, price):
+    try:
+        claimed = alerts_handler.claim_alerts(alert_ids, price)
+    except Exception as e:
+        # Not claimed: the alerts stay active in the database and fire again after a restart
+        logger.error(f"Could not claim {len(alert_ids)} fired alerts: {e}", exc_info=True)
+        return
+    with _lock:
+        _stats["fired"] += len(alert_ids)
+        _stats["delivered"] += len(claimed)
+        _stats["duplicates"] += len(alert_ids) - len(claimed)
+    for alert in claimed:
+        events.publish(events.PRICE_ALERT, user_id=alert["user_id"], alert=_json_safe(alert))
+
+
+def _load_new_alerts():
+    global _last_loaded_id
+    rows = alerts_handler.get_active_alerts(max(_last_loaded_id - SYNC_OVERLAP, 0))
+    if not rows:
+        return 0
+    _last_loaded_id = max(_last_loaded_id, rows[-1]["id"])
+    return _index.add_many((row["id"], row["asset_symbol"], row["direction"], row["threshold"]) for row in rows)
+
+
+def _sync_loop():
+    while True:
+        try:
+            _load_new_alerts()
+        except Exception as e:
+            logger.warning(f"Loading alerts failed: {str(e).strip()}")
+        time.sleep(ALERT_SYNC_INTERVAL)
+
+
+def start():
+    """Load active alerts, keep them synced and register with the quote poller (idempotent, call at app startup)."""
+    global _thread
+    if not ALERT_ENGINE_ENABLED:
+        return
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_sync_loop, name="alert-engine", daemon=True)
+    _thread.start()
+    quote_poller.register("alerts", on_price, _index.symbols, ALERT_POLL_INTERVAL)
+
+
+def get_stats():
+    with _lock:
+        return {**_stats, "active": len(_index)}
@@ -0,0 +1,124 @@
+"""
+Sorted threshold index for price alerts ("notify me when AAPL crosses $200").
+
+An alert fires once, when the price reaches its threshold from one side:
+
+    above  fires when price >= threshold
+    below  fires when price <= threshold
+
+Per symbol, AlertIndex keeps one sorted list of (threshold, alert_id) per
+direction. The alerts a price update fires are always a contiguous range at one
+end of the list (a prefix of `above`, a suffix of `below`), found with one bisect
+and cut off in one slice. A tick therefore only touches the alerts it fires, not
+every alert of the symbol. Adding and cancelling is a bisect plus a list insert or
+delete.
+
+A fired alert leaves the index, so it cannot fire twice in this process;
+utils/alert_engine.py additionally claims it in the database so that only one
+process delivers it.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+ABOVE = "above"
+BELOW = "below"
+DIRECTIONS = (ABOVE, BELOW)
+
+_INF = float("inf")
+
+
+class _SymbolAlerts:
+    __slots__ = ("above", "below")
+
+    def __init__(self):
+        self.above = []       # sorted (threshold, alert_id)
+        self.below = []
+
+
+class AlertIndex:
+    """Active alerts of all symbols, sorted by threshold (thread-safe)."""
+
+    def __init__(self):
+        self._symbols = {}
+        self._alerts = {}     # alert_id -> (symbol, direction, threshold)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def __contains__(self, alert_id):
+        return alert_id in self._alerts
+
+    def symbols(self):
+        with self._lock:
+            return sorted(symbol for symbol, alerts in self._symbols.items() if alerts.above or alerts.below)
+
+    def add(self, alert_id, symbol, direction, threshold):
+        """Add an alert; returns False if it is already indexed."""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown alert direction: {direction}")
+        symbol = symbol.upper()
+        with self._lock:
+            if alert_id in self._alerts:
+                return False
+            self._alerts[alert_id] = (symbol, direction, threshold)
+            alerts = self._symbols.get(symbol)
+            if alerts is None:
+                alerts = self._symbols[symbol] = _SymbolAlerts()
+            insort(alerts.above if direction == ABOVE else alerts.below, (threshold, alert_id))
+            return True
+
+    def add_many(self, alerts):
+        """Bulk load of (alert_id, symbol, direction, threshold): append, then sort once. Returns the number added."""
+        added = 0
+        with self._lock:
+            touched = set()
+            for alert_id, symbol, direction, threshold in alerts:
+                if direction not in DIRECTIONS:
+                    raise ValueError(f"Unknown alert direction: {direction}")
+                if alert_id in self._alerts:
+                    continue
+                symbol = symbol.upper()
+                self._alerts[alert_id] = (symbol, direction, threshold)
+                symbol_alerts = self._symbols.get(symbol)
+                if symbol_alerts is None:
+                    symbol_alerts = self._symbols[symbol] = _SymbolAlerts()
+                (symbol_alerts.above if direction == ABOVE else symbol_alerts.below).append((threshold, alert_id))
+                touched.add(symbol)
+                added += 1
+            for symbol in touched:
+                self._symbols[symbol].above.sort()
+                self._symbols[symbol].below.sort()
+        return added
+
+    def remove(self, alert_id):
+        """Remove an alert (cancelled); returns True if it was indexed."""
+        with self._lock:
+            entry = self._alerts.pop(alert_id, None)
+            if entry is None:
+                return False
+            symbol, direction, threshold = entry
+            alerts = self._symbols[symbol]
+            sorted_alerts = alerts.above if direction == ABOVE else alerts.below
+            position = bisect_left(sorted_alerts, (threshold, alert_id))
+            del sorted_alerts[position]
+            return True
+
+    def on_price(self, symbol, price):
+        """Remove and return the ids of all alerts of the symbol that fire at this price."""
+        with self._lock:
+            alerts = self._symbols.get(symbol.upper())
+            if alerts is None:
+                return []
+            fired = []
+            end = bisect_right(alerts.above, (price, _INF))
+            if end:
+                fired.extend(alert_id for _, alert_id in alerts.above[:end])
+                del alerts.above[:end]
+            start = bisect_left(alerts.below, (price, -_INF))
+            if start < len(alerts.below):
+                fired.extend(alert_id for _, alert_id in alerts.below[start:])
+                del alerts.below[start:]
+            for alert_id in fired:
+                del self._alerts[alert_id]
+            return fired
@@ -1,7 +1,6 @@
-import firebase_admin
-from firebase_admin import auth as firebase_auth, credentials
 import requests  # For Firebase REST API
 import os
+import threading
 import dotenv
 import json
 import logging
@@ -19,6 +18,8 @@ dotenv.load_dotenv()
 
 # Initialize Firebase Admin SDK
 def initialize_firebase_admin_sdk():
+    import firebase_admin
+    from firebase_admin import credentials
     cred_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'firebase-service-account-key.json')
     if os.path.exists(cred_path):
         try:
@@ -33,9 +34,18 @@ def initialize_firebase_admin_sdk():
     else:
         logger.error(f"Firebase service account key not found at {cred_path}. Please ensure the file exists and the path is correct.")
 
-# Call initialize_firebase_admin_sdk at module level if not already initialized by app.py
-if not firebase_admin._apps:
-    initialize_firebase_admin_sdk()
+# firebase_admin (and the Google auth stack behind it) is imported and initialised on
+# first use, so importing this module stays cheap and works without credentials
+_firebase_lock = threading.Lock()
+
+def get_firebase_auth():
+    """Return the firebase_admin.auth module, initialising the Admin SDK on first use."""
+    import firebase_admin
+    from firebase_admin import auth as firebase_auth
+    if not firebase_admin._apps:
+        with _firebase_lock:
+            initialize_firebase_admin_sdk()
+    return firebase_auth
 
 # Get Firebase Web API Key from various sources with fallbacks
 def get_firebase_web_api_key():
@@ -99,6 +109,7 @@ if not FIREBASE_WEB_API_KEY:
 
 def create_firebase_user(email, password, username=None):
     """Creates a new user in Firebase Authentication."""
+    firebase_auth = get_firebase_auth()
     try:
         user_record = firebase_auth.create_user(
             email=email,
@@ -176,6 +187,7 @@ def login_firebase_user_rest(email, password):
 
 def delete_firebase_user(uid):
     """Deletes a user from Firebase Authentication."""
+    firebase_auth = get_firebase_auth()
     try:
         firebase_auth.delete_user(uid)
         return True
@@ -199,6 +211,7 @@ def verify_firebase_password_rest(email, password):
 
 def verify_firebase_id_token(id_token):
     """Verifiziert ein Firebase ID Token mit dem Admin SDK."""
+    firebase_auth = get_firebase_auth()
     try:
         decoded_token = firebase_auth.verify_id_token(id_token)
         return decoded_token
@@ -215,6 +228,7 @@ def verify_google_id_token(id_token: str):
     Returns:
         The decoded token (Firebase UserRecord like object) if verification is successful, otherwise None.
     """
+    firebase_auth = get_firebase_auth()
     try:
         # Firebase Admin SDK can verify ID tokens issued by Google Sign-In
         decoded_token = firebase_auth.verify_id_token(id_token, check_revoked=True)
@@ -298,6 +312,7 @@ def send_password_reset_email(email):
 
 def change_firebase_password(uid, new_password):
     """Changes a Firebase user's password using the Admin SDK."""
+    firebase_auth = get_firebase_auth()
     try:
         firebase_auth.update_user(
             uid,
@@ -381,13 +396,13 @@ def create_anonymous_user():
     Erstellt einen anonymen Benutzer in Firebase.
     """
     try:
+        import firebase_admin
+        firebase_auth = get_firebase_auth()
         if not firebase_admin._apps:
-            initialize_firebase_admin_sdk()
-            if not firebase_admin._apps:
-                logger.error("Firebase not initialized, cannot create anonymous user.")
-                return None
+            logger.error("Firebase not initialized, cannot create anonymous user.")
+            return None
 
-        user_record = firebase_admin.auth.create_user()
+        user_record = firebase_auth.create_user()
         logger.info(f"Anonymer Firebase-Benutzer erstellt: UID={user_record.uid}")
         return {"uid": user_record.uid}
     except Exception as e:
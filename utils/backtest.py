@@ -0,0 +1,242 @@
+"""
+Vectorised strategy backtests over close prices.
+
+A strategy turns closes into a position per bar (1 = invested, 0 = cash); the
+position decided at the close of bar t earns the return of bar t+1, so a
+strategy never trades on a price it has not seen yet. Everything is computed
+for all bars at once with NumPy:
+
+    signal -> position -> bar returns (minus fees on position changes) -> equity
+
+Strategies (parameters and defaults):
+
+    ma_crossover   fast=20, slow=50         invested while SMA(fast) > SMA(slow)
+    buy_the_dip    dip=5, lookback=20, hold=10
+                                            buy when the close is dip % below its highest
+                                            close of the last `lookback` bars, hold `hold` bars
+    rsi_reversion  period=14, lower=30, upper=70
+                                            buy when RSI < lower, sell when RSI > upper
+
+run_backtest returns the equity curve and its stats (total return, CAGR, max
+drawdown, Sharpe). run_sweep backtests every combination of a parameter grid;
+large sweeps are spread over a process pool (created on first use).
+
+Usage:
+    from utils.backtest import run_backtest, run_sweep
+    result = run_backtest(closes, "ma_crossover", {"fast": 10, "slow": 30}, bars_per_year=252)
+    ranked = run_sweep(closes, "ma_crossover", {"fast": [5, 10, 20], "slow": [50, 100]}, bars_per_year=252)
+"""
+import itertools
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.indicators import rsi, sma
+from utils.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(min(os.cpu_count() or 1, 4))))
+MAX_SWEEP_COMBINATIONS = 1000
+# Bound on the raw grid product, checked before iterating it (combinations with fast >= slow are skipped later)
+MAX_SWEEP_GRID = 10 * MAX_SWEEP_COMBINATIONS
+# Sweeps below this many (combinations x bars) run in the calling process; the pool would cost more
+SWEEP_INLINE_BELOW = 2_000_000
+SWEEP_CHUNK = 16
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _ma_crossover(closes, fast, slow):
+    fast_line, slow_line = sma(closes, fast), sma(closes, slow)
+    return (fast_line > slow_line).astype(float)     # NaN compares False: flat while warming up
+
+
+def _buy_the_dip(closes, dip, lookback, hold):
+    highest = np.full(len(closes), np.nan)
+    if len(closes) >= lookback:
+        highest[lookback - 1:] = np.lib.stride_tricks.sliding_window_view(closes, lookback).max(axis=1)
+    with np.errstate(invalid="ignore"):
+        entries = closes <= highest * (1 - dip / 100)
+    # Invested if there was an entry within the last `hold` bars
+    cumulative = np.concatenate(([0], np.cumsum(entries)))
+    since = cumulative[1:] - cumulative[np.maximum(np.arange(1, len(closes) + 1) - hold, 0)]
+    return (since > 0).astype(float)
+
+
+def _rsi_reversion(closes, period, lower, upper):
+    values = rsi(closes, period)
+    # 1 on a buy signal, 0 on a sell signal, carried forward in between
+    signal = np.where(values < lower, 1.0, np.where(values > upper, 0.0, np.nan))
+    signal[0] = 0.0 if np.isnan(signal[0]) else signal[0]
+    last = np.maximum.accumulate(np.where(np.isnan(signal), 0, np.arange(len(signal))))
+    return signal[last]
+
+
+STRATEGIES = {
+    "ma_crossover": (_ma_crossover, {"fast": 20, "slow": 50}),
+    "buy_the_dip": (_buy_the_dip, {"dip": 5.0, "lookback": 20, "hold": 10}),
+    "rsi_reversion": (_rsi_reversion, {"period": 14, "lower": 30.0, "upper": 70.0}),
+}
+_INTEGER_PARAMS = {"fast", "slow", "lookback", "hold", "period"}
+
+
+def _checked_values(strategy, params):
+    """Parameters with each value validated on its own (no defaults, no relations); raises ValueError."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}' (available: {', '.join(STRATEGIES)})")
+    unknown = set(params) - set(STRATEGIES[strategy][1])
+    if unknown:
+        raise ValueError(f"Unknown parameters for {strategy}: {', '.join(sorted(map(str, unknown)))}")
+    checked = {}
+    for name, value in params.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError(f"{name} must be a number")
+        if name in _INTEGER_PARAMS:
+            if value != int(value) or not 1 <= value <= 1000:
+                raise ValueError(f"{name} must be a whole number between 1 and 1000")
+            checked[name] = int(value)
+        elif not 0 < float(value) < 100:
+            raise ValueError(f"{name} must be between 0 and 100")
+        else:
+            checked[name] = float(value)
+    return checked
+
+
+def _check_relations(strategy, params):
+    if strategy == "ma_crossover" and params["fast"] >= params["slow"]:
+        raise ValueError("fast must be shorter than slow")
+    if strategy == "rsi_reversion" and params["lower"] >= params["upper"]:
+        raise ValueError("lower must be below upper")
+
+
+def strategy_params(strategy, params=None):
+    """Complete and validate the parameters of a strategy; raises ValueError."""
+    checked = _checked_values(strategy, params or {})
+    merged = {**STRATEGIES[strategy][1], **checked}
+    _check_relations(strategy, merged)
+    return merged
+
+
+def positions(closes, strategy, params):
+    function, _ = STRATEGIES[strategy]
+    return function(closes, **params)
+
+
+def _simulate(closes, position, fee_bps, initial):
+    """Per-bar strategy returns and the equity curve (equity[0] = initial)."""
+    bar_returns = closes[1:] / closes[:-1] - 1
+    held = position[:-1]
+    trades = np.abs(np.diff(np.concatenate(([0.0], held))))
+    returns = held * bar_returns - trades * fee_bps / 10_000
+    equity = initial * np.concatenate(([1.0], np.cumprod(1 + returns)))
+    return returns, equity
+
+
+def _stats(closes, position, returns, equity, bars_per_year):
+    years = (len(closes) - 1) / bars_per_year
+    final = equity[-1] / equity[0]
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    deviation = returns.std() if len(returns) else 0.0
+    held = position[:-1]
+    return {
+        "total_return_pct": float(final - 1) * 100,
+        "cagr_pct": float(final ** (1 / years) - 1) * 100 if years > 0 and final > 0 else None,
+        "max_drawdown_pct": float(drawdown.min()) * 100,
+        "sharpe": float(returns.mean() / deviation * math.sqrt(bars_per_year)) if deviation > 0 else None,
+        "trades": int(np.count_nonzero(np.diff(np.concatenate(([0.0], held))) > 0)),
+        "exposure_pct": float(held.mean()) * 100 if len(held) else 0.0,
+        "buy_and_hold_pct": float(closes[-1] / closes[0] - 1) * 100,
+        "bars": len(closes),
+    }
+
+
+def run_backtest(closes, strategy, params=None, bars_per_year=252, fee_bps=0.0, initial=10_000.0, with_equity=True):
+    """
+    Backtest one strategy over the closes.
+
+    Returns:
+        dict: {"strategy", "params", "stats": {...}, "equity": array (with_equity only)}
+    """
+    params = strategy_params(strategy, params)
+    closes = np.asarray(closes, dtype=float)
+    if len(closes) < 2:
+        raise ValueError("Need at least two bars")
+    position = positions(closes, strategy, params)
+    returns, equity = _simulate(closes, position, fee_bps, initial)
+    result = {"strategy": strategy, "params": params, "stats": _stats(closes, position, returns, equity, bars_per_year)}
+    if with_equity:
+        result["equity"] = equity
+    return result
+
+
+def _run_chunk(closes, strategy, combinations, bars_per_year, fee_bps):
+    return [run_backtest(closes, strategy, params, bars_per_year, fee_bps, with_equity=False) for params in combinations]
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking a server process with running threads is not safe
+                _pool = ProcessPoolExecutor(max_workers=BACKTEST_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def checked_grid(strategy, grid):
+    """
+    The grid ({param: [values]}) with every value validated and converted; raises ValueError
+    for unknown parameters, empty or non-list value lists, invalid values and grids with
+    more than MAX_SWEEP_GRID combinations.
+    """
+    if not isinstance(grid, dict) or not grid:
+        raise ValueError("The grid needs at least one parameter")
+    for name, values in grid.items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"{name}: the grid needs a non-empty list of values per parameter")
+    if math.prod(len(values) for values in grid.values()) > MAX_SWEEP_GRID:
+        raise ValueError(f"At most {MAX_SWEEP_GRID} grid combinations per sweep")
+    return {name: [_checked_values(strategy, {name: value})[name] for value in values] for name, values in grid.items()}
+
+
+def grid_combinations(strategy, grid):
+    """
+    Parameter sets of the grid. Invalid parameters or values raise ValueError (checked_grid);
+    only combinations that are invalid relative to each other (fast >= slow) are skipped.
+    """
+    grid = checked_grid(strategy, grid)
+    names, defaults = list(grid), STRATEGIES[strategy][1]
+    combinations = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = {**defaults, **dict(zip(names, values))}
+        try:
+            _check_relations(strategy, params)
+        except ValueError:
+            continue
+        combinations.append(params)
+        if len(combinations) > MAX_SWEEP_COMBINATIONS:
+            raise ValueError(f"At most {MAX_SWEEP_COMBINATIONS} parameter combinations per sweep")
+    return combinations
+
+
+def run_sweep(closes, strategy, grid, bars_per_year=252, fee_bps=0.0, sort_by="sharpe", parallel=None):
+    """
+    Backtest every combination of the grid ({param: [values]}); results without equity
+    curves, best first by `sort_by`. parallel=None decides by the amount of work.
+    """
+    combinations = grid_combinations(strategy, grid)
+    closes = np.asarray(closes, dtype=float)
+    if parallel is None:
+        parallel = BACKTEST_WORKERS > 1 and len(combinations) * len(closes) >= SWEEP_INLINE_BELOW
+    if parallel:
+        chunks = [combinations[i:i + SWEEP_CHUNK] for i in range(0, len(combinations), SWEEP_CHUNK)]
+        pool = _get_pool()
+        futures = [pool.submit(_run_chunk, closes, strategy, chunk, bars_per_year, fee_bps) for chunk in chunks]
+        results = [result for future in futures for result in future.result()]
+    else:
+        results = _run_chunk(closes, strategy, combinations, bars_per_year, fee_bps)
+    return sorted(results, key=lambda r: -math.inf if r["stats"].get(sort_by) is None else r["stats"][sort_by], reverse=True)
@@ -0,0 +1,171 @@
+"""
+Backtests over the bars of the price cache (utils/stock_data_api.py), with
+results memoised per (strategy, params, symbol, range).
+
+The range is a timeframe of the price cache, optionally cut to start/end
+dates. A cached result remembers the bars it was computed on (first and last
+bar time, bar count, last close) and is only reused while the cache still
+serves exactly those bars; new bars or revised data give a fresh run.
+
+Annualisation (CAGR, Sharpe) uses the calendar time the bars span, so it is
+right for daily as well as minute bars.
+
+Usage:
+    import utils.backtest_service as backtest_service
+    backtest_service.backtest("AAPL", "ALL", "ma_crossover", {"fast": 20, "slow": 100})
+    backtest_service.sweep("AAPL", "ALL", "ma_crossover", {"fast": [10, 20], "slow": [50, 100, 200]})
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+import utils.stock_data_api as stock_data
+from utils.backtest import checked_grid, run_backtest, run_sweep, strategy_params
+from utils.downsample import lttb_indices
+from utils.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAMES = ('1MIN', '1W', '1M', '3M', '6M', '1Y', 'ALL')
+SORT_KEYS = ('sharpe', 'total_return_pct', 'cagr_pct', 'max_drawdown_pct')
+BACKTEST_CACHE_MAX_ENTRIES = 1024
+EQUITY_POINTS = 500
+SECONDS_PER_YEAR = 365.25 * 86400
+DECIMALS = 4
+
+_cache = OrderedDict()      # (kind, strategy, params, SYMBOL, timeframe, start, end, fee_bps) -> (fingerprint, result)
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _bars(symbol, timeframe, start=None, end=None):
+    """Times, closes and the demo flag of the cached bars in the range."""
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"Unknown timeframe '{timeframe}' (available: {', '.join(TIMEFRAMES)})")
+    df = stock_data.get_cached_or_live_data(symbol, timeframe)
+    is_demo = getattr(df, 'is_demo', True)
+    index = df.index.tz_localize(None) if getattr(df.index, 'tz', None) is not None else df.index
+    times = index.values.astype('datetime64[s]')
+    closes = df['Close'].to_numpy(dtype=float)
+    keep = ~np.isnan(closes)
+    if start is not None:
+        keep &= times >= np.datetime64(start, 's')
+    if end is not None:
+        keep &= times <= np.datetime64(end, 's')
+    times, closes = times[keep], closes[keep]
+    if len(closes) < 2:
+        raise ValueError(f"Not enough bars for {symbol} in this range")
+    return times, closes, is_demo
+
+
+def _bars_per_year(times):
+    seconds = (times[-1] - times[0]).astype(np.int64)
+    return (len(times) - 1) * SECONDS_PER_YEAR / seconds if seconds > 0 else 252
+
+
+def _fingerprint(times, closes):
+    return int(times[0].astype(np.int64)), int(times[-1].astype(np.int64)), len(times), float(closes[-1])
+
+
+def _cached(key, fingerprint, compute):
+    """The result stored under key for exactly these bars, else compute() (stored unless key is None)."""
+    if key is not None:
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                _cache.move_to_end(key)
+                _stats["hits"] += 1
+                return entry[1]
+            _stats["misses"] += 1
+    result = compute()
+    if key is not None:
+        with _cache_lock:
+            _cache[key] = (fingerprint, result)
+            _cache.move_to_end(key)
+            while len(_cache) > BACKTEST_CACHE_MAX_ENTRIES:
+                _cache.popitem(last=False)
+    return result
+
+
+def _round_stats(stats):
+    return {name: round(value, DECIMALS) if isinstance(value, float) else value for name, value in stats.items()}
+
+
+def _date(value):
+    return str(np.datetime64(value, 's')) if value is not None else None
+
+
+def backtest(symbol, timeframe, strategy, params=None, start=None, end=None, fee_bps=0.0):
+    """
+    One strategy over the symbol's bars.
+
+    Returns:
+        dict: {"symbol", "timeframe", "is_demo", "strategy", "params", "stats", "dates", "equity"};
+        the equity curve is reduced to at most EQUITY_POINTS points (LTTB, shape preserving).
+
+    Raises:
+        ValueError: unknown timeframe or strategy, invalid parameters, too few bars
+    """
+    symbol, timeframe = symbol.upper(), timeframe.upper()
+    params = strategy_params(strategy, params)
+    times, closes, is_demo = _bars(symbol, timeframe, start, end)
+
+    def compute():
+        result = run_backtest(closes, strategy, params, _bars_per_year(times), fee_bps)
+        equity = result["equity"]
+        keep = lttb_indices(times.astype(np.int64).astype(float), equity, EQUITY_POINTS)
+        return {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "is_demo": is_demo,
+            "strategy": strategy,
+            "params": params,
+            "stats": _round_stats(result["stats"]),
+            "dates": np.datetime_as_string(times[keep], unit='s').tolist(),
+            "equity": np.round(equity[keep], 2).tolist(),
+        }
+
+    # Demo data is regenerated per request and not worth caching
+    key = None if is_demo else ("backtest", strategy, tuple(sorted(params.items())), symbol, timeframe,
+                                _date(start), _date(end), float(fee_bps))
+    return _cached(key, _fingerprint(times, closes), compute)
+
+
+def sweep(symbol, timeframe, strategy, grid, start=None, end=None, fee_bps=0.0, sort_by='sharpe', top=20):
+    """
+    Every combination of the parameter grid ({param: [values]}) over the symbol's bars,
+    best first by sort_by; large sweeps run in a process pool (utils/backtest.py).
+
+    Returns:
+        dict: {"symbol", "timeframe", "is_demo", "strategy", "combinations", "results": [{"params", "stats"}, ...]}
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort_by}' (available: {', '.join(SORT_KEYS)})")
+    symbol, timeframe = symbol.upper(), timeframe.upper()
+    # Validated up front: bad input is a 400, and the checked values are hashable for the cache key
+    grid = checked_grid(strategy, grid)
+    times, closes, is_demo = _bars(symbol, timeframe, start, end)
+
+    def compute():
+        results = run_sweep(closes, strategy, grid, _bars_per_year(times), fee_bps, sort_by)
+        return [{"params": result["params"], "stats": _round_stats(result["stats"])} for result in results]
+
+    grid_key = tuple((name, tuple(values)) for name, values in sorted(grid.items()))
+    key = None if is_demo else ("sweep", strategy, grid_key, symbol, timeframe, _date(start), _date(end),
+                                float(fee_bps), sort_by)
+    results = _cached(key, _fingerprint(times, closes), compute)
+    return {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "is_demo": is_demo,
+        "strategy": strategy,
+        "combinations": len(results),
+        "results": results[:top],
+    }
+
+
+def get_cache_stats():
+    with _cache_lock:
+        return {**_stats, "entries": len(_cache)}
@@ -0,0 +1,277 @@
+"""
+Regel-Engine für automatisch verliehene Abzeichen.
+
+Die Engine hört auf Domain-Events (utils.events) und prüft pro Event nur die Regeln,
+die für diesen Event-Typ indiziert sind. Dafür werden pro Benutzer laufende Zähler
+(Trades, Level, richtige Quiz-Antworten) im Speicher gehalten, die beim ersten Event
+eines Benutzers mit einer einzigen Abfrage aus der Datenbank initialisiert werden.
+Verleihungen werden gesammelt und als Batch per INSERT ... ON CONFLICT DO NOTHING geschrieben.
+
+Für nachträgliche Korrekturen (neue Regeln, Datenimporte) wertet reevaluate_all_badges()
+alle Zähler-Regeln mengenbasiert in einem einzigen SQL-Statement über alle Benutzer aus.
+
+Verwendung:
+    import utils.badge_rules as badge_rules
+    badge_rules.register()               # einmal beim App-Start
+    python -m utils.badge_rules          # Bulk-Neubewertung aller Benutzer
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import psycopg2.extras
+
+import database.handler.postgres.postgres_badges_handler as badges_handler
+import utils.events as events
+
+logger = logging.getLogger(__name__)
+
+# counter: Name des Zählers, der mit threshold verglichen wird (None = nur predicate auf dem Payload)
+# predicate: optionale Bedingung auf dem Event-Payload (für zustandslose Regeln)
+BadgeRule = namedtuple('BadgeRule', ['badge_name', 'event_type', 'counter', 'threshold', 'predicate'])
+
+BADGE_RULES = (
+    BadgeRule('Erster Trade', events.TRADE_EXECUTED, 'trades', 1, None),
+    BadgeRule('Aktiver Händler', events.TRADE_EXECUTED, 'trades', 50, None),
+    BadgeRule('Vielhändler', events.TRADE_EXECUTED, 'trades', 250, None),
+    BadgeRule('Aufsteiger', events.LEVEL_UP, 'level', 5, None),
+    BadgeRule('Elite', events.LEVEL_UP, 'level', 10, None),
+    BadgeRule('Wissbegierig', events.QUIZ_CORRECT, 'quiz_correct', 10, None),
+    BadgeRule('Quiz-Meister', events.QUIZ_CORRECT, 'quiz_correct', 50, None),
+    BadgeRule('Glückspilz', events.GAMBLE_WIN, None, None, lambda payload: payload.get('multiplier', 0) >= 20),
+)
+
+# Regeln nach Event-Typ indiziert, damit pro Event nur die relevanten Regeln geprüft werden
+RULES_BY_EVENT = {}
+for _rule in BADGE_RULES:
+    RULES_BY_EVENT.setdefault(_rule.event_type, []).append(_rule)
+
+# Wie ein Event die Zähler verändert: ('add', zähler, menge) oder ('max', zähler, payload_feld)
+COUNTER_UPDATES = {
+    events.TRADE_EXECUTED: ('add', 'trades', 1),
+    events.LEVEL_UP: ('max', 'level', 'new_level'),
+    events.QUIZ_CORRECT: ('add', 'quiz_correct', 1),
+}
+
+AWARD_BATCH_SIZE = 100
+AWARD_FLUSH_INTERVAL = 2.0    # Sekunden
+USER_STATE_TTL = 600          # Sekunden, danach werden Zähler neu aus der DB geladen
+USER_STATE_MAX_SIZE = 10000
+
+# Zähler pro Benutzer aus der Datenbank - dieselben Ausdrücke nutzt die Bulk-Neubewertung
+_USER_COUNTERS_SQL = """
+    SELECT u.id AS user_id,
+           COALESCE(u.total_trades, 0) AS trades,
+           COALESCE(u.level, 1) AS level,
+           COALESCE(dq.cnt, 0) + COALESCE(rq.cnt, 0) AS quiz_correct
+    FROM users u
+    LEFT JOIN (SELECT user_id, COUNT(*) AS cnt FROM daily_quiz_attempts
+               WHERE is_correct GROUP BY user_id) dq ON dq.user_id = u.id
+    LEFT JOIN (SELECT user_id, COUNT(*) AS cnt FROM user_roadmap_quiz_progress
+               WHERE is_correct GROUP BY user_id) rq ON rq.user_id = u.id
+"""
+
+_user_state = OrderedDict()   # user_id -> (geladen_um, zähler_dict, verdiente_badge_ids)
+_user_state_lock = threading.Lock()
+_pending_awards = set()
+_pending_lock = threading.Lock()
+_flush_event = threading.Event()
+_flusher_thread = None
+_registered = False
+
+def _badge_ids_by_name():
+    catalog = badges_handler.get_badge_catalog()
+    ids = {}
+    for badge in catalog.by_id.values():
+        ids.setdefault(badge['name'], badge['id'])
+    return ids
+
+def _load_user_state(user_id):
+    """Lädt Zähler und bereits verdiente Abzeichen eines Benutzers mit einer Abfrage."""
+    with badges_handler.get_db_connection() as conn:
+        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.execute(f"""
+                SELECT c.trades, c.level, c.quiz_correct,
+                       ARRAY(SELECT badge_id FROM user_badges WHERE user_id = c.user_id) AS earned
+                FROM ({_USER_COUNTERS_SQL} WHERE u.id = %s) c
+            """, (user_id,))
+            row = cur.fetchone()
+    if not row:
+        return None
+    counters = {'trades': row['trades'], 'level': row['level'], 'quiz_correct': row['quiz_correct']}
+    return counters, set(row['earned'])
+
+def _get_user_state(user_id):
+    """
+    Gibt (zähler, verdiente_badge_ids, frisch_geladen) zurück.
+
+    Frisch geladene Zähler enthalten das auslösende Event bereits, da Events erst nach dem Commit
+    veröffentlicht werden; sie dürfen dann nicht nochmals erhöht werden.
+    """
+    now = time.monotonic()
+    with _user_state_lock:
+        entry = _user_state.get(user_id)
+        if entry is not None and now - entry[0] <= USER_STATE_TTL:
+            _user_state.move_to_end(user_id)
+            return entry[1], entry[2], False
+
+    loaded = _load_user_state(user_id)
+    if loaded is None:
+        return None, None, True
+    counters, earned = loaded
+    with _user_state_lock:
+        _user_state[user_id] = (now, counters, earned)
+        _user_state.move_to_end(user_id)
+        while len(_user_state) > USER_STATE_MAX_SIZE:
+            _user_state.popitem(last=False)
+    return counters, earned, True
+
+def reset_user_state(user_id=None):
+    """Verwirft die gecachten Zähler eines Benutzers (oder aller Benutzer)."""
+    with _user_state_lock:
+        if user_id is None:
+            _user_state.clear()
+        else:
+            _user_state.pop(user_id, None)
+
+def handle_event(event_type, payload):
+    """Event-Handler: aktualisiert die Zähler und prüft die für diesen Event-Typ indizierten Regeln."""
+    rules = RULES_BY_EVENT.get(event_type)
+    user_id = payload.get('user_id')
+    if not rules or user_id is None:
+        return
+
+    counters, earned, fresh = _get_user_state(user_id)
+    if counters is None:
+        logger.warning(f"Badge-Regeln: Benutzer {user_id} nicht gefunden")
+        return
+
+    update = COUNTER_UPDATES.get(event_type)
+    if update and not fresh:
+        op, counter, arg = update
+        with _user_state_lock:
+            if op == 'add':
+                counters[counter] += arg
+            elif payload.get(arg) is not None:
+                counters[counter] = max(counters[counter], payload[arg])
+
+    badge_ids = _badge_ids_by_name()
+    new_awards = []
+    for rule in rules:
+        badge_id = badge_ids.get(rule.badge_name)
+        if badge_id is None or badge_id in earned:
+            continue
+        if rule.counter is not None and counters.get(rule.counter, 0) < rule.threshold:
+            continue
+        if rule.predicate is not None and not rule.predicate(payload):
+            continue
+        earned.add(badge_id)
+        new_awards.append((user_id, badge_id))
+
+    if new_awards:
+        _queue_awards(new_awards)
+
+def _queue_awards(awards):
+    with _pending_lock:
+        _pending_awards.update(awards)
+        batch_full = len(_pending_awards) >= AWARD_BATCH_SIZE
+    _ensure_flusher()
+    if batch_full:
+        _flush_event.set()
+
+def flush_pending_awards():
+    """Schreibt alle gesammelten Verleihungen in einem Batch. Gibt die Anzahl neu verliehener Abzeichen zurück."""
+    with _pending_lock:
+        if not _pending_awards:
+            return 0
+        awards = list(_pending_awards)
+        _pending_awards.clear()
+    inserted = badges_handler.award_badges_bulk(awards)
+    if len(inserted) != len(awards):
+        # Nicht geschriebene Paare (Fehler oder bereits vorhanden) aus dem Zähler-Cache entfernen,
+        # damit der Zustand beim nächsten Event frisch aus der DB geladen wird
+        for user_id in {user_id for user_id, _ in awards} - {user_id for user_id, _ in inserted}:
+            reset_user_state(user_id)
+    return len(inserted)
+
+def _flusher_loop():
+    while True:
+        _flush_event.wait(AWARD_FLUSH_INTERVAL)
+        _flush_event.clear()
+        try:
+            flush_pending_awards()
+        except Exception as e:
+            logger.error(f"Fehler beim Schreiben der Badge-Verleihungen: {e}", exc_info=True)
+
+def _ensure_flusher():
+    global _flusher_thread
+    if _flusher_thread is not None:
+        return
+    with _pending_lock:
+        if _flusher_thread is None:
+            _flusher_thread = threading.Thread(target=_flusher_loop, name="badge-award-flusher", daemon=True)
+            _flusher_thread.start()
+
+def register():
+    """Registriert die Regel-Engine für alle Event-Typen mit Regeln. Mehrfacher Aufruf ist unschädlich."""
+    global _registered
+    if _registered:
+        return
+    for event_type in RULES_BY_EVENT:
+        events.subscribe(event_type, handle_event)
+    atexit.register(flush_pending_awards)
+    _registered = True
+    logger.info(f"Badge-Regel-Engine registriert ({len(BADGE_RULES)} Regeln, {len(RULES_BY_EVENT)} Event-Typen)")
+
+def reevaluate_all_badges():
+    """
+    Wertet alle Zähler-Regeln mengenbasiert über alle Benutzer aus und verleiht fehlende Abzeichen.
+
+    Ein einziges INSERT ... SELECT joint die Zähler aller Benutzer gegen die Regeltabelle
+    (VALUES-Liste), statt pro Benutzer zu iterieren. Reine Payload-Regeln (z.B. Glückspilz)
+    können nachträglich nicht bewertet werden und werden übersprungen.
+
+    Returns:
+        int: Anzahl neu verliehener Abzeichen
+    """
+    badge_ids = _badge_ids_by_name()
+    rule_rows = [
+        (badge_ids[rule.badge_name], rule.counter, rule.threshold)
+        for rule in BADGE_RULES
+        if rule.counter is not None and rule.badge_name in badge_ids
+    ]
+    if not rule_rows:
+        return 0
+
+    try:
+        with badges_handler.get_db_connection() as conn:
+            with conn.cursor() as cur:
+                inserted = psycopg2.extras.execute_values(cur, f"""
+                    WITH counters AS ({_USER_COUNTERS_SQL}),
+                         rules (badge_id, counter, threshold) AS (VALUES %s)
+                    INSERT INTO user_badges (user_id, badge_id)
+                    SELECT c.user_id, r.badge_id
+                    FROM counters c
+                    JOIN rules r ON CASE r.counter
+                                        WHEN 'trades' THEN c.trades
+                                        WHEN 'level' THEN c.level
+                                        WHEN 'quiz_correct' THEN c.quiz_correct
+                                    END >= r.threshold
+                    ON CONFLICT DO NOTHING
+                    RETURNING user_id
+                """, rule_rows, page_size=len(rule_rows), fetch=True)
+                conn.commit()
+    except Exception as e:
+        logger.error(f"Fehler bei der Bulk-Neubewertung der Abzeichen: {e}", exc_info=True)
+        return 0
+
+    badges_handler.invalidate_user_badges_cache()
+    reset_user_state()
+    logger.info(f"Bulk-Neubewertung abgeschlossen: {len(inserted)} Abzeichen verliehen")
+    return len(inserted)
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(f"{reevaluate_all_badges()} Abzeichen verliehen")
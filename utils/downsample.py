@@ -0,0 +1,116 @@
+"""
+Chart-sized price series: downsampling, weekly/monthly resampling and fast
+conversion of OHLCV frames into /stock-data points.
+
+    lttb_indices(x, y, n)          Largest-Triangle-Three-Buckets: the n points of a line
+                                   that keep its visual shape (first and last always kept)
+    ohlc_buckets(df, n)            candles merged into n buckets of consecutive bars
+                                   (first open, highest high, lowest low, last close, summed volume)
+    resample(df, 'weekly')         daily bars aggregated per week or month, the same way
+    downsample(df, n, chart)       'line' -> LTTB on the closes, 'candle' -> ohlc_buckets
+    frame_to_points(df)            list of point dicts (date, open, high, low, close, volume, currency)
+
+Aggregated buckets are dated with their first bar, so they stay aligned with the
+original bars (and with /indicators).
+"""
+from utils.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+CHART_TYPES = ('candle', 'line')
+RESAMPLE_PERIODS = {'weekly': 'W-FRI', 'monthly': 'M'}
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def lttb_indices(x, y, n):
+    """Indices of the n points LTTB keeps from the line (x, y); all indices if n >= len(x)."""
+    count = len(x)
+    if n >= count or count <= 2:
+        return np.arange(count)
+    if n < 3:
+        raise ValueError("LTTB needs at least 3 points")
+    # Buckets over the points between the first and the last one
+    edges = np.floor(np.linspace(1, count - 1, n - 1)).astype(np.int64)
+    selected = np.empty(n, dtype=np.int64)
+    selected[0], selected[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(n - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The next bucket is represented by its average point (the last point for the last bucket)
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < n - 1 else count
+        next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        # Twice the area of the triangle (previous selected point, candidate, next average)
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def lttb(df, n):
+    """The rows of df that LTTB keeps for a line chart of the closes."""
+    x = df.index.asi8.astype(float) if isinstance(df.index, pd.DatetimeIndex) else np.arange(len(df), dtype=float)
+    return df.iloc[lttb_indices(x, df['Close'].to_numpy(dtype=float), n)]
+
+
+def _aggregate(df, starts):
+    """OHLCV of the runs of rows beginning at `starts` (sorted positions, first one 0)."""
+    ends = np.append(starts[1:], len(df)) - 1
+    aggregated = pd.DataFrame({
+        'Open': df['Open'].to_numpy(dtype=float)[starts],
+        'High': np.maximum.reduceat(df['High'].to_numpy(dtype=float), starts),
+        'Low': np.minimum.reduceat(df['Low'].to_numpy(dtype=float), starts),
+        'Close': df['Close'].to_numpy(dtype=float)[ends],
+        'Volume': np.add.reduceat(df['Volume'].to_numpy(dtype=float), starts),
+    }, index=df.index[starts])
+    for attribute in ('is_demo', 'is_stale', 'provider'):
+        if hasattr(df, attribute):
+            setattr(aggregated, attribute, getattr(df, attribute))
+    return aggregated
+
+
+def ohlc_buckets(df, n):
+    """Candles merged into at most n buckets of (almost) equally many consecutive bars."""
+    df = df.dropna(subset=OHLCV)
+    if n >= len(df):
+        return df
+    if n < 1:
+        raise ValueError("Need at least 1 bucket")
+    return _aggregate(df, np.unique(np.floor(np.linspace(0, len(df), n, endpoint=False)).astype(np.int64)))
+
+
+def resample(df, period):
+    """Bars aggregated per calendar week (ending Friday) or month; period 'weekly' or 'monthly'."""
+    if period not in RESAMPLE_PERIODS:
+        raise ValueError(f"Unknown resample period '{period}' (available: {', '.join(RESAMPLE_PERIODS)})")
+    df = df.dropna(subset=OHLCV)
+    if df.empty:
+        return df
+    index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+    periods = index.to_period(RESAMPLE_PERIODS[period]).asi8
+    starts = np.flatnonzero(np.diff(periods, prepend=periods[0] - 1))
+    return _aggregate(df, starts)
+
+
+def downsample(df, n, chart='candle'):
+    """At most n points for the chart type ('candle' keeps OHLC ranges, 'line' keeps the close shape)."""
+    if chart not in CHART_TYPES:
+        raise ValueError(f"Unknown chart type '{chart}' (available: {', '.join(CHART_TYPES)})")
+    if n is None or len(df) <= n:
+        return df
+    return lttb(df.dropna(subset=OHLCV), n) if chart == 'line' else ohlc_buckets(df, n)
+
+
+def frame_to_points(df, currency='USD'):
+    """/stock-data points of an OHLCV frame, skipping rows with missing values (column-wise, no iterrows)."""
+    df = df.dropna(subset=OHLCV)
+    index = df.index.tz_localize(None) if getattr(df.index, 'tz', None) is not None else df.index
+    dates = index.strftime('%Y-%m-%dT%H:%M:%S')
+    columns = zip(dates, df['Open'].to_numpy(dtype=float).tolist(), df['High'].to_numpy(dtype=float).tolist(),
+                  df['Low'].to_numpy(dtype=float).tolist(), df['Close'].to_numpy(dtype=float).tolist(),
+                  df['Volume'].to_numpy(dtype=float).astype(np.int64).tolist())
+    return [
+        {'date': date, 'open': open_price, 'high': high, 'low': low, 'close': close, 'volume': volume, 'currency': currency}
+        for date, open_price, high, low, close, volume in columns
+    ]
@@ -0,0 +1,57 @@
+"""
+Einfacher prozessinterner Event-Bus für Domain-Events (Trades, Level-Ups, Quiz, Gamble, Lerninhalte).
+
+Handler werden synchron im aufrufenden Thread ausgeführt. Fehler in einem Handler
+werden nur geloggt und unterbrechen weder andere Handler noch den Aufrufer.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Event-Typen
+TRADE_EXECUTED = "trade_executed"    # user_id, side ('buy'/'sell'), symbol, quantity, price
+LEVEL_UP = "level_up"                # user_id, old_level, new_level
+QUIZ_CORRECT = "quiz_correct"        # user_id, quiz_id, source ('daily'/'roadmap')
+GAMBLE_WIN = "gamble_win"            # user_id, game, bet, payout, multiplier
+CONTENT_CHANGED = "content_changed"  # user_id (None), source ('roadmap'/'daily_quiz')
+PRICE_UPDATED = "price_updated"      # user_id (None), symbol, price (neuer Kurs vom Datenanbieter)
+PRICE_ALERT = "price_alert"          # user_id, alert (ausgelöster Kursalarm, JSON-fähig)
+PORTFOLIO_VALUED = "portfolio_valued"  # user_id, totals (Marktwert und unrealisierter G/V nach Kursänderung)
+
+_subscribers = {}
+_subscribers_lock = threading.Lock()
+
+def subscribe(event_type, handler):
+    """
+    Registriert einen Handler für einen Event-Typ. Doppelte Registrierungen werden ignoriert.
+
+    Args:
+        event_type (str): Event-Typ, z.B. TRADE_EXECUTED
+        handler (callable): Wird mit (event_type, payload_dict) aufgerufen
+    """
+    with _subscribers_lock:
+        handlers = _subscribers.get(event_type, ())
+        if handler not in handlers:
+            # Tupel ersetzen statt Liste mutieren, damit publish() ohne Lock iterieren kann
+            _subscribers[event_type] = handlers + (handler,)
+
+def unsubscribe(event_type, handler):
+    """Entfernt einen zuvor registrierten Handler."""
+    with _subscribers_lock:
+        handlers = _subscribers.get(event_type, ())
+        _subscribers[event_type] = tuple(h for h in handlers if h is not handler)
+
+def publish(event_type, **payload):
+    """
+    Veröffentlicht ein Event an alle Handler dieses Typs.
+
+    Args:
+        event_type (str): Event-Typ
+        **payload: Event-Daten, mindestens user_id
+    """
+    for handler in _subscribers.get(event_type, ()):
+        try:
+            handler(event_type, payload)
+        except Exception as e:
+            logger.error(f"Fehler im Event-Handler {getattr(handler, '__name__', handler)} für '{event_type}': {e}", exc_info=True)
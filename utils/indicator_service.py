@@ -0,0 +1,196 @@
+"""
+Indicator series for charts, computed over the bars of the price cache
+(utils/stock_data_api.py) and memoised per (symbol, timeframe, indicator).
+
+A cached series remembers its bars and the indicator state after the last
+settled bar (the newest bar may still change while its session is open). When
+the same chart is requested again:
+
+    - same bars                      -> the cached series is returned as is
+    - new bars after the cached ones -> only those bars are computed, O(1) each
+      (IndicatorState.update), and the series is extended
+    - the window moved forward       -> bars before the new start are cut off
+    - anything else (revised data, a mayhem adjustment, a new symbol)
+                                     -> full vectorised recomputation
+
+Usage:
+    import utils.indicator_service as indicator_service
+    indicator_service.get_indicators("AAPL", "3M", "sma:20,ema:50,rsi:14,macd,bbands")
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+import utils.stock_data_api as stock_data
+from utils.indicators import parse_spec
+from utils.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAMES = ('1MIN', '1W', '1M', '3M', '6M', '1Y', 'ALL')
+INDICATOR_CACHE_MAX_ENTRIES = 512
+DECIMALS = 4
+
+_cache = OrderedDict()      # (SYMBOL, timeframe, indicator key) -> _Series
+_cache_lock = threading.Lock()
+_stats = {"unchanged": 0, "extended": 0, "bars_added": 0, "recomputed": 0}
+
+
+def _grown(array, size):
+    if size <= len(array):
+        return array
+    grown = np.empty(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _Series:
+    """One indicator over a growing run of bars."""
+
+    def __init__(self, indicator):
+        self.indicator = indicator
+        self.lock = threading.Lock()
+        self.size = 0
+
+    def rebuild(self, times, closes):
+        self.times, self.closes = times.copy(), closes.copy()
+        self.outputs = {name: values.copy() for name, values in self.indicator.compute(closes).items()}
+        self.size = len(times)
+        self.state = self.indicator.state_at(closes, self.size - 2)
+        with _cache_lock:
+            _stats["recomputed"] += 1
+
+    def _append(self, time, close, values):
+        index = self.size
+        self.times, self.closes = _grown(self.times, index + 1), _grown(self.closes, index + 1)
+        self.times[index], self.closes[index] = time, close
+        for name, value in values.items():
+            self.outputs[name] = _grown(self.outputs[name], index + 1)
+            self.outputs[name][index] = value
+        self.size += 1
+
+    def _drop_front(self, count):
+        self.size -= count
+        self.times, self.closes = self.times[count:count + self.size].copy(), self.closes[count:count + self.size].copy()
+        self.outputs = {name: values[count:count + self.size].copy() for name, values in self.outputs.items()}
+
+    def extend(self, times, closes):
+        """Bring the series up to these bars incrementally; False if it has to be recomputed."""
+        size = self.size
+        if size < 2 or not len(times):
+            return False
+        position = int(np.searchsorted(times, self.times[size - 1]))
+        if position < 1 or position >= len(times) or times[position] != self.times[size - 1]:
+            return False
+        # The last settled bar must be unchanged, otherwise the state does not continue these bars
+        if times[position - 1] != self.times[size - 2] or closes[position - 1] != self.closes[size - 2]:
+            return False
+        first = int(np.searchsorted(self.times[:size], times[0]))
+        if first >= size or self.times[first] != times[0]:
+            return False
+        if position == len(times) - 1 and closes[position] == self.closes[size - 1]:
+            with _cache_lock:
+                _stats["unchanged"] += 1
+        else:
+            self.size -= 1          # the newest bar is recomputed from the settled state
+            last = len(times) - 1
+            for index in range(position, last):
+                self._append(times[index], closes[index], self.state.update(closes[index]))
+            self._append(times[last], closes[last], self.state.copy().update(closes[last]))
+            with _cache_lock:
+                _stats["extended"] += 1
+                _stats["bars_added"] += last - position
+        if first and first >= self.size // 2:
+            self._drop_front(first)
+        return True
+
+    def window(self, start):
+        """
+        Output arrays from the bar at `start` on. These are views: later extends only append
+        behind them or rewrite the newest bar with a fresher value of the same bar, and
+        growing or trimming the buffers allocates new arrays.
+        """
+        first = int(np.searchsorted(self.times[:self.size], start))
+        return {name: values[first:self.size] for name, values in self.outputs.items()}
+
+
+def compute_series(cache_key, indicator, times, closes):
+    """
+    Indicator outputs (name -> array aligned with `times`) for these bars, reusing and
+    extending the cached series under cache_key (None: no caching).
+    """
+    if cache_key is None:
+        return indicator.compute(closes)
+    with _cache_lock:
+        series = _cache.get(cache_key)
+        if series is None:
+            series = _cache[cache_key] = _Series(indicator)
+        _cache.move_to_end(cache_key)
+        while len(_cache) > INDICATOR_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    with series.lock:
+        if series.extend(times, closes):
+            outputs = series.window(times[0])
+            if len(next(iter(outputs.values()))) == len(times):
+                return outputs
+        # Bars that do not continue the cached series (or gaps in between): start over
+        series.rebuild(times, closes)
+        return series.window(times[0])
+
+
+def _json_values(values):
+    """Rounded list with None for the warm-up bars (NaN is not valid JSON)."""
+    return np.where(np.isnan(values), None, np.round(values, DECIMALS)).tolist()
+
+
+def get_indicators(symbol, timeframe, spec):
+    """
+    Indicators for a chart over the same bars as /stock-data.
+
+    Returns:
+        dict: {"symbol", "timeframe", "is_demo", "dates": [...], "indicators": {key: values}},
+        where values is a list per bar, or a dict of lists for indicators with several
+        outputs (macd: macd/signal/hist, bbands: middle/upper/lower).
+
+    Raises:
+        ValueError: unknown timeframe or invalid indicator spec
+    """
+    timeframe = timeframe.upper()
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"Unknown timeframe '{timeframe}' (available: {', '.join(TIMEFRAMES)})")
+    indicators = parse_spec(spec)
+    symbol = symbol.upper()
+
+    df = stock_data.get_cached_or_live_data(symbol, timeframe)
+    is_demo = getattr(df, 'is_demo', True)
+    index = df.index.tz_localize(None) if getattr(df.index, 'tz', None) is not None else df.index
+    times = index.values.astype('datetime64[s]')
+    closes = df['Close'].to_numpy(dtype=float)
+    valid = ~np.isnan(closes)
+    times, closes = times[valid], closes[valid]
+
+    result = {}
+    for indicator in indicators:
+        # Demo data is regenerated per request and not worth caching
+        cache_key = None if is_demo else (symbol, timeframe, indicator.key)
+        outputs = compute_series(cache_key, indicator, times, closes) if len(closes) else \
+            {name: np.empty(0) for name in indicator.outputs}
+        if len(indicator.outputs) == 1:
+            result[indicator.key] = _json_values(outputs[indicator.outputs[0]])
+        else:
+            result[indicator.key] = {name: _json_values(outputs[name]) for name in indicator.outputs}
+
+    return {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "is_demo": is_demo,
+        "dates": np.datetime_as_string(times, unit='s').tolist(),
+        "indicators": result,
+    }
+
+
+def get_cache_stats():
+    with _cache_lock:
+        return {**_stats, "entries": len(_cache)}
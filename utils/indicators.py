@@ -0,0 +1,371 @@
+"""
+Technical indicators over close prices, vectorised with NumPy.
+
+    sma:20        simple moving average
+    ema:20        exponential moving average (seeded with the SMA of the first bars)
+    rsi:14        relative strength index (Wilder smoothing)
+    macd:12:26:9  MACD line, signal line and histogram
+    bbands:20:2   Bollinger bands (middle, upper, lower; population standard deviation)
+
+parse_spec("sma:20,ema:50,rsi:14,macd,bbands") turns a request string into
+Indicator objects. Indicator.compute(closes) returns the whole series at once
+(NaN while the indicator warms up); Indicator.state_at(closes, i) returns an
+IndicatorState positioned after bar i, whose update(close) computes the values
+of the next bar in O(1) (utils/indicator_service.py uses it to extend cached
+series by new bars instead of recomputing them).
+
+Exponential smoothing is a recursion; ema_filter evaluates it blockwise: a
+matrix product per block of BLOCK bars and a short loop carrying the last value
+from block to block.
+"""
+import math
+from collections import deque
+
+from utils.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+BLOCK = 64
+MAX_PERIOD = 1000
+_RESUM_EVERY = 1000      # running sums are recomputed from the window this often (rounding drift)
+
+
+def ema_filter(values, alpha, initial):
+    """y[t] = alpha * values[t] + (1 - alpha) * y[t-1] with y[-1] = initial, for all t at once."""
+    count = len(values)
+    if count == 0:
+        return np.empty(0)
+    decay = 1.0 - alpha
+    padded = -count % BLOCK
+    blocks = np.concatenate((values, np.zeros(padded))).reshape(-1, BLOCK)
+    lags = np.arange(BLOCK)[:, None] - np.arange(BLOCK)[None, :]
+    weights = np.where(lags >= 0, alpha * decay ** np.maximum(lags, 0), 0.0)
+    # Each block as if it started from 0, then add the carried-in value decayed into every position
+    partial = blocks @ weights.T
+    carry_decay = decay ** np.arange(1, BLOCK + 1)
+    carried = np.empty(len(blocks))
+    last = initial
+    for index, block_last in enumerate(partial[:, -1]):
+        carried[index] = last
+        last = block_last + carry_decay[-1] * last
+    return (partial + carried[:, None] * carry_decay[None, :]).ravel()[:count]
+
+
+def sma(closes, period):
+    result = np.full(len(closes), np.nan)
+    if len(closes) >= period:
+        # Relative to the first close, so the cumulative sum stays small
+        base = closes[0]
+        cumulative = np.concatenate(([0.0], np.cumsum(closes - base)))
+        result[period - 1:] = (cumulative[period:] - cumulative[:-period]) / period + base
+    return result
+
+
+def ema(closes, period):
+    result = np.full(len(closes), np.nan)
+    if len(closes) >= period:
+        seed = closes[:period].mean()
+        result[period - 1] = seed
+        result[period:] = ema_filter(closes[period:], 2.0 / (period + 1), seed)
+    return result
+
+
+def _wilder_averages(closes, period):
+    """Average gain and loss per bar (NaN before bar `period`)."""
+    gains, losses = np.full(len(closes), np.nan), np.full(len(closes), np.nan)
+    if len(closes) > period:
+        change = np.diff(closes)
+        up, down = np.maximum(change, 0.0), np.maximum(-change, 0.0)
+        gains[period], losses[period] = up[:period].mean(), down[:period].mean()
+        gains[period + 1:] = ema_filter(up[period:], 1.0 / period, gains[period])
+        losses[period + 1:] = ema_filter(down[period:], 1.0 / period, losses[period])
+    return gains, losses
+
+
+def _rsi_from(gain, loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + gain / loss))
+
+
+def rsi(closes, period):
+    gains, losses = _wilder_averages(closes, period)
+    return _rsi_from(gains, losses)
+
+
+def rolling_std(closes, period):
+    result = np.full(len(closes), np.nan)
+    if len(closes) >= period:
+        result[period - 1:] = np.lib.stride_tricks.sliding_window_view(closes, period).std(axis=1)
+    return result
+
+
+class IndicatorState:
+    """Indicator position after some bar; update(close) returns the next bar's values (NaN while warming up)."""
+
+    def update(self, close):
+        raise NotImplementedError
+
+    def copy(self):
+        raise NotImplementedError
+
+
+class _WindowState(IndicatorState):
+    """Last `period` closes with running sums (SMA, Bollinger bands)."""
+
+    def __init__(self, period, closes):
+        self.period = period
+        self.window = deque((float(c) for c in closes[-period:]), maxlen=period)
+        self._resum()
+
+    def _resum(self):
+        self.total = math.fsum(self.window)
+        self.squares = math.fsum(c * c for c in self.window)
+        self.updates = 0
+
+    def _push(self, close):
+        if len(self.window) == self.period:
+            dropped = self.window[0]
+            self.total -= dropped
+            self.squares -= dropped * dropped
+        self.window.append(close)
+        self.total += close
+        self.squares += close * close
+        self.updates += 1
+        if self.updates >= _RESUM_EVERY:
+            self._resum()
+        return len(self.window) == self.period
+
+    def _copy_into(self, other):
+        other.period, other.window = self.period, deque(self.window, maxlen=self.period)
+        other.total, other.squares, other.updates = self.total, self.squares, self.updates
+        return other
+
+
+class _SMAState(_WindowState):
+    def update(self, close):
+        full = self._push(float(close))
+        return {"value": self.total / self.period if full else math.nan}
+
+    def copy(self):
+        return self._copy_into(_SMAState.__new__(_SMAState))
+
+
+class _BBandsState(_WindowState):
+    def __init__(self, period, width, closes):
+        super().__init__(period, closes)
+        self.width = width
+
+    def update(self, close):
+        if not self._push(float(close)):
+            return {"middle": math.nan, "upper": math.nan, "lower": math.nan}
+        mean = self.total / self.period
+        std = math.sqrt(max(self.squares / self.period - mean * mean, 0.0))
+        return {"middle": mean, "upper": mean + self.width * std, "lower": mean - self.width * std}
+
+    def copy(self):
+        other = self._copy_into(_BBandsState.__new__(_BBandsState))
+        other.width = self.width
+        return other
+
+
+class _EMAState(IndicatorState):
+    """EMA value, or the closes collected so far while fewer than `period` bars were seen."""
+
+    def __init__(self, period, value=math.nan, seed=()):
+        self.period, self.alpha = period, 2.0 / (period + 1)
+        self.value, self.seed = value, list(seed)
+
+    def step(self, close):
+        if math.isnan(self.value):
+            self.seed.append(close)
+            if len(self.seed) == self.period:
+                self.value, self.seed = math.fsum(self.seed) / self.period, []
+        else:
+            self.value = self.alpha * close + (1.0 - self.alpha) * self.value
+        return self.value
+
+    def update(self, close):
+        return {"value": self.step(float(close))}
+
+    def copy(self):
+        return _EMAState(self.period, self.value, self.seed)
+
+
+class _RSIState(IndicatorState):
+    def __init__(self, period, last_close, gain, loss, seed=()):
+        self.period, self.last_close = period, last_close
+        self.gain, self.loss, self.seed = gain, loss, list(seed)
+
+    def update(self, close):
+        close = float(close)
+        if self.last_close is None:
+            self.last_close = close
+            return {"value": math.nan}
+        change, self.last_close = close - self.last_close, close
+        up, down = max(change, 0.0), max(-change, 0.0)
+        if math.isnan(self.gain):
+            self.seed.append((up, down))
+            if len(self.seed) < self.period:
+                return {"value": math.nan}
+            self.gain = math.fsum(u for u, _ in self.seed) / self.period
+            self.loss = math.fsum(d for _, d in self.seed) / self.period
+            self.seed = []
+        else:
+            self.gain += (up - self.gain) / self.period
+            self.loss += (down - self.loss) / self.period
+        if self.loss == 0:
+            return {"value": 50.0 if self.gain == 0 else 100.0}
+        return {"value": 100.0 - 100.0 / (1.0 + self.gain / self.loss)}
+
+    def copy(self):
+        return _RSIState(self.period, self.last_close, self.gain, self.loss, self.seed)
+
+
+class _MACDState(IndicatorState):
+    def __init__(self, fast, slow, signal):
+        self.fast, self.slow, self.signal = fast, slow, signal
+
+    def update(self, close):
+        close = float(close)
+        fast, slow = self.fast.step(close), self.slow.step(close)
+        if math.isnan(slow):
+            return {"macd": math.nan, "signal": math.nan, "hist": math.nan}
+        line = fast - slow
+        signal = self.signal.step(line)
+        return {"macd": line, "signal": signal, "hist": line - signal}
+
+    def copy(self):
+        return _MACDState(self.fast.copy(), self.slow.copy(), self.signal.copy())
+
+
+def _ema_state_at(closes, values, period, i):
+    if i < period - 1:
+        return _EMAState(period, seed=(float(c) for c in closes[:i + 1]))
+    return _EMAState(period, float(values[i]))
+
+
+class Indicator:
+    """One indicator with its parameters; `key` names it in responses and caches (e.g. 'macd_12_26_9')."""
+
+    name = None
+    defaults = ()
+    outputs = ("value",)
+
+    def __init__(self, *params):
+        self.params = params or self.defaults
+        self.key = "_".join([self.name] + [f"{p:g}" for p in self.params])
+
+    def compute(self, closes):
+        """dict output -> array over all bars."""
+        raise NotImplementedError
+
+    def state_at(self, closes, i):
+        """IndicatorState after bar i (continues the series computed by compute)."""
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    name, defaults = "sma", (20,)
+
+    def compute(self, closes):
+        return {"value": sma(closes, self.params[0])}
+
+    def state_at(self, closes, i):
+        return _SMAState(self.params[0], closes[:i + 1])
+
+
+class EMA(Indicator):
+    name, defaults = "ema", (20,)
+
+    def compute(self, closes):
+        return {"value": ema(closes, self.params[0])}
+
+    def state_at(self, closes, i):
+        period = self.params[0]
+        return _ema_state_at(closes, ema(closes[:i + 1], period), period, i)
+
+
+class RSI(Indicator):
+    name, defaults = "rsi", (14,)
+
+    def compute(self, closes):
+        return {"value": rsi(closes, self.params[0])}
+
+    def state_at(self, closes, i):
+        period = self.params[0]
+        closes = closes[:i + 1]
+        if i < period:
+            change = np.diff(closes)
+            return _RSIState(period, float(closes[-1]) if i >= 0 else None, math.nan, math.nan,
+                             zip(np.maximum(change, 0.0).tolist(), np.maximum(-change, 0.0).tolist()))
+        gains, losses = _wilder_averages(closes, period)
+        return _RSIState(period, float(closes[-1]), float(gains[-1]), float(losses[-1]))
+
+
+class MACD(Indicator):
+    name, defaults = "macd", (12, 26, 9)
+    outputs = ("macd", "signal", "hist")
+
+    def compute(self, closes):
+        fast, slow, signal = self.params
+        line = ema(closes, fast) - ema(closes, slow)
+        signal_line = np.full(len(closes), np.nan)
+        signal_line[slow - 1:] = ema(line[slow - 1:], signal)
+        return {"macd": line, "signal": signal_line, "hist": line - signal_line}
+
+    def state_at(self, closes, i):
+        fast, slow, signal = self.params
+        closes = closes[:i + 1]
+        line = ema(closes, fast) - ema(closes, slow)
+        signal_state = _ema_state_at(line[slow - 1:], ema(line[slow - 1:], signal), signal, i - (slow - 1)) \
+            if i >= slow - 1 else _EMAState(signal)
+        return _MACDState(_ema_state_at(closes, ema(closes, fast), fast, i),
+                          _ema_state_at(closes, ema(closes, slow), slow, i), signal_state)
+
+
+class BBands(Indicator):
+    name, defaults = "bbands", (20, 2.0)
+    outputs = ("middle", "upper", "lower")
+
+    def compute(self, closes):
+        period, width = self.params
+        middle, std = sma(closes, period), rolling_std(closes, period)
+        return {"middle": middle, "upper": middle + width * std, "lower": middle - width * std}
+
+    def state_at(self, closes, i):
+        period, width = self.params
+        return _BBandsState(period, width, closes[:i + 1])
+
+
+INDICATORS = {cls.name: cls for cls in (SMA, EMA, RSI, MACD, BBands)}
+
+
+def parse_spec(spec):
+    """
+    "sma:20,ema:50,rsi:14,macd,bbands" -> [SMA(20), EMA(50), RSI(14), MACD(12, 26, 9), BBands(20, 2)].
+    Raises ValueError for unknown indicators or invalid parameters.
+    """
+    indicators = {}
+    for part in (spec or "").split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        name, *raw = part.split(":")
+        cls = INDICATORS.get(name)
+        if cls is None:
+            raise ValueError(f"Unknown indicator '{name}' (available: {', '.join(INDICATORS)})")
+        if len(raw) > len(cls.defaults):
+            raise ValueError(f"{name} takes at most {len(cls.defaults)} parameters")
+        try:
+            params = [float(p) if isinstance(d, float) or "." in p else int(p) for p, d in zip(raw, cls.defaults)]
+        except ValueError:
+            raise ValueError(f"Invalid parameters for {name}: {':'.join(raw)}")
+        params += list(cls.defaults[len(params):])
+        periods = [p for p, d in zip(params, cls.defaults) if isinstance(d, int)]
+        if any(not isinstance(p, int) or not 1 <= p <= MAX_PERIOD for p in periods) or any(p <= 0 for p in params):
+            raise ValueError(f"Periods of {name} must be whole numbers between 1 and {MAX_PERIOD}")
+        indicator = cls(*params)
+        indicators[indicator.key] = indicator
+    if not indicators:
+        raise ValueError("No indicators requested")
+    return list(indicators.values())
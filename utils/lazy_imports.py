@@ -0,0 +1,36 @@
+"""
+Deferred imports for heavy modules (pandas, numpy, ...).
+
+    pd = lazy_import("pandas")
+
+returns the module object right away, but the module is only executed on the
+first attribute access (importlib.util.LazyLoader). Modules that need pandas
+only inside request handlers therefore do not pay for it when the app starts.
+
+Annotations are evaluated when a function is defined, so code importing lazily
+must not use `pd.DataFrame` in signatures (use a string annotation instead).
+"""
+import importlib.util
+import sys
+
+
+def lazy_import(name, optional=False):
+    """
+    Return the module `name`, deferring its execution until first use.
+    With optional=True a missing module returns None instead of raising ImportError.
+    """
+    # Checked before find_spec: find_spec reads __spec__, which would load a lazy module
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        if optional:
+            return None
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
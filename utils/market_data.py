@@ -0,0 +1,593 @@
+"""
+Provider-agnostic market data layer.
+
+All price data goes through one MarketDataProvider interface with adapters for
+Twelve Data, Alpha Vantage and yfinance:
+
+- Every provider/API key has a token-bucket request budget. The buckets live in a
+  small SQLite file, so all processes (FastAPI workers, Flask app) share them.
+- Keys are read like ApiKeyManager does (PREFIX, PREFIX_1, PREFIX_2, ...) and
+  rotated: a key that hits a rate limit is blocked for the provider's cool-down and
+  the next key with budget is used.
+- Rate limits and errors fail over to the next provider automatically.
+- Each provider has a health score (success rate / latency, exponentially
+  weighted), and requests go to the fastest healthy provider first.
+- Every upstream call has a deadline and runs through a per-provider circuit
+  breaker (utils/resilience.py) that trips on errors or slow calls. While all
+  breakers are open, the last good answer is served (marked is_stale) if it is
+  recent enough; callers fall back to demo data otherwise.
+- Quotes are reused for QUOTE_TTL seconds, so one upstream call serves all
+  requests for a symbol in that window. Every live quote is published as an
+  events.PRICE_UPDATED event (the order engine triggers resting orders on it).
+- With MARKET_DATA_HEDGE=1 a request that is slower than the provider's p95
+  latency is hedged with the next provider.
+
+Usage:
+    import utils.market_data as market_data
+    df = market_data.get_history("AAPL", interval="1d", start_date="2025-01-01", end_date="2025-03-31")
+    price = market_data.get_quote("AAPL")
+"""
+import abc
+import functools
+import hashlib
+import importlib.util
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import requests
+
+import utils.events as events
+import utils.resilience as resilience
+from utils.lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DB_PATH = os.getenv("MARKET_DATA_STATE_DB", os.path.join(PROJECT_ROOT, "data", "market_data_state.sqlite3"))
+REQUEST_TIMEOUT = 10                 # socket timeout; bounds threads of calls that overran their deadline
+CALL_DEADLINE = float(os.getenv("MARKET_DATA_DEADLINE", "6"))         # seconds per provider call
+TOTAL_DEADLINE = float(os.getenv("MARKET_DATA_TOTAL_DEADLINE", "12"))  # no further failover after this
+SLOW_CALL_MS = 4000                  # calls slower than this count against the circuit breaker
+BREAKER_OPEN_SECONDS = 30
+HEDGE_REQUESTS = os.getenv("MARKET_DATA_HEDGE", "0") == "1"
+STALE_MAX_AGE = int(os.getenv("MARKET_DATA_STALE_MAX_AGE", "3600"))   # seconds a last good answer may be served
+STALE_CACHE_SIZE = 512
+QUOTE_TTL = float(os.getenv("MARKET_DATA_QUOTE_TTL", "30"))         # seconds a quote is reused without a call
+HEALTH_ALPHA = 0.2                   # weight of the newest sample in the health averages
+HEALTH_RECOVERY = 300                # seconds without samples after which a bad score is forgotten
+
+INTRADAY_INTERVALS = ("1m", "5m", "15m", "30m", "60m")
+
+
+class MarketDataError(Exception):
+    """A provider could not deliver the requested data."""
+
+
+class RateLimitError(MarketDataError):
+    """The provider rejected the request because of a rate limit or exhausted credits."""
+
+    def __init__(self, message, retry_after=60):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _keys_from_env(prefix):
+    """API keys from PREFIX, PREFIX_1, PREFIX_2, ... (same convention as ApiKeyManager)."""
+    keys = []
+    main_key = os.getenv(prefix)
+    if main_key:
+        keys.append(main_key)
+    i = 1
+    while os.getenv(f"{prefix}_{i}"):
+        keys.append(os.getenv(f"{prefix}_{i}"))
+        i += 1
+    return keys
+
+
+def _empty_frame():
+    return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+
+
+# --- Shared request budgets ---
+
+class RateBudget:
+    """
+    Token buckets per (provider, key) persisted in SQLite so that all processes
+    share one budget. Keys are stored as short hashes, never in plain text.
+    """
+
+    def __init__(self, path=STATE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    provider TEXT NOT NULL,
+                    key_id TEXT NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    blocked_until REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (provider, key_id)
+                )
+            """)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key_id(key):
+        return hashlib.sha1((key or "no-key").encode("utf-8")).hexdigest()[:12]
+
+    def try_acquire(self, provider, key, per_minute, burst=None):
+        """Take one request token; False if the bucket is empty or the key is blocked."""
+        capacity = float(burst or per_minute)
+        key_id = self.key_id(key)
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at, blocked_until FROM rate_buckets WHERE provider = ? AND key_id = ?",
+                (provider, key_id)
+            ).fetchone()
+            if row is None:
+                tokens, blocked_until = capacity, 0.0
+            else:
+                tokens, updated_at, blocked_until = row
+                tokens = min(capacity, tokens + (now - updated_at) * per_minute / 60.0)
+            allowed = now >= blocked_until and tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            conn.execute("""
+                INSERT INTO rate_buckets (provider, key_id, tokens, updated_at, blocked_until)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (provider, key_id) DO UPDATE
+                SET tokens = excluded.tokens, updated_at = excluded.updated_at
+            """, (provider, key_id, tokens, now, blocked_until))
+            conn.execute("COMMIT")
+            return allowed
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def block(self, provider, key, seconds):
+        """Mark a key as rate limited for the given number of seconds (for all processes)."""
+        until = time.time() + seconds
+        self._connect().execute("""
+            INSERT INTO rate_buckets (provider, key_id, tokens, updated_at, blocked_until)
+            VALUES (?, ?, 0, ?, ?)
+            ON CONFLICT (provider, key_id) DO UPDATE
+            SET tokens = 0, updated_at = excluded.updated_at,
+                blocked_until = MAX(rate_buckets.blocked_until, excluded.blocked_until)
+        """, (provider, self.key_id(key), time.time(), until))
+
+    def snapshot(self):
+        rows = self._connect().execute(
+            "SELECT provider, key_id, tokens, blocked_until FROM rate_buckets ORDER BY provider, key_id"
+        ).fetchall()
+        now = time.time()
+        return [
+            {"provider": p, "key_id": k, "tokens": round(t, 2), "blocked_for": max(0, round(b - now))}
+            for p, k, t, b in rows
+        ]
+
+
+# --- Provider interface and adapters ---
+
+class MarketDataProvider(abc.ABC):
+    """
+    Interface of a market data source. Adapters implement get_history and get_quote
+    and raise RateLimitError when the key is limited and MarketDataError for other failures.
+    """
+    name = "base"
+    key_env_prefix = None            # None: provider needs no API key
+    requests_per_minute = 60
+    rate_limit_cooldown = 60         # seconds a key is blocked after a rate-limit response
+
+    def __init__(self):
+        self.keys = _keys_from_env(self.key_env_prefix) if self.key_env_prefix else [None]
+
+    @property
+    def configured(self):
+        return bool(self.keys)
+
+    @abc.abstractmethod
+    def get_history(self, symbol, interval, start_date, end_date, key=None):
+        """DataFrame with Open, High, Low, Close, Volume and a sorted DatetimeIndex."""
+
+    @abc.abstractmethod
+    def get_quote(self, symbol, key=None):
+        """Latest price as float."""
+
+
+class TwelveDataProvider(MarketDataProvider):
+    name = "twelvedata"
+    key_env_prefix = "TWELVE_DATA_API_KEY"
+    requests_per_minute = int(os.getenv("TWELVE_DATA_RPM", "8"))
+    rate_limit_cooldown = 60
+    BASE_URL = "https://api.twelvedata.com"
+    INTERVALS = {"1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min", "60m": "1h",
+                 "1d": "1day", "1wk": "1week", "1mo": "1month"}
+
+    def _get(self, endpoint, params, key):
+        response = requests.get(f"{self.BASE_URL}/{endpoint}", params={**params, "apikey": key}, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 429:
+            raise RateLimitError("Twelve Data rate limit", self.rate_limit_cooldown)
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") == "error":
+            if data.get("code") == 429:
+                # Credits of the current minute/day used up
+                raise RateLimitError(data.get("message", "Twelve Data credits exhausted"), self.rate_limit_cooldown)
+            raise MarketDataError(data.get("message", "Unknown Twelve Data error"))
+        return data
+
+    def get_history(self, symbol, interval, start_date, end_date, key=None):
+        data = self._get("time_series", {
+            "symbol": symbol,
+            "interval": self.INTERVALS.get(interval, "1day"),
+            "start_date": start_date,
+            "end_date": end_date,
+            "outputsize": 5000,
+        }, key)
+        values = data.get("values")
+        if not values:
+            return _empty_frame()
+        df = pd.DataFrame(values).rename(columns={
+            "datetime": "Datetime", "open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"
+        })
+        df["Datetime"] = pd.to_datetime(df["Datetime"])
+        df = df.set_index("Datetime")
+        for col in ["Open", "High", "Low", "Close", "Volume"]:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+        return df.sort_index()
+
+    def get_quote(self, symbol, key=None):
+        return float(self._get("price", {"symbol": symbol}, key)["price"])
+
+
+class AlphaVantageProvider(MarketDataProvider):
+    name = "alphavantage"
+    key_env_prefix = "ALPHA_VANTAGE_API_KEY"
+    requests_per_minute = int(os.getenv("ALPHA_VANTAGE_RPM", "5"))
+    rate_limit_cooldown = 3600       # free keys are limited per day; retry hourly
+    BASE_URL = "https://www.alphavantage.co/query"
+    COLUMNS = {"1. open": "Open", "2. high": "High", "3. low": "Low", "4. close": "Close", "5. volume": "Volume"}
+    INTRADAY = {"1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min", "60m": "60min"}
+
+    def _get(self, params, key):
+        response = requests.get(self.BASE_URL, params={**params, "apikey": key}, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
+        if "Error Message" in data:
+            raise MarketDataError(data["Error Message"])
+        notice = data.get("Note") or data.get("Information")
+        if notice and ("call frequency" in notice or "rate limit" in notice or "API call limit" in notice):
+            raise RateLimitError(notice, self.rate_limit_cooldown)
+        if notice and len(data) == 1:
+            raise MarketDataError(notice)
+        return data
+
+    def get_history(self, symbol, interval, start_date, end_date, key=None):
+        if interval in self.INTRADAY:
+            params = {"function": "TIME_SERIES_INTRADAY", "interval": self.INTRADAY[interval], "outputsize": "full"}
+            series_key = f"Time Series ({self.INTRADAY[interval]})"
+        else:
+            params = {"function": "TIME_SERIES_DAILY", "outputsize": "full"}
+            series_key = "Time Series (Daily)"
+        data = self._get({**params, "symbol": symbol}, key)
+        series = data.get(series_key)
+        if series is None:
+            raise MarketDataError(f"Alpha Vantage response without '{series_key}'")
+        df = pd.DataFrame.from_dict(series, orient="index").rename(columns=self.COLUMNS)
+        for col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        df.index = pd.to_datetime(df.index)
+        df = df.sort_index()
+        start, end = pd.to_datetime(start_date), pd.to_datetime(end_date) + pd.Timedelta(days=1)
+        return df[(df.index >= start) & (df.index < end)]
+
+    def get_quote(self, symbol, key=None):
+        quote = self._get({"function": "GLOBAL_QUOTE", "symbol": symbol}, key).get("Global Quote") or {}
+        if "05. price" not in quote:
+            raise MarketDataError(f"No Alpha Vantage quote for {symbol}")
+        return float(quote["05. price"])
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+    requests_per_minute = int(os.getenv("YFINANCE_RPM", "60"))
+    rate_limit_cooldown = 120
+    INTERVALS = {"1m": "1m", "5m": "5m", "15m": "15m", "30m": "30m", "60m": "60m",
+                 "1d": "1d", "1wk": "1wk", "1mo": "1mo"}
+
+    @property
+    def configured(self):
+        return importlib.util.find_spec("yfinance") is not None
+
+    def _ticker(self, symbol):
+        import yfinance as yf  # optional dependency, imported on first use
+        return yf.Ticker(symbol.upper())
+
+    def _history(self, symbol, **kwargs):
+        try:
+            df = self._ticker(symbol).history(timeout=REQUEST_TIMEOUT, **kwargs)
+        except Exception as e:
+            if "Too Many Requests" in str(e) or "Rate limited" in str(e):
+                raise RateLimitError(str(e), self.rate_limit_cooldown)
+            raise MarketDataError(str(e))
+        return df
+
+    def get_history(self, symbol, interval, start_date, end_date, key=None):
+        end = (datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        df = self._history(symbol, start=start_date, end=end, interval=self.INTERVALS.get(interval, "1d"))
+        if df is None or df.empty:
+            return _empty_frame()
+        df = df[[c for c in ["Open", "High", "Low", "Close", "Volume"] if c in df.columns]]
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        return df.sort_index()
+
+    def get_quote(self, symbol, key=None):
+        df = self._history(symbol, period="1d")
+        if df is None or df.empty:
+            raise MarketDataError(f"No yfinance data for {symbol}")
+        return float(df["Close"].iloc[-1])
+
+
+# --- Health scoring and failover ---
+
+class ProviderHealth:
+    """Exponentially weighted success rate and latency of one provider (per process)."""
+
+    def __init__(self):
+        self.success = 1.0
+        self.latency_ms = 500.0
+        self.samples = 0
+        self.last_sample = time.monotonic()
+
+    def record(self, ok, latency_ms=None):
+        self.samples += 1
+        self.last_sample = time.monotonic()
+        self.success = (1 - HEALTH_ALPHA) * self.success + HEALTH_ALPHA * (1.0 if ok else 0.0)
+        if latency_ms is not None:
+            self.latency_ms = (1 - HEALTH_ALPHA) * self.latency_ms + HEALTH_ALPHA * latency_ms
+
+    @property
+    def score(self):
+        # Successful answers per second of waiting; higher is better. A provider that
+        # lost traffic after failures drifts back to full success so it gets retried.
+        idle = min(1.0, (time.monotonic() - self.last_sample) / HEALTH_RECOVERY)
+        success = self.success + (1.0 - self.success) * idle
+        return success * 1000.0 / max(self.latency_ms, 1.0)
+
+
+class MarketData:
+    """Routes requests over the configured providers by health, with budgets, breakers and failover."""
+
+    def __init__(self, providers=None, budget=None, hedge=HEDGE_REQUESTS):
+        self.providers = [p for p in (providers or default_providers()) if p.configured]
+        self.budget = budget or RateBudget()
+        self.hedge = hedge
+        self.health = {p.name: ProviderHealth() for p in self.providers}
+        self.breakers = {
+            p.name: resilience.get_breaker(
+                f"market_data.{p.name}", slow_call_ms=SLOW_CALL_MS, open_seconds=BREAKER_OPEN_SECONDS,
+                ignore_exceptions=(RateLimitError,)
+            )
+            for p in self.providers
+        }
+        self._key_cursor = {p.name: 0 for p in self.providers}
+        self._last_good = OrderedDict()     # (operation, symbol, args) -> (monotonic time, provider, result)
+        self._stale_served = 0
+        self._lock = threading.Lock()
+
+    def _ordered_providers(self):
+        with self._lock:
+            ranked = sorted(enumerate(self.providers), key=lambda item: (-self.health[item[1].name].score, item[0]))
+        return [p for _, p in ranked]
+
+    def _keys_in_rotation(self, provider):
+        # Round-robin start so the load is spread over all keys
+        with self._lock:
+            start = self._key_cursor[provider.name]
+            self._key_cursor[provider.name] = (start + 1) % len(provider.keys)
+        return provider.keys[start:] + provider.keys[:start]
+
+    def _attempt(self, provider, operation, symbol, args):
+        """One provider with key rotation; raises MarketDataError if it cannot answer."""
+        health, breaker = self.health[provider.name], self.breakers[provider.name]
+        attempted = False
+        for key in self._keys_in_rotation(provider):
+            if not self.budget.try_acquire(provider.name, key, provider.requests_per_minute):
+                continue
+            attempted = True
+            started = time.perf_counter()
+            try:
+                result = breaker.call(resilience.call_with_deadline, getattr(provider, operation),
+                                      CALL_DEADLINE, symbol, *args, key=key)
+            except RateLimitError as e:
+                logger.warning(f"{provider.name} rate limited ({e}); blocking key for {e.retry_after}s")
+                self.budget.block(provider.name, key, e.retry_after)
+                continue  # next key of the same provider
+            except Exception as e:
+                if not isinstance(e, (resilience.CircuitOpenError, resilience.BulkheadFullError)):
+                    with self._lock:
+                        health.record(False)
+                logger.warning(f"{provider.name} {operation} failed for {symbol}: {e}")
+                # Provider problem, not key problem: next provider
+                raise MarketDataError(f"{provider.name}: {e}") from e
+            with self._lock:
+                health.record(True, (time.perf_counter() - started) * 1000)
+            return result
+        raise MarketDataError(f"{provider.name}: {'rate limited' if attempted else 'no request budget left'}")
+
+    def _hedge_delay(self, provider):
+        p95 = self.breakers[provider.name].p95_ms
+        return None if p95 is None else max(p95 / 1000.0, 0.05)
+
+    def _call(self, operation, symbol, *args):
+        errors = []
+        started = time.monotonic()
+        candidates = []
+        for provider in self._ordered_providers():
+            if self.breakers[provider.name].available:
+                candidates.append(provider)
+            else:
+                errors.append(f"{provider.name}: circuit open")
+
+        while candidates:
+            if time.monotonic() - started > TOTAL_DEADLINE:
+                errors.append(f"total deadline of {TOTAL_DEADLINE:.0f}s exceeded")
+                break
+            provider = candidates.pop(0)
+            delay = self._hedge_delay(provider) if self.hedge and candidates else None
+            try:
+                if delay is None:
+                    winner, result = provider, self._attempt(provider, operation, symbol, args)
+                else:
+                    backup = candidates[0]
+                    index, result = resilience.hedged_call(
+                        functools.partial(self._attempt, provider, operation, symbol, args),
+                        functools.partial(self._attempt, backup, operation, symbol, args),
+                        delay
+                    )
+                    winner = (provider, backup)[index]
+            except resilience.HedgeError as e:
+                if e.secondary_started:
+                    candidates.pop(0)
+                errors.extend(str(error) for error in e.errors)
+                continue
+            except MarketDataError as e:
+                errors.append(str(e))
+                continue
+            self._remember((operation, symbol, args), winner.name, result)
+            return winner.name, result
+
+        stale = self._recall((operation, symbol, args))
+        if stale is not None:
+            logger.warning(f"Serving cached {operation} for {symbol} from {stale[0]}: {'; '.join(errors)}")
+            return stale
+        raise MarketDataError(f"All market data providers failed for {symbol}: {'; '.join(errors)}")
+
+    def _remember(self, cache_key, provider, result):
+        if isinstance(result, pd.DataFrame):
+            result = result.copy()  # callers modify their frame in place (e.g. mayhem effect)
+        with self._lock:
+            self._last_good[cache_key] = (time.monotonic(), provider, result)
+            self._last_good.move_to_end(cache_key)
+            while len(self._last_good) > STALE_CACHE_SIZE:
+                self._last_good.popitem(last=False)
+
+    def _recall(self, cache_key, max_age=STALE_MAX_AGE, stale=True):
+        """Last good (provider, result) for the request if it is younger than max_age."""
+        with self._lock:
+            entry = self._last_good.get(cache_key)
+            if entry is None or time.monotonic() - entry[0] > max_age:
+                return None
+            if stale:
+                self._stale_served += 1
+        _, provider, result = entry
+        if isinstance(result, pd.DataFrame):
+            result = result.copy()
+            result.is_stale = stale
+        return provider, result
+
+    def get_history(self, symbol, interval="1d", start_date=None, end_date=None):
+        """
+        Price history as DataFrame (Open, High, Low, Close, Volume) with attributes
+        is_demo=False, provider=<name> and is_stale (True if a cached answer was served
+        because no provider could answer). Raises MarketDataError if all providers fail.
+        """
+        now = datetime.now()
+        end_date = end_date or now.strftime("%Y-%m-%d")
+        if start_date is None:
+            days = 1 if interval in INTRADAY_INTERVALS else 30
+            start_date = (datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=days)).strftime("%Y-%m-%d")
+        provider, df = self._call("get_history", symbol, interval, start_date, end_date)
+        df.is_demo = False
+        df.provider = provider
+        if not getattr(df, "is_stale", False):
+            df.is_stale = False
+        return df
+
+    def get_quote(self, symbol):
+        """
+        Latest price of the symbol; a quote younger than QUOTE_TTL is reused without an
+        upstream call. Raises MarketDataError if all providers fail.
+        """
+        fresh = self._recall(("get_quote", symbol, ()), max_age=QUOTE_TTL, stale=False)
+        if fresh is not None:
+            return fresh[1]
+        price = self._call("get_quote", symbol)[1]
+        if self._recall(("get_quote", symbol, ()), max_age=QUOTE_TTL, stale=False) is not None:
+            # A live answer (not a stale fallback): tell the order engine and other listeners
+            events.publish(events.PRICE_UPDATED, user_id=None, symbol=symbol.upper(), price=price)
+        return price
+
+    def get_health(self):
+        with self._lock:
+            providers = [
+                {
+                    "provider": p.name,
+                    "keys": len(p.keys) if p.key_env_prefix else 0,
+                    "score": round(self.health[p.name].score, 3),
+                    "success_rate": round(self.health[p.name].success, 3),
+                    "latency_ms": round(self.health[p.name].latency_ms, 1),
+                    "samples": self.health[p.name].samples,
+                }
+                for p in self.providers
+            ]
+            stale_served = self._stale_served
+        for entry in providers:
+            entry["breaker"] = self.breakers[entry["provider"]].stats()
+        return {
+            "providers": providers,
+            "budgets": self.budget.snapshot(),
+            "upstream": {**resilience.get_stats(), "hedging": self.hedge, "stale_served": stale_served},
+        }
+
+
+def default_providers():
+    """Configured adapters in their default priority (used until health data exists)."""
+    return [TwelveDataProvider(), YFinanceProvider(), AlphaVantageProvider()]
+
+
+_market_data = None
+_market_data_lock = threading.Lock()
+
+
+def get_market_data():
+    """Process-wide MarketData instance."""
+    global _market_data
+    if _market_data is None:
+        with _market_data_lock:
+            if _market_data is None:
+                _market_data = MarketData()
+    return _market_data
+
+
+def get_history(symbol, interval="1d", start_date=None, end_date=None):
+    return get_market_data().get_history(symbol, interval, start_date, end_date)
+
+
+def get_quote(symbol):
+    return get_market_data().get_quote(symbol)
+
+
+def get_provider_health():
+    return get_market_data().get_health()
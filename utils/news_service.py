@@ -0,0 +1,316 @@
+"""
+News ingestion service.
+
+Keeps Finnhub news in memory so that user requests never call Finnhub directly:
+
+- General/category feeds are refreshed by a background thread every NEWS_REFRESH_INTERVAL seconds.
+- Articles are stored once, deduplicated by their Finnhub `id`.
+- Company news is tracked per symbol as a list of merged, already-fetched date ranges.
+  A request only schedules the missing parts of its range; recently requested symbols
+  get today's news refreshed in the background.
+- Every feed carries an ETag derived from its article ids, so unchanged feeds can be
+  answered with 304 Not Modified.
+
+Usage:
+    import utils.news_service as news_service
+    news_service.start()                             # once at app startup
+    articles, etag = news_service.get_general_news("general")
+    articles, etag = news_service.get_company_news("AAPL", "2025-01-01", "2025-01-31")
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+import utils.stock_news as stock_news
+
+logger = logging.getLogger(__name__)
+
+NEWS_CATEGORIES = ("general", "forex", "crypto", "merger")
+NEWS_REFRESH_INTERVAL = 300          # seconds between background refreshes
+COMPANY_NEWS_DEFAULT_DAYS = 7        # default range when no dates are given
+COMPANY_NEWS_WAIT_TIMEOUT = 5.0      # max seconds a request waits for a first fetch of a symbol
+TRACKED_SYMBOLS_MAX = 50             # symbols whose recent news are kept fresh in the background
+MAX_ARTICLES = 20000                 # upper bound for the article store
+
+_lock = threading.RLock()
+_articles = OrderedDict()            # Finnhub id -> article (insertion order ~ age)
+_category_feeds = {}                 # category -> {'ids': [...], 'etag': str, 'updated_at': float}
+_symbol_coverage = {}                # symbol -> {'ranges': [(date, date), ...], 'ids': set()}
+_tracked_symbols = OrderedDict()     # symbol -> last request time (LRU)
+_pending_fetches = {}                # (symbol, from, to) -> threading.Event
+_category_waits = {}                 # category -> threading.Event, set when its next refresh ends
+_fetch_queue = []
+_wakeup = threading.Event()
+_worker = None
+
+def _compute_etag(key, ids):
+    digest = hashlib.sha1(",".join(str(i) for i in ids).encode("utf-8")).hexdigest()[:16]
+    return f'W/"{key}-{digest}"'
+
+def _article_sort_key(article):
+    return article.get("datetime") or 0
+
+def _store_articles(raw_articles):
+    """Store articles by Finnhub id and return the ids in feed order (newest first)."""
+    ids = []
+    seen = set()
+    with _lock:
+        for article in raw_articles or ():
+            if not isinstance(article, dict) or article.get("id") is None:
+                continue
+            article_id = article["id"]
+            if article_id in seen:
+                continue
+            seen.add(article_id)
+            if article_id in _articles:
+                _articles.move_to_end(article_id)
+            _articles[article_id] = article
+            ids.append(article_id)
+        _evict_articles()
+    ids.sort(key=lambda i: _article_sort_key(_articles.get(i, {})), reverse=True)
+    return ids
+
+def _evict_articles():
+    """
+    Drop the oldest articles beyond MAX_ARTICLES (caller holds _lock). Symbols that
+    referenced them lose the article ids and the days of those articles from their
+    covered ranges, so these days are fetched again on the next request.
+    """
+    evicted = {}
+    while len(_articles) > MAX_ARTICLES:
+        article_id, article = _articles.popitem(last=False)
+        evicted[article_id] = article
+    if not evicted:
+        return
+    for coverage in _symbol_coverage.values():
+        dropped = coverage["ids"].intersection(evicted)
+        if not dropped:
+            continue
+        coverage["ids"].difference_update(dropped)
+        days = {date.fromtimestamp(_article_sort_key(evicted[i])) for i in dropped}
+        coverage["ranges"] = _without_days(coverage["ranges"], days)
+
+def _without_days(ranges, days):
+    """Merged date ranges with the given days cut out."""
+    remaining = []
+    for range_start, range_end in ranges:
+        cursor = range_start
+        for day in sorted(d for d in days if range_start <= d <= range_end):
+            if day > cursor:
+                remaining.append((cursor, day - timedelta(days=1)))
+            cursor = day + timedelta(days=1)
+        if cursor <= range_end:
+            remaining.append((cursor, range_end))
+    return remaining
+
+def _merge_ranges(ranges):
+    """Merge overlapping or adjacent (from, to) date ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def _missing_ranges(covered, start, end):
+    """Return the parts of [start, end] that are not covered by the merged ranges."""
+    missing = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start - timedelta(days=1)))
+        cursor = max(cursor, covered_end + timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+def _parse_date(value, default):
+    if value is None or value == "":
+        return default
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d").date()
+
+# --- Fetching (background thread only) ---
+
+def refresh_category(category):
+    """Fetch one general news category from Finnhub and replace its feed."""
+    try:
+        raw = stock_news.fetch_general_news(category)
+        ids = _store_articles(raw)
+        with _lock:
+            _category_feeds[category] = {
+                "ids": ids,
+                "etag": _compute_etag(category, ids),
+                "updated_at": time.time()
+            }
+        logger.info(f"News feed '{category}' refreshed: {len(ids)} articles")
+    finally:
+        # Wake requests waiting for this refresh, also if it failed; later ones wait for the next
+        with _lock:
+            done = _category_waits.pop(category, None)
+        if done is not None:
+            done.set()
+
+def _fetch_company_range(symbol, start_date, end_date):
+    raw = stock_news.fetch_company_news(symbol, start_date.isoformat(), end_date.isoformat())
+    ids = _store_articles(raw)
+    with _lock:
+        coverage = _symbol_coverage.setdefault(symbol, {"ranges": [], "ids": set()})
+        coverage["ids"].update(i for i in ids if i in _articles)
+        # Today is never considered complete; it is refreshed for tracked symbols instead
+        covered_end = min(end_date, date.today() - timedelta(days=1))
+        if covered_end >= start_date:
+            coverage["ranges"] = _merge_ranges(coverage["ranges"] + [(start_date, covered_end)])
+        # Articles of this batch that were evicted again right away (batch larger than the store)
+        lost_days = {date.fromtimestamp(_article_sort_key(article)) for article in raw or ()
+                     if isinstance(article, dict) and article.get("id") in ids and article["id"] not in _articles}
+        if lost_days:
+            coverage["ranges"] = _without_days(coverage["ranges"], lost_days)
+    logger.debug(f"Company news for {symbol} {start_date}..{end_date}: {len(ids)} articles")
+
+def _refresh_tracked_symbols():
+    today = date.today()
+    with _lock:
+        symbols = list(_tracked_symbols)
+    for symbol in symbols:
+        try:
+            _fetch_company_range(symbol, today - timedelta(days=1), today)
+        except Exception as e:
+            logger.warning(f"Refreshing company news for {symbol} failed: {e}")
+
+def _run_queued_fetches():
+    while True:
+        with _lock:
+            if not _fetch_queue:
+                return
+            key = _fetch_queue.pop(0)
+        symbol, start_date, end_date = key
+        try:
+            _fetch_company_range(symbol, start_date, end_date)
+        except Exception as e:
+            logger.warning(f"Fetching company news for {symbol} {start_date}..{end_date} failed: {e}")
+        finally:
+            with _lock:
+                done = _pending_fetches.pop(key, None)
+            if done:
+                done.set()
+
+def _worker_loop():
+    next_refresh = 0.0
+    while True:
+        now = time.monotonic()
+        if now >= next_refresh:
+            for category in NEWS_CATEGORIES:
+                try:
+                    refresh_category(category)
+                except Exception as e:
+                    logger.warning(f"Refreshing news category '{category}' failed: {e}")
+            _refresh_tracked_symbols()
+            next_refresh = time.monotonic() + NEWS_REFRESH_INTERVAL
+        # Clear before draining so a fetch scheduled meanwhile wakes the next wait immediately
+        _wakeup.clear()
+        _run_queued_fetches()
+        _wakeup.wait(max(0.0, next_refresh - time.monotonic()))
+
+def start():
+    """Start the background refresh thread (idempotent)."""
+    global _worker
+    with _lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_worker_loop, name="news-refresher", daemon=True)
+        _worker.start()
+    logger.info("News refresher started")
+
+def _schedule_fetch(symbol, start_date, end_date):
+    key = (symbol, start_date, end_date)
+    with _lock:
+        event = _pending_fetches.get(key)
+        if event is None:
+            event = threading.Event()
+            _pending_fetches[key] = event
+            _fetch_queue.append(key)
+    if _worker is None or not _worker.is_alive():
+        start()
+    _wakeup.set()
+    return event
+
+# --- Read API (used by request handlers) ---
+
+def get_general_news(category="general"):
+    """
+    Return (articles, etag) for a news category from memory.
+    If the feed has not been loaded yet, waits briefly for the background refresh.
+    """
+    with _lock:
+        feed = _category_feeds.get(category)
+        if feed is None:
+            refreshed = _category_waits.setdefault(category, threading.Event())
+    if feed is None:
+        start()
+        refreshed.wait(COMPANY_NEWS_WAIT_TIMEOUT)
+        with _lock:
+            feed = _category_feeds.get(category)
+        if feed is None:
+            return [], _compute_etag(category, ())
+    with _lock:
+        articles = [_articles[i] for i in feed["ids"] if i in _articles]
+    return articles, feed["etag"]
+
+def get_company_news(symbol, from_date=None, to_date=None):
+    """
+    Return (articles, etag) for a symbol and date range (YYYY-MM-DD, inclusive) from memory.
+    Missing parts of the range are fetched by the background worker; the request waits
+    up to COMPANY_NEWS_WAIT_TIMEOUT seconds for them.
+    """
+    symbol = symbol.upper()
+    today = date.today()
+    end = _parse_date(to_date, today)
+    start_date = _parse_date(from_date, end - timedelta(days=COMPANY_NEWS_DEFAULT_DAYS))
+
+    with _lock:
+        _tracked_symbols[symbol] = time.time()
+        _tracked_symbols.move_to_end(symbol)
+        while len(_tracked_symbols) > TRACKED_SYMBOLS_MAX:
+            _tracked_symbols.popitem(last=False)
+        coverage = _symbol_coverage.get(symbol, {"ranges": [], "ids": set()})
+        missing = _missing_ranges(coverage["ranges"], start_date, end)
+        known_symbol = symbol in _symbol_coverage
+
+    # Today is kept fresh by the refresher; only wait for it if the symbol is brand new
+    if known_symbol:
+        missing = [(s, e) for s, e in missing if not (s >= today - timedelta(days=1))]
+    waits = [_schedule_fetch(symbol, s, e) for s, e in missing]
+    deadline = time.monotonic() + COMPANY_NEWS_WAIT_TIMEOUT
+    for event in waits:
+        event.wait(max(0.0, deadline - time.monotonic()))
+
+    start_ts = datetime.combine(start_date, datetime.min.time()).timestamp()
+    end_ts = datetime.combine(end + timedelta(days=1), datetime.min.time()).timestamp()
+    with _lock:
+        ids = _symbol_coverage.get(symbol, {"ids": set()})["ids"]
+        articles = [
+            _articles[i] for i in ids
+            if i in _articles and start_ts <= _article_sort_key(_articles[i]) < end_ts
+        ]
+    articles.sort(key=_article_sort_key, reverse=True)
+    return articles, _compute_etag(f"{symbol}-{start_date}-{end}", [a["id"] for a in articles])
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value matches the given ETag."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
@@ -0,0 +1,193 @@
+"""
+In-memory trigger index for resting limit, stop and stop-limit orders.
+
+Every order waits for one price level, in one of two directions:
+
+    buy limit  L   fires when price <= L        sell limit L   fires when price >= L
+    buy stop   S   fires when price >= S        sell stop  S   fires when price <= S
+
+A stop-limit order first waits for its stop; when that fires it becomes a limit
+order at its limit price (and fires at once if the price already satisfies it).
+
+Per symbol, OrderBook keeps two heaps: `below` (max-heap of trigger prices, fires
+on price <= trigger) and `above` (min-heap, fires on price >= trigger). A price
+update only looks at the heap tops, so it costs O(log n) per triggered order
+instead of a scan over all resting orders. Cancelled orders stay in the heaps and
+are skipped when they surface; a heap is rebuilt once most of it is cancelled.
+
+The book holds no database state; utils/order_engine.py loads it from the orders
+table and executes what on_price() returns.
+"""
+import heapq
+import itertools
+import threading
+
+BUY = "buy"
+SELL = "sell"
+LIMIT = "limit"
+STOP = "stop"
+STOP_LIMIT = "stop_limit"
+ORDER_TYPES = (LIMIT, STOP, STOP_LIMIT)
+
+
+class RestingOrder:
+    """A pending order as the book sees it; `stage` is the price it currently waits for."""
+    __slots__ = ("id", "user_id", "symbol", "side", "order_type", "quantity", "limit_price", "stop_price", "stage")
+
+    def __init__(self, id, user_id, symbol, side, order_type, quantity, limit_price=None, stop_price=None, stage=None):
+        if side not in (BUY, SELL):
+            raise ValueError(f"Unknown order side: {side}")
+        if order_type not in ORDER_TYPES:
+            raise ValueError(f"Unknown order type: {order_type}")
+        if order_type in (LIMIT, STOP_LIMIT) and limit_price is None:
+            raise ValueError(f"{order_type} orders need a limit price")
+        if order_type in (STOP, STOP_LIMIT) and stop_price is None:
+            raise ValueError(f"{order_type} orders need a stop price")
+        self.id = id
+        self.user_id = user_id
+        self.symbol = symbol.upper()
+        self.side = side
+        self.order_type = order_type
+        self.quantity = quantity
+        self.limit_price = limit_price
+        self.stop_price = stop_price
+        self.stage = stage or (LIMIT if order_type == LIMIT else STOP)
+
+    @property
+    def trigger(self):
+        """(price, fires_below) the order currently waits for."""
+        if self.stage == LIMIT:
+            return self.limit_price, self.side == BUY
+        return self.stop_price, self.side == SELL
+
+    def fires_at(self, price):
+        level, below = self.trigger
+        return price <= level if below else price >= level
+
+    def __repr__(self):
+        return f"RestingOrder({self.id}, {self.side} {self.quantity} {self.symbol} {self.order_type}, stage={self.stage})"
+
+
+class _SymbolBook:
+    __slots__ = ("below", "above", "cancelled")
+
+    def __init__(self):
+        self.below = []       # (-trigger, seq, order)
+        self.above = []       # (trigger, seq, order)
+        self.cancelled = 0
+
+
+class OrderBook:
+    """Resting orders of all symbols, indexed by trigger price (thread-safe)."""
+
+    def __init__(self):
+        self._books = {}
+        self._orders = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def symbols(self):
+        """Symbols with at least one resting order."""
+        with self._lock:
+            return sorted({order.symbol for order in self._orders.values()})
+
+    def _push(self, order):
+        book = self._books.get(order.symbol)
+        if book is None:
+            book = self._books[order.symbol] = _SymbolBook()
+        level, below = order.trigger
+        if below:
+            heapq.heappush(book.below, (-level, next(self._seq), order))
+        else:
+            heapq.heappush(book.above, (level, next(self._seq), order))
+
+    def add(self, order):
+        """Add a resting order; returns False if an order with this id is already in the book."""
+        with self._lock:
+            if order.id in self._orders:
+                return False
+            self._orders[order.id] = order
+            self._push(order)
+            return True
+
+    def add_many(self, orders):
+        """Bulk load (startup): append everything, then heapify once per heap. Returns the number added."""
+        added = 0
+        with self._lock:
+            for order in orders:
+                if order.id in self._orders:
+                    continue
+                added += 1
+                self._orders[order.id] = order
+                book = self._books.get(order.symbol)
+                if book is None:
+                    book = self._books[order.symbol] = _SymbolBook()
+                level, below = order.trigger
+                if below:
+                    book.below.append((-level, next(self._seq), order))
+                else:
+                    book.above.append((level, next(self._seq), order))
+            for book in self._books.values():
+                heapq.heapify(book.below)
+                heapq.heapify(book.above)
+        return added
+
+    def cancel(self, order_id):
+        """Remove an order; returns it, or None if it is not (or no longer) resting."""
+        with self._lock:
+            order = self._orders.pop(order_id, None)
+            if order is None:
+                return None
+            book = self._books[order.symbol]
+            book.cancelled += 1
+            if book.cancelled > 64 and book.cancelled * 2 > len(book.below) + len(book.above):
+                book.below = [entry for entry in book.below if entry[2].id in self._orders]
+                book.above = [entry for entry in book.above if entry[2].id in self._orders]
+                heapq.heapify(book.below)
+                heapq.heapify(book.above)
+                book.cancelled = 0
+            return order
+
+    def _pop_due(self, book, price):
+        due = []
+        while book.below and -book.below[0][0] >= price:
+            due.append(heapq.heappop(book.below)[2])
+        while book.above and book.above[0][0] <= price:
+            due.append(heapq.heappop(book.above)[2])
+        return due
+
+    def on_price(self, symbol, price):
+        """
+        Apply a price update to the symbol's orders.
+
+        Returns:
+            (fired, activated): orders to execute now (removed from the book), and
+            stop-limit orders whose stop fired and that now rest as limit orders
+        """
+        fired, activated = [], []
+        with self._lock:
+            book = self._books.get(symbol.upper())
+            if book is None:
+                return fired, activated
+            due = self._pop_due(book, price)
+            while due:
+                order = due.pop()
+                if self._orders.get(order.id) is not order:
+                    book.cancelled = max(book.cancelled - 1, 0)     # cancelled earlier, skip
+                    continue
+                if order.stage == STOP and order.order_type == STOP_LIMIT:
+                    order.stage = LIMIT
+                    if not order.fires_at(price):
+                        activated.append(order)
+                        self._push(order)
+                        continue
+                del self._orders[order.id]
+                fired.append(order)
+            fired.sort(key=lambda o: o.id)
+        return fired, activated
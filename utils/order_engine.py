@@ -0,0 +1,200 @@
+"""
+Limit, stop and stop-limit order engine.
+
+Orders are stored in the orders table (postgres_orders_handler) and indexed in an
+in-memory OrderBook (utils/order_book.py). Prices come in through the shared
+quote poller (utils/quote_poller.py): every live quote of utils/market_data.py,
+and while the exchange is open a poll of all symbols with resting orders every
+ORDER_POLL_INTERVAL seconds (through the market data budgets).
+
+A price update only pops the orders it triggers from the book. They are executed
+in one batch on a background thread: claimed in the database (so another worker
+process cannot execute them too), then run in parallel through the normal
+buy_stock/sell_stock path at the triggering price (where the balance queue and,
+if enabled, group commit batch them further), and their results are written
+with one statement.
+
+Every worker process loads all pending orders at start and keeps its own book;
+orders placed through another worker after that are picked up on the next
+restart, cancellations are honoured through the claim.
+
+Usage:
+    import utils.order_engine as order_engine
+    order_engine.start()                                   # at app startup
+    order_engine.place_order(user_id, "AAPL", "buy", "limit", 5, limit_price=180.0)
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database.handler.postgres.postgres_orders_handler as orders_handler
+import database.handler.postgres.postgre_transactions_handler as transactions_handler
+import utils.quote_poller as quote_poller
+from utils.order_book import BUY, SELL, LIMIT, STOP, STOP_LIMIT, ORDER_TYPES, OrderBook, RestingOrder
+
+logger = logging.getLogger(__name__)
+
+ORDER_ENGINE_ENABLED = os.getenv("ORDER_ENGINE_ENABLED", "1") == "1"
+ORDER_POLL_INTERVAL = float(os.getenv("ORDER_POLL_INTERVAL", "30"))     # seconds between quote polls
+ORDER_EXECUTION_WORKERS = int(os.getenv("ORDER_EXECUTION_WORKERS", "8"))
+LOAD_RETRY_SECONDS = 30
+
+_book = OrderBook()
+_loaded = threading.Event()
+_lock = threading.Lock()
+_thread = None
+_dispatcher = None          # runs triggered batches one after another
+_trade_pool = None          # executes the trades of a batch in parallel
+_stats = {"triggered": 0, "filled": 0, "rejected": 0, "batches": 0}
+
+
+def _executors():
+    global _dispatcher, _trade_pool
+    if _dispatcher is None:
+        with _lock:
+            if _dispatcher is None:
+                _trade_pool = ThreadPoolExecutor(max_workers=ORDER_EXECUTION_WORKERS, thread_name_prefix="order-trade")
+                _dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="order-dispatch")
+    return _dispatcher, _trade_pool
+
+
+def _to_resting(row):
+    return RestingOrder(
+        row["id"], row["user_id"], row["asset_symbol"], row["side"], row["order_type"], row["quantity"],
+        limit_price=row["limit_price"], stop_price=row["stop_price"],
+        stage=LIMIT if row["status"] == "active" else None
+    )
+
+
+def validate_order(side, order_type, quantity, limit_price=None, stop_price=None):
+    """Error message for an invalid order, None if it is valid."""
+    if side not in (BUY, SELL):
+        return "Side must be 'buy' or 'sell'."
+    if order_type not in ORDER_TYPES:
+        return f"Order type must be one of: {', '.join(ORDER_TYPES)}."
+    if quantity is None or quantity <= 0:
+        return "Quantity must be positive."
+    if order_type in (LIMIT, STOP_LIMIT) and (limit_price is None or limit_price <= 0):
+        return f"A {order_type} order needs a positive limit price."
+    if order_type in (STOP, STOP_LIMIT) and (stop_price is None or stop_price <= 0):
+        return f"A {order_type} order needs a positive stop price."
+    return None
+
+
+def place_order(user_id, symbol, side, order_type, quantity, limit_price=None, stop_price=None):
+    """
+    Store a pending order and add it to the trigger book. Balance and holdings are
+    checked when the order fires, like for a market order at that price.
+
+    Returns:
+        dict: {"success": True, "order": {...}} or {"success": False, "message": "..."}
+    """
+    error = validate_order(side, order_type, quantity, limit_price, stop_price)
+    if error:
+        return {"success": False, "message": error}
+    if order_type == LIMIT:
+        stop_price = None
+    elif order_type == STOP:
+        limit_price = None
+    result = orders_handler.create_order(user_id, symbol, side, order_type, quantity, limit_price, stop_price)
+    if result["success"]:
+        _book.add(_to_resting(result["order"]))
+    return result
+
+
+def cancel_order(user_id, order_id):
+    result = orders_handler.cancel_order(user_id, order_id)
+    if result["success"]:
+        _book.cancel(order_id)
+    return result
+
+
+def on_price(symbol, price):
+    """Trigger the resting orders of the symbol at this price (cheap; execution runs in the background)."""
+    fired, activated = _book.on_price(symbol, price)
+    if not fired and not activated:
+        return
+    dispatcher, _ = _executors()
+    if activated:
+        dispatcher.submit(_activate, [order.id for order in activated])
+    if fired:
+        dispatcher.submit(_execute, fired, price)
+
+
+def _activate(order_ids):
+    try:
+        orders_handler.activate_orders(order_ids)
+    except Exception as e:
+        logger.error(f"Could not mark stop-limit orders {order_ids} active: {e}", exc_info=True)
+
+
+def _trade(order, price):
+    trade = transactions_handler.buy_stock if order.side == BUY else transactions_handler.sell_stock
+    try:
+        return trade(order.user_id, order.symbol, order.quantity, price)
+    except Exception as e:
+        return {"success": False, "message": str(e)}
+
+
+def _execute(orders, price):
+    """Execute one batch of triggered orders at the triggering price."""
+    try:
+        claimed = orders_handler.claim_orders([order.id for order in orders])
+    except Exception as e:
+        # Nothing was executed and the orders are still open in the database: put them back
+        # in the book so the next price update triggers them again
+        logger.error(f"Could not claim {len(orders)} triggered orders, returning them to the book: {e}", exc_info=True)
+        _book.add_many(orders)
+        return
+    orders = [order for order in orders if order.id in claimed]
+    if not orders:
+        return
+    _, trade_pool = _executors()
+    results = list(trade_pool.map(lambda order: _trade(order, price), orders))
+    updates = [
+        (order.id, "filled", price, None) if result.get("success") else (order.id, "rejected", None, result.get("message"))
+        for order, result in zip(orders, results)
+    ]
+    filled = sum(1 for update in updates if update[1] == "filled")
+    with _lock:
+        _stats["batches"] += 1
+        _stats["triggered"] += len(orders)
+        _stats["filled"] += filled
+        _stats["rejected"] += len(orders) - filled
+    try:
+        orders_handler.update_order_statuses(updates)
+    except Exception as e:
+        logger.error(f"Executed {len(orders)} orders but could not store their status: {e}; ids {[u[0] for u in updates]}", exc_info=True)
+
+
+def _load_pending_orders():
+    while True:
+        try:
+            rows = orders_handler.get_pending_orders()
+            _book.add_many(_to_resting(row) for row in rows)
+            logger.info(f"Order engine loaded {len(rows)} pending orders")
+            _loaded.set()
+            return
+        except Exception as e:
+            logger.warning(f"Loading pending orders failed ({str(e).strip()}); retrying in {LOAD_RETRY_SECONDS}s")
+            time.sleep(LOAD_RETRY_SECONDS)
+
+
+def start():
+    """Load pending orders and register with the quote poller (idempotent, call at app startup)."""
+    global _thread
+    if not ORDER_ENGINE_ENABLED:
+        return
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_load_pending_orders, name="order-engine", daemon=True)
+    _thread.start()
+    quote_poller.register("orders", on_price, _book.symbols, ORDER_POLL_INTERVAL)
+
+
+def get_stats():
+    with _lock:
+        return {**_stats, "resting": len(_book), "loaded": _loaded.is_set()}
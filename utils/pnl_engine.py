@@ -0,0 +1,163 @@
+"""
+Streaming profit/loss engine: keeps every user's market value and unrealised
+P/L current as prices move, without revaluing whole portfolios.
+
+All open positions (portfolio table) are loaded into a PortfolioBook
+(utils/portfolio_book.py) at start. Prices come in through the shared quote
+poller (utils/quote_poller.py): every live quote of utils/market_data.py, and
+while the exchange is open a poll of all held symbols every PNL_POLL_INTERVAL
+seconds. A tick only revalues the holders of that symbol.
+After a trade in this process (events.TRADE_EXECUTED) the user's positions are
+reloaded; trades through other processes are picked up by a full reload every
+PNL_RELOAD_INTERVAL seconds.
+
+Users with a connected client (watch/unwatch, see
+buyhigh_flask/routes/portfolio_events.py) get an events.PORTFOLIO_VALUED with
+their new totals whenever a tick changes them; the Flask app forwards it over
+Socket.IO (namespace /portfolio, event 'portfolio_update').
+
+Usage:
+    import utils.pnl_engine as pnl_engine
+    pnl_engine.start()                  # at app startup
+    pnl_engine.get_totals(user_id)      # market_value, cost_basis, unrealised_pl, unrealised_pl_pct
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database.handler.postgres.postgre_transactions_handler as transactions_handler
+import utils.events as events
+import utils.quote_poller as quote_poller
+from utils.portfolio_book import PortfolioBook
+
+logger = logging.getLogger(__name__)
+
+PNL_ENGINE_ENABLED = os.getenv("PNL_ENGINE_ENABLED", "1") == "1"
+PNL_POLL_INTERVAL = float(os.getenv("PNL_POLL_INTERVAL", "60"))     # seconds between quote polls
+PNL_RELOAD_INTERVAL = float(os.getenv("PNL_RELOAD_INTERVAL", "300"))  # seconds between full position reloads
+LOAD_RETRY_SECONDS = 30
+
+_book = PortfolioBook()
+_loaded = threading.Event()
+_lock = threading.Lock()
+_thread = None
+_dispatcher = None          # reloads positions and pushes totals, in order
+_stats = {"ticks": 0, "pushed": 0, "reloads": 0}
+
+
+def _get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None:
+        with _lock:
+            if _dispatcher is None:
+                _dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pnl-dispatch")
+    return _dispatcher
+
+
+def get_totals(user_id):
+    """Current totals of the user, or None if the engine has not loaded them (yet)."""
+    if not _loaded.is_set():
+        return None
+    return _book.totals(user_id)
+
+
+def watch(user_id):
+    """A client of the user connected: push their totals on every change."""
+    _book.watch(user_id)
+
+
+def unwatch(user_id):
+    _book.unwatch(user_id)
+
+
+def on_price(symbol, price):
+    """Revalue the holders of the symbol (cheap; pushing runs in the background)."""
+    # User ids, not book slots: a reload queued before the push renumbers the slots
+    changed = _book.on_price(symbol, price)
+    with _lock:
+        _stats["ticks"] += 1
+    if len(changed):
+        _get_dispatcher().submit(_push, changed)
+
+
+def _on_trade_event(event_type, payload):
+    _get_dispatcher().submit(_reload_user, payload["user_id"])
+
+
+def _push(user_ids):
+    updates = _book.watched_totals(user_ids)
+    with _lock:
+        _stats["pushed"] += len(updates)
+    for user_id, totals in updates:
+        events.publish(events.PORTFOLIO_VALUED, user_id=user_id, totals=totals)
+
+
+def _reload_user(user_id):
+    try:
+        rows = transactions_handler.get_user_positions(user_id)
+    except Exception as e:
+        logger.warning(f"Reloading positions of user {user_id} failed: {e}")
+        return
+    _book.set_positions(user_id, [(symbol, float(quantity), float(average_price), _price(default_price))
+                                  for _, symbol, quantity, average_price, default_price in rows])
+    with _lock:
+        _stats["reloads"] += 1
+    if _book.is_watched(user_id):
+        events.publish(events.PORTFOLIO_VALUED, user_id=user_id, totals=_book.totals(user_id))
+
+
+def _price(default_price):
+    return None if default_price is None else float(default_price)
+
+
+def _reload_all():
+    rows = transactions_handler.get_all_positions()
+    _book.load((user_id, symbol, float(quantity), float(average_price), _price(default_price))
+               for user_id, symbol, quantity, average_price, default_price in rows)
+    logger.info(f"P&L engine loaded {_book.positions} positions of {len(_book)} users")
+
+
+def _load_positions():
+    while True:
+        try:
+            _reload_all()
+            _loaded.set()
+            return
+        except Exception as e:
+            logger.warning(f"Loading positions failed ({str(e).strip()}); retrying in {LOAD_RETRY_SECONDS}s")
+            time.sleep(LOAD_RETRY_SECONDS)
+
+
+def _periodic_reload():
+    try:
+        _reload_all()
+    except Exception as e:
+        logger.warning(f"Reloading positions failed: {str(e).strip()}")
+
+
+def _reload_loop():
+    _load_positions()
+    while True:
+        time.sleep(PNL_RELOAD_INTERVAL)
+        _get_dispatcher().submit(_periodic_reload)
+
+
+def start():
+    """Subscribe to trades, load positions and register with the quote poller (idempotent, call at app startup)."""
+    global _thread
+    if not PNL_ENGINE_ENABLED:
+        return
+    with _lock:
+        if _thread is not None:
+            return
+        events.subscribe(events.TRADE_EXECUTED, _on_trade_event)
+        _thread = threading.Thread(target=_reload_loop, name="pnl-engine", daemon=True)
+    _thread.start()
+    quote_poller.register("pnl", on_price, _book.symbols, PNL_POLL_INTERVAL)
+
+
+def get_stats():
+    with _lock:
+        return {**_stats, "users": len(_book), "positions": _book.positions, "loaded": _loaded.is_set()}
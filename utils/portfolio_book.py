@@ -0,0 +1,288 @@
+"""
+In-memory positions of all users for streaming profit/loss.
+
+PortfolioBook keeps every open position (one row per user and symbol) in flat
+NumPy arrays, plus a reverse index from symbol to the rows that hold it:
+
+    quantity, cost (quantity * average buy price), value (quantity * last price)
+    per position, and market value / cost basis per user
+
+A price update of one symbol touches only the rows of that symbol: their values
+are recomputed in one vectorised step and the difference is added to their
+holders' market value. The rest of the book is not looked at, so a tick of a
+symbol with 100k holders costs a few array operations over 100k elements instead
+of revaluing 100k portfolios.
+
+Positions of a user are replaced as a whole (set_positions, after a trade); the
+old rows are marked dead and compacted away once they make up half the arrays.
+"""
+import threading
+
+from utils.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+_INITIAL_CAPACITY = 1024
+_COMPACT_MIN_DEAD = 1024
+
+
+def _grown(array, size, fill=0):
+    """array with room for at least `size` elements (capacity doubles)."""
+    if size <= len(array):
+        return array
+    grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class PortfolioBook:
+    """Positions of all users with per-user market value and cost basis (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._user_slot = {}                # user_id -> slot
+        self._user_ids = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self._user_value = np.zeros(_INITIAL_CAPACITY)
+        self._user_cost = np.zeros(_INITIAL_CAPACITY)
+        self._watched = np.zeros(_INITIAL_CAPACITY, dtype=np.int32)     # open client connections per user
+        self._user_rows = {}                # slot -> {symbol slot: row}
+
+        self._symbol_slot = {}              # symbol -> slot
+        self._symbols = []
+        self._prices = np.full(_INITIAL_CAPACITY, np.nan)
+        self._symbol_rows = []              # symbol slot -> row array
+        self._symbol_added = {}             # symbol slot -> rows added since the array was built
+        self._symbol_stale = set()          # symbol slots whose array may contain dead rows
+
+        self._rows = 0
+        self._dead = 0
+        self._pos_user = np.full(_INITIAL_CAPACITY, -1, dtype=np.int64)   # -1 = dead row
+        self._pos_symbol = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self._pos_quantity = np.zeros(_INITIAL_CAPACITY)
+        self._pos_cost = np.zeros(_INITIAL_CAPACITY)
+        self._pos_value = np.zeros(_INITIAL_CAPACITY)
+
+    def __len__(self):
+        return len(self._user_slot)
+
+    @property
+    def positions(self):
+        return self._rows - self._dead
+
+    def symbols(self):
+        with self._lock:
+            return [symbol for slot, symbol in enumerate(self._symbols) if len(self._rows_of(slot))]
+
+    def _user(self, user_id):
+        slot = self._user_slot.get(user_id)
+        if slot is None:
+            slot = self._user_slot[user_id] = len(self._user_slot)
+            self._user_ids = _grown(self._user_ids, slot + 1)
+            self._user_value = _grown(self._user_value, slot + 1)
+            self._user_cost = _grown(self._user_cost, slot + 1)
+            self._watched = _grown(self._watched, slot + 1)
+            self._user_ids[slot] = user_id
+        return slot
+
+    def _symbol(self, symbol):
+        slot = self._symbol_slot.get(symbol)
+        if slot is None:
+            slot = self._symbol_slot[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+            self._symbol_rows.append(np.empty(0, dtype=np.int64))
+            self._prices = _grown(self._prices, slot + 1, np.nan)
+        return slot
+
+    def _rows_of(self, symbol_slot):
+        """Live rows of a symbol; changes since the last call are applied to its array first."""
+        rows = self._symbol_rows[symbol_slot]
+        added = self._symbol_added.pop(symbol_slot, None)
+        if added:
+            rows = np.concatenate((rows, np.asarray(added, dtype=np.int64)))
+        # Filter after adding: a row added since the last call may have been replaced again already
+        if symbol_slot in self._symbol_stale:
+            self._symbol_stale.discard(symbol_slot)
+            rows = rows[self._pos_user[rows] >= 0]
+        self._symbol_rows[symbol_slot] = rows
+        return rows
+
+    def _index_symbols(self):
+        """Rebuild all symbol -> rows arrays (all rows must be live)."""
+        order = np.argsort(self._pos_symbol[:self._rows], kind="stable")
+        bounds = np.searchsorted(self._pos_symbol[:self._rows][order], np.arange(len(self._symbols) + 1))
+        self._symbol_rows = [order[bounds[slot]:bounds[slot + 1]] for slot in range(len(self._symbols))]
+        self._symbol_added = {}
+        self._symbol_stale = set()
+
+    def _reserve_rows(self, count):
+        size = self._rows + count
+        self._pos_user = _grown(self._pos_user, size, -1)
+        self._pos_symbol = _grown(self._pos_symbol, size)
+        self._pos_quantity = _grown(self._pos_quantity, size)
+        self._pos_cost = _grown(self._pos_cost, size)
+        self._pos_value = _grown(self._pos_value, size)
+
+    def load(self, positions):
+        """
+        Replace the whole book with (user_id, symbol, quantity, average_price, price)
+        rows; price is a fallback for symbols without a tick yet (None: valued at the
+        average price).
+        """
+        with self._lock:
+            # Connected clients and prices seen so far survive a reload
+            watching = {int(self._user_ids[slot]): int(self._watched[slot])
+                        for slot in np.flatnonzero(self._watched[:len(self._user_slot)])}
+            known = {symbol: float(self._prices[slot]) for symbol, slot in self._symbol_slot.items()
+                     if not np.isnan(self._prices[slot])}
+            self._reset()
+            for user_id, count in watching.items():
+                self._watched[self._user(user_id)] = count
+            for symbol, price in known.items():
+                self._prices[self._symbol(symbol)] = price
+            users, symbols, quantities, costs, values = [], [], [], [], []
+            for user_id, symbol, quantity, average_price, price in positions:
+                if quantity <= 0:
+                    continue
+                user_slot, symbol_slot = self._user(user_id), self._symbol(symbol.upper())
+                rows = self._user_rows.setdefault(user_slot, {})
+                if symbol_slot in rows:
+                    raise ValueError(f"Duplicate position for user {user_id} in {symbol}")
+                rows[symbol_slot] = len(users)
+                if not np.isnan(self._prices[symbol_slot]):
+                    price = self._prices[symbol_slot]
+                elif price is not None:
+                    self._prices[symbol_slot] = price
+                users.append(user_slot)
+                symbols.append(symbol_slot)
+                quantities.append(quantity)
+                costs.append(quantity * average_price)
+                values.append(quantity * (average_price if price is None else price))
+            self._reserve_rows(len(users))
+            self._rows = len(users)
+            self._pos_user[:self._rows] = users
+            self._pos_symbol[:self._rows] = symbols
+            self._pos_quantity[:self._rows] = quantities
+            self._pos_cost[:self._rows] = costs
+            self._pos_value[:self._rows] = values
+            self._index_symbols()
+            self._revalue_users()
+
+    def _revalue_users(self):
+        """Recompute all users' totals from the position rows (also removes rounding drift)."""
+        count = len(self._user_slot)
+        live = self._pos_user[:self._rows] >= 0
+        holders = self._pos_user[:self._rows][live]
+        self._user_value[:count] = np.bincount(holders, weights=self._pos_value[:self._rows][live], minlength=count)
+        self._user_cost[:count] = np.bincount(holders, weights=self._pos_cost[:self._rows][live], minlength=count)
+
+    def set_positions(self, user_id, positions):
+        """Replace one user's positions with (symbol, quantity, average_price, price) rows."""
+        with self._lock:
+            user_slot = self._user(user_id)
+            for symbol_slot, row in self._user_rows.pop(user_slot, {}).items():
+                self._user_value[user_slot] -= self._pos_value[row]
+                self._user_cost[user_slot] -= self._pos_cost[row]
+                self._pos_user[row] = -1
+                self._symbol_stale.add(symbol_slot)
+                self._dead += 1
+            merged = {}
+            for symbol, quantity, average_price, price in positions:
+                if quantity > 0:
+                    merged[self._symbol(symbol.upper())] = (quantity, average_price, price)
+            self._reserve_rows(len(merged))
+            rows = self._user_rows[user_slot] = {}
+            for symbol_slot, (quantity, average_price, price) in merged.items():
+                known = self._prices[symbol_slot]
+                if not np.isnan(known):
+                    price = known
+                elif price is not None:
+                    self._prices[symbol_slot] = price
+                row = rows[symbol_slot] = self._rows
+                self._rows += 1
+                self._pos_user[row] = user_slot
+                self._pos_symbol[row] = symbol_slot
+                self._pos_quantity[row] = quantity
+                self._pos_cost[row] = quantity * average_price
+                self._pos_value[row] = quantity * (average_price if price is None else price)
+                self._user_value[user_slot] += self._pos_value[row]
+                self._user_cost[user_slot] += self._pos_cost[row]
+                self._symbol_added.setdefault(symbol_slot, []).append(row)
+            if self._dead >= _COMPACT_MIN_DEAD and 2 * self._dead >= self._rows:
+                self._compact()
+
+    def _compact(self):
+        live = self._pos_user[:self._rows] >= 0
+        new_row = np.cumsum(live) - 1
+        for rows in self._user_rows.values():
+            for symbol_slot, row in rows.items():
+                rows[symbol_slot] = int(new_row[row])
+        count = int(live.sum())
+        for name in ("_pos_user", "_pos_symbol", "_pos_quantity", "_pos_cost", "_pos_value"):
+            array = getattr(self, name)
+            array[:count] = array[:self._rows][live]
+        self._pos_user[count:self._rows] = -1
+        self._rows, self._dead = count, 0
+        self._index_symbols()
+        self._revalue_users()
+
+    def on_price(self, symbol, price):
+        """
+        Revalue the holders of `symbol`; returns the ids of the watched users whose totals
+        changed (ids, not slots: load() renumbers the slots).
+        """
+        with self._lock:
+            symbol_slot = self._symbol_slot.get(symbol.upper())
+            if symbol_slot is None:
+                return np.empty(0, dtype=np.int64)
+            self._prices[symbol_slot] = price
+            rows = self._rows_of(symbol_slot)
+            if not len(rows):
+                return np.empty(0, dtype=np.int64)
+            values = self._pos_quantity[rows] * price
+            delta = values - self._pos_value[rows]
+            self._pos_value[rows] = values
+            holders = self._pos_user[rows]
+            # One row per user and symbol: holders are unique, so a fancy-index add is exact
+            self._user_value[holders] += delta
+            changed = holders[delta != 0]
+            return self._user_ids[changed[self._watched[changed] > 0]]
+
+    def _totals(self, slot):
+        value, cost = float(self._user_value[slot]), float(self._user_cost[slot])
+        return {
+            "market_value": value,
+            "cost_basis": cost,
+            "unrealised_pl": value - cost,
+            "unrealised_pl_pct": (value - cost) / cost * 100 if cost > 0 else 0.0,
+        }
+
+    def totals(self, user_id):
+        """Market value, cost basis and unrealised P/L of a user (None if unknown)."""
+        with self._lock:
+            slot = self._user_slot.get(user_id)
+            return None if slot is None else self._totals(slot)
+
+    def watched_totals(self, user_ids):
+        """[(user_id, totals)] for the given users that (still) have a client watching."""
+        with self._lock:
+            slots = ((int(user_id), self._user_slot.get(int(user_id))) for user_id in user_ids)
+            return [(user_id, self._totals(slot)) for user_id, slot in slots
+                    if slot is not None and self._watched[slot] > 0]
+
+    def watch(self, user_id):
+        with self._lock:
+            self._watched[self._user(user_id)] += 1
+
+    def is_watched(self, user_id):
+        with self._lock:
+            slot = self._user_slot.get(user_id)
+            return slot is not None and self._watched[slot] > 0
+
+    def unwatch(self, user_id):
+        with self._lock:
+            slot = self._user_slot.get(user_id)
+            if slot is not None and self._watched[slot] > 0:
+                self._watched[slot] -= 1
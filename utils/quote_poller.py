@@ -0,0 +1,108 @@
+"""
+Shared quote poller for the price-driven engines (orders, alerts, P&L).
+
+Each engine registers a price callback, a function listing the symbols it
+watches and how often those symbols should be polled. The poller:
+
+    - subscribes once to events.PRICE_UPDATED (every live quote of
+      utils/market_data.py) and hands each price to every registered callback
+    - runs one background thread that, while the exchange is open, polls the
+      union of the symbols of all engines that are due, each symbol once per
+      round (get_quote publishes PRICE_UPDATED, so every engine sees the price)
+
+so a symbol watched by several engines costs one upstream quote per round, not
+one per engine. The thread starts with the first registration, not at import.
+
+Usage:
+    import utils.quote_poller as quote_poller
+    quote_poller.register("orders", on_price, _book.symbols, interval=30)
+"""
+import logging
+import threading
+import time
+
+import utils.events as events
+import utils.market_data as market_data
+import utils.trading_calendar as trading_calendar
+
+logger = logging.getLogger(__name__)
+
+CLOSED_RECHECK_SECONDS = 3600.0     # longest sleep while the exchange is closed
+MIN_SLEEP_SECONDS = 1.0
+
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_clients = {}               # name -> {"on_price", "symbols", "interval", "next_poll"}
+_thread = None
+_stats = {"rounds": 0, "quotes": 0, "failed": 0}
+
+
+def register(name, on_price, symbols, interval):
+    """
+    Deliver prices to on_price(symbol, price) and poll symbols() every `interval`
+    seconds while the exchange is open (idempotent per name).
+    """
+    global _thread
+    with _lock:
+        _clients[name] = {"on_price": on_price, "symbols": symbols, "interval": interval, "next_poll": 0.0}
+        if _thread is None:
+            events.subscribe(events.PRICE_UPDATED, _on_price_event)
+            _thread = threading.Thread(target=_poll_loop, name="quote-poller", daemon=True)
+            _thread.start()
+    _wakeup.set()
+
+
+def _on_price_event(event_type, payload):
+    with _lock:
+        clients = list(_clients.items())
+    for name, client in clients:
+        try:
+            client["on_price"](payload["symbol"], payload["price"])
+        except Exception as e:
+            logger.error(f"Price update of {payload['symbol']} failed in {name}: {e}", exc_info=True)
+
+
+def _due_symbols(now):
+    with _lock:
+        due = [(name, client) for name, client in _clients.items() if client["next_poll"] <= now]
+        for _, client in due:
+            client["next_poll"] = now + client["interval"]
+    symbols = set()
+    for name, client in due:
+        try:
+            symbols.update(client["symbols"]())
+        except Exception as e:
+            logger.warning(f"Listing the symbols of {name} failed: {e}")
+    return sorted(symbols)
+
+
+def _poll_loop():
+    while True:
+        _wakeup.clear()
+        now = time.time()
+        if not trading_calendar.is_open(now):
+            upcoming = trading_calendar.next_open(now)
+            _wakeup.wait(min(max(upcoming - now, MIN_SLEEP_SECONDS), CLOSED_RECHECK_SECONDS)
+                         if upcoming else CLOSED_RECHECK_SECONDS)
+            continue
+        symbols = _due_symbols(now)
+        failed = 0
+        for symbol in symbols:
+            try:
+                # Publishes PRICE_UPDATED for live quotes, which reaches every registered engine
+                market_data.get_quote(symbol)
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Quote poll for {symbol} failed: {e}")
+        with _lock:
+            if symbols:
+                _stats["rounds"] += 1
+                _stats["quotes"] += len(symbols) - failed
+                _stats["failed"] += failed
+            next_poll = min((client["next_poll"] for client in _clients.values()), default=now + CLOSED_RECHECK_SECONDS)
+        _wakeup.wait(max(next_poll - time.time(), MIN_SLEEP_SECONDS))
+
+
+def get_stats():
+    with _lock:
+        return {**_stats, "engines": sorted(_clients)}
@@ -0,0 +1,328 @@
+"""
+Resilience helpers for calls to upstream services (price providers etc.).
+
+- call_with_deadline() runs a call in a bounded worker pool and gives up after a
+  deadline. Threads of calls that overran are not killed, but the pool is a
+  bulkhead: when all workers are busy new calls fail immediately instead of
+  piling up request threads behind a slow upstream.
+- CircuitBreaker trips after too many failures or too many slow calls in its
+  sliding window, rejects calls while open and lets a single probe through after
+  the open period (half-open) to decide whether to close again.
+- hedged_call() starts a second, equivalent request when the first one has not
+  answered within a delay (typically the upstream's p95 latency) and returns
+  whichever succeeds first.
+
+Breakers are registered by name; get_breaker_stats() and get_stats() return the
+state, trip counts and latency percentiles for dashboards.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent import futures
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_WORKERS = int(os.getenv("UPSTREAM_WORKERS", "16"))   # concurrent upstream calls per process
+HEDGE_WORKERS = 2 * UPSTREAM_WORKERS
+
+_pool_lock = threading.Lock()
+_upstream_pool = None
+_hedge_pool = None
+_inflight = threading.BoundedSemaphore(UPSTREAM_WORKERS)
+_stats = {"calls": 0, "deadline_exceeded": 0, "bulkhead_rejected": 0, "hedged": 0, "hedge_wins": 0}
+_breakers = {}
+
+
+class ResilienceError(Exception):
+    """Base class of the errors raised by this module."""
+
+
+class DeadlineExceeded(ResilienceError):
+    """The call did not finish within its deadline."""
+
+
+class BulkheadFullError(ResilienceError):
+    """All upstream workers are busy; the call was rejected without waiting."""
+
+
+class CircuitOpenError(ResilienceError):
+    """The circuit breaker is open and rejects calls."""
+
+
+class HedgeError(ResilienceError):
+    """All started requests of a hedged call failed."""
+
+    def __init__(self, errors, secondary_started):
+        super().__init__("; ".join(str(e) for e in errors) or "hedged call failed")
+        self.errors = errors
+        self.secondary_started = secondary_started
+
+
+def _pools():
+    global _upstream_pool, _hedge_pool
+    if _upstream_pool is None:
+        with _pool_lock:
+            if _upstream_pool is None:
+                _hedge_pool = futures.ThreadPoolExecutor(HEDGE_WORKERS, thread_name_prefix="upstream-hedge")
+                _upstream_pool = futures.ThreadPoolExecutor(UPSTREAM_WORKERS, thread_name_prefix="upstream")
+    return _upstream_pool, _hedge_pool
+
+
+# --- Deadlines ---
+
+def call_with_deadline(fn, timeout, *args, **kwargs):
+    """
+    Run fn(*args, **kwargs) in the upstream pool and return its result.
+
+    Raises DeadlineExceeded after `timeout` seconds and BulkheadFullError if all
+    UPSTREAM_WORKERS are busy. Exceptions of fn are re-raised.
+    """
+    if not _inflight.acquire(blocking=False):
+        _stats["bulkhead_rejected"] += 1
+        raise BulkheadFullError(f"all {UPSTREAM_WORKERS} upstream workers busy")
+
+    def run():
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _inflight.release()
+
+    _stats["calls"] += 1
+    upstream_pool, _ = _pools()
+    try:
+        future = upstream_pool.submit(run)
+    except Exception:
+        _inflight.release()
+        raise
+    try:
+        return future.result(timeout=timeout)
+    except futures.TimeoutError:
+        _stats["deadline_exceeded"] += 1
+        raise DeadlineExceeded(f"no answer within {timeout:.1f}s") from None
+
+
+# --- Latency percentiles ---
+
+class LatencyWindow:
+    """The last `size` latencies in milliseconds, for percentile estimates."""
+
+    def __init__(self, size=100, min_samples=20):
+        self.samples = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def add(self, latency_ms):
+        self.samples.append(latency_ms)
+
+    def percentile(self, pct):
+        """Latency percentile in ms, or None while there are fewer than min_samples."""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+# --- Circuit breaker ---
+
+class CircuitBreaker:
+    """
+    Count-based circuit breaker.
+
+    The last `window` calls are kept as (failed, slow) outcomes. Once at least
+    `min_calls` are recorded, the breaker opens when the failure rate reaches
+    `failure_rate` or the share of calls slower than `slow_call_ms` reaches
+    `slow_call_rate`. After `open_seconds` one probe call is allowed (half-open):
+    a fast success closes the breaker, anything else opens it again.
+
+    Exceptions listed in `ignore_exceptions` (e.g. a rate limit of one API key)
+    count neither as success nor as failure. Neither does BulkheadFullError: a
+    call rejected by the local upstream pool never reached the upstream.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, window=20, min_calls=5, failure_rate=0.5, slow_call_ms=3000,
+                 slow_call_rate=0.6, open_seconds=30, ignore_exceptions=()):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.ignore_exceptions = (BulkheadFullError,) + tuple(ignore_exceptions)
+        self.state = self.CLOSED
+        self.trips = 0
+        self.rejected = 0
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.last_error = None
+        self.latency = LatencyWindow()
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        """True if a call would currently be allowed (without reserving the half-open probe)."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return time.monotonic() - self._opened_at >= self.open_seconds
+            return not self._probe_in_flight
+
+    def allow(self):
+        """Reserve permission for one call; False if the breaker rejects it."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self.trips += 1
+        logger.warning(f"Circuit breaker '{self.name}' opened (trip {self.trips}, last error: {self.last_error})")
+
+    def record(self, ok, latency_ms=None, error=None):
+        """Record the outcome of a call that was allowed by allow()."""
+        slow = latency_ms is not None and latency_ms >= self.slow_call_ms
+        with self._lock:
+            self.calls += 1
+            if latency_ms is not None:
+                self.latency.add(latency_ms)
+            if not ok:
+                self.failures += 1
+                self.last_error = str(error) if error is not None else "failure"
+            if slow:
+                self.slow_calls += 1
+
+            if self.state == self.HALF_OPEN:
+                if ok and not slow:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                    self._probe_in_flight = False
+                    logger.info(f"Circuit breaker '{self.name}' closed again")
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append((not ok, slow))
+            if self.state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                failed = sum(1 for f, _ in self._outcomes if f) / len(self._outcomes)
+                slowed = sum(1 for _, s in self._outcomes if s) / len(self._outcomes)
+                if failed >= self.failure_rate or slowed >= self.slow_call_rate:
+                    self._open()
+                    self._outcomes.clear()
+
+    def release(self):
+        """Give back a half-open probe whose call ended without a usable outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker; raises CircuitOpenError while the breaker is open."""
+        if not self.allow():
+            raise CircuitOpenError(f"circuit '{self.name}' is {self.state}")
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except self.ignore_exceptions:
+            self.release()
+            raise
+        except Exception as e:
+            self.record(False, (time.perf_counter() - started) * 1000, error=e)
+            raise
+        self.record(True, (time.perf_counter() - started) * 1000)
+        return result
+
+    @property
+    def p95_ms(self):
+        return self.latency.percentile(95)
+
+    def stats(self):
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = max(0.0, round(self.open_seconds - (time.monotonic() - self._opened_at), 1))
+            outcomes = list(self._outcomes)
+        p50, p95 = self.latency.percentile(50), self.latency.percentile(95)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "trips": self.trips,
+            "calls": self.calls,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+            "rejected": self.rejected,
+            "window_failure_rate": round(sum(1 for f, _ in outcomes if f) / len(outcomes), 3) if outcomes else 0.0,
+            "latency_p50_ms": round(p50, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95, 1) if p95 is not None else None,
+            "retry_in_s": retry_in,
+            "last_error": self.last_error,
+        }
+
+
+def get_breaker(name, **settings):
+    """Return the breaker registered under name, creating it with the given settings."""
+    with _pool_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **settings)
+        return breaker
+
+
+def get_breaker_stats(prefix=""):
+    with _pool_lock:
+        breakers = [b for name, b in sorted(_breakers.items()) if name.startswith(prefix)]
+    return [b.stats() for b in breakers]
+
+
+# --- Hedged requests ---
+
+def hedged_call(primary, secondary, delay):
+    """
+    Call primary(); if it has not finished after `delay` seconds, also call
+    secondary() and return the first successful result as (index, result) with
+    index 0 for primary and 1 for secondary.
+
+    Raises HedgeError with the collected errors if every started call failed.
+    The slower call is left running in the background; its result is dropped.
+    """
+    _, hedge_pool = _pools()
+    first = hedge_pool.submit(primary)
+    done, _ = futures.wait([first], timeout=delay)
+    if done:
+        if first.exception() is None:
+            return 0, first.result()
+        raise HedgeError([first.exception()], secondary_started=False)
+
+    _stats["hedged"] += 1
+    pending = {first: 0, hedge_pool.submit(secondary): 1}
+    errors = []
+    while pending:
+        done, _ = futures.wait(list(pending), return_when=futures.FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            if future.exception() is None:
+                if index == 1:
+                    _stats["hedge_wins"] += 1
+                return index, future.result()
+            errors.append(future.exception())
+    raise HedgeError(errors, secondary_started=True)
+
+
+def get_stats():
+    """Counters of the upstream pool (deadlines, bulkhead rejections, hedging)."""
+    busy = UPSTREAM_WORKERS - _inflight._value  # BoundedSemaphore has no public counter
+    return {**_stats, "in_flight": busy, "workers": UPSTREAM_WORKERS}
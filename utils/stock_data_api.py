@@ -1,15 +1,19 @@
-import requests
-import pandas as pd
 from datetime import datetime, timedelta
 import dotenv
 import os
 import time
 import logging
+import threading
+from collections import OrderedDict
 from rich import print
-from flask import g
 
 from database.handler.postgres.postgres_db_handler import app_api_request
 from database.handler.postgres.postgre_market_mayhem_handler import check_if_mayhem
+import utils.market_data as market_data
+import utils.trading_calendar as trading_calendar
+from utils.lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
 
 # Load environment variables from .env file
 dotenv.load_dotenv()
@@ -18,9 +22,21 @@ dotenv.load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Twelve Data API Key - einfacher Zugriff ohne Key-Rotation
+# Twelve Data API Key (weitere Keys und Provider verwaltet utils/market_data.py)
 TWELVE_DATA_API_KEY = os.getenv('TWELVE_DATA_API_KEY')
 
+# Cache for get_cached_or_live_data; entries expire at the next session boundary (utils/trading_calendar.py)
+PRICE_CACHE_MAX_ENTRIES = 256
+PRICE_REFRESH_INTERVAL = 30        # seconds between background refresh passes while the market is open
+PRICE_REFRESH_AHEAD = 45           # entries expiring within this many seconds are refreshed
+PRICE_REFRESH_RECENT = 15 * 60     # only entries requested within this window are kept warm
+PRICE_REFRESH_MAX = 4              # refreshes per pass, so the warm-up stays within the API budgets
+INTERVAL_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '60m': 3600}
+
+_price_cache = OrderedDict()       # (SYMBOL, timeframe) -> {'df', 'provider', 'expires_at', 'last_access'}
+_price_cache_lock = threading.Lock()
+_price_refresher = None
+
 # Demo function that can work without API key
 def get_demo_stock_data(symbol: str = "DEMO", days: int = 30, is_minutes: bool = False):
     """
@@ -86,41 +102,38 @@ def get_demo_stock_data(symbol: str = "DEMO", days: int = 30, is_minutes: bool =
     df = apply_mayhem_effect(df)
     return df
 
-def _map_interval_to_twelve_data(custom_interval: str):
-    """Maps common interval strings to Twelve Data format."""
+def _normalize_interval(custom_interval: str):
+    """Maps common interval strings to the intervals of utils/market_data.py."""
     if not custom_interval:
-        return '1day' # Default
-    
+        return '1d' # Default
+
     custom_interval = custom_interval.lower()
     mapping = {
-        '1m': '1min', '5m': '5min', '15m': '15min',
-        '30m': '30min', '60m': '1h',
-        'daily': '1day', '1d': '1day',
-        '1wk': '1week', '1w': '1week',
-        '1mo': '1month', '1m_month': '1month' # distinguish from 1minute
+        '1m': '1m', '5m': '5m', '15m': '15m',
+        '30m': '30m', '60m': '60m', '1h': '60m',
+        'daily': '1d', '1d': '1d',
+        '1wk': '1wk', '1w': '1wk',
+        '1mo': '1mo', '1m_month': '1mo' # distinguish from 1minute
     }
-    return mapping.get(custom_interval, '1day')
+    return mapping.get(custom_interval, '1d')
 
 def get_stock_data(symbol: str, period: str = None, interval: str = None, start_date: str = None, end_date: str = None):
     """
-    Get stock data for a given symbol using Twelve Data API.
+    Get stock data for a given symbol from the market data layer (utils/market_data.py),
+    which fails over between Twelve Data, yfinance and Alpha Vantage within shared rate budgets.
     
     Args:
         symbol: The stock symbol (e.g., 'AAPL')
         period: Optional. E.g., '1d', '5d'. Used to calculate start_date if start_date is None for intraday.
-        interval: Data interval (e.g., '1m' for 1 minute, 'daily'). Will be mapped to Twelve Data format.
+        interval: Data interval (e.g., '1m' for 1 minute, 'daily').
         start_date: Start date for data in YYYY-MM-DD format.
         end_date: End date for data in YYYY-MM-DD format.
     
     Returns:
-        DataFrame with Open, High, Low, Close, Volume columns and an 'is_demo' attribute.
+        DataFrame with Open, High, Low, Close, Volume columns and an 'is_demo' attribute,
+        or None if no provider could deliver data.
     """
-    # Prüfen, ob API-Key verfügbar ist
-    if not TWELVE_DATA_API_KEY:
-        logger.warning("No Twelve Data API key available. Cannot fetch live data.")
-        return None # get_cached_or_live_data wird zu Demo-Daten zurückfallen
-        
-    td_interval = _map_interval_to_twelve_data(interval)
+    md_interval = _normalize_interval(interval)
 
     # Determine start_date and end_date if not provided
     now = datetime.now()
@@ -128,7 +141,7 @@ def get_stock_data(symbol: str, period: str = None, interval: str = None, start_
         end_date = now.strftime('%Y-%m-%d')
     
     if start_date is None:
-        if td_interval in ['1min', '5min', '15min', '30min', '1h']: # Intraday
+        if md_interval in market_data.INTRADAY_INTERVALS: # Intraday
             days_to_subtract = 1
             if period:
                 try:
@@ -140,89 +153,23 @@ def get_stock_data(symbol: str, period: str = None, interval: str = None, start_
         else: # Daily, weekly, monthly
             start_date = (datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
 
-    # Parameter für den API-Aufruf
-    params = {
-        "symbol": symbol,
-        "interval": td_interval,
-        "apikey": TWELVE_DATA_API_KEY,
-        "start_date": start_date,
-        "end_date": end_date,
-        "outputsize": 5000  # Maximale Datenpunkte anfordern
-    }
-    
     try:
-        logger.info(f"Fetching Twelve Data for {symbol}, interval: {td_interval}, start: {start_date}, end: {end_date}")
-        print(f"Fetching Twelve Data for {symbol} (interval: {td_interval}, from: {start_date} to: {end_date})...")
-        
-        response = requests.get("https://api.twelvedata.com/time_series", params=params)
-        
-        # Corrected call: Provide the required api_name and endpoint arguments.
-        app_api_request(api_name="Twelve Data", endpoint="time_series") 
-        
-        print(f"[red]API request to Twelve Data completed for {symbol}.")
-        # Fehlerbehandlung für HTTP-Fehler
-        if response.status_code == 429:  # Rate limit exceeded
-            logger.warning(f"Rate limit exceeded for Twelve Data API key.")
-            return None
-            
-        response.raise_for_status()  # Andere HTTP-Fehler auslösen
-        
-        data = response.json()
-
-        # API-Fehler überprüfen
-        if data.get("status") == "error" or "values" not in data:
-            error_message = data.get("message", "Unknown API error")
-            logger.error(f"Twelve Data API Error for {symbol}: {error_message}")
-            return None
-        
-        # Prüfen, ob Daten zurückgegeben wurden
-        if not data["values"]:
-            logger.warning(f"No data values returned by Twelve Data for {symbol}")
-            return pd.DataFrame()  # Leeren DataFrame zurückgeben
-
-        # DataFrame erstellen und formatieren
-        df = pd.DataFrame(data["values"])
-        
-        # Spalten umbenennen
-        column_mapping = {
-            "datetime": "Datetime",  # Wird Index
-            "open": "Open",
-            "high": "High",
-            "low": "Low", 
-            "close": "Close",
-            "volume": "Volume"
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # Datetime als Index setzen
-        df["Datetime"] = pd.to_datetime(df["Datetime"])
-        df = df.set_index("Datetime")
-        
-        # Spalten in numerische Werte konvertieren
-        for col in ["Open", "High", "Low", "Close", "Volume"]:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        # Sortieren nach Datum
-        df = df.sort_index()
-        
-        logger.info(f"Successfully fetched {len(df)} data points for {symbol}")
-        df.is_demo = False  # Als echte API-Daten markieren
+        logger.info(f"Fetching market data for {symbol}, interval: {md_interval}, start: {start_date}, end: {end_date}")
+        df = market_data.get_history(symbol, interval=md_interval, start_date=start_date, end_date=end_date)
+        if df.is_stale:
+            logger.warning(f"Providers unavailable, serving cached data for {symbol} from {df.provider}")
+        else:
+            app_api_request(api_name=df.provider, endpoint="time_series")
+            logger.info(f"Successfully fetched {len(df)} data points for {symbol} from {df.provider}")
         return df
-            
-    except requests.exceptions.HTTPError as http_err:
-        logger.error(f"HTTP error occurred with Twelve Data: {http_err}")
-        return None
-    except requests.exceptions.RequestException as req_err:
-        logger.error(f"Request error occurred with Twelve Data: {req_err}")
+    except market_data.MarketDataError as e:
+        logger.error(f"No market data for {symbol}: {e}")
         return None
     except Exception as e:
-        logger.error(f"Error fetching stock data from Twelve Data: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"Error fetching stock data for {symbol}: {e}", exc_info=True)
         return None
 
-def apply_mayhem_effect(df: pd.DataFrame):
+def apply_mayhem_effect(df: "pd.DataFrame"):
     """
     Überprüft auf Marktereignisse und passt die Preise im DataFrame entsprechend an.
     """
@@ -244,19 +191,10 @@ def apply_mayhem_effect(df: pd.DataFrame):
         print("[green]No market mayhem detected.")
     return df
 
-def get_cached_or_live_data(symbol, timeframe):
-    """
-    Get stock data using Twelve Data API, with fallback to demo data.
-    
-    Args:
-        symbol: Stock symbol
-        timeframe: One of '1MIN', '1W', '1M', '3M', '6M', '1Y', 'ALL'
-    
-    Returns:
-        DataFrame with stock data and an 'is_demo' attribute.
-    """
-    interval_param = None
-    start_date_param = None
+TIMEFRAMES = ('1MIN', '1W', '1M', '3M', '6M', '1Y', 'ALL')
+
+def _timeframe_params(timeframe):
+    """(interval, start_date, end_date) for a chart timeframe (TIMEFRAMES; anything else is 3M)."""
     end_date_param = datetime.now()
     
     # Configure parameters based on timeframe
@@ -285,11 +223,63 @@ def get_cached_or_live_data(symbol, timeframe):
         interval_param = '1d'
         start_date_param = end_date_param - timedelta(days=90)
     
-    start_date_str = start_date_param.strftime('%Y-%m-%d')
-    end_date_str = end_date_param.strftime('%Y-%m-%d')
-    
-    # Versuche Live-Daten zu holen
+    return interval_param, start_date_param.strftime('%Y-%m-%d'), end_date_param.strftime('%Y-%m-%d')
+
+def _cache_key(symbol, timeframe):
+    """Price cache key; timeframes without parameters of their own share the 3M entry they fetch."""
+    return symbol.upper(), timeframe if timeframe in TIMEFRAMES else '3M'
+
+def _get_cached_frame(key):
+    """Copy of a valid cached frame (callers modify it in place), or None."""
+    now = time.time()
+    with _price_cache_lock:
+        entry = _price_cache.get(key)
+        if entry is None or entry['expires_at'] <= now:
+            return None
+        entry['last_access'] = now
+        _price_cache.move_to_end(key)
+        df = entry['df'].copy()
+    df.is_demo = False
+    df.is_stale = False
+    df.provider = entry['provider']
+    return df
+
+def _fetch_timeframe(symbol, timeframe):
+    """Fetch live data for the timeframe and cache it until the next session boundary."""
+    interval_param, start_date_str, end_date_str = _timeframe_params(timeframe)
     df = get_stock_data(symbol, interval=interval_param, start_date=start_date_str, end_date=end_date_str)
+    if df is None or df.empty or getattr(df, 'is_stale', False):
+        return df
+    # Daily bars only change while the exchange is open, intraday bars are frozen after the close
+    expires_at = trading_calendar.cache_expiry(bar_seconds=INTERVAL_SECONDS.get(interval_param))
+    key = _cache_key(symbol, timeframe)
+    with _price_cache_lock:
+        last_access = _price_cache[key]['last_access'] if key in _price_cache else time.time()
+        _price_cache[key] = {'df': df.copy(), 'provider': df.provider, 'expires_at': expires_at, 'last_access': last_access}
+        _price_cache.move_to_end(key)
+        while len(_price_cache) > PRICE_CACHE_MAX_ENTRIES:
+            _price_cache.popitem(last=False)
+    return df
+
+def get_cached_or_live_data(symbol, timeframe):
+    """
+    Get stock data from the price cache or the market data layer, with fallback to demo data.
+    Cached data stays valid until the next trading session boundary, so nights, weekends
+    and holidays are served without upstream requests.
+    
+    Args:
+        symbol: Stock symbol
+        timeframe: One of '1MIN', '1W', '1M', '3M', '6M', '1Y', 'ALL'
+    
+    Returns:
+        DataFrame with stock data and an 'is_demo' attribute.
+    """
+    # Versuche Cache, dann Live-Daten
+    df = _get_cached_frame(_cache_key(symbol, timeframe))
+    if df is not None:
+        logger.info(f"Price cache hit for {symbol} (timeframe {timeframe})")
+    else:
+        df = _fetch_timeframe(symbol, timeframe)
     
     if df is None or df.empty:
         print(f"No live data for {symbol} (timeframe {timeframe}), using demo data.")
@@ -314,6 +304,46 @@ def get_cached_or_live_data(symbol, timeframe):
         df.is_demo = False
     return df
 
+def warm_price_cache(symbol, timeframe):
+    """
+    Load the timeframe into the price cache unless a valid entry exists (startup warm-up).
+    Returns True if live data is cached afterwards.
+    """
+    key = _cache_key(symbol, timeframe)
+    with _price_cache_lock:
+        entry = _price_cache.get(key)
+        if entry is not None and entry['expires_at'] > time.time():
+            return True
+    df = _fetch_timeframe(symbol, timeframe)
+    return df is not None and not df.empty and not getattr(df, 'is_stale', False)
+
+def _price_refresh_loop():
+    while True:
+        now = time.time()
+        if not trading_calendar.is_open(now):
+            # Outside market hours cached bars stay valid until the next open: nothing to refresh
+            upcoming = trading_calendar.next_open(now)
+            time.sleep(min(max(upcoming - now, 1.0), 3600.0) if upcoming else 3600.0)
+            continue
+        with _price_cache_lock:
+            due = [
+                (entry['last_access'], key) for key, entry in _price_cache.items()
+                if entry['last_access'] > now - PRICE_REFRESH_RECENT and entry['expires_at'] - now < PRICE_REFRESH_AHEAD
+            ]
+        for _, (symbol, timeframe) in sorted(due, reverse=True)[:PRICE_REFRESH_MAX]:
+            try:
+                _fetch_timeframe(symbol, timeframe)
+            except Exception as e:
+                logger.warning(f"Background refresh of {symbol} ({timeframe}) failed: {e}")
+        time.sleep(PRICE_REFRESH_INTERVAL)
+
+def start_price_refresher():
+    """Keep recently requested charts warm during market hours (idempotent, call at app startup)."""
+    global _price_refresher
+    if _price_refresher is None or not _price_refresher.is_alive():
+        _price_refresher = threading.Thread(target=_price_refresh_loop, name="price-refresher", daemon=True)
+        _price_refresher.start()
+
 # Example usage:
 if __name__ == "__main__":
     print("Testing Twelve Data API stock data retrieval")
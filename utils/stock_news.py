@@ -1,6 +1,6 @@
-import finnhub
 from datetime import datetime, timedelta
 import os
+import threading
 import dotenv
 # Load environment variables from .env file
 dotenv.load_dotenv()
@@ -8,8 +8,19 @@ dotenv.load_dotenv()
 API_KEY = os.getenv("FINNHUB_API_KEY")
 
 
-# Initialize the Finnhub client with your API key
-finnhub_client = finnhub.Client(api_key=API_KEY)
+# The Finnhub client is created on first use instead of at import time
+_finnhub_client = None
+_finnhub_client_lock = threading.Lock()
+
+def get_finnhub_client():
+    """Return the shared Finnhub client, creating it on first use."""
+    global _finnhub_client
+    if _finnhub_client is None:
+        with _finnhub_client_lock:
+            if _finnhub_client is None:
+                import finnhub  # deferred: only needed once news are fetched
+                _finnhub_client = finnhub.Client(api_key=API_KEY)
+    return _finnhub_client
 
 def fetch_company_news(symbol, from_date, to_date):
     """
@@ -20,7 +31,7 @@ def fetch_company_news(symbol, from_date, to_date):
     :param to_date: End date for fetching news (YYYY-MM-DD)
     :return: List of news articles
     """
-    news = finnhub_client.company_news(symbol, _from=from_date, to=to_date)
+    news = get_finnhub_client().company_news(symbol, _from=from_date, to=to_date)
     return news
 
 def fetch_general_news(category="general"):
@@ -30,7 +41,7 @@ def fetch_general_news(category="general"):
     :param category: Category of news (e.g., "general", "forex", "crypto", etc.)
     :return: List of news articles
     """
-    news = finnhub_client.general_news(category=category)
+    news = get_finnhub_client().general_news(category=category)
     for article in news:
         # Ensure 'image' field exists and is not the placeholder
         image_url = article.get('image')
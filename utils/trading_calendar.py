@@ -0,0 +1,217 @@
+"""
+Exchange calendar for NYSE/NASDAQ (both use the same sessions and holidays).
+
+Sessions are derived from the exchange rules (no network access or calendar
+package needed) for FIRST_YEAR..LAST_YEAR and kept as two sorted arrays of
+UTC epoch seconds, opens[i] and closes[i]. All queries are a bisect on these
+arrays, so is_open()/next_open() cost about a microsecond.
+
+- Regular session 09:30-16:00 America/New_York, early close 13:00 on July 3,
+  the day after Thanksgiving and Christmas Eve.
+- Holidays: New Year's Day, Martin Luther King Jr. Day, Presidents' Day, Good
+  Friday, Memorial Day, Juneteenth (since 2022), Independence Day, Labor Day,
+  Thanksgiving and Christmas, with the usual weekend observance, plus the
+  unscheduled closures in UNSCHEDULED_CLOSURES.
+
+Every function takes `ts` as epoch seconds, a datetime (naive = local time) or
+None for now, and returns epoch seconds.
+
+Usage:
+    import utils.trading_calendar as trading_calendar
+    trading_calendar.is_open()
+    expires_at = trading_calendar.cache_expiry(bar_seconds=60)
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+FIRST_YEAR = 2000
+LAST_YEAR = 2045
+OPEN_TIME = (9, 30)
+CLOSE_TIME = (16, 0)
+EARLY_CLOSE_TIME = (13, 0)
+SETTLE_SECONDS = 15 * 60             # providers finalise the daily bar some minutes after the close
+DAILY_BAR_TTL_OPEN = 300             # the current daily bar changes during the session
+
+UNSCHEDULED_CLOSURES = {
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),  # September 11
+    date(2004, 6, 11),   # Ronald Reagan
+    date(2007, 1, 2),    # Gerald Ford
+    date(2012, 10, 29), date(2012, 10, 30),  # Hurricane Sandy
+    date(2018, 12, 5),   # George H. W. Bush
+    date(2025, 1, 9),    # Jimmy Carter
+}
+
+_lock = threading.Lock()
+_opens = None                        # array('d') of session opens, UTC epoch seconds
+_closes = None                       # array('d') of session closes, UTC epoch seconds
+
+
+# --- Holiday rules ---
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th weekday (0 = Monday) of the month; n = -1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def holidays(year):
+    """Full-day closures of the year."""
+    days = {
+        _nth_weekday(year, 1, 0, 3),         # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),         # Presidents' Day
+        _easter(year) - timedelta(days=2),   # Good Friday
+        _nth_weekday(year, 5, 0, -1),        # Memorial Day
+        _observed(date(year, 7, 4)),         # Independence Day
+        _nth_weekday(year, 9, 0, 1),         # Labor Day
+        _nth_weekday(year, 11, 3, 4),        # Thanksgiving
+        _observed(date(year, 12, 25)),       # Christmas
+    }
+    # New Year's Day on a Saturday is not made up on the preceding Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))   # Juneteenth
+    days.update(d for d in UNSCHEDULED_CLOSURES if d.year == year)
+    return days
+
+
+def _early_closes(year, closed):
+    candidates = (
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),   # day after Thanksgiving
+        date(year, 12, 24),
+    )
+    return {d for d in candidates if d.weekday() < 5 and d not in closed}
+
+
+# --- Session arrays ---
+
+def _epoch(day, hour_minute):
+    return datetime(day.year, day.month, day.day, *hour_minute, tzinfo=EXCHANGE_TZ).timestamp()
+
+
+def _build_sessions():
+    opens, closes = array("d"), array("d")
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        closed = holidays(year)
+        early = _early_closes(year, closed)
+        day = date(year, 1, 1)
+        while day.year == year:
+            if day.weekday() < 5 and day not in closed:
+                opens.append(_epoch(day, OPEN_TIME))
+                closes.append(_epoch(day, EARLY_CLOSE_TIME if day in early else CLOSE_TIME))
+            day += timedelta(days=1)
+    return opens, closes
+
+
+def _sessions():
+    global _opens, _closes
+    if _opens is None:
+        with _lock:
+            if _opens is None:
+                _opens, _closes = _build_sessions()
+    return _opens, _closes
+
+
+def _to_epoch(ts):
+    if ts is None:
+        return time.time()
+    if isinstance(ts, datetime):
+        return ts.timestamp()
+    return float(ts)
+
+
+# --- Queries ---
+
+def is_open(ts=None):
+    """True if the regular session is open at ts."""
+    t = _to_epoch(ts)
+    opens, closes = _sessions()
+    i = bisect_right(opens, t) - 1
+    return i >= 0 and t < closes[i]
+
+
+def next_open(ts=None):
+    """Open of the first session starting after ts (None beyond LAST_YEAR)."""
+    opens, _ = _sessions()
+    i = bisect_right(opens, _to_epoch(ts))
+    return opens[i] if i < len(opens) else None
+
+
+def next_close(ts=None):
+    """Close of the current session if open, otherwise of the next one."""
+    _, closes = _sessions()
+    i = bisect_right(closes, _to_epoch(ts))
+    return closes[i] if i < len(closes) else None
+
+
+def previous_close(ts=None):
+    """Close of the last session that ended at or before ts (None before FIRST_YEAR)."""
+    _, closes = _sessions()
+    i = bisect_right(closes, _to_epoch(ts)) - 1
+    return closes[i] if i >= 0 else None
+
+
+def is_trading_day(day):
+    """True if the exchange has a session on the given date."""
+    opens, _ = _sessions()
+    start = _epoch(day, (0, 0))
+    i = bisect_right(opens, start)
+    return i < len(opens) and opens[i] < start + 86400
+
+
+def cache_expiry(ts=None, bar_seconds=None):
+    """
+    Epoch seconds until which price bars fetched at ts stay valid.
+
+    While the session is open, intraday bars (bar_seconds) are valid until the
+    next bar boundary and daily bars for DAILY_BAR_TTL_OPEN. Data fetched within
+    SETTLE_SECONDS after a close is refreshed once to get the final bar; after
+    that it stays valid until the next open, i.e. across nights, weekends and
+    holidays.
+    """
+    t = _to_epoch(ts)
+    if is_open(t):
+        if bar_seconds:
+            expiry = t - t % bar_seconds + bar_seconds
+        else:
+            expiry = t + DAILY_BAR_TTL_OPEN
+        return min(expiry, next_close(t) + SETTLE_SECONDS)
+    last_close = previous_close(t)
+    if last_close is not None and t < last_close + SETTLE_SECONDS:
+        return last_close + SETTLE_SECONDS
+    upcoming = next_open(t)
+    return upcoming if upcoming is not None else t + DAILY_BAR_TTL_OPEN
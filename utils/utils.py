@@ -2,6 +2,7 @@ import functools
 from flask import g, flash, redirect, url_for, request, session, jsonify, current_app
 from rich import print
 from database.handler.postgres.postgres_db_handler import get_db_connection, add_analytics, get_user_by_id
+import database.handler.postgres.postgres_balance_handler as balance_handler
 import random
 import datetime
 import logging
@@ -96,26 +97,24 @@ def process_easter_egg(code):
     code_data = valid_codes[code.upper()]
     user_id = g.user.get('id')
     
+    def redeem(conn, account):
+        # Runs in the user's balance queue with the user row locked, so the same code
+        # cannot be redeemed twice by parallel requests
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM easter_eggs_redeemed WHERE user_id = %s AND code = %s", 
+                        (account.user_id, code.upper()))
+            if cur.fetchone():
+                return False
+            # Record that this code has been redeemed
+            cur.execute("INSERT INTO easter_eggs_redeemed (user_id, code, redeemed_at) VALUES (%s, %s, %s)",
+                       (account.user_id, code.upper(), datetime.datetime.now()))
+        # Award credits to the user
+        account.balance += code_data["credits"]
+        return True
+
     try:
-        # Check if this code has already been redeemed by this user
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Check if this code has been redeemed already
-        cur.execute("SELECT id FROM easter_eggs_redeemed WHERE user_id = %s AND code = %s", 
-                    (user_id, code.upper()))
-        if cur.fetchone():
+        if not balance_handler.run_balance_command(user_id, redeem):
             return False, "You've already redeemed this easter egg!"
-            
-        # Award credits to the user
-        cur.execute("UPDATE users SET balance = balance + %s WHERE id = %s", 
-                   (code_data["credits"], user_id))
-        
-        # Record that this code has been redeemed
-        cur.execute("INSERT INTO easter_eggs_redeemed (user_id, code, redeemed_at) VALUES (%s, %s, %s)",
-                   (user_id, code.upper(), datetime.datetime.now()))
-        
-        conn.commit()
         add_analytics(user_id, f"easter_egg_redeemed_{code.upper()}", "utils:process_easter_egg")
         
         return True, code_data["message"]
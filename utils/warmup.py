@@ -0,0 +1,162 @@
+"""
+Startup warm-up and readiness state for the FastAPI and Flask apps.
+
+After a deploy every worker starts with empty caches, and the first requests
+would all go to the database and the price providers at once. start() runs a
+warm-up in a background thread instead:
+
+- reference data: badge catalog, roadmap bundles, XP tables and the asset list
+- price bars (WARMUP_TIMEFRAMES) and quotes for the WARMUP_SYMBOLS symbols held
+  by the most users (table portfolio)
+
+Tasks run on at most WARMUP_WORKERS threads; upstream calls additionally go
+through the request budgets and breakers of utils/market_data.py. The worker is
+ready once all tasks finished or WARMUP_TIMEOUT passed. Failed tasks do not
+block readiness: the caches then fill on first use, as without warm-up. The
+/ready endpoints return 503 until then, so the load balancer only routes to
+warm workers.
+
+Usage:
+    import utils.warmup as warmup
+    warmup.start()              # at app startup
+    warmup.get_status()         # {'ready': ..., 'status': ..., ...}
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import database.handler.postgres.postgres_db_handler as db_handler
+import database.handler.postgres.postgres_badges_handler as badges_handler
+import database.handler.postgres.postgre_roadmap_handler as roadmap_handler
+import database.handler.postgres.postgre_transactions_handler as transactions_handler
+import utils.market_data as market_data
+import utils.stock_data_api as stock_data_api
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_SYMBOLS = int(os.getenv("WARMUP_SYMBOLS", "20"))
+WARMUP_WORKERS = int(os.getenv("WARMUP_WORKERS", "4"))
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "90"))      # seconds until the worker reports ready anyway
+# '3M' is the default chart; the portfolio valuation asks for '1D', which shares the 3M cache entry
+WARMUP_TIMEFRAMES = tuple(t.strip() for t in os.getenv("WARMUP_TIMEFRAMES", "3M").split(",") if t.strip())
+MAX_REPORTED_ERRORS = 10
+
+REFERENCE_DATA = (
+    ("badges", badges_handler.get_badge_catalog),
+    ("roadmaps", roadmap_handler.load_roadmap_bundles),
+    ("xp_tables", db_handler.get_xp_tables),
+    ("assets", lambda: _check(transactions_handler.get_all_assets())),
+)
+
+_ready = threading.Event()
+_lock = threading.Lock()
+_thread = None
+_status = {
+    "status": "pending",
+    "started_at": None,
+    "duration_ms": None,
+    "symbols": [],
+    "tasks": 0,
+    "failed": 0,
+    "errors": [],
+}
+
+
+def _update(**fields):
+    with _lock:
+        _status.update(fields)
+
+
+def _check(result):
+    # Handlers that report errors as {"success": False, "message": ...}
+    if not result.get("success"):
+        raise RuntimeError(result.get("message"))
+
+
+def _prefetch_bars(symbol, timeframe):
+    if not stock_data_api.warm_price_cache(symbol, timeframe):
+        raise RuntimeError("no live data")
+
+
+def _tasks(symbols):
+    tasks = list(REFERENCE_DATA)
+    for symbol in symbols:
+        for timeframe in WARMUP_TIMEFRAMES:
+            tasks.append((f"bars {symbol} {timeframe}", lambda s=symbol, t=timeframe: _prefetch_bars(s, t)))
+        tasks.append((f"quote {symbol}", lambda s=symbol: market_data.get_quote(s)))
+    return tasks
+
+
+def run():
+    """Run the warm-up in the calling thread and mark the process ready; returns get_status()."""
+    started = time.monotonic()
+    _update(status="running", started_at=time.time())
+    # The symbol lookup counts as a task of its own
+    lookups = 1 if WARMUP_SYMBOLS > 0 else 0
+    symbols, errors, failed = [], [], 0
+    if lookups:
+        try:
+            symbols = transactions_handler.get_most_held_symbols(WARMUP_SYMBOLS)
+        except Exception as e:
+            errors.append(f"symbols: {str(e).strip()}")
+            failed += 1
+
+    tasks = _tasks(symbols)
+    total = len(tasks) + lookups
+    _update(symbols=symbols, tasks=total)
+    pool = ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix="warmup")
+    futures = {pool.submit(fn): name for name, fn in tasks}
+    done, pending = wait(futures, timeout=max(WARMUP_TIMEOUT - (time.monotonic() - started), 0))
+    # Tasks still running finish in the background; queued ones are dropped
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    for future in done:
+        if future.exception() is not None:
+            errors.append(f"{futures[future]}: {str(future.exception()).strip()}")
+            failed += 1
+    if pending:
+        errors.append(f"{len(pending)} tasks not finished after {WARMUP_TIMEOUT:.0f}s")
+        failed += len(pending)
+    duration_ms = round((time.monotonic() - started) * 1000)
+    _update(status="done", duration_ms=duration_ms, failed=failed, errors=errors[:MAX_REPORTED_ERRORS])
+    _ready.set()
+    logger.info(f"Warm-up finished in {duration_ms} ms: {total} tasks, {len(symbols)} symbols, {failed} failed")
+    for error in errors[:MAX_REPORTED_ERRORS]:
+        logger.warning(f"Warm-up: {error}")
+    return get_status()
+
+
+def _run_safely():
+    try:
+        run()
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}", exc_info=True)
+        _update(status="failed", errors=[str(e)])
+        _ready.set()
+
+
+def start():
+    """Start the warm-up in a background thread (idempotent, call at app startup)."""
+    global _thread
+    if not WARMUP_ENABLED:
+        _update(status="disabled")
+        _ready.set()
+        return
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_run_safely, name="warmup", daemon=True)
+    _thread.start()
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def get_status():
+    """Readiness report for the /ready endpoints."""
+    with _lock:
+        return {"ready": _ready.is_set(), **_status, "symbols": list(_status["symbols"]), "errors": list(_status["errors"])}